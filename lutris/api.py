@@ -1,9 +1,11 @@
 """Functions to interact with the Lutris REST API"""
 
+import hashlib
 import json
 import os
 import re
 import socket
+import threading
 import time
 import urllib.error
 import urllib.parse
@@ -26,6 +28,8 @@ from lutris.util.strings import time_ago
 
 API_KEY_FILE_PATH = os.path.join(settings.CACHE_DIR, "auth-token")
 USER_INFO_FILE_PATH = os.path.join(settings.CACHE_DIR, "user.json")
+# Seconds during which cached installers are used without asking the server
+INSTALLER_CACHE_TTL = 24 * 60 * 60
 
 ApiGameDict: TypeAlias = Dict[str, Any]
 GamesPageDict: TypeAlias = Dict[str, Any]
@@ -393,8 +397,64 @@ def get_api_games(
     return results
 
 
-def get_game_installers(game_slug: str, revision: Optional[str] = None) -> List[InstallerDict]:
-    """Get installers for a single game"""
+def _get_api_cache_path(url: str) -> str:
+    return os.path.join(settings.API_CACHE_DIR, hashlib.sha1(url.encode("utf-8")).hexdigest() + ".json")
+
+
+def _write_api_cache(cache_path: str, entry: Dict[str, Any]) -> None:
+    temp_path = "%s.%s.tmp" % (cache_path, threading.get_ident())
+    try:
+        os.makedirs(settings.API_CACHE_DIR, exist_ok=True)
+        with open(temp_path, "w", encoding="utf-8") as cache_file:
+            json.dump(entry, cache_file)
+        os.replace(temp_path, cache_path)
+    except OSError as ex:
+        logger.warning("Unable to write API cache %s: %s", cache_path, ex)
+
+
+def get_cached_json(url: str, ttl: int) -> Any:
+    """Return the JSON document at 'url', through a cache kept on disk.
+
+    A cached response younger than 'ttl' seconds is used without asking the
+    server; an older one is revalidated with its ETag, and still used if the
+    server can't be reached. Raises HTTPError if there is no cached response
+    and the request fails."""
+    cache_path = _get_api_cache_path(url)
+    try:
+        with open(cache_path, "r", encoding="utf-8") as cache_file:
+            cached = json.load(cache_file)
+    except (OSError, ValueError):
+        cached = None
+    if cached and time.time() - cached["fetched"] < ttl:
+        return cached["data"]
+
+    headers = {}
+    if cached and cached.get("etag"):
+        headers["If-None-Match"] = cached["etag"]
+    request = http.Request(url, headers=headers)
+    try:
+        request.get()
+    except HTTPError as ex:
+        if not cached:
+            raise
+        if ex.code != 304:
+            logger.warning("Using cached response for %s: %s", url, ex)
+            return cached["data"]
+        cached["fetched"] = time.time()
+        _write_api_cache(cache_path, cached)
+        return cached["data"]
+
+    data = request.json
+    etag = request.info.get("ETag") if request.info else None
+    _write_api_cache(cache_path, {"fetched": time.time(), "etag": etag, "data": data})
+    return data
+
+
+def get_game_installers(
+    game_slug: str, revision: Optional[str] = None, cache_ttl: Optional[int] = None
+) -> List[InstallerDict]:
+    """Get installers for a single game; with a 'cache_ttl', the installers may
+    come from a cached response of up to that many seconds old."""
     if not game_slug:
         raise ValueError("No game_slug provided. Can't query an installer")
     if revision:
@@ -403,9 +463,12 @@ def get_game_installers(game_slug: str, revision: Optional[str] = None) -> List[
         installer_url = settings.INSTALLER_URL % game_slug
 
     logger.debug("Fetching installer %s", installer_url)
-    request = http.Request(installer_url)
-    request.get()
-    response = request.json
+    if cache_ttl is not None:
+        response = get_cached_json(installer_url, cache_ttl)
+    else:
+        request = http.Request(installer_url)
+        request.get()
+        response = request.json
     if response is None:
         raise RuntimeError("Couldn't get installer at %s" % installer_url)
 
@@ -0,0 +1,320 @@
+"""In-memory copy of the game library, used to build the views without querying the database."""
+
+import dataclasses
+import re
+import threading
+from typing import Any, Collection, Dict, Iterable, List, Optional, Set, Tuple
+
+from lutris import settings
+from lutris.database import games as games_db
+from lutris.database import sql
+from lutris.database.games import DbGameDict
+from lutris.database.saved_searches import SavedSearch
+
+# Fields of the games table that have a hash index in the catalog
+INDEXED_FIELDS = ("slug", "runner", "platform", "service", "installed")
+
+# Categories that do not make a game 'categorized'
+IGNORED_CATEGORIES = ("all", "favorite")
+
+_ASCII_FOLD = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+
+
+def _get_key(value: Any) -> Optional[str]:
+    """Return the value as SQLite would compare it to a column of the games table;
+    filters are often given as strings for integer columns or the reverse."""
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        value = int(value)
+    elif isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value)
+
+
+def _split_condition(value: Any) -> Tuple[Set[Optional[str]], bool]:
+    """Return the keys a condition matches and whether it matches NULL as well,
+    following sql._create_filter()."""
+    if hasattr(value, "__iter__") and not isinstance(value, str):
+        keys = set(_get_key(v) for v in value)
+    else:
+        keys = {_get_key(value)}
+    also_null = None in keys
+    keys.discard(None)
+    return keys, also_null
+
+
+def _matches_filter(game: DbGameDict, field: str, value: Any) -> bool:
+    keys, also_null = _split_condition(value)
+    game_key = _get_key(game.get(field))
+    if game_key is None:
+        return also_null
+    return game_key in keys
+
+
+def _matches_exclude(game: DbGameDict, field: str, value: Any) -> bool:
+    keys, also_null = _split_condition(value)
+    game_key = _get_key(game.get(field))
+    if game_key is None:
+        # NULL never passes a '!=' or 'NOT IN' test in SQL
+        return not keys and not also_null
+    return game_key not in keys
+
+
+def _get_slug_order(game: DbGameDict) -> Tuple[bool, str, int]:
+    """Sort key equivalent to 'ORDER BY slug ASC', NULLs first."""
+    slug = game.get("slug")
+    return slug is not None, slug or "", int(game["id"])
+
+
+def _fold_ascii(text: str) -> str:
+    """Case-fold like SQLite's NOCASE collation and LIKE operator, which only fold ASCII letters."""
+    return text.translate(_ASCII_FOLD)
+
+
+def _compile_like_pattern(pattern: str) -> "re.Pattern[str]":
+    parts = [".*" if c == "%" else "." if c == "_" else re.escape(c) for c in _fold_ascii(pattern)]
+    return re.compile("".join(parts), re.DOTALL)
+
+
+class GameCatalog:
+    """This class is a singleton that holds the games, their categories and the saved searches
+    in memory, with hash indexes on the fields used by the views.
+
+    It listens to the writes made to the database, from any thread; the games that were
+    written to are reloaded on next access, by id when possible. Everything else is
+    answered from memory, so switching views or searching does not touch the disk."""
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._db_path: Optional[str] = None
+        self._games: Dict[str, DbGameDict] = {}
+        self._indexes: Dict[str, Dict[Optional[str], Set[str]]] = {field: {} for field in INDEXED_FIELDS}
+        self._service_index: Dict[Tuple[Optional[str], Optional[str]], Set[str]] = {}
+        self._category_names: Dict[int, str] = {}
+        self._category_game_ids: Dict[str, Set[str]] = {}
+        self._game_category_names: Dict[str, Set[str]] = {}
+        self._saved_searches: Dict[str, SavedSearch] = {}
+        self._games_stale = True
+        self._stale_game_ids: Set[str] = set()
+        self._categories_stale = True
+        self._saved_searches_stale = True
+        sql.add_write_listener(self._on_db_write)
+
+    def _on_db_write(self, db_path: str, table: Optional[str], row_ids: Optional[List[Any]]) -> None:
+        with self._lock:
+            if db_path != self._db_path:
+                return
+            if table is None:
+                self.invalidate()
+            elif table == "games":
+                if row_ids is None:
+                    self._games_stale = True
+                else:
+                    self._stale_game_ids.update(str(row_id) for row_id in row_ids)
+            elif table in ("categories", "games_categories"):
+                self._categories_stale = True
+            elif table == "saved_searches":
+                self._saved_searches_stale = True
+
+    def invalidate(self) -> None:
+        """Discard everything; it will be loaded again on next access."""
+        with self._lock:
+            self._games_stale = True
+            self._stale_game_ids.clear()
+            self._categories_stale = True
+            self._saved_searches_stale = True
+
+    def _refresh(self) -> None:
+        """Bring the catalog up to date with the database; call with the lock held."""
+        if self._db_path != settings.DB_PATH:
+            self._db_path = settings.DB_PATH
+            self.invalidate()
+        if self._games_stale:
+            self._load_games()
+        elif self._stale_game_ids:
+            self._reload_games(self._stale_game_ids)
+        if self._categories_stale:
+            self._load_categories()
+        if self._saved_searches_stale:
+            self._load_saved_searches()
+
+    def _load_games(self) -> None:
+        self._games_stale = False
+        self._stale_game_ids.clear()
+        self._games = {}
+        self._indexes = {field: {} for field in INDEXED_FIELDS}
+        self._service_index = {}
+        for game in games_db.get_games():
+            self._add_game(game)
+
+    def _reload_games(self, game_ids: Collection[str]) -> None:
+        game_ids = list(game_ids)
+        self._stale_game_ids.clear()
+        for game_id in game_ids:
+            self._remove_game(game_id)
+        for game in games_db.get_games_by_ids(game_ids):
+            self._add_game(game)
+
+    def _add_game(self, game: DbGameDict) -> None:
+        game_id = game["id"]
+        self._games[game_id] = game
+        for field, index in self._indexes.items():
+            index.setdefault(_get_key(game.get(field)), set()).add(game_id)
+        service_key = (game.get("service"), _get_key(game.get("service_id")))
+        self._service_index.setdefault(service_key, set()).add(game_id)
+
+    def _remove_game(self, game_id: str) -> None:
+        game = self._games.pop(game_id, None)
+        if not game:
+            return
+        for field, index in self._indexes.items():
+            index.get(_get_key(game.get(field)), set()).discard(game_id)
+        service_key = (game.get("service"), _get_key(game.get("service_id")))
+        self._service_index.get(service_key, set()).discard(game_id)
+
+    def _load_categories(self) -> None:
+        self._categories_stale = False
+        self._category_names = {row["id"]: row["name"] for row in sql.db_select(settings.DB_PATH, "categories")}
+        self._category_game_ids = {name: set() for name in self._category_names.values()}
+        self._game_category_names = {}
+        for row in sql.db_select(settings.DB_PATH, "games_categories"):
+            name = self._category_names.get(row["category_id"])
+            if name is not None:
+                game_id = str(row["game_id"])
+                self._category_game_ids[name].add(game_id)
+                self._game_category_names.setdefault(game_id, set()).add(name)
+
+    def _load_saved_searches(self) -> None:
+        self._saved_searches_stale = False
+        self._saved_searches = {}
+        for row in sql.db_select(settings.DB_PATH, "saved_searches"):
+            self._saved_searches.setdefault(row["name"], SavedSearch(row["id"], row["name"], row["search"]))
+
+    def _get_candidate_ids(self, filters: sql.DBConditionsDict) -> Iterable[str]:
+        """Use the indexes to narrow down the games that can match the filters."""
+        candidates: Optional[Set[str]] = None
+        for field, value in filters.items():
+            index = self._indexes.get(field)
+            if index is None:
+                continue
+            keys, also_null = _split_condition(value)
+            if also_null:
+                keys.add(None)
+            matching_ids = set().union(*(index.get(key, ()) for key in keys))
+            candidates = matching_ids if candidates is None else candidates & matching_ids
+        return self._games if candidates is None else candidates
+
+    def get_games(
+        self, filters: sql.DBConditionsDict = None, excludes: sql.DBConditionsDict = None
+    ) -> List[DbGameDict]:
+        """Return the games matching the filters and excludes, with the same
+        semantics and order as games.get_games()."""
+        filters = filters or {}
+        excludes = excludes or {}
+        with self._lock:
+            self._refresh()
+            games = [
+                game
+                for game in (self._games[game_id] for game_id in self._get_candidate_ids(filters))
+                if all(_matches_filter(game, field, value) for field, value in filters.items())
+                and all(_matches_exclude(game, field, value) for field, value in excludes.items())
+            ]
+        games.sort(key=_get_slug_order)
+        return [dict(game) for game in games]
+
+    def get_game_count(self, filters: sql.DBConditionsDict = None) -> int:
+        filters = filters or {}
+        with self._lock:
+            self._refresh()
+            return sum(
+                1
+                for game_id in self._get_candidate_ids(filters)
+                if all(_matches_filter(self._games[game_id], field, value) for field, value in filters.items())
+            )
+
+    def get_game_by_id(self, game_id: str) -> Optional[DbGameDict]:
+        with self._lock:
+            self._refresh()
+            game = self._games.get(str(game_id))
+            return dict(game) if game else None
+
+    def get_games_by_ids(self, game_ids: Collection[str]) -> List[DbGameDict]:
+        with self._lock:
+            self._refresh()
+            games = [self._games[str(game_id)] for game_id in set(game_ids) if str(game_id) in self._games]
+        games.sort(key=lambda game: int(game["id"]))
+        return [dict(game) for game in games]
+
+    def get_game_for_service(self, service: str, appid: str) -> Optional[DbGameDict]:
+        if service == "lutris":
+            games = self.get_games(filters={"slug": appid})
+            return games[0] if games else None
+        with self._lock:
+            self._refresh()
+            game_ids = self._service_index.get((service, _get_key(appid)), ())
+            games = sorted((self._games[game_id] for game_id in game_ids), key=_get_slug_order)
+            return dict(games[0]) if games else None
+
+    def normalized_category_names(self, name: str, subname_allowed: bool = False) -> List[str]:
+        """Same as categories.normalized_category_names(), from memory."""
+        with self._lock:
+            self._refresh()
+            category_names = list(self._category_names.values())
+        folded_name = _fold_ascii(name)
+        names = [category_name for category_name in category_names if _fold_ascii(category_name) == folded_name]
+        if not names and subname_allowed:
+            pattern = _compile_like_pattern(f"%{name}%")
+            names = [category_name for category_name in category_names if pattern.fullmatch(_fold_ascii(category_name))]
+        return names or [name]
+
+    def get_game_ids_for_categories(
+        self, included_category_names: List[str] = None, excluded_category_names: List[str] = None
+    ) -> List[str]:
+        """Same as categories.get_game_ids_for_categories(), from memory."""
+        with self._lock:
+            self._refresh()
+            if included_category_names:
+                result = set().union(*(self._category_game_ids.get(name, ()) for name in included_category_names))
+                result.intersection_update(self._games)
+            else:
+                result = set(self._games)
+
+            if excluded_category_names:
+                result.difference_update(*(self._category_game_ids.get(name, ()) for name in excluded_category_names))
+
+            if included_category_names is None or ".uncategorized" in included_category_names:
+                if excluded_category_names is None or ".uncategorized" not in excluded_category_names:
+                    result |= self._get_uncategorized_game_ids()
+
+        return list(sorted(result))
+
+    def get_uncategorized_game_ids(self) -> Set[str]:
+        """Same as categories.get_uncategorized_game_ids(), from memory."""
+        with self._lock:
+            self._refresh()
+            return self._get_uncategorized_game_ids()
+
+    def _get_uncategorized_game_ids(self) -> Set[str]:
+        return set(
+            game_id
+            for game_id in self._games
+            if not self._game_category_names.get(game_id, set()).difference(IGNORED_CATEGORIES)
+        )
+
+    def get_uncategorized_games(self) -> List[DbGameDict]:
+        return self.get_games_by_ids(self.get_uncategorized_game_ids())
+
+    def get_categories_in_game(self, game_id: str) -> List[str]:
+        with self._lock:
+            self._refresh()
+            return sorted(self._game_category_names.get(str(game_id), ()))
+
+    def get_saved_search_by_name(self, name: str) -> Optional[SavedSearch]:
+        with self._lock:
+            self._refresh()
+            saved_search = self._saved_searches.get(name)
+            return dataclasses.replace(saved_search) if saved_search else None
+
+
+GAME_CATALOG = GameCatalog()
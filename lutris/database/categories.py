@@ -180,8 +180,8 @@ def redefine_category(category_id: int, new_name: str, no_signal: bool = False)
 def remove_category(category_id: int, no_signal: bool = False) -> None:
     queries = ["DELETE FROM games_categories WHERE category_id=?", "DELETE FROM categories WHERE id=?"]
 
-    for query in queries:
-        with sql.db_cursor(settings.DB_PATH) as cursor:
+    with sql.db_transaction(settings.DB_PATH) as cursor:
+        for query in queries:
             sql.cursor_execute(cursor, query, (category_id,))
 
     if not no_signal:
@@ -1,7 +1,7 @@
 import math
 import time
 from itertools import chain
-from typing import Any, Collection, Dict, List, Optional, Sequence, TypeAlias, cast
+from typing import Any, Collection, Dict, List, Optional, Sequence, Set, TypeAlias, cast
 
 from lutris import settings
 from lutris.database import sql
@@ -175,7 +175,7 @@ def add_game(**game_data: Any) -> str:
 
 def add_games_bulk(games: List[DbGameDict]) -> List[str]:
     """
-    Add a list of games to the database.
+    Add a list of games to the database, in a single transaction.
     The dicts must have an identical set of keys.
 
     Args:
@@ -183,7 +183,8 @@ def add_games_bulk(games: List[DbGameDict]) -> List[str]:
     Returns:
         list: List of inserted game ids
     """
-    return [str(sql.db_insert(settings.DB_PATH, "games", game)) for game in games]
+    with sql.db_transaction(settings.DB_PATH):
+        return [str(sql.db_insert(settings.DB_PATH, "games", game)) for game in games]
 
 
 def add_or_update(**params: Any) -> str:
@@ -248,6 +249,15 @@ def get_used_runners() -> List[str]:
     return [result[0] for result in results if result[0]]
 
 
+def get_used_directories() -> Set[str]:
+    """Return the directories of the games in the database"""
+    with sql.db_cursor(settings.DB_PATH) as cursor:
+        query = "select distinct directory from games where directory is not null and directory is not ''"
+        rows = cursor.execute(query)
+        results = rows.fetchall()
+    return {result[0] for result in results}
+
+
 def get_used_platforms() -> List[str]:
     """Return a list of platforms currently in use"""
     with sql.db_cursor(settings.DB_PATH) as cursor:
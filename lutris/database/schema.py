@@ -1,10 +1,12 @@
-from typing import Any, Dict, List, TypeAlias
+import sqlite3
+from typing import Any, Dict, List, Sequence, TypeAlias
 
 from lutris import settings
 from lutris.database import sql
 from lutris.util.log import logger
 
 DBSchema: TypeAlias = List[Dict[str, Any]]
+DBIndexes: TypeAlias = List[Dict[str, Any]]
 
 DATABASE: Dict[str, DBSchema] = {
     "games": [
@@ -62,6 +64,10 @@ DATABASE: Dict[str, DBSchema] = {
         {"name": "game_id", "type": "INTEGER", "indexed": False},
         {"name": "category_id", "type": "INTEGER", "indexed": False},
     ],
+    "game_paths": [
+        {"name": "game_id", "type": "INTEGER", "indexed": True},
+        {"name": "path", "type": "TEXT"},
+    ],
     "saved_searches": [
         {"name": "id", "type": "INTEGER", "indexed": True},
         {"name": "name", "type": "TEXT", "unique": True},
@@ -70,6 +76,31 @@ DATABASE: Dict[str, DBSchema] = {
 }
 
 
+# Secondary indexes, covering the lookups done by the lutris.database modules
+INDEXES: Dict[str, DBIndexes] = {
+    "games": [
+        {"fields": ["slug"]},
+        {"fields": ["installer_slug"]},
+        {"fields": ["configpath"]},
+        {"fields": ["runner"]},
+        {"fields": ["installed", "slug"]},
+        {"fields": ["service", "service_id"]},
+    ],
+    "service_games": [
+        {"fields": ["service", "appid"], "unique": True},
+    ],
+    "games_categories": [
+        {"fields": ["game_id", "category_id"]},
+        {"fields": ["category_id", "game_id"]},
+    ],
+}
+
+
+# Full-text indexes created by earlier versions; their triggers called a function that only
+# Lutris's own connections define, so other programs could not write to these tables.
+OBSOLETE_FULL_TEXT_INDEXES = ("games_fts", "service_games_fts")
+
+
 def get_schema(tablename: str) -> DBSchema:
     """
     Fields:
@@ -114,6 +145,100 @@ def create_table(name: str, schema: DBSchema) -> None:
         cursor.execute(query)
 
 
+def get_index_name(table: str, fields: Sequence[str]) -> str:
+    return "%s_%s_idx" % (table, "_".join(fields))
+
+
+def get_indexes(tablename: str) -> List[str]:
+    """Return the names of the indexes existing on a table"""
+    query = "pragma index_list('%s')" % tablename
+    with sql.db_cursor(settings.DB_PATH) as cursor:
+        return [row[1] for row in cursor.execute(query).fetchall()]
+
+
+def index_to_string(table: str, fields: Sequence[str], unique: bool = False) -> str:
+    """Converts a python based index definition to it's SQL statement"""
+    return "CREATE %sINDEX IF NOT EXISTS %s ON %s (%s)" % (
+        "UNIQUE " if unique else "",
+        get_index_name(table, fields),
+        table,
+        ", ".join(fields),
+    )
+
+
+def create_index(table: str, fields: Sequence[str], unique: bool = False) -> None:
+    """Creates an index on a table. If a unique index can't be created because
+    of duplicate rows, a regular index is created instead."""
+    query = index_to_string(table, fields, unique)
+    logger.debug("[Query] %s", query)
+    try:
+        with sql.db_cursor(settings.DB_PATH) as cursor:
+            cursor.execute(query)
+    except sqlite3.IntegrityError:
+        logger.warning("Duplicate rows in %s, index on %s won't be unique", table, ", ".join(fields))
+        create_index(table, fields)
+
+
+def create_indexes(table: str, indexes: DBIndexes) -> List[str]:
+    """Create the indexes of a table that do not exist yet
+
+    Returns:
+        list: The names of the created indexes
+    """
+    existing_indexes = get_indexes(table)
+    created_indexes = []
+    for index in indexes:
+        index_name = get_index_name(table, index["fields"])
+        if index_name not in existing_indexes:
+            logger.info("Creating index %s", index_name)
+            create_index(table, index["fields"], index.get("unique", False))
+            created_indexes.append(index_name)
+    return created_indexes
+
+
+def drop_obsolete_full_text_indexes() -> List[str]:
+    """Drops the full-text indexes of earlier versions, and their triggers first, since those
+    make inserts fail in other programs.
+
+    Returns:
+        list: The names of the indexes and triggers that have been dropped
+    """
+    triggers = [
+        "%s_%s" % (index_name, event)
+        for index_name in OBSOLETE_FULL_TEXT_INDEXES
+        for event in ("insert", "delete", "update")
+    ]
+    names = list(OBSOLETE_FULL_TEXT_INDEXES) + triggers
+    existing = [
+        row["name"]
+        for row in sql.db_query(
+            settings.DB_PATH,
+            "SELECT name FROM sqlite_master WHERE name IN (%s)" % ", ".join("?" * len(names)),
+            names,
+        )
+    ]
+    if not existing:
+        return []
+
+    with sql.db_transaction(settings.DB_PATH) as cursor:
+        for trigger in triggers:
+            if trigger in existing:
+                logger.info("Dropping trigger %s", trigger)
+                cursor.execute("DROP TRIGGER %s" % trigger)
+    dropped = [trigger for trigger in triggers if trigger in existing]
+    for index_name in OBSOLETE_FULL_TEXT_INDEXES:
+        if index_name in existing:
+            logger.info("Dropping full-text index %s", index_name)
+            try:
+                with sql.db_transaction(settings.DB_PATH) as cursor:
+                    cursor.execute("DROP TABLE %s" % index_name)
+                dropped.append(index_name)
+            except sqlite3.OperationalError as ex:
+                # Without FTS5, the table can't be dropped, but it is no longer written to either
+                logger.warning("Unable to drop the full-text index %s: %s", index_name, ex)
+    return dropped
+
+
 def migrate(table: str, schema: DBSchema) -> List[str]:
     """Compare a database table with the reference model and make necessary changes
 
@@ -146,3 +271,11 @@ def syncdb() -> None:
     for backwards compatibility."""
     for table_name, table_data in DATABASE.items():
         migrate(table_name, table_data)
+    created_indexes = []
+    for table_name, indexes in INDEXES.items():
+        created_indexes += create_indexes(table_name, indexes)
+    drop_obsolete_full_text_indexes()
+    if created_indexes:
+        # Refresh the statistics the query planner uses to pick indexes
+        with sql.db_cursor(settings.DB_PATH) as cursor:
+            cursor.execute("ANALYZE")
@@ -1,4 +1,5 @@
-from typing import Dict, List, Optional, Sequence, TypeAlias, Union
+from types import TracebackType
+from typing import Any, Dict, List, Optional, Sequence, Set, Type, TypeAlias, Union
 
 from lutris import settings
 from lutris.database import sql
@@ -6,6 +7,13 @@ from lutris.util.log import logger
 
 DBServiceGame: TypeAlias = Dict[str, Union[str, int]]
 
+# Syncs in progress, by service id
+_ACTIVE_SYNCS: Dict[str, "ServiceGameSync"] = {}
+
+# Fields filled by matching service games with Lutris games after they are loaded;
+# an empty value coming from the service does not replace the stored one.
+MATCHED_FIELDS = ("lutris_slug",)
+
 
 class ServiceGameCollection:
     @classmethod
@@ -41,3 +49,108 @@ class ServiceGameCollection:
         if len(results) > 1:
             logger.warning("More than one game found for %s on %s", appid, service)
         return results[0]
+
+    @classmethod
+    def save_games(cls, service_games: Sequence[DBServiceGame]) -> int:
+        """Insert or update several games at once, matching them on their service and appid.
+        Returns the number of games that were not in the database yet.
+
+        While a ServiceGameSync is running for their service, games are handed over to it."""
+        if service_games:
+            sync = _ACTIVE_SYNCS.get(str(service_games[0]["service"]))
+            if sync:
+                return sync.save_games(service_games)
+        return sql.db_upsert_many(settings.DB_PATH, "service_games", service_games, key_fields=("service", "appid"))
+
+
+def _normalize_value(value: Any) -> Optional[str]:
+    """Return a value the way SQLite stores it in a TEXT column"""
+    return None if value is None else str(value)
+
+
+class ServiceGameSync:
+    """Bring the stored games of a service in line with a freshly loaded library,
+    writing only what changed.
+
+    While the sync is active, games saved through ServiceGameCollection.save_games()
+    are compared to the stored rows by appid and content: new games are inserted,
+    modified ones are updated and identical ones are left alone. When the sync
+    completes without error, stored games that were not saved are deleted.
+
+    Usage:
+        with ServiceGameSync("gog") as sync:
+            service.load()
+        print(sync.added, sync.changed, sync.removed)
+    """
+
+    def __init__(self, service: str) -> None:
+        self.service = service
+        self.added: List[str] = []
+        self.changed: List[str] = []
+        self.removed: List[str] = []
+        self._stored_games: Dict[str, DBServiceGame] = {}
+        self._seen_appids: Set[str] = set()
+
+    def __enter__(self) -> "ServiceGameSync":
+        if self.service in _ACTIVE_SYNCS:
+            raise RuntimeError("Games of %s are already being synced" % self.service)
+        self._stored_games = {str(game["appid"]): game for game in ServiceGameCollection.get_for_service(self.service)}
+        _ACTIVE_SYNCS[self.service] = self
+        return self
+
+    def __exit__(self, _type: Type[BaseException], value: BaseException, traceback: TracebackType) -> None:
+        _ACTIVE_SYNCS.pop(self.service, None)
+        if _type is None:
+            self._remove_unseen_games()
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.added or self.changed or self.removed)
+
+    def get_changes(self, stored_game: DBServiceGame, service_game: DBServiceGame) -> DBServiceGame:
+        """Return the fields of service_game that differ from the stored game"""
+        changes = {}
+        for field, value in service_game.items():
+            if field in MATCHED_FIELDS and not value:
+                continue
+            if _normalize_value(value) != stored_game.get(field):
+                changes[field] = value
+        return changes
+
+    def save_games(self, service_games: Sequence[DBServiceGame]) -> int:
+        """Write the games that are new or have changed. Returns the number of new games."""
+        new_games = []
+        updates = []
+        for appid, service_game in {str(game["appid"]): game for game in service_games}.items():
+            if appid in self._seen_appids and appid not in self._stored_games:
+                # Saved earlier in this sync, update it like any other save would
+                self._stored_games[appid] = ServiceGameCollection.get_game(self.service, appid)
+            self._seen_appids.add(appid)
+            stored_game = self._stored_games.get(appid)
+            if not stored_game:
+                new_games.append(service_game)
+                self.added.append(appid)
+                continue
+            changes = self.get_changes(stored_game, service_game)
+            if changes:
+                updates.append((stored_game["id"], changes))
+                stored_game.update({field: _normalize_value(value) for field, value in changes.items()})
+                if appid not in self.added and appid not in self.changed:
+                    self.changed.append(appid)
+        with sql.db_transaction(settings.DB_PATH):
+            for game_id, changes in updates:
+                sql.db_update(settings.DB_PATH, "service_games", changes, {"id": game_id})
+            return sql.db_upsert_many(settings.DB_PATH, "service_games", new_games, key_fields=("service", "appid"))
+
+    def _remove_unseen_games(self) -> None:
+        unseen_games = [game for appid, game in self._stored_games.items() if appid not in self._seen_appids]
+        if unseen_games:
+            sql.db_delete(settings.DB_PATH, "service_games", "id", [game["id"] for game in unseen_games])
+        self.removed = [str(game["appid"]) for game in unseen_games]
+        logger.debug(
+            "%s games synced: %s added, %s changed, %s removed",
+            self.service,
+            len(self.added),
+            len(self.changed),
+            len(self.removed),
+        )
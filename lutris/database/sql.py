@@ -1,10 +1,21 @@
+import os
+import re
 import sqlite3
 import threading
+import weakref
 from types import TracebackType
-from typing import Any, Dict, List, Sequence, Tuple, Type, TypeAlias, cast
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Type, TypeAlias, cast
 
-# Prevent multiple access to the database (SQLite limitation)
-DB_LOCK = threading.RLock()
+# Serialize the writers of each database, by path; readers run concurrently thanks to the WAL journal
+_DB_LOCKS: Dict[Optional[str], threading.RLock] = {}
+_DB_LOCKS_LOCK = threading.Lock()
+
+# Seconds a connection waits on a locked database before giving up
+DB_TIMEOUT = 5
+# Number of prepared statements each pooled connection keeps around
+STATEMENT_CACHE_SIZE = 256
+# Lowest limit of bound parameters per statement across SQLite versions
+MAX_VARIABLES = 999
 
 DBResult: TypeAlias = Dict[str, Any]
 DBResults: TypeAlias = List[DBResult]
@@ -13,33 +24,237 @@ DBConditionsDict: TypeAlias = Dict[str, Any]
 DBUpdateDict: TypeAlias = Dict[str, Any]
 DBParams: TypeAlias = Sequence[Any]
 
+# Called with the database path, the written table and the ids of the written rows, if known.
+# The table is None when anything in the database may have changed.
+DBWriteListener: TypeAlias = Callable[[str, Optional[str], Optional[List[Any]]], None]
+
+_WRITE_LISTENERS: List[DBWriteListener] = []
+_WRITTEN_TABLE_REGEX = re.compile(r"^\s*(?:insert(?:\s+or\s+\w+)?\s+into|update|delete\s+from)\s+(\w+)", re.IGNORECASE)
+
+
+class PooledConnection:
+    """A long-lived connection owned by a single thread.
+
+    The file identity is kept so that the connection can be recycled when the
+    database file gets replaced (deleted and recreated) under our feet.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(
+            db_path,
+            timeout=DB_TIMEOUT,
+            isolation_level=None,  # Autocommit, transactions are explicit (see db_transaction)
+            check_same_thread=False,  # Only used by its thread, but closable from any thread
+            cached_statements=STATEMENT_CACHE_SIZE,
+        )
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.file_id = _get_file_id(db_path)
+        self.transaction_depth = 0
+        self.pending_writes: List[Tuple[Optional[str], Optional[List[Any]]]] = []
+        self.closed = False
+
+    def is_stale(self) -> bool:
+        return self.file_id != _get_file_id(self.db_path)
+
+    def close(self) -> None:
+        self.closed = True
+        try:
+            self.conn.close()
+        except sqlite3.Error:
+            pass
+
+
+_THREAD_CONNECTIONS = threading.local()
+# Weak references, so connections of finished threads are released along with them
+_POOL: Dict[str, "weakref.WeakSet[PooledConnection]"] = {}
+_POOL_LOCK = threading.Lock()
+
+
+def _get_file_id(db_path: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(db_path)
+    except OSError:
+        return None
+    return stat.st_dev, stat.st_ino
+
+
+def _get_thread_connections() -> Dict[str, PooledConnection]:
+    connections = getattr(_THREAD_CONNECTIONS, "connections", None)
+    if connections is None:
+        connections = {}
+        _THREAD_CONNECTIONS.connections = connections
+    return connections
+
+
+def get_connection(db_path: str) -> PooledConnection:
+    """Return the connection to `db_path` owned by the current thread,
+    opening it if needed."""
+    connections = _get_thread_connections()
+    pooled = connections.get(db_path)
+    if pooled and pooled.closed:
+        # Closed from another thread through close_connections()
+        pooled = None
+    elif pooled and pooled.transaction_depth == 0 and pooled.is_stale():
+        # The database file was removed or replaced, every connection
+        # to the old file has to go before a new one gets created.
+        close_connections(db_path)
+        pooled = None
+    if not pooled:
+        pooled = PooledConnection(db_path)
+        connections[db_path] = pooled
+        with _POOL_LOCK:
+            _POOL.setdefault(db_path, weakref.WeakSet()).add(pooled)
+    return pooled
+
+
+def close_connections(db_path: str = None) -> None:
+    """Close pooled connections to `db_path`, or all of them if no path is given.
+    Connections get reopened transparently on next use."""
+    with _POOL_LOCK:
+        paths = [db_path] if db_path else list(_POOL)
+        closing = [pooled for path in paths for pooled in _POOL.pop(path, ())]
+    for pooled in closing:
+        pooled.close()
+    connections = _get_thread_connections()
+    for path in paths:
+        connections.pop(path, None)
+        notify_write(path, None, None)
+
 
 class db_cursor(object):
+    """Provide a cursor on the pooled connection of the current thread.
+
+    Statements are committed as they run, unless the cursor is used inside
+    a db_transaction() block, in which case the transaction decides."""
+
     def __init__(self, db_path: str):
         self.db_path = db_path
-        self.db_conn: sqlite3.Connection = None
+        self.cursor: sqlite3.Cursor = None
 
     def __enter__(self) -> sqlite3.Cursor:
-        self.db_conn = sqlite3.connect(self.db_path)
-        cursor = self.db_conn.cursor()
-        return cursor
+        self.cursor = get_connection(self.db_path).conn.cursor()
+        return self.cursor
 
     def __exit__(self, _type: Type[BaseException], value: BaseException, traceback: TracebackType) -> None:
-        self.db_conn.commit()
-        self.db_conn.close()
+        self.cursor.close()
 
 
-def cursor_execute(cursor: sqlite3.Cursor, query: str, params: DBParams = None) -> sqlite3.Cursor:
-    """Execute a SQL query, run it in a lock block"""
-    params = params or ()
-    lock = DB_LOCK.acquire(timeout=5)  # pylint: disable=consider-using-with
+class db_transaction(object):
+    """Run every statement of the block, on this thread, in a single transaction.
+
+    The transaction is committed when the block exits normally and rolled back
+    if it raises. Nested blocks join the outermost transaction."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.pooled: PooledConnection = None
+        self.cursor: sqlite3.Cursor = None
+        self.lock: Optional[threading.RLock] = None
+
+    def __enter__(self) -> sqlite3.Cursor:
+        self.pooled = get_connection(self.db_path)
+        if self.pooled.transaction_depth == 0:
+            # Writers of other threads wait on the lock of the database, as they would for a
+            # single write, rather than on the SQLite lock held by the transaction, which times out.
+            self.lock = get_db_lock(self.db_path)
+            if not self.lock.acquire(timeout=DB_TIMEOUT):  # pylint: disable=consider-using-with
+                raise RuntimeError("Database is busy. Not starting a transaction on %s" % self.db_path)
+            try:
+                self.pooled.conn.execute("BEGIN IMMEDIATE")
+            except BaseException:
+                self.lock.release()
+                raise
+        self.pooled.transaction_depth += 1
+        self.cursor = self.pooled.conn.cursor()
+        return self.cursor
+
+    def __exit__(self, _type: Type[BaseException], value: BaseException, traceback: TracebackType) -> None:
+        self.cursor.close()
+        self.pooled.transaction_depth -= 1
+        if self.pooled.transaction_depth:
+            return
+        pending_writes = self.pooled.pending_writes
+        self.pooled.pending_writes = []
+        try:
+            if _type is None:
+                self.pooled.conn.commit()
+            else:
+                self.pooled.conn.rollback()
+        finally:
+            self.lock.release()
+        if _type is None:
+            for table, row_ids in pending_writes:
+                notify_write(self.db_path, table, row_ids)
+
+
+def is_read_only(query: str) -> bool:
+    """Return whether a query only reads from the database"""
+    return query.lstrip()[:6].lower() in ("select", "pragma")
+
+
+def add_write_listener(listener: DBWriteListener) -> None:
+    """Register a function called after each write to the database, from the writing thread."""
+    _WRITE_LISTENERS.append(listener)
+
+
+def remove_write_listener(listener: DBWriteListener) -> None:
+    _WRITE_LISTENERS.remove(listener)
+
+
+def notify_write(db_path: str, table: Optional[str], row_ids: Optional[List[Any]]) -> None:
+    """Tell the write listeners about a write; writes made inside a transaction
+    are only reported once it is committed."""
+    pooled = _get_thread_connections().get(db_path)
+    if pooled and pooled.transaction_depth:
+        pooled.pending_writes.append((table, row_ids))
+        return
+    for listener in _WRITE_LISTENERS:
+        listener(db_path, table, row_ids)
+
+
+def _get_cursor_db_path(cursor: sqlite3.Cursor) -> Optional[str]:
+    for db_path, pooled in _get_thread_connections().items():
+        if pooled.conn is cursor.connection:
+            return db_path
+    return None
+
+
+def get_db_lock(db_path: Optional[str]) -> threading.RLock:
+    """Return the lock serializing the writers of a database. Each database has its own,
+    so a long transaction on one does not hold up the writers of the others."""
+    with _DB_LOCKS_LOCK:
+        lock = _DB_LOCKS.get(db_path)
+        if lock is None:
+            lock = _DB_LOCKS[db_path] = threading.RLock()
+        return lock
+
+
+def _execute_write(cursor: sqlite3.Cursor, query: str, params: DBParams) -> sqlite3.Cursor:
+    db_lock = get_db_lock(_get_cursor_db_path(cursor))
+    lock = db_lock.acquire(timeout=DB_TIMEOUT)  # pylint: disable=consider-using-with
     if not lock:
         raise RuntimeError(f"Database is busy. Not executing {query}")
 
     try:
         return cursor.execute(query, params)
     finally:
-        DB_LOCK.release()
+        db_lock.release()
+
+
+def cursor_execute(cursor: sqlite3.Cursor, query: str, params: DBParams = None) -> sqlite3.Cursor:
+    """Execute a SQL query, run writes in a lock block"""
+    params = params or ()
+    if is_read_only(query):
+        return cursor.execute(query, params)
+
+    result = _execute_write(cursor, query, params)
+    db_path = _get_cursor_db_path(cursor)
+    if db_path:
+        match = _WRITTEN_TABLE_REGEX.match(query)
+        notify_write(db_path, match.group(1).lower() if match else None, None)
+    return result
 
 
 def db_insert(db_path: str, table: str, fields: DBUpdateDict) -> int:
@@ -47,12 +262,13 @@ def db_insert(db_path: str, table: str, fields: DBUpdateDict) -> int:
     placeholders = ("?, " * len(fields))[:-2]
     field_values = tuple(fields.values())
     with db_cursor(db_path) as cursor:
-        cursor_execute(
+        _execute_write(
             cursor,
             "insert into {0}({1}) values ({2})".format(table, columns, placeholders),
             field_values,
         )
         inserted_id = cursor.lastrowid
+    notify_write(db_path, table, [inserted_id])
     return cast(int, inserted_id)
 
 
@@ -68,13 +284,82 @@ def db_update(db_path: str, table: str, updated_fields: DBUpdateDict, conditions
 
     with db_cursor(db_path) as cursor:
         query = "UPDATE {0} SET {1} WHERE {2}".format(table, columns, condition_field)
-        result = cursor_execute(cursor, query, field_values + condition_value)
+        result = _execute_write(cursor, query, field_values + condition_value)
+    notify_write(db_path, table, list(condition_value) if list(conditions) == ["id"] else None)
     return result
 
 
+def _get_bulk_columns(rows: Sequence[DBUpdateDict]) -> List[str]:
+    columns = list(rows[0].keys())
+    for row in rows:
+        if len(row) != len(columns) or any(column not in row for column in columns):
+            raise ValueError("All rows of a bulk operation must have the same fields")
+    return columns
+
+
+def db_insert_many(db_path: str, table: str, rows: Sequence[DBUpdateDict]) -> int:
+    """Insert several rows in a single transaction. All rows must have the same fields.
+
+    Rows are sent in multi-row INSERT statements, as many as the SQLite limit
+    on bound parameters allows.
+
+    Returns:
+        int: The number of inserted rows
+    """
+    if not rows:
+        return 0
+    columns = _get_bulk_columns(rows)
+    row_placeholders = "(" + ", ".join("?" * len(columns)) + ")"
+    chunk_size = max(1, MAX_VARIABLES // len(columns))
+    with db_transaction(db_path) as cursor:
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start : start + chunk_size]
+            query = "INSERT INTO {0}({1}) VALUES {2}".format(
+                table, ", ".join(columns), ", ".join([row_placeholders] * len(chunk))
+            )
+            _execute_write(cursor, query, [row[column] for row in chunk for column in columns])
+    notify_write(db_path, table, None)
+    return len(rows)
+
+
+def db_upsert_many(db_path: str, table: str, rows: Sequence[DBUpdateDict], key_fields: Sequence[str]) -> int:
+    """Update rows matching on `key_fields`, insert the ones that don't exist yet.
+    All of this happens in a single transaction. When several rows share the same
+    key, the last one wins.
+
+    Returns:
+        int: The number of inserted rows
+    """
+    if not rows:
+        return 0
+    columns = _get_bulk_columns(rows)
+    unique_rows = list({tuple(row[field] for field in key_fields): row for row in rows}.values())
+    query = "UPDATE {0} SET {1} WHERE {2}".format(
+        table,
+        ", ".join("%s=?" % column for column in columns),
+        " AND ".join("%s=?" % field for field in key_fields),
+    )
+    missing_rows = []
+    with db_transaction(db_path) as cursor:
+        for row in unique_rows:
+            params = [row[column] for column in columns] + [row[field] for field in key_fields]
+            if not _execute_write(cursor, query, params).rowcount:
+                missing_rows.append(row)
+        inserted_count = db_insert_many(db_path, table, missing_rows)
+    notify_write(db_path, table, None)
+    return inserted_count
+
+
 def db_delete(db_path: str, table: str, field: str, value: Any) -> None:
-    with db_cursor(db_path) as cursor:
-        cursor_execute(cursor, "delete from {0} where {1}=?".format(table, field), (value,))
+    """Delete rows where `field` matches `value`, or any of the values if a
+    list, tuple or set is given."""
+    values = list(value) if isinstance(value, (list, tuple, set)) else [value]
+    with db_transaction(db_path) as cursor:
+        for start in range(0, len(values), MAX_VARIABLES):
+            chunk = values[start : start + MAX_VARIABLES]
+            placeholders = ", ".join("?" * len(chunk))
+            _execute_write(cursor, "delete from {0} where {1} in ({2})".format(table, field, placeholders), chunk)
+    notify_write(db_path, table, values if field == "id" else None)
 
 
 def db_select(db_path: str, table: str, fields: Sequence[str] = None, condition: DBCondition = None) -> DBResults:
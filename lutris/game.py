@@ -37,6 +37,7 @@ from lutris.util.display import (
 from lutris.util.graphics.xrandr import turn_off_except
 from lutris.util.linux import LINUX_SYSTEM
 from lutris.util.log import LOG_BUFFERS, logger
+from lutris.util.process_tracker import GameProcessTracker
 from lutris.util.steam.shortcut import remove_shortcut as remove_steam_shortcut
 from lutris.util.system import fix_path_case
 from lutris.util.timer import Timer
@@ -66,6 +67,30 @@ def _on_categories_updated(*_args: Any) -> None:
 categories_db.CATEGORIES_UPDATED.register(_on_categories_updated)
 
 
+def get_path_from_game_config(game_config: Dict[str, Any], runner_name: str, directory: str) -> str:
+    """Return the path of the main entry point in the 'game' section of a game config,
+    or an empty string if there is none."""
+    # Skip MAME roms referenced by their ID
+    if runner_name == "mame":
+        if "main_file" in game_config and "." not in game_config["main_file"]:
+            return ""
+
+    path = get_entry_point_path(game_config)
+    if not path:
+        return ""
+
+    path = os.path.expanduser(path)
+    if not path.startswith("/"):
+        path = os.path.join(directory or "", path)
+
+    # The Wine runner fixes case mismatches automatically,
+    # sort of like Windows, so we need to do the same.
+    if runner_name == "wine":
+        path = fix_path_case(path)
+
+    return path
+
+
 class Game:
     """This class takes cares of loading the configuration for a game
     and running it.
@@ -126,6 +151,7 @@ class Game:
         self.game_thread = None
         self.antimicro_thread = None
         self.prelaunch_pids = None
+        self.process_tracker = None
         self.prelaunch_executor = None
         self.heartbeat = None
         self.killswitch = None
@@ -676,27 +702,9 @@ class Game:
         if not self.config:
             logger.warning("%s has no configuration", self)
             return ""
-        game_config = self.config.game_config
-
-        # Skip MAME roms referenced by their ID
-        if self.runner_name == "mame":
-            if "main_file" in game_config and "." not in game_config["main_file"]:
-                return ""
-
-        path = get_entry_point_path(game_config)
+        path = get_path_from_game_config(self.config.game_config, self.runner_name, self.directory)
         if not path:
             logger.warning("No path found in %s", self.config)
-            return ""
-
-        path = os.path.expanduser(path)
-        if not path.startswith("/"):
-            path = os.path.join(self.directory, path)
-
-        # The Wine runner fixes case mismatches automatically,
-        # sort of like Windows, so we need to do the same.
-        if self.runner_name == "wine":
-            path = fix_path_case(path)
-
         return path
 
     def get_store_name(self) -> str:
@@ -843,6 +851,7 @@ class Game:
             log_buffer=self.log_buffer,
             include_processes=self.game_runtime_config["include_processes"],
             exclude_processes=self.game_runtime_config["exclude_processes"],
+            use_scope=True,
         )
         stop_func = getattr(self.runner, "stop", None)
         if stop_func and self.game_thread:
@@ -851,6 +860,12 @@ class Game:
         if self.game_thread:
             self.game_uuid = self.game_thread.env["LUTRIS_GAME_UUID"]
             self.game_thread.start()
+            game_process = self.game_thread.game_process
+            self.process_tracker = GameProcessTracker(
+                self.game_uuid,
+                self.prelaunch_pids,
+                main_pid=game_process.pid if game_process and self.game_thread.use_scope else None,
+            )
 
         self.timer.start()
         self.state = self.STATE_RUNNING
@@ -922,9 +937,14 @@ class Game:
             logger.error("No LUTRIS_GAME_UUID recorded. The game's PIDs cannot be computed.")
             return set()
 
-        new_pids = self.get_new_pids()
         game_folder = self.resolve_game_path()
-        return self.runner.filter_game_pids(new_pids, self.game_uuid, game_folder)
+
+        def filter_pids(pids: Set[int]) -> Set[int]:
+            return self.runner.filter_game_pids(pids, self.game_uuid, game_folder)
+
+        if self.process_tracker and self.process_tracker.game_uuid == self.game_uuid:
+            return self.process_tracker.get_game_pids(filter_pids)
+        return filter_pids(self.get_new_pids())
 
     def get_new_pids(self) -> Set[int]:
         """Return list of PIDs started since the game was launched"""
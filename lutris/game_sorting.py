@@ -0,0 +1,211 @@
+"""Sorting of games for the views, with the sort keys of each game cached"""
+
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from lutris import settings
+from lutris.database import sql
+from lutris.util.strings import get_natural_sort_key
+
+SORT_DEFAULTS = {
+    "name": "",
+    "year": 0,
+    "lastplayed": 0.0,
+    "installed_at": 0.0,
+    "playtime": 0.0,
+}
+
+# Pseudo sort mode under which the release year a service gives for a game is cached
+SERVICE_YEAR = "service_year"
+
+SortKeyCacheKey = Tuple[str, ...]
+
+_MISSING = object()
+
+
+def get_sort_cache_key(db_game: Dict[str, Any]) -> Optional[SortKeyCacheKey]:
+    """Return the key identifying the database row a game dictionary comes from,
+    or None if it does not come from one."""
+    if "appid" in db_game:
+        return "service_games", str(db_game.get("service")), str(db_game["appid"])
+    if db_game.get("id") is not None:
+        return "games", str(db_game["id"])
+    return None
+
+
+def convert_sort_value(value: Any, view_sorting: str) -> Any:
+    """Converts 'value' to the type required for the sort that is in use. Returns None if this
+    can't be managed."""
+    try:
+        if not value:
+            return None
+        if view_sorting == "name":
+            return str(value)
+        if view_sorting == "year":
+            # Years can take many forms! We'll try to convert as best we can.
+            if isinstance(value, datetime):
+                return int(value.year)
+            else:
+                try:
+                    return int(value)
+                except ValueError:
+                    as_date = datetime.strptime(str(value), "%Y-%m-%d")
+                    return int(as_date.year)
+        else:
+            return float(value)
+    except ValueError:
+        return None  # unable to parse value?
+
+
+class SortKeyCache:
+    """This class is a singleton that caches the sort value of each game, for each
+    sort mode; these are the values that are costly to compute, like natural sort keys
+    and parsed dates. Entries are discarded when the database rows they come from are
+    written to."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._db_path: Optional[str] = None
+        self._values: Dict[str, Dict[SortKeyCacheKey, Any]] = {}
+        # Incremented on each invalidation, so values computed meanwhile are not stored
+        self._generation = 0
+        sql.add_write_listener(self._on_db_write)
+
+    def _on_db_write(self, db_path: str, table: Optional[str], row_ids: Optional[List[Any]]) -> None:
+        with self._lock:
+            if db_path != self._db_path:
+                return
+            if table is None:
+                self._clear()
+            elif table == "games" and row_ids is not None:
+                self._generation += 1
+                for values in self._values.values():
+                    for row_id in row_ids:
+                        values.pop(("games", str(row_id)), None)
+            elif table in ("games", "service_games"):
+                self._generation += 1
+                for sort_mode, values in self._values.items():
+                    self._values[sort_mode] = {key: value for key, value in values.items() if key[0] != table}
+
+    def _clear(self) -> None:
+        self._generation += 1
+        self._values = {}
+
+    def invalidate(self) -> None:
+        """Discard every cached sort value."""
+        with self._lock:
+            self._clear()
+
+    def _get_values(
+        self, db_games: List[Dict[str, Any]], sort_mode: str, compute: Callable[[Dict[str, Any]], Any]
+    ) -> List[Any]:
+        """Return the value of each game for a sort mode, calling compute() for
+        those not in the cache yet."""
+        cache_keys = [get_sort_cache_key(db_game) for db_game in db_games]
+        with self._lock:
+            if self._db_path != settings.DB_PATH:
+                self._db_path = settings.DB_PATH
+                self._clear()
+            cached_values = self._values.get(sort_mode, {})
+            results = [cached_values.get(cache_key, _MISSING) for cache_key in cache_keys]
+            generation = self._generation
+
+        new_values = {}
+        for index, value in enumerate(results):
+            if value is _MISSING:
+                value = compute(db_games[index])
+                results[index] = value
+                if cache_keys[index] is not None:
+                    new_values[cache_keys[index]] = value
+
+        if new_values:
+            with self._lock:
+                if generation == self._generation:
+                    self._values.setdefault(sort_mode, {}).update(new_values)
+        return results
+
+    def get_sort_values(self, db_games: List[Dict[str, Any]], view_sorting: str) -> List[Any]:
+        """Return the value of each game for a sort mode, or None if it has none; for
+        'name', this is the natural sort key of its sortname or name."""
+
+        def compute(db_game):
+            if view_sorting == "name":
+                value = convert_sort_value(db_game.get("sortname") or db_game.get("name"), view_sorting)
+                return get_natural_sort_key(value or "")
+            return convert_sort_value(db_game.get(view_sorting), view_sorting)
+
+        return self._get_values(db_games, view_sorting, compute)
+
+    def get_service_years(self, service, db_games: List[Dict[str, Any]]) -> List[Optional[int]]:
+        """Return the release year the service gives for each game, or None."""
+
+        def compute(db_game):
+            return convert_sort_value(service.get_game_release_date(db_game), "year")
+
+        return self._get_values(db_games, SERVICE_YEAR, compute)
+
+
+SORT_KEY_CACHE = SortKeyCache()
+
+
+def sort_games(
+    items: Iterable[Any],
+    view_sorting: str,
+    reverse_order: bool = False,
+    installed_first: bool = True,
+    service=None,
+    resolver: Callable[[Any], Optional[Dict[str, Any]]] = lambda i: i,
+) -> List[Any]:
+    """Sorts a list of items; the items can be anything, but you can provide a resolver
+    that returns a database game dictionary for each one; this dictionary carries the
+    data we sort on (though any field may be missing).
+
+    This sort always sorts installed games ahead of uninstalled ones, even when
+    the sort is set to descending, unless 'installed_first' is False.
+
+    This treats 'name' sorting specially, applying a natural sort so that
+    'Mega slap battler 20' comes after 'Mega slap battler 3'."""
+
+    # Users may have obsolete view_sorting settings, so
+    # we must tolerate them. We treat them all as blank.
+    sort_default = SORT_DEFAULTS.get(view_sorting, "")
+    is_year_sort = view_sorting == "year"
+    flip_installation_flag = reverse_order != (view_sorting == "name")
+
+    items = list(items)
+    db_games = [resolver(item) for item in items]
+    resolved_games = [db_game for db_game in db_games if db_game]
+    resolved_values = iter(SORT_KEY_CACHE.get_sort_values(resolved_games, view_sorting))
+    values = [next(resolved_values) if db_game else None for db_game in db_games]
+
+    if is_year_sort and service:
+        # The default to use when the value is missing; we may be able to extract this from the item.
+        missing = [index for index, value in enumerate(values) if not value]
+        service_years = SORT_KEY_CACHE.get_service_years(service, [items[index] for index in missing])
+        for index, service_year in zip(missing, service_years):
+            values[index] = service_year
+
+    sort_keys = []
+    for db_game, value in zip(db_games, values):
+        value = value or sort_default
+
+        if is_year_sort:
+            # Expands the value to sort by, so games without a year come last
+            contains_year = bool(value)
+            if reverse_order:
+                contains_year = not contains_year
+            value = contains_year, value
+
+        if installed_first:
+            # We want installed games to always be first, even in
+            # a descending sort.
+            installation_flag = bool(db_game and db_game.get("installed"))
+            if flip_installation_flag:
+                installation_flag = not installation_flag
+            value = installation_flag, value
+        sort_keys.append(value)
+
+    reverse = reverse_order if view_sorting == "name" else not reverse_order
+    order = sorted(range(len(items)), key=sort_keys.__getitem__, reverse=reverse)
+    return [items[index] for index in order]
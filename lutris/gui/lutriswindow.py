@@ -4,7 +4,6 @@
 # pylint: disable=no-member
 import os
 from collections import namedtuple
-from datetime import datetime
 from gettext import gettext as _
 from gettext import ngettext
 from typing import Callable, Dict, Iterable, List, Optional, Set, cast
@@ -19,14 +18,14 @@ from lutris.api import (
     get_runtime_versions,
     read_api_key,
 )
-from lutris.database import categories as categories_db
-from lutris.database import games as games_db
 from lutris.database import saved_searches as saved_searches_db
+from lutris.database.catalog import GAME_CATALOG
 from lutris.database.categories import CATEGORIES_UPDATED
 from lutris.database.saved_searches import SAVED_SEARCHES_UPDATED
 from lutris.database.services import ServiceGameCollection
 from lutris.exceptions import EsyncLimitError, InvalidSearchTermError
 from lutris.game import GAME_INSTALLED, GAME_STOPPED, GAME_UNHANDLED_ERROR, GAME_UPDATED, Game
+from lutris.game_sorting import sort_games
 from lutris.gui import dialogs
 from lutris.gui.addgameswindow import AddGamesWindow
 from lutris.gui.config.edit_saved_search import SearchFiltersBox
@@ -54,9 +53,9 @@ from lutris.gui.widgets.gi_composites import GtkTemplate
 from lutris.gui.widgets.sidebar import LutrisSidebar, SidebarRow
 from lutris.gui.widgets.utils import load_icon_theme, open_uri, pick_stock_icon
 from lutris.runtime import ComponentUpdater, RuntimeUpdater
-from lutris.search import GameSearch
+from lutris.search import GameSearch, filter_db_games
 from lutris.search_predicate import NotPredicate
-from lutris.services.base import SERVICE_GAMES_LOADED, SERVICE_LOGIN, SERVICE_LOGOUT
+from lutris.services.base import SERVICE_GAMES_UPDATED, SERVICE_LOGIN, SERVICE_LOGOUT
 from lutris.services.lutris import LutrisService, sync_media
 from lutris.style_manager import THEME_CHANGED
 from lutris.util import datapath
@@ -66,7 +65,6 @@ from lutris.util.library_sync import LOCAL_LIBRARY_UPDATED, LibrarySyncer
 from lutris.util.linux import LINUX_SYSTEM
 from lutris.util.log import logger
 from lutris.util.path_cache import MISSING_GAMES, add_to_path_cache
-from lutris.util.strings import get_natural_sort_key
 from lutris.util.system import update_desktop_icons
 from lutris.util.wine.wine import clear_wine_version_cache
 
@@ -191,7 +189,7 @@ class LutrisWindow(Gtk.ApplicationWindow, DialogLaunchUIDelegate, DialogInstallU
         BUSY_STOPPED.register(self.on_busy_stopped)
         SERVICE_LOGIN.register(self.on_service_login)
         SERVICE_LOGOUT.register(self.on_service_logout)
-        SERVICE_GAMES_LOADED.register(self.on_service_games_loaded)
+        SERVICE_GAMES_UPDATED.register(self.on_service_games_updated)
         CATEGORIES_UPDATED.register(self.on_categories_updated)
         SAVED_SEARCHES_UPDATED.register(self.on_categories_updated)
         GAME_UPDATED.register(self.on_game_updated)
@@ -352,7 +350,7 @@ class LutrisWindow(Gtk.ApplicationWindow, DialogLaunchUIDelegate, DialogInstallU
         """True if there are any hidden games to show."""
         return bool(
             self.sidebar.selected_category == ("category", ".hidden")
-            or categories_db.get_game_ids_for_categories([".hidden"])
+            or GAME_CATALOG.get_game_ids_for_categories([".hidden"])
         )
 
     def on_show_hidden_clicked(self, action, value):
@@ -452,117 +450,28 @@ class LutrisWindow(Gtk.ApplicationWindow, DialogLaunchUIDelegate, DialogInstallU
     def apply_view_sort(self, items, resolver=lambda i: i):
         """This sorts a list of items according to the view settings of this window;
         the items can be anything, but you can provide a lambda that provides a
-        database game dictionary for each one; this dictionary carries the
-        data we sort on (though any field may be missing).
-
-        This sort always sorts installed games ahead of uninstalled ones, even when
-        the sort is set to descending.
-
-        This treats 'name' sorting specially, applying a natural sort so that
-        'Mega slap battler 20' comes after 'Mega slap battler 3'."""
-        sort_defaults = {
-            "name": "",
-            "year": 0,
-            "lastplayed": 0.0,
-            "installed_at": 0.0,
-            "playtime": 0.0,
-        }
-
-        service = self.service
-        view_sorting = self.view_sorting
-        view_reverse_order = self.view_reverse_order
-        view_sorting_installed_first = self.view_sorting_installed_first
-
-        def get_sort_default(item):
-            """Returns the default value to use when the value is missing; we may be able
-            to extract this from the item.."""
-            if view_sorting == "year" and service:
-                service_year = service.get_game_release_date(item)
-                service_year = convert_value(service_year)
-                if service_year:
-                    return service_year
-
-            # Users may have obsolete view_sorting settings, so
-            # we must tolerate them. We treat them all as blank.
-            return sort_defaults.get(view_sorting, "")
-
-        def convert_value(value):
-            """Converts 'value' to the type required for the sort that is in use. Returns None if this
-            can't be managed."""
-            try:
-                if not value:
-                    return None
-                if view_sorting == "name":
-                    return str(value)
-                if view_sorting == "year":
-                    # Years can take many forms! We'll try to convert as best we can.
-                    if isinstance(value, datetime):
-                        return int(value.year)
-                    else:
-                        try:
-                            return int(value)
-                        except ValueError:
-                            as_date = datetime.strptime(str(value), "%Y-%m-%d")
-                            return int(as_date.year)
-                else:
-                    return float(value)
-            except ValueError:
-                return None  # unable to parse value?
-
-        def extend_value(value):
-            """Expands the value to sort by to a more complex form, for smarter sorting."""
-            if view_sorting == "name":
-                return get_natural_sort_key(value)
-            if view_sorting == "year":
-                contains_year = bool(value)
-                if view_reverse_order:
-                    contains_year = not contains_year
-                return contains_year, value
-            return value
-
-        def get_sort_value(item):
-            db_game = resolver(item)
-            if not db_game:
-                installation_flag = False
-                value = None
-            else:
-                installation_flag = bool(db_game.get("installed"))
-
-                # When sorting by name, check for a valid sortname first, then fall back
-                # on name if valid sortname is not available.
-                if view_sorting == "name":
-                    value = db_game.get("sortname") or db_game.get("name")
-                else:
-                    value = db_game.get(view_sorting)
-
-            value = convert_value(value) or get_sort_default(item)
-            value = extend_value(value)
-
-            if view_sorting_installed_first:
-                # We want installed games to always be first, even in
-                # a descending sort.
-                if view_reverse_order:
-                    installation_flag = not installation_flag
-                if view_sorting == "name":
-                    installation_flag = not installation_flag
-                return installation_flag, value
-            return value
-
-        reverse = view_reverse_order if view_sorting == "name" else not view_reverse_order
-        return sorted(items, key=get_sort_value, reverse=reverse)
+        database game dictionary for each one. See game_sorting.sort_games()."""
+        return sort_games(
+            items,
+            self.view_sorting,
+            reverse_order=self.view_reverse_order,
+            installed_first=self.view_sorting_installed_first,
+            service=self.service,
+            resolver=resolver,
+        )
 
     def get_running_games(self):
         """Return a list of currently running games"""
-        games = games_db.get_games_by_ids(self.application.get_running_game_ids())
+        games = GAME_CATALOG.get_games_by_ids(self.application.get_running_game_ids())
         return self.apply_view_sort(self.filter_games(games))
 
     def get_uncategorized_games(self):
         """Return a list of games not in any category"""
-        games = self.filter_games(categories_db.get_uncategorized_games())
+        games = self.filter_games(GAME_CATALOG.get_uncategorized_games())
         return self.apply_view_sort(games)
 
     def get_missing_games(self):
-        games = games_db.get_games_by_ids(MISSING_GAMES.missing_game_ids)
+        games = GAME_CATALOG.get_games_by_ids(MISSING_GAMES.missing_game_ids)
         return self.apply_view_sort(self.filter_games(games))
 
     def update_missing_games_sidebar_row(self) -> None:
@@ -579,7 +488,7 @@ class LutrisWindow(Gtk.ApplicationWindow, DialogLaunchUIDelegate, DialogInstallU
 
     def get_recent_games(self):
         """Return a list of recently played games"""
-        games = games_db.get_games(filters={"installed": "1"})
+        games = GAME_CATALOG.get_games(filters={"installed": "1"})
         games = self.filter_games(games)
         return sorted(games, key=lambda game: max(game["installed_at"] or 0, game["lastplayed"] or 0), reverse=True)
 
@@ -608,18 +517,7 @@ class LutrisWindow(Gtk.ApplicationWindow, DialogLaunchUIDelegate, DialogInstallU
 
             searches = [search]
 
-        to_apply = [search for search in searches if not search.is_empty]
-
-        if not to_apply:
-            return games
-
-        def matches(game):
-            for search in to_apply:
-                if not search.matches(game):
-                    return False
-            return True
-
-        return [game for game in games if matches(game)]
+        return filter_db_games(games, searches)
 
     def set_service(self, service_name):
         if self.service and self.service.id == service_name:
@@ -646,20 +544,23 @@ class LutrisWindow(Gtk.ApplicationWindow, DialogLaunchUIDelegate, DialogInstallU
     def get_service_games(self, service_id):
         """Return games for the service indicated."""
         service_games = ServiceGameCollection.get_for_service(service_id)
+        return self.get_service_game_rows(service_games, sort=True)
+
+    def get_service_game_rows(self, service_games, sort=False):
+        """Return the rows the current service view shows for the service games given: they get
+        their release year and the information of their Lutris game, and the games the filters
+        of the view exclude are left out."""
         for game in service_games:
             game["year"] = self.service.get_game_release_year(game)
 
-        if service_id == "lutris":
-            lutris_games = {g["slug"]: g for g in games_db.get_games()}
+        if self.service.id == "lutris":
+            lutris_games = {g["slug"]: g for g in GAME_CATALOG.get_games()}
         else:
-            lutris_games = {g["service_id"]: g for g in games_db.get_games(filters={"service": self.service.id})}
+            lutris_games = {g["service_id"]: g for g in GAME_CATALOG.get_games(filters={"service": self.service.id})}
 
-        return self.filter_games(
-            [
-                self.combine_games(game, lutris_games.get(game["appid"]))
-                for game in self.apply_view_sort(service_games, lambda game: lutris_games.get(game["appid"]) or game)
-            ]
-        )
+        if sort:
+            service_games = self.apply_view_sort(service_games, lambda game: lutris_games.get(game["appid"]) or game)
+        return self.filter_games([self.combine_games(game, lutris_games.get(game["appid"])) for game in service_games])
 
     def get_games_from_filters(self):
         service_id = self.filters.get("service")
@@ -677,7 +578,7 @@ class LutrisWindow(Gtk.ApplicationWindow, DialogLaunchUIDelegate, DialogInstallU
 
         saved_search = self.filters.get("saved_search")
         if saved_search:
-            saved_search_found = saved_searches_db.get_saved_search_by_name(saved_search)
+            saved_search_found = GAME_CATALOG.get_saved_search_by_name(saved_search)
 
             if saved_search_found:
                 try:
@@ -690,7 +591,7 @@ class LutrisWindow(Gtk.ApplicationWindow, DialogLaunchUIDelegate, DialogInstallU
         excluded = (
             [".hidden"] if category != ".hidden" and not any(s for s in searches if s.has_component("hidden")) else []
         )
-        category_game_ids = categories_db.get_game_ids_for_categories(included, excluded)
+        category_game_ids = set(GAME_CATALOG.get_game_ids_for_categories(included, excluded))
 
         filters = self.get_sql_filters()
         excludes = {}
@@ -704,7 +605,7 @@ class LutrisWindow(Gtk.ApplicationWindow, DialogLaunchUIDelegate, DialogInstallU
             if excluded_services:
                 excludes["service"] = excluded_services
 
-        games = games_db.get_games(filters=filters, excludes=excludes)
+        games = GAME_CATALOG.get_games(filters=filters, excludes=excludes)
         games = self.filter_games([game for game in games if game["id"] in category_game_ids], searches=searches)
         return self.apply_view_sort(games)
 
@@ -757,7 +658,7 @@ class LutrisWindow(Gtk.ApplicationWindow, DialogLaunchUIDelegate, DialogInstallU
             return
 
         filter_text = self.filters.get("text")
-        has_uninstalled_games = games_db.get_game_count("installed", "0")
+        has_uninstalled_games = GAME_CATALOG.get_game_count({"installed": "0"})
         if filter_text:
             if self.filters.get("category") == "favorite":
                 self.show_label(_("Add a game matching '%s' to your favorites to see it here.") % filter_text)
@@ -810,10 +711,10 @@ class LutrisWindow(Gtk.ApplicationWindow, DialogLaunchUIDelegate, DialogInstallU
             if error:
                 raise error  # bounce any error against the backstop
 
-            # Since get_games_from_filters() seems to be much faster than making a GameStore,
-            # we defer the spinner to here, when we know how many games we will show. If there
-            # are "many" we show a spinner while the store is built.
-            if len(games) > 512:
+            # We defer the spinner to here, when we know how many games we will show. The
+            # store only computes the columns needed to sort up front, leaving media and
+            # formatted text until rows are shown, so only very large libraries need one.
+            if len(games) > 8192:
                 self.show_spinner()
 
             AsyncCall(make_game_store, apply_store, games)
@@ -1106,10 +1007,35 @@ class LutrisWindow(Gtk.ApplicationWindow, DialogLaunchUIDelegate, DialogInstallU
                 client_version = runtime_versions.get("client_version")
                 settings.write_setting("ignored_supported_lutris_version", client_version or "")
 
-    def on_service_games_loaded(self, service):
-        """Request a view update when service games are loaded"""
-        if self.service and service.id == self.service.id:
+    def on_service_games_updated(self, service, changed_appids):
+        """Update the view when service games are reloaded; only the changed games
+        are updated, unless games were added or removed."""
+        if not self.service or service.id != self.service.id:
+            return
+        if changed_appids is None:
             self.update_store()
+            return
+        service_games = []
+        for appid in changed_appids:
+            service_game = ServiceGameCollection.get_game(service.id, appid)
+            if not service_game:
+                self.update_store()
+                return
+            service_games.append(service_game)
+
+        # The rows are built as a full reload builds them, and games the filters now exclude go away
+        rows = self.get_service_game_rows(service_games)
+        shown_appids = {row["appid"] for row in rows}
+        for service_game in service_games:
+            if service_game["appid"] not in shown_appids:
+                self.game_store.remove_game(service_game["appid"])
+
+        sensitive_columns = self.get_sort_sensitive_columns()
+        for row in rows:
+            updated_columns = self.game_store.update(row)
+            if updated_columns is None or not sensitive_columns.isdisjoint(updated_columns):
+                self.update_store()
+                return
 
     def on_categories_updated(self):
         self.update_store()
@@ -1324,7 +1250,7 @@ class LutrisWindow(Gtk.ApplicationWindow, DialogLaunchUIDelegate, DialogInstallU
             if self.service:
                 game = ServiceGameCollection.get_game(self.service.id, game_id)
             else:
-                game = games_db.get_game_by_field(game_id, "id")
+                game = GAME_CATALOG.get_game_by_id(game_id)
 
             # There can be no game found if you are removing a game; it will
             # still have a selected icon in the UI just long enough to get here.
@@ -1384,7 +1310,7 @@ class LutrisWindow(Gtk.ApplicationWindow, DialogLaunchUIDelegate, DialogInstallU
         if self.service:
             db_game = self.service.get_service_db_game(game)
         else:
-            db_game = games_db.get_game_by_field(game.id, "id")
+            db_game = GAME_CATALOG.get_game_by_id(game.id)
 
             if db_game and not self.is_game_displayed(game) and "id" in db_game:
                 self.game_store.remove_game(db_game["id"])
@@ -1418,7 +1344,7 @@ class LutrisWindow(Gtk.ApplicationWindow, DialogLaunchUIDelegate, DialogInstallU
         """Handles view activations (double click, enter press)"""
         if self.service:
             logger.debug("Looking up %s game %s", self.service.id, game_id)
-            db_game = games_db.get_game_for_service(self.service.id, game_id)
+            db_game = GAME_CATALOG.get_game_for_service(self.service.id, game_id)
 
             if db_game and db_game["installed"]:
                 game_id = db_game["id"]
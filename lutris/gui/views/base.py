@@ -39,6 +39,7 @@ class GameView:
         self.connect("destroy", self.on_destroy)
         self.connect("button-press-event", self.popup_contextual_menu)
         self.connect("key-press-event", self.handle_key_press)
+        self.connect("draw", self.on_draw)
 
         self.game_start_registration = GAME_START.register(self.on_game_start)
 
@@ -50,6 +51,15 @@ class GameView:
         if self.image_renderer:
             self.image_renderer.service = self.service
 
+    def on_draw(self, _widget, _cr):
+        """Queue the rows that are about to be drawn to be loaded; the default handler draws
+        them after this, with placeholders until they are."""
+        if self.game_store:
+            is_visible, start_path, end_path = self.get_visible_range()
+            if is_visible:
+                self.game_store.queue_rows(start_path, end_path)
+        return False
+
     def on_media_cache_invalidated(self):
         self.queue_draw()
 
@@ -1,7 +1,7 @@
 """Store object for a list of games"""
 
 # pylint: disable=not-an-iterable
-from typing import TYPE_CHECKING, Optional, Set, Union
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set, Tuple, Union
 
 if TYPE_CHECKING:
     from lutris.services.base import BaseService
@@ -12,7 +12,8 @@ from gi.repository import GObject, Gtk
 from lutris import settings
 from lutris.database.games import get_all_installed_game_for_service
 from lutris.gui.views.store_item import StoreItem
-from lutris.util.strings import gtk_safe
+from lutris.util.jobs import AsyncCall
+from lutris.util.log import logger
 
 from . import (
     COL_ID,
@@ -33,6 +34,42 @@ from . import (
     COL_YEAR,
 )
 
+# Columns filled in when the row is added; these are cheap to compute
+# and include everything the store may be sorted on by default.
+EAGER_COLUMNS = (
+    COL_ID,
+    COL_SLUG,
+    COL_NAME,
+    COL_SORTNAME,
+    COL_YEAR,
+    COL_RUNNER,
+    COL_LASTPLAYED,
+    COL_INSTALLED,
+    COL_INSTALLED_AT,
+    COL_PLAYTIME,
+)
+
+# Columns filled in only once the row is shown, as they can require
+# looking at the filesystem, the runners or the service.
+LAZY_COLUMNS = (
+    COL_MEDIA_PATHS,
+    COL_RUNNER_HUMAN_NAME,
+    COL_PLATFORM,
+    COL_LASTPLAYED_TEXT,
+    COL_INSTALLED_AT_TEXT,
+    COL_PLAYTIME_TEXT,
+)
+
+# Values of the lazy columns until they are loaded
+LAZY_PLACEHOLDERS = {
+    COL_MEDIA_PATHS: [],
+    COL_RUNNER_HUMAN_NAME: "",
+    COL_PLATFORM: "",
+    COL_LASTPLAYED_TEXT: "",
+    COL_INSTALLED_AT_TEXT: "",
+    COL_PLAYTIME_TEXT: "",
+}
+
 
 def try_lower(value):
     try:
@@ -72,11 +109,23 @@ def sort_func(model, row1, row2, sort_col):
 
 
 class GameStore(GObject.Object):
+    """Holds the rows of the game views. Rows are added with only their eager columns;
+    the lazy ones are computed on a worker thread for the rows queue_rows() is given
+    when the views are about to show them, or by load_all_rows() when the store is
+    sorted on one of them."""
+
     def __init__(self, service: Optional["BaseService"], service_media: "ServiceMedia") -> None:
         super().__init__()
         self.service = service
         self.service_media = service_media
-        self._rows_by_id: dict[str, Gtk.TreeRowReference] = {}
+        # List store iterators remain valid as long as the row exists, and unlike
+        # row references, they do not need updating for each row inserted.
+        self._rows_by_id: Dict[str, Gtk.TreeIter] = {}
+        # Items for the rows whose lazy columns are not loaded yet
+        self._unloaded_items: Dict[str, StoreItem] = {}
+        # Items queued for the worker, and whether it is running
+        self._queued_items: Dict[str, StoreItem] = {}
+        self._is_loading = False
 
         self.store = Gtk.ListStore(
             str,
@@ -96,14 +145,15 @@ class GameStore(GObject.Object):
             float,
             str,
         )
+        self.store.connect("sort-column-changed", self.on_sort_column_changed)
 
     def get_path_by_id(self, game_id):
         """Return the TreePath for a game ID, or None. This is an O(1) lookup."""
         if not game_id:
             return None
-        row_ref = self._rows_by_id.get(str(game_id))
-        if row_ref is not None:
-            return row_ref.get_path()
+        tree_iter = self._rows_by_id.get(str(game_id))
+        if tree_iter is not None:
+            return self.store.get_path(tree_iter)
         return None
 
     def get_row_by_id(self, game_id):
@@ -118,6 +168,8 @@ class GameStore(GObject.Object):
         row = self.get_row_by_id(game_id)
         if row:
             self._rows_by_id.pop(str(game_id), None)
+            self._unloaded_items.pop(str(game_id), None)
+            self._queued_items.pop(str(game_id), None)
             self.store.remove(row.iter)
 
     def update(self, db_game: dict) -> Union[Set[int], None]:
@@ -133,24 +185,13 @@ class GameStore(GObject.Object):
             return None
 
         old_id = row[COL_ID]
-        new_values = dict()
-
-        new_values[COL_ID] = store_item.id
-        new_values[COL_SLUG] = store_item.slug
-        new_values[COL_NAME] = store_item.name
-        new_values[COL_SORTNAME] = store_item.sortname if store_item.sortname else store_item.name
-        new_values[COL_MEDIA_PATHS] = store_item.get_media_paths() if settings.SHOW_MEDIA else []
-        new_values[COL_YEAR] = store_item.year
-        new_values[COL_RUNNER] = store_item.runner
-        new_values[COL_RUNNER_HUMAN_NAME] = store_item.runner_text
-        new_values[COL_PLATFORM] = store_item.platform
-        new_values[COL_LASTPLAYED] = store_item.lastplayed
-        new_values[COL_LASTPLAYED_TEXT] = store_item.lastplayed_text
-        new_values[COL_INSTALLED] = store_item.installed
-        new_values[COL_INSTALLED_AT] = store_item.installed_at
-        new_values[COL_INSTALLED_AT_TEXT] = store_item.installed_at_text
-        new_values[COL_PLAYTIME] = store_item.playtime
-        new_values[COL_PLAYTIME_TEXT] = store_item.playtime_text
+        new_id = store_item.id
+        new_values = dict(zip(EAGER_COLUMNS, self._get_eager_values(store_item)))
+        self._queued_items.pop(old_id, None)
+        if self._unloaded_items.pop(old_id, None):
+            self._unloaded_items[new_id] = store_item
+        else:
+            new_values.update(zip(LAZY_COLUMNS, self._get_lazy_values(store_item)))
 
         changed_indices = set()
         for idx, value in new_values.items():
@@ -158,11 +199,10 @@ class GameStore(GObject.Object):
                 row[idx] = value
                 changed_indices.add(idx)
 
-        new_id = store_item.id
         if old_id != new_id:
-            row_ref = self._rows_by_id.pop(old_id, None)
-            if row_ref is not None:
-                self._rows_by_id[new_id] = row_ref
+            tree_iter = self._rows_by_id.pop(old_id, None)
+            if tree_iter is not None:
+                self._rows_by_id[new_id] = tree_iter
 
         return changed_indices
 
@@ -172,27 +212,99 @@ class GameStore(GObject.Object):
         self.add_item(store_item)
 
     def add_item(self, store_item):
-        tree_iter = self.store.append(
-            (
-                store_item.id,
-                store_item.slug,
-                store_item.name,
-                store_item.sortname if store_item.sortname else store_item.name,
-                store_item.get_media_paths() if settings.SHOW_MEDIA else [],
-                store_item.year,
-                store_item.runner,
-                store_item.runner_text,
-                gtk_safe(store_item.platform),
-                store_item.lastplayed,
-                store_item.lastplayed_text,
-                store_item.installed,
-                store_item.installed_at,
-                store_item.installed_at_text,
-                store_item.playtime,
-                store_item.playtime_text,
-            )
-        )
-        self._rows_by_id[store_item.id] = Gtk.TreeRowReference(self.store, self.store.get_path(tree_iter))
+        values = dict(LAZY_PLACEHOLDERS)
+        values.update(zip(EAGER_COLUMNS, self._get_eager_values(store_item)))
+        tree_iter = self.store.append([values[column] for column in range(len(values))])
+        self._rows_by_id[store_item.id] = tree_iter
+        self._unloaded_items[store_item.id] = store_item
+
+    @staticmethod
+    def _get_eager_values(store_item: StoreItem) -> List[Any]:
+        return [
+            store_item.id,
+            store_item.slug,
+            store_item.name,
+            store_item.sortname if store_item.sortname else store_item.name,
+            store_item.year,
+            store_item.runner,
+            store_item.lastplayed,
+            store_item.installed,
+            store_item.installed_at,
+            store_item.playtime,
+        ]
+
+    @staticmethod
+    def _get_lazy_values(store_item: StoreItem) -> List[Any]:
+        return [
+            store_item.get_media_paths() if settings.SHOW_MEDIA else [],
+            store_item.runner_text,
+            store_item.platform,
+            store_item.lastplayed_text,
+            store_item.installed_at_text,
+            store_item.playtime_text,
+        ]
+
+    def _load_row(self, tree_iter: Gtk.TreeIter) -> None:
+        game_id = self.store.get_value(tree_iter, COL_ID)
+        self._queued_items.pop(game_id, None)
+        store_item = self._unloaded_items.pop(game_id, None)
+        if store_item:
+            self.store.set(tree_iter, LAZY_COLUMNS, self._get_lazy_values(store_item))
+
+    def queue_rows(self, start_path: Gtk.TreePath, end_path: Gtk.TreePath) -> None:
+        """Queue the rows from start_path to end_path, inclusive, to have their lazy
+        columns filled in; rows already loaded or queued are left alone."""
+        if len(self._queued_items) >= len(self._unloaded_items):
+            return
+        start_index = start_path.get_indices()[0]
+        end_index = end_path.get_indices()[0]
+        for index in range(start_index, end_index + 1):
+            tree_iter = self.store.iter_nth_child(None, index)
+            if tree_iter is not None:
+                game_id = self.store.get_value(tree_iter, COL_ID)
+                store_item = self._unloaded_items.get(game_id)
+                if store_item and game_id not in self._queued_items:
+                    self._queued_items[game_id] = store_item
+        self._start_loading()
+
+    def _start_loading(self) -> None:
+        if self._queued_items and not self._is_loading:
+            self._is_loading = True
+            AsyncCall(self._get_lazy_values_of_items, self._on_lazy_values_loaded, list(self._queued_items.values()))
+
+    @classmethod
+    def _get_lazy_values_of_items(cls, store_items: List[StoreItem]) -> List[Tuple[StoreItem, List[Any]]]:
+        """Computes the lazy columns of the items given; this runs on a worker thread."""
+        return [(store_item, cls._get_lazy_values(store_item)) for store_item in store_items]
+
+    def _on_lazy_values_loaded(self, results: Optional[List[Tuple[StoreItem, List[Any]]]], error: Exception) -> None:
+        self._is_loading = False
+        if error:
+            logger.error("Unable to load the rows of the game view: %s", error)
+            self._queued_items.clear()
+            return
+        for store_item, values in results:
+            game_id = store_item.id
+            if self._queued_items.get(game_id) is store_item:
+                del self._queued_items[game_id]
+            # Rows updated or loaded in the meantime are left alone
+            if self._unloaded_items.get(game_id) is store_item:
+                del self._unloaded_items[game_id]
+                self.store.set(self._rows_by_id[game_id], LAZY_COLUMNS, values)
+        self._start_loading()
+
+    def load_all_rows(self) -> None:
+        """Fill in the lazy columns of every row."""
+        for game_id in list(self._unloaded_items):
+            tree_iter = self._rows_by_id.get(game_id)
+            if tree_iter is not None:
+                self._load_row(tree_iter)
+
+    def on_sort_column_changed(self, _sortable):
+        """Sorting on a lazy column needs its values for every row, not just those shown."""
+        sort_column_id, _order = self.store.get_sort_column_id()
+        if sort_column_id in LAZY_COLUMNS:
+            self.load_all_rows()
 
     def add_preloaded_games(self, db_games, service_id):
         """Add games to the store, but preload their installed-game data
@@ -6,26 +6,16 @@ from math import floor
 
 import gi
 
-from lutris.util.jobs import schedule_at_idle
-from lutris.util.log import logger
-
 gi.require_version("PangoCairo", "1.0")
 
 import cairo
 from gi.repository import Gdk, GObject, Gtk, Pango, PangoCairo
 
-from lutris.gui.widgets.utils import (
-    MEDIA_CACHE_INVALIDATED,
-    get_default_icon_path,
-    get_runtime_icon_path,
-    get_scaled_surface_by_path,
-    get_surface_size,
-)
+from lutris.gui.widgets.thumbnail_cache import THUMBNAIL_CACHE
+from lutris.gui.widgets.utils import get_default_icon_path, get_runtime_icon_path, get_surface_size
 from lutris.services.service_media import resolve_media_path
 from lutris.util.path_cache import MISSING_GAMES
 
-_MEDIA_CACHE_GENERATION_NUMBER = 0
-
 
 class GridViewCellRendererText(Gtk.CellRendererText):
     """CellRendererText adjusted for grid view display, removes extra padding
@@ -102,7 +92,10 @@ class GridViewCellRendererText(Gtk.CellRendererText):
 class GridViewCellRendererImage(Gtk.CellRenderer):
     """A pixbuf cell renderer that takes not the pixbuf but a path to an image file;
     it loads that image only when rendering. It also has properties for its width
-    and height, so it need not load the pixbuf to know its size."""
+    and height, so it need not load the pixbuf to know its size.
+
+    Images are loaded in the background by the thumbnail cache; the default
+    icon is drawn in their place until they are ready."""
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -112,10 +105,6 @@ class GridViewCellRendererImage(Gtk.CellRenderer):
         self._show_badges = True
         self._platform = None
         self._is_installed = True
-        self.cached_surfaces_new = {}
-        self.cached_surfaces_old = {}
-        self.cached_surfaces_loaded = 0
-        self.cached_surface_generation = 0
         self.badge_size = 0, 0
         self.badge_alpha = 0.6
         self.badge_fore_color = 1, 1, 1
@@ -240,9 +229,13 @@ class GridViewCellRendererImage(Gtk.CellRenderer):
         alpha = 1 if self.is_installed else 100 / 255
 
         if media_width > 0 and media_height > 0 and path:
-            surface = self._get_cached_surface_by_path(widget, path, size=(media_width, media_height))
+            scale_factor = widget.get_scale_factor() if widget else 1
+            _is_ready, surface = THUMBNAIL_CACHE.get_surface(
+                path, (media_width, media_height), scale_factor, on_loaded=widget.queue_draw if widget else None
+            )
             if not surface:
-                # The default icon needs to be scaled to fill the cell space.
+                # The default icon needs to be scaled to fill the cell space; it
+                # stands in for media that is missing or still loading.
                 path = get_default_icon_path((media_width, media_height))
                 surface = self._get_cached_surface_by_path(
                     widget, path, size=(media_width, media_height), preserve_aspect_ratio=False
@@ -286,10 +279,6 @@ class GridViewCellRendererImage(Gtk.CellRenderer):
                     layout = widget.create_pango_layout("")
                     PangoCairo.update_layout(cr, layout)
 
-            # Idle time will wait until the widget has drawn whatever it wants to;
-            # we can then discard surfaces we aren't using anymore.
-            schedule_at_idle(self.cycle_cache)
-
     def select_badge_metrics(self, surface, media_width, media_height):
         """Updates fields holding data about the appearance of the badges;
         this sets self.badge_size to None if no badges should be shown at all."""
@@ -507,73 +496,8 @@ class GridViewCellRendererImage(Gtk.CellRenderer):
             # spoiled with cr.restore(), and this fixes that.
             PangoCairo.update_layout(cr, layout)
 
-    def clear_cache(self):
-        """Discards all cached surfaces; used when some properties are changed."""
-        self.cached_surfaces_old.clear()
-        self.cached_surfaces_new.clear()
-
-    def cycle_cache(self) -> None:
-        """Is the key cache size control trick. When called, the surfaces cached or used
-        since the last call are preserved, but those not touched are discarded.
-
-        We call this at idle time after rendering a cell; this should keep all the surfaces
-        rendered at that time, so during scrolling the visible media are kept and scrolling is smooth.
-        At other times we may discard almost all surfaces, saving memory.
-
-        We skip clearing anything if no surfaces have been loaded; this happens if drawing was
-        serviced entirely from cache. GTK may have redrawn just one image or something, so
-        let's not disturb the cache for that."""
-        if self.cached_surfaces_loaded > 0:
-            self.cached_surfaces_old = self.cached_surfaces_new
-            self.cached_surfaces_new = {}
-            self.cached_surfaces_loaded = 0
-
     def _get_cached_surface_by_path(self, widget, path, size, preserve_aspect_ratio=True):
-        """This obtains the scaled surface to rander for a given media path; this is cached
-        in this render, but we'll clear that cache when the media generation number is changed,
-        or certain properties are. We also age surfaces from the cache at idle time after
-        rendering."""
-        if self.cached_surface_generation != _MEDIA_CACHE_GENERATION_NUMBER:
-            self.cached_surface_generation = _MEDIA_CACHE_GENERATION_NUMBER
-            self.clear_cache()
-
-        key = widget, path, size, preserve_aspect_ratio
-
-        if key in self.cached_surfaces_new:
-            return self.cached_surfaces_new[key]
-
-        if key in self.cached_surfaces_old:
-            surface = self.cached_surfaces_old[key]
-        else:
-            surface = self._get_surface_by_path(widget, path, size, preserve_aspect_ratio)
-            if surface:
-                # We cache missing surfaces too, but only a successful load trigger
-                # cache cycling
-                self.cached_surfaces_loaded += 1
-
-        self.cached_surfaces_new[key] = surface
-        return surface
-
-    def _get_surface_by_path(self, widget, path, size, preserve_aspect_ratio=True):
-        cell_size = size
+        """This obtains the scaled surface to render for a small image, like a badge or
+        the default icon; these are loaded at once rather than in the background."""
         scale_factor = widget.get_scale_factor() if widget else 1
-        try:
-            return get_scaled_surface_by_path(
-                path, cell_size, scale_factor, preserve_aspect_ratio=preserve_aspect_ratio
-            )
-        except Exception as ex:
-            # We need to survive nasty data in the media files, so the user can replace
-            # them.
-            logger.exception("Unable to load media '%s': %s", path, ex)
-            return None
-
-
-def _on_media_cached_invalidated() -> None:
-    # Increment a counter, so we can passively detect when the media cache is invalid
-    # without a per-object handler. We have no way to unregister that handler, but we never
-    # need to unregister this global one.
-    global _MEDIA_CACHE_GENERATION_NUMBER
-    _MEDIA_CACHE_GENERATION_NUMBER += 1
-
-
-MEDIA_CACHE_INVALIDATED.register(_on_media_cached_invalidated)
+        return THUMBNAIL_CACHE.get_surface_now(path, size, scale_factor, preserve_aspect_ratio=preserve_aspect_ratio)
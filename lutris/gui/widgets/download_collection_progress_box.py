@@ -1,13 +1,10 @@
-import os
 import time
 from gettext import gettext as _
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
 
 from gi.repository import GObject, Gtk, Pango
 
-from lutris.gui.dialogs import display_error
-from lutris.util.download_cache import CacheState, create_cache_lock, update_cache_lock
-from lutris.util.downloader import Downloader
+from lutris.util.download_manager import DownloadManager
 from lutris.util.jobs import schedule_repeating_at_idle
 from lutris.util.log import logger
 from lutris.util.strings import gtk_safe, human_size
@@ -18,28 +15,12 @@ if TYPE_CHECKING:
 # Same reason as Downloader
 get_time = time.monotonic
 
-# Maximum number of file downloads running at the same time.  Keeping
-# this at 2 ("prefetch-one") eliminates the cold-start gap between
-# files without overloading the CDN (GOGDownloader already opens 4
-# Range connections per file).
-MAX_CONCURRENT_FILES = 2
-
-
-class _ActiveDownload:
-    """Tracks one active file download and its retry state."""
-
-    __slots__ = ("downloader", "file", "num_retries")
-
-    def __init__(self, file, downloader) -> None:
-        self.file = file
-        self.downloader = downloader
-        self.num_retries = 0
-
 
 class DownloadCollectionProgressBox(Gtk.Box):
-    """Progress bar used to monitor a collection of files download."""
+    """Progress bar used to monitor a collection of files download.
 
-    max_retries = 3
+    The files are downloaded by a DownloadManager, several at a time; this
+    polls it and shows their aggregate progress."""
 
     __gsignals__ = {
         "complete": (GObject.SignalFlags.RUN_LAST, None, (GObject.TYPE_PYOBJECT,)),
@@ -47,19 +28,13 @@ class DownloadCollectionProgressBox(Gtk.Box):
         "error": (GObject.SignalFlags.RUN_LAST, None, (GObject.TYPE_PYOBJECT,)),
     }
 
-    def __init__(
-        self,
-        file_collection: "InstallerFileCollection",
-        cancelable: bool = True,
-        downloader: Downloader | None = None,
-    ) -> None:
+    def __init__(self, file_collection: "InstallerFileCollection", cancelable: bool = True) -> None:
         super().__init__(orientation=Gtk.Orientation.VERTICAL)
 
-        self.downloader = downloader
+        self.manager: Optional[DownloadManager] = None
         self.is_complete = False
-        self._file_queue = file_collection.files_list.copy()
+        self._files = file_collection.files_list.copy()
         self.title = file_collection.human_url
-        self.num_files_downloaded = 0
         self.num_files_to_download = file_collection.num_files
         self.full_size = file_collection.full_size
         self.time_left = "00:00:00"
@@ -68,16 +43,6 @@ class DownloadCollectionProgressBox(Gtk.Box):
         self.avg_speed = 0
         self.speed_list = []
 
-        # --- Concurrent download state ---
-        # List of _ActiveDownload objects currently downloading.
-        self._active_downloads: list[_ActiveDownload] = []
-        # Cumulative bytes for files that have already completed.
-        self._completed_sizes: dict[str, int] = {}
-
-        # Legacy compat: kept for the single-downloader callers that
-        # pass a ``downloader`` kwarg (e.g. on_retry_clicked).
-        self.num_retries = 0
-
         top_box = Gtk.Box()
         self.main_label = Gtk.Label(self.title)
         self.main_label.set_alignment(0, 0)
@@ -119,139 +84,20 @@ class DownloadCollectionProgressBox(Gtk.Box):
         self.show_all()
         self.cancel_button.hide()
 
-    # ------------------------------------------------------------------
-    # Downloader creation helper
-    # ------------------------------------------------------------------
-
-    def _create_downloader(self, file):
-        """Create a Downloader (or subclass) for *file* and return it.
-
-        Handles `downloader_class` look-up, ``.tmp`` path creation and
-        cache-lock creation.  Returns ``None`` on failure.
-        """
-        tmp_path = file.dest_file + ".tmp"
-        file.tmp_file = tmp_path
-        if os.path.exists(tmp_path):
-            os.remove(tmp_path)
-
-        try:
-            downloader_cls = getattr(file, "downloader_class", None) or Downloader
-            dl = downloader_cls(file.url, file.tmp_file, referer=file.referer, overwrite=True)
-        except RuntimeError as ex:
-            display_error(ex, parent=self.get_toplevel())
-            return None
-
-        create_cache_lock(file.dest_file, CacheState.DOWNLOADING)
-        return dl
-
-    # ------------------------------------------------------------------
-    # File-label helpers
-    # ------------------------------------------------------------------
-
-    def _update_active_file_labels(self):
-        """Set the file-name label to the names of all active downloads."""
-        names = [ad.file.filename for ad in self._active_downloads]
-        self.file_name_label.set_text(", ".join(names) if names else "")
-
-    # ------------------------------------------------------------------
-    # Queue helpers
-    # ------------------------------------------------------------------
-
-    def _pop_next_downloadable_file(self):
-        """Pop and return the next file from the queue, skipping cached files.
-
-        Returns ``None`` when the queue is empty.
-        """
-        while self._file_queue:
-            file = self._file_queue.pop()
-            if os.path.exists(file.dest_file):
-                logger.info("File exists, skipping download: '%s'", file.dest_file)
-                self.num_files_downloaded += 1
-                size = os.path.getsize(file.dest_file)
-                self._completed_sizes[file.dest_file] = size
-                continue
-            return file
-        return None
-
-    # ------------------------------------------------------------------
-    # Start / prefetch
-    # ------------------------------------------------------------------
-
-    def _start_one(self, file):
-        """Create a downloader for *file*, add to active list, and start it.
-
-        Returns the ``_ActiveDownload`` on success, ``None`` on failure.
-        """
-        dl = self._create_downloader(file)
-        if dl is None:
-            self.emit("cancel")
-            return None
-        ad = _ActiveDownload(file, dl)
-        self._active_downloads.append(ad)
-        dl.start()
-        return ad
-
-    def _start_prefetch(self):
-        """If there is room and files remain, start the next download."""
-        if len(self._active_downloads) >= MAX_CONCURRENT_FILES:
-            return
-        file = self._pop_next_downloadable_file()
-        if file is None:
-            return
-        self._start_one(file)
-        self._update_active_file_labels()
+    @property
+    def num_files_downloaded(self) -> int:
+        return self.manager.num_files_downloaded if self.manager else 0
 
     def start(self) -> None:
-        """Start downloading files from the collection.
-
-        Launches up to ``MAX_CONCURRENT_FILES`` downloads immediately.
-        """
-        # If an external caller already supplied a downloader
-        # (e.g. on_retry_clicked), honour it as the primary.
-        if self.downloader:
-            file = self._file_queue.pop() if self._file_queue else None
-            if file is None:
-                self.cancel_button.set_sensitive(False)
-                self.is_complete = True
-                self.emit("complete", {})
-                return
-            file.tmp_file = self.downloader.dest
-            ad = _ActiveDownload(file, self.downloader)
-            self._active_downloads.append(ad)
-            self._update_active_file_labels()
-            create_cache_lock(file.dest_file, CacheState.DOWNLOADING)
-            schedule_repeating_at_idle(self._progress, interval_seconds=0.5)
-            self.cancel_button.show()
-            self.cancel_button.set_sensitive(True)
-            if self.downloader.state != self.downloader.DOWNLOADING:
-                self.downloader.start()
-            self._start_prefetch()
-            return
-
-        # Normal path: start first file, then prefetch
-        file = self._pop_next_downloadable_file()
-        if file is None:
-            self.cancel_button.set_sensitive(False)
-            self.is_complete = True
-            self.emit("complete", {})
-            return
-
-        ad = self._start_one(file)
-        if ad is None:
-            return  # error already emitted
-
-        self._update_active_file_labels()
+        """Start downloading the files of the collection."""
+        self.manager = DownloadManager(self._files)
+        self.manager.start()
+        self.time_left_check_time = get_time()
+        self.last_size = 0
         schedule_repeating_at_idle(self._progress, interval_seconds=0.5)
         self.cancel_button.show()
         self.cancel_button.set_sensitive(True)
 
-        # Prefetch the next file immediately
-        self._start_prefetch()
-
-    # ------------------------------------------------------------------
-    # Retry helpers
-    # ------------------------------------------------------------------
-
     def set_retry_button(self):
         """Transform the cancel button into a retry button"""
         self.cancel_button.set_label(_("Retry"))
@@ -260,107 +106,54 @@ class DownloadCollectionProgressBox(Gtk.Box):
         self.cancel_button.set_sensitive(True)
 
     def on_retry_clicked(self, button):
-        """Retry current download."""
+        """Retry the download; the files already downloaded are skipped."""
         logger.debug("Retrying download")
         button.set_label(_("Cancel"))
         button.disconnect(self.cancel_cb_id)
         self.cancel_cb_id = button.connect("clicked", self.on_cancel_clicked)
-        if self.downloader:
-            self.downloader.reset()
-        self._active_downloads.clear()
         self.start()
 
-    # ------------------------------------------------------------------
-    # Cancel
-    # ------------------------------------------------------------------
-
     def on_cancel_clicked(self, _widget=None):
         """Cancel all active downloads."""
         logger.debug("Download cancel requested")
-        for ad in self._active_downloads:
-            ad.downloader.cancel()
-        self._active_downloads.clear()
-        self.downloader = None
+        if self.manager:
+            self.manager.cancel()
         self.cancel_button.set_sensitive(False)
         self.emit("cancel")
 
-    # ------------------------------------------------------------------
-    # Aggregate progress helpers
-    # ------------------------------------------------------------------
+    def _progress(self) -> bool:
+        """Periodic callback: check the manager's state, update the UI."""
+        manager = self.manager
+        if not manager:
+            return False
 
-    def _aggregate_downloaded_size(self):
-        """Return total bytes downloaded (completed + active)."""
-        completed = sum(self._completed_sizes.values())
-        active = sum(ad.downloader.downloaded_size for ad in self._active_downloads)
-        return completed + active
+        if manager.state == manager.CANCELLED:
+            self.progressbar.set_fraction(0)
+            self._set_text(_("Download interrupted"))
+            self.cancel_button.set_sensitive(False)
+            return False
 
-    # ------------------------------------------------------------------
-    # Progress polling
-    # ------------------------------------------------------------------
+        if manager.state == manager.ERROR:
+            self._set_text(str(manager.error)[:80])
+            self.cancel_button.set_sensitive(False)
+            self.emit("error", manager.error)
+            return False
 
-    def _progress(self) -> bool:
-        """Periodic callback: check active downloads, update UI."""
-        if not self._active_downloads:
-            return False  # nothing to poll
-
-        # ---- Handle error / cancelled states on each active download ----
-        finished = []
-        for ad in self._active_downloads:
-            state = ad.downloader.state
-            if state == ad.downloader.CANCELLED:
-                self.progressbar.set_fraction(0)
-                self._set_text(_("Download interrupted"))
-                self._cancel_all()
-                self.emit("cancel")
-                return False
-
-            if state == ad.downloader.ERROR:
-                if ad.num_retries >= self.max_retries:
-                    # Exhausted retries — fail entire collection
-                    self._set_text(str(ad.downloader.error)[:80])
-                    self._cancel_all()
-                    self.emit("error", ad.downloader.error)
-                    return False
-                # Retry this one download independently
-                ad.num_retries += 1
-                logger.debug(
-                    "Retrying file %s (attempt %d/%d)",
-                    ad.file.filename,
-                    ad.num_retries,
-                    self.max_retries,
-                )
-                ad.downloader.reset()
-                ad.downloader = self._create_downloader(ad.file)
-                if ad.downloader is None:
-                    self._cancel_all()
-                    self.emit("cancel")
-                    return False
-                ad.downloader.start()
-                continue
-
-            if state == ad.downloader.COMPLETED:
-                finished.append(ad)
-
-        # ---- Process completions ----
-        for ad in finished:
-            self.num_files_downloaded += 1
-            self._completed_sizes[ad.file.dest_file] = ad.downloader.downloaded_size
-            os.rename(ad.file.tmp_file, ad.file.dest_file)
-            update_cache_lock(ad.file.dest_file, CacheState.DOWNLOADED)
-            self._active_downloads.remove(ad)
-
-        # If files finished, maybe start more prefetch downloads
-        if finished:
-            self._start_prefetch()
-            self._update_active_file_labels()
-
-        # ---- Update aggregate progress ----
-        downloaded_size = self._aggregate_downloaded_size()
+        if manager.state == manager.COMPLETED:
+            self.progressbar.set_fraction(1)
+            self.file_name_label.set_text("")
+            self.cancel_button.set_sensitive(False)
+            self.is_complete = True
+            self.emit("complete", {})
+            return False
+
+        self.file_name_label.set_text(", ".join(file.filename for file in manager.active_files))
+        downloaded_size = manager.downloaded_size
         progress = 0
         if self.full_size > 0:
             progress = min(downloaded_size / self.full_size, 1)
         self.progressbar.set_fraction(progress)
-        self.update_speed_and_time()
+        self.update_speed_and_time(downloaded_size)
         megabytes = 1024 * 1024
         progress_text = _("{downloaded} / {size} ({speed:0.2f}MB/s), {time} remaining").format(
             downloaded=human_size(downloaded_size),
@@ -369,28 +162,14 @@ class DownloadCollectionProgressBox(Gtk.Box):
             time=self.time_left,
         )
         self._set_text(progress_text)
-
-        # ---- Check if all done ----
-        if not self._active_downloads and not self._file_queue:
-            self.cancel_button.set_sensitive(False)
-            self.is_complete = True
-            self.downloader = None
-            self.emit("complete", {})
-            return False
-
         return True
 
-    # ------------------------------------------------------------------
-    # Speed / ETA (aggregate)
-    # ------------------------------------------------------------------
-
-    def update_speed_and_time(self):
+    def update_speed_and_time(self, downloaded_size: int) -> None:
         """Update time left and average speed using aggregate throughput."""
         elapsed_time = get_time() - self.time_left_check_time
         if elapsed_time < 1:  # Minimum delay
             return
 
-        downloaded_size = self._aggregate_downloaded_size()
         elapsed_size = downloaded_size - self.last_size
         self.last_size = downloaded_size
 
@@ -411,18 +190,6 @@ class DownloadCollectionProgressBox(Gtk.Box):
         self.time_left_check_time = get_time()
         self.time_left = "%d:%02d:%02d" % (hours, minutes, seconds)
 
-    # ------------------------------------------------------------------
-    # Internal helpers
-    # ------------------------------------------------------------------
-
-    def _cancel_all(self):
-        """Cancel every active download without emitting a signal."""
-        for ad in self._active_downloads:
-            ad.downloader.cancel()
-        self._active_downloads.clear()
-        self.downloader = None
-        self.cancel_button.set_sensitive(False)
-
     def _set_text(self, text):
         markup = "<span size='10000'>{}</span>".format(gtk_safe(text))
         self.progress_label.set_markup(markup)
@@ -31,10 +31,12 @@ class DownloadProgressBox(Gtk.Box):
         title: Optional[str] = None,
         cancelable: bool = True,
         downloader: Optional[Downloader] = None,
+        hash_type: Optional[str] = None,
     ) -> None:
         super().__init__(orientation=Gtk.Orientation.VERTICAL)
 
         self._downloader = downloader
+        self.hash_type = hash_type
         self.is_complete = False
         self.url = url
         self.dest = dest
@@ -83,7 +85,11 @@ class DownloadProgressBox(Gtk.Box):
     @property
     def downloader(self) -> Downloader:
         if not self._downloader:
-            self._downloader = Downloader(self.url, self.temp, referer=self.referer, overwrite=True)
+            self._downloader = Downloader(
+                self.url, self.temp, referer=self.referer, overwrite=True, hash_type=self.hash_type
+            )
+        elif self.hash_type and not self._downloader.hash_type:
+            self._downloader.hash_type = self.hash_type
         return self._downloader
 
     def cancel_download(self):
@@ -0,0 +1,226 @@
+"""Cache of the scaled media surfaces drawn by the game views, in memory and on disk"""
+
+import concurrent.futures
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+import cairo
+from gi.repository import GLib
+
+from lutris import settings
+from lutris.gui.widgets.utils import MEDIA_CACHE_INVALIDATED, get_scaled_surface_by_path
+from lutris.util.log import logger
+
+# How much memory the surfaces held in memory may use, in bytes
+MEMORY_BUDGET = 128 * 1024 * 1024
+
+# How many media files are decoded at once
+WORKER_COUNT = 4
+
+# How much space the thumbnails on disk may use, in bytes
+DISK_BUDGET = 256 * 1024 * 1024
+
+# Thumbnails not used for this long, in seconds, are deleted
+DISK_MAX_AGE = 90 * 24 * 60 * 60
+
+# How old the last use of a thumbnail must be for it to be recorded again
+LAST_USED_RESOLUTION = 24 * 60 * 60
+
+# path, size, device scale, preserve_aspect_ratio
+ThumbnailKey = Tuple[str, Tuple[int, int], int, bool]
+
+
+def get_thumbnail_path(key: ThumbnailKey) -> str:
+    """Return the path of the disk cache file for a scaled media. The source file's
+    modification time is not part of it, but is given to the cache file, so a stale
+    thumbnail is recognized and replaced rather than left behind. The access time of
+    the cache file is when it was last used, for prune_thumbnails()."""
+    digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+    return os.path.join(settings.THUMBNAIL_CACHE_DIR, digest[:2], digest + ".png")
+
+
+def _save_thumbnail(surface: cairo.ImageSurface, thumbnail_path: str, source_mtime: int) -> None:
+    temp_path = "%s.%s.tmp" % (thumbnail_path, threading.get_ident())
+    try:
+        os.makedirs(os.path.dirname(thumbnail_path), exist_ok=True)
+        surface.write_to_png(temp_path)
+        os.utime(temp_path, ns=(time.time_ns(), source_mtime))
+        os.replace(temp_path, thumbnail_path)
+    except (OSError, cairo.Error) as ex:
+        logger.warning("Unable to save thumbnail %s: %s", thumbnail_path, ex)
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+
+
+def load_thumbnail(key: ThumbnailKey) -> Optional[cairo.ImageSurface]:
+    """Return the scaled surface for a media file, from the disk cache if it is up to date,
+    or else from the media file itself, and then saved in the disk cache. Returns None if
+    there's no media file. This is safe to call from any thread."""
+    path, size, device_scale, preserve_aspect_ratio = key
+    try:
+        source_mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+    thumbnail_path = get_thumbnail_path(key)
+    try:
+        thumbnail_stat = os.stat(thumbnail_path)
+        if thumbnail_stat.st_mtime_ns == source_mtime:
+            surface = cairo.ImageSurface.create_from_png(thumbnail_path)
+            surface.set_device_scale(device_scale, device_scale)
+            now = time.time_ns()
+            if thumbnail_stat.st_atime_ns < now - LAST_USED_RESOLUTION * 1_000_000_000:
+                os.utime(thumbnail_path, ns=(now, source_mtime))
+            return surface
+    except FileNotFoundError:
+        pass
+    except (OSError, cairo.Error) as ex:
+        logger.warning("Unable to read thumbnail %s: %s", thumbnail_path, ex)
+
+    surface = get_scaled_surface_by_path(path, size, device_scale, preserve_aspect_ratio=preserve_aspect_ratio)
+    if surface:
+        _save_thumbnail(surface, thumbnail_path, source_mtime)
+    return surface
+
+
+def prune_thumbnails(max_size: int = DISK_BUDGET, max_age: int = DISK_MAX_AGE) -> None:
+    """Delete the thumbnails on disk not used for 'max_age' seconds, and then the least
+    recently used ones until they take no more than 'max_size' bytes."""
+    thumbnails = []
+    try:
+        with os.scandir(settings.THUMBNAIL_CACHE_DIR) as folders:
+            for folder in folders:
+                if folder.is_dir(follow_symlinks=False):
+                    with os.scandir(folder.path) as entries:
+                        for entry in entries:
+                            if entry.is_file(follow_symlinks=False):
+                                entry_stat = entry.stat(follow_symlinks=False)
+                                thumbnails.append((entry_stat.st_atime, entry_stat.st_size, entry.path))
+    except OSError as ex:
+        logger.warning("Unable to list the thumbnails in %s: %s", settings.THUMBNAIL_CACHE_DIR, ex)
+        return
+
+    thumbnails.sort()
+    total_size = sum(size for _last_used, size, _path in thumbnails)
+    oldest_kept = time.time() - max_age
+    deleted = 0
+    for last_used, size, path in thumbnails:
+        if last_used >= oldest_kept and total_size <= max_size:
+            break
+        try:
+            os.unlink(path)
+        except OSError as ex:
+            logger.warning("Unable to delete thumbnail %s: %s", path, ex)
+            continue
+        total_size -= size
+        deleted += 1
+    if deleted:
+        logger.debug("Deleted %d thumbnails from %s", deleted, settings.THUMBNAIL_CACHE_DIR)
+
+
+def _get_surface_memory(surface: Optional[cairo.ImageSurface]) -> int:
+    return surface.get_stride() * surface.get_height() if surface else 0
+
+
+class ThumbnailCache:
+    """This class is a singleton that holds the most recently drawn media surfaces,
+    within a memory budget. Surfaces not in memory are loaded by a pool of worker
+    threads, so the views can draw a placeholder meanwhile rather than wait. The first
+    of them prunes the thumbnails on disk.
+
+    This must be used from the main thread only; the workers report back through
+    idle callbacks."""
+
+    def __init__(self, memory_budget: int = MEMORY_BUDGET) -> None:
+        self.memory_budget = memory_budget
+        self.memory_used = 0
+        self._surfaces: "OrderedDict[ThumbnailKey, Optional[cairo.ImageSurface]]" = OrderedDict()
+        self._pending: Dict[ThumbnailKey, List[Callable[[], None]]] = {}
+        self._executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        # Incremented when the cache is cleared, so loads started before are discarded
+        self._generation = 0
+        MEDIA_CACHE_INVALIDATED.register(self.clear)
+
+    def clear(self) -> None:
+        """Discards all surfaces in memory; the disk cache checks itself against the media files."""
+        self._generation += 1
+        self._surfaces.clear()
+        self.memory_used = 0
+
+    def _add_surface(self, key: ThumbnailKey, surface: Optional[cairo.ImageSurface]) -> None:
+        if key in self._surfaces:
+            self.memory_used -= _get_surface_memory(self._surfaces[key])
+        self._surfaces[key] = surface
+        self.memory_used += _get_surface_memory(surface)
+        while self.memory_used > self.memory_budget and len(self._surfaces) > 1:
+            _key, evicted = self._surfaces.popitem(last=False)
+            self.memory_used -= _get_surface_memory(evicted)
+
+    def get_surface(
+        self,
+        path: str,
+        size: Tuple[int, int],
+        device_scale: int,
+        preserve_aspect_ratio: bool = True,
+        on_loaded: Optional[Callable[[], None]] = None,
+    ) -> Tuple[bool, Optional[cairo.ImageSurface]]:
+        """Returns whether the surface is ready, and the surface if so; it is None if there's no media
+        file. If not ready, the surface is loaded in the background and 'on_loaded' is called once it is,
+        so the caller can draw it."""
+        key = path, tuple(size), device_scale, preserve_aspect_ratio
+        if key in self._surfaces:
+            self._surfaces.move_to_end(key)
+            return True, self._surfaces[key]
+
+        callbacks = self._pending.get(key)
+        if callbacks is None:
+            callbacks = self._pending[key] = []
+            if not self._executor:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=WORKER_COUNT, thread_name_prefix="thumbnails"
+                )
+                self._executor.submit(prune_thumbnails)
+            generation = self._generation
+            future = self._executor.submit(self._load, key)
+            future.add_done_callback(lambda f: GLib.idle_add(self._on_surface_loaded, key, generation, f))
+        if on_loaded and on_loaded not in callbacks:
+            callbacks.append(on_loaded)
+        return False, None
+
+    def get_surface_now(
+        self, path: str, size: Tuple[int, int], device_scale: int, preserve_aspect_ratio: bool = True
+    ) -> Optional[cairo.ImageSurface]:
+        """Returns the surface, loading it on this thread if need be; for small images like badges
+        and default icons that it is not worth drawing a placeholder for."""
+        key = path, tuple(size), device_scale, preserve_aspect_ratio
+        if key in self._surfaces:
+            self._surfaces.move_to_end(key)
+            return self._surfaces[key]
+        surface = self._load(key)
+        self._add_surface(key, surface)
+        return surface
+
+    @staticmethod
+    def _load(key: ThumbnailKey) -> Optional[cairo.ImageSurface]:
+        try:
+            return load_thumbnail(key)
+        except Exception as ex:
+            # We need to survive nasty data in the media files, so the user can replace them.
+            logger.exception("Unable to load media '%s': %s", key[0], ex)
+            return None
+
+    def _on_surface_loaded(self, key: ThumbnailKey, generation: int, future: concurrent.futures.Future) -> bool:
+        callbacks = self._pending.pop(key, [])
+        surface = future.result()
+        if generation == self._generation:
+            self._add_surface(key, surface)
+        for callback in callbacks:
+            callback()
+        return False
+
+
+THUMBNAIL_CACHE = ThumbnailCache()
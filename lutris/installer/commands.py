@@ -17,7 +17,7 @@ from lutris.installer.installer import LutrisInstaller
 from lutris.monitored_command import MonitoredCommand
 from lutris.runners import InvalidRunnerError, import_runner, import_task
 from lutris.runners.wine import wine
-from lutris.util import extract, linux, selective_merge, system
+from lutris.util import extract, file_placement, linux, selective_merge, system
 from lutris.util.fileio import EvilConfigParser, MultiOrderedDict
 from lutris.util.gog import apply_gog_config
 from lutris.util.gogdl import run_gogdl
@@ -209,7 +209,7 @@ class CommandsMixin:
             merge_single = "nomerge" not in data
             extractor = data.get("format")
             logger.debug("extracting file %s to %s", filename, dest_path)
-            self._killable_process(extract.extract_archive, filename, dest_path, merge_single, extractor)
+            self._killable_extract(filename, dest_path, merge_single, extractor)
         logger.debug("Extract done")
 
     def input_menu(self, data):
@@ -554,6 +554,25 @@ class CommandsMixin:
             logger.debug("Process %s returned: %s", func, result)
             return result
 
+    def _killable_extract(self, filename, dest_path, merge_single=True, extractor=None):
+        """Extract an archive in a separate, killable process, and report the progress."""
+        progress = multiprocessing.Value("d", -1.0)
+        text = _("Extracting %s") % os.path.basename(filename)
+        with multiprocessing.Pool(1, initializer=extract.init_shared_progress, initargs=(progress,)) as process:
+            result_obj = process.apply_async(
+                extract.extract_archive,
+                (filename, dest_path, merge_single, extractor),
+                {"progress_callback": extract.report_shared_progress},
+            )
+            self.abort_current_task = process.terminate
+            while not result_obj.ready():
+                result_obj.wait(0.5)
+                if progress.value >= 0:
+                    self.interpreter_ui_delegate.report_progress(progress.value, text)
+            self.abort_current_task = None
+            self.interpreter_ui_delegate.report_progress(None)
+            return result_obj.get()  # Re-raise exceptions
+
     def _extract_innosetup(self, file_id):
         self.extract({"src": file_id, "dst": "$GAMEDIR", "extractor": "innoextract"})
         app_path = os.path.join(self.target_path, "app")
@@ -723,27 +742,24 @@ class CommandsMixin:
         for directory in directories:
             self.mkdir(f"$GAMEDIR/drive_c/game/{directory}")
 
-        # move installed files from CACHE to game folder
+        # move installed files from CACHE to game folder; files with the same hash
+        # are copied from the first one placed, as reflinks where possible
+        placements = []
         for file_hash, file_data in files.items():
             if file_hash not in self.game_files:
                 logger.warning("Amazon: Missing file hash %s (expected at %s)", file_hash, file_data["paths"][0])
                 continue
 
-            source_file = self.game_files[file_hash]
-            paths = file_data["paths"]
-
-            for path in paths:
-                dest_path = f"$GAMEDIR/drive_c/game/{path}"
-
-                abs_dest_path = self._substitute(dest_path)
+            dest_paths = []
+            for path in file_data["paths"]:
+                abs_dest_path = self._substitute(f"$GAMEDIR/drive_c/game/{path}")
                 if os.path.isdir(abs_dest_path):
                     logger.warning("Amazon: Removing conflicting directory %s", abs_dest_path)
                     shutil.rmtree(abs_dest_path)
+                dest_paths.append(abs_dest_path)
+            placements.append((self.game_files[file_hash], dest_paths))
 
-                self._killable_process(shutil.copyfile, source_file, abs_dest_path)
-
-            if os.path.exists(source_file):
-                os.remove(source_file)
+        self._killable_process(file_placement.place_files, placements, consume=True)
 
     def gogdl_setup(self, data):
         """Download and set up a GOG game via depot/CDN using heroic-gogdl.
@@ -1003,7 +1019,7 @@ class CommandsMixin:
         file_path = self._get_file_path(file_id)
 
         # Extract the archive (e.g. tar.gz wrapper)
-        self._killable_process(extract.extract_archive, file_path, dst, True)
+        self._killable_extract(file_path, dst)
 
         # Check if any extracted .exe is an installer
         for entry in os.listdir(dst):
@@ -313,6 +313,32 @@ class LutrisInstaller:  # pylint: disable=too-many-instance-attributes
             config["service_id"] = self.service_appid
         return config
 
+    def prepare_save(self):
+        """Write the game configuration file; returns it, and the fields of the game in the DB.
+        This does the file I/O of save(), so the DB write can be done apart."""
+        for hook in self.post_install_hooks:
+            hook(self)
+
+        game_config = self.get_game_config()
+        configpath = write_game_config(self.slug, game_config)
+        game_fields = {
+            "name": self.game_name,
+            "runner": self.runner,
+            "slug": self.game_slug,
+            "platform": import_runner(self.runner)().get_platform(),
+            "directory": self.interpreter.target_path,
+            "installed": 1,
+            "installer_slug": self.slug,
+            "parent_slug": self.requires,
+            "year": self.year,
+            "configpath": configpath,
+            "service": self.service.id if self.service else None,
+            "service_id": self.service_appid,
+            "id": self.game_id,
+            "discord_id": self.discord_id,
+        }
+        return game_config, game_fields
+
     def save(self):
         """Write the game configuration in the DB and config file"""
         if self.extends:
@@ -322,25 +348,6 @@ class LutrisInstaller:  # pylint: disable=too-many-instance-attributes
             )
             return self.game_id, None
 
-        for hook in self.post_install_hooks:
-            hook(self)
-
-        game_config = self.get_game_config()
-        configpath = write_game_config(self.slug, game_config)
-        self.game_id = add_or_update(
-            name=self.game_name,
-            runner=self.runner,
-            slug=self.game_slug,
-            platform=import_runner(self.runner)().get_platform(),
-            directory=self.interpreter.target_path,
-            installed=1,
-            installer_slug=self.slug,
-            parent_slug=self.requires,
-            year=self.year,
-            configpath=configpath,
-            service=self.service.id if self.service else None,
-            service_id=self.service_appid,
-            id=self.game_id,
-            discord_id=self.discord_id,
-        )
+        game_config, game_fields = self.prepare_save()
+        self.game_id = add_or_update(**game_fields)
         return self.game_id, game_config
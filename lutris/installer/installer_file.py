@@ -1,5 +1,6 @@
 """Manipulates installer files"""
 
+import hashlib
 import os
 from gettext import gettext as _
 from typing import Optional
@@ -111,6 +112,16 @@ class InstallerFile:
         if isinstance(self._file_meta, dict):
             return self._file_meta.get("checksum")
 
+    @property
+    def hash_type(self) -> Optional[str]:
+        """The type of the checksum, if there's a valid one; downloaders compute
+        it as they write the file."""
+        if self.checksum and ":" in self.checksum:
+            hash_type = self.checksum.split(":", 1)[0]
+            if hash_type in hashlib.algorithms_available:
+                return hash_type
+        return None
+
     @property
     def dest_file(self):
         def find_dest_file():
@@ -249,11 +260,17 @@ class InstallerFile:
 
     def create_download_progress_box(self):
         return DownloadProgressBox(
-            url=self.url, dest=self.dest_file, temp=self.download_file, referer=self.referer, downloader=self.downloader
+            url=self.url,
+            dest=self.dest_file,
+            temp=self.download_file,
+            referer=self.referer,
+            downloader=self.downloader,
+            hash_type=self.hash_type,
         )
 
     def check_hash(self):
-        """Checks the checksum of `file` and compare it to `value`
+        """Checks the checksum of `file` and compare it to `value`; if the file was
+        just downloaded, the checksum computed during the download is used.
 
         Args:
             checksum (str): The checksum to look for (type:hash)
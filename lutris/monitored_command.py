@@ -16,6 +16,7 @@ from gi.repository import GLib
 from lutris import settings
 from lutris.util import system
 from lutris.util.log import logger
+from lutris.util.process_tracker import get_scope_command, is_scope_supported
 from lutris.util.shell import get_terminal_script
 
 
@@ -55,6 +56,7 @@ class MonitoredCommand:
         exclude_processes=None,
         log_buffer=None,
         title=None,
+        use_scope=False,
     ):  # pylint: disable=too-many-arguments
         self.ready_state = True
         self.env = self.get_environment(env)
@@ -84,6 +86,8 @@ class MonitoredCommand:
         self._stdout = io.StringIO()
 
         self._title = title if title else command[0]
+        # Run in a systemd scope of its own, so its processes can be found from its cgroup
+        self.use_scope = use_scope and is_scope_supported()
 
     @property
     def stdout(self):
@@ -101,6 +105,8 @@ class MonitoredCommand:
             + self.include_processes
             + self.exclude_processes
         )
+        if self.use_scope:
+            wrapper_command = get_scope_command(self.env["LUTRIS_GAME_UUID"]) + wrapper_command
         if not self.terminal:
             return wrapper_command + self.command
 
@@ -1,6 +1,7 @@
 """Runner for MAME"""
 
 import os
+import subprocess
 from gettext import gettext as _
 
 from lutris import runtime, settings
@@ -8,12 +9,11 @@ from lutris.exceptions import GameConfigError
 from lutris.runners.runner import Runner
 from lutris.util import async_choices, system
 from lutris.util.log import logger
-from lutris.util.mame.database import get_supported_systems
+from lutris.util.mame.database import get_supported_systems, is_machine_database_ready
 from lutris.util.strings import split_arguments
 
 MAME_CACHE_DIR = os.path.join(settings.CACHE_DIR, "mame")
 MAME_XML_PATH = os.path.join(MAME_CACHE_DIR, "mame.xml")
-MAME_SYSTEMS_PATH = os.path.join(MAME_CACHE_DIR, "systems.json")
 
 
 def build_mame_systems_cache(force=False):
@@ -29,23 +29,21 @@ def build_mame_systems_cache(force=False):
         if system.get_disk_size(MAME_XML_PATH) == 0:
             logger.warning("MAME did not write anything to %s", MAME_XML_PATH)
             return False
-    if not system.path_exists(MAME_SYSTEMS_PATH, exclude_empty=True) or force:
-        logger.info("Building MAME systems list")
+    if not is_machine_database_ready(MAME_XML_PATH) or force:
+        logger.info("Building MAME machine database")
         _ = get_supported_systems(MAME_XML_PATH, force=True)
     return True
 
 
 @async_choices(
     generate=build_mame_systems_cache,
-    ready=lambda: system.path_exists(MAME_SYSTEMS_PATH, exclude_empty=True),
+    ready=lambda: is_machine_database_ready(MAME_XML_PATH),
     error_message="Failed to build MAME systems cache",
 )
 def get_system_choices(include_year=True):
     """Return list of systems for inclusion in dropdown"""
-    for system_id, info in sorted(
-        get_supported_systems(MAME_XML_PATH).items(),
-        key=lambda sys: (sys[1]["manufacturer"], sys[1]["description"]),
-    ):
+    # Systems come sorted by manufacturer and description
+    for system_id, info in get_supported_systems(MAME_XML_PATH).items():
         if info["description"].startswith(info["manufacturer"]):
             template = ""
         else:
@@ -263,16 +261,26 @@ class mame(Runner):  # pylint: disable=invalid-name
 
     def write_xml_list(self):
         """Write the full game list in XML to disk"""
-        env = runtime.get_env(prefer_system_libs=True)
+        env = system.get_environment()
+        env.update({key: value for key, value in runtime.get_env(prefer_system_libs=True).items() if value is not None})
         listxml_command = self.get_command() + ["-listxml"]
         os.makedirs(self.cache_dir, exist_ok=True)
-        output, error_output = system.execute_with_error(listxml_command, env=env)
-        if output:
-            with open(self.xml_path, "w", encoding="utf-8") as xml_file:
-                xml_file.write(output)
+        # The list runs to hundreds of megabytes, it goes straight to the file
+        temp_path = self.xml_path + ".tmp"
+        try:
+            with open(temp_path, "wb") as xml_file:
+                process = subprocess.run(listxml_command, stdout=xml_file, stderr=subprocess.PIPE, env=env, check=False)
+        except OSError as ex:
+            logger.warning("Couldn't run mame -listxml: %s", ex)
+            return
+        if system.get_disk_size(temp_path):
+            os.replace(temp_path, self.xml_path)
             logger.info("MAME XML list written to %s", self.xml_path)
         else:
-            logger.warning("Couldn't get any output for mame -listxml: %s", error_output)
+            os.remove(temp_path)
+            logger.warning(
+                "Couldn't get any output for mame -listxml: %s", process.stderr.decode(errors="replace").strip()
+            )
 
     def get_platform(self):
         selected_platform = self.game_config.get("platform")
@@ -1,35 +1,37 @@
 import os
+from concurrent.futures import ThreadPoolExecutor
 
-from lutris.api import get_api_games, get_game_installers
-from lutris.database.games import get_games
+from lutris import settings
+from lutris.api import INSTALLER_CACHE_TTL, get_api_games, get_game_installers
+from lutris.database import games as games_db
+from lutris.database import sql
 from lutris.installer.errors import MissingGameDependencyError
 from lutris.installer.interpreter import ScriptInterpreter
-from lutris.services.lutris import download_lutris_media
+from lutris.services.lutris import sync_media
 from lutris.util.log import logger
 from lutris.util.strings import slugify
 
+# Games whose installers are fetched and probed at the same time
+MAX_SCAN_WORKERS = 8
+
 
 def get_game_slugs_and_folders(dirname):
     """Scan a directory for games previously installed with lutris"""
-    folders = os.listdir(dirname)
     game_folders = {}
-    for folder in folders:
-        if not os.path.isdir(os.path.join(dirname, folder)):
-            continue
-        game_folders[slugify(folder)] = folder
+    with os.scandir(dirname) as entries:
+        for entry in entries:
+            if entry.is_dir():
+                game_folders[slugify(entry.name)] = entry.name
     return game_folders
 
 
 def find_game_folder(dirname, api_game, slugs_map):
-    if api_game["slug"] in slugs_map:
-        game_folder = os.path.join(dirname, slugs_map[api_game["slug"]])
-        if os.path.exists(game_folder):
-            return game_folder
-    for alias in api_game["aliases"]:
-        if alias["slug"] in slugs_map:
-            game_folder = os.path.join(dirname, slugs_map[alias["slug"]])
-            if os.path.exists(game_folder):
-                return game_folder
+    """Return the folder of 'dirname' matching the game or one of its aliases;
+    'slugs_map' comes from a listing of 'dirname', so the folders are known to exist."""
+    for slug in [api_game["slug"]] + [alias["slug"] for alias in api_game["aliases"]]:
+        if slug in slugs_map:
+            return os.path.join(dirname, slugs_map[slug])
+    return None
 
 
 def detect_game_from_installer(game_folder, installer):
@@ -50,8 +52,8 @@ def detect_game_from_installer(game_folder, installer):
         return full_path
 
 
-def find_game(game_folder, api_game):
-    installers = get_game_installers(api_game["slug"])
+def find_game(game_folder, api_game, cache_ttl=None):
+    installers = get_game_installers(api_game["slug"], cache_ttl=cache_ttl)
     for installer in installers:
         full_path = detect_game_from_installer(game_folder, installer)
         if full_path:
@@ -60,42 +62,97 @@ def find_game(game_folder, api_game):
 
 
 def get_used_directories():
-    directories = set()
-    for game in get_games():
-        if game["directory"]:
-            directories.add(game["directory"])
-    return directories
+    return games_db.get_used_directories()
+
+
+def remove_game_config(configpath):
+    """Delete the configuration written by prepare_game() for a game that was not added"""
+    try:
+        os.remove(os.path.join(settings.GAME_CONFIG_DIR, "%s.yml" % configpath))
+    except OSError as ex:
+        logger.warning("Unable to remove the configuration %s: %s", configpath, ex)
 
 
-def install_game(installer, game_folder):
+def prepare_game(installer, game_folder):
+    """Write the configuration of a game found in 'game_folder', and return the fields of
+    its row in the DB; None if the installer extends another game and adds no row."""
     interpreter = ScriptInterpreter(installer)
     interpreter.target_path = game_folder
-    interpreter.installer.save()
+    if interpreter.installer.extends:
+        return None
+    _game_config, game_fields = interpreter.installer.prepare_save()
+    return game_fields
 
 
-def scan_directory(dirname):
+def scan_directory(dirname, max_workers=MAX_SCAN_WORKERS):
+    """Add the games found in the folders of 'dirname' to the library. The
+    installers of several games are fetched at the same time, from a cache
+    of recent responses where possible, and the games are added in a single
+    short transaction, once their configuration is written. Returns the
+    folders added or already present, and those that were not recognized,
+    by slug."""
     slugs_map = get_game_slugs_and_folders(dirname)
     directories = get_used_directories()
     api_games = get_api_games(list(slugs_map.keys()))
     slugs_seen = set()
     slugs_installed = set()
+    candidates = []
     for api_game in api_games:
         if api_game["slug"] in slugs_seen:
             continue
         slugs_seen.add(api_game["slug"])
         game_folder = find_game_folder(dirname, api_game, slugs_map)
+        if not game_folder:
+            continue
         if game_folder in directories:
             slugs_installed.add(api_game["slug"])
             continue
-        full_path, installer = find_game(game_folder, api_game)
-        if full_path:
-            logger.info("Found %s in %s", api_game["name"], full_path)
+        candidates.append((game_folder, api_game))
+
+    def probe_game(candidate):
+        game_folder, api_game = candidate
+        try:
+            return find_game(game_folder, api_game, cache_ttl=INSTALLER_CACHE_TTL)
+        except Exception as ex:  # pylint: disable=broad-except
+            logger.error("Unable to get installers for %s: %s", api_game["slug"], ex)
+            return None, None
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="scan-directory") as executor:
+        found = list(executor.map(probe_game, candidates))
+
+    # The configuration files are written first, so the transaction only covers the rows
+    media_slugs = set()
+    games_fields = []
+    for (game_folder, api_game), (full_path, installer) in zip(candidates, found):
+        if not full_path:
+            continue
+        logger.info("Found %s in %s", api_game["name"], full_path)
+        try:
+            game_fields = prepare_game(installer, game_folder)
+        except MissingGameDependencyError as ex:
+            logger.error("Skipped %s: %s", api_game["name"], ex)
+            game_fields = None
+        except Exception as ex:  # pylint: disable=broad-except
+            logger.exception("Unable to add %s: %s", api_game["name"], ex)
+            continue
+        if game_fields:
+            games_fields.append((api_game, installer, game_fields))
+        else:
+            media_slugs.add(installer["game_slug"])
+            slugs_installed.add(api_game["slug"])
+
+    with sql.db_transaction(settings.DB_PATH):
+        for api_game, installer, game_fields in games_fields:
+            # A failing row must not roll back the games added before it
             try:
-                install_game(installer, game_folder)
-            except MissingGameDependencyError as ex:
-                logger.error("Skipped %s: %s", api_game["name"], ex)
-            download_lutris_media(installer["game_slug"])
+                games_db.add_or_update(**game_fields)
+            except Exception as ex:  # pylint: disable=broad-except
+                logger.exception("Unable to add %s: %s", api_game["name"], ex)
+                remove_game_config(game_fields["configpath"])
+                continue
+            media_slugs.add(installer["game_slug"])
             slugs_installed.add(api_game["slug"])
+    sync_media(media_slugs)
 
     installed_map = {slug: folder for slug, folder in slugs_map.items() if slug in slugs_installed}
     missing_map = {slug: folder for slug, folder in slugs_map.items() if slug not in slugs_installed}
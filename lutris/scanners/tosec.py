@@ -1,10 +1,27 @@
+import json
 import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional
+from xml.etree import ElementTree
 
 from lutris import settings
+from lutris.database import sql
 from lutris.util import http
 from lutris.util.extract import extract_archive
+from lutris.util.hashing import hash_files
 from lutris.util.log import logger
-from lutris.util.system import get_md5_hash
+
+# Checksums resolved together by scan_folder() before their results are yielded
+TOSEC_BATCH_SIZE = 50
+# Games of a DAT file written to the database in each transaction
+DAT_BATCH_SIZE = 1000
+# Requests to the API running at the same time; it looks up a single checksum per request
+TOSEC_API_WORKERS = 4
+# Seconds after which checksums the API did not know are looked up again
+NO_RESULTS_LIFETIME = 30 * 24 * 3600
 
 archive_formats = [".zip", ".7z", ".rar", ".gz"]
 save_formats = [".srm"]
@@ -65,10 +82,176 @@ PLATFORM_PATTERNS = {
 }
 
 
-def search_tosec_by_md5(md5sum):
-    """Retrieve a lutris bundle from the API"""
-    if not md5sum:
-        return []
+class TosecDatabase:
+    """Local knowledge of ROM checksums, kept in an SQLite database: the games
+    loaded from TOSEC or No-Intro DAT files, and the answers of the Lutris API
+    to previous lookups. Games are in the format of the API's results."""
+
+    def __init__(self, db_path: str = settings.TOSEC_DB_PATH) -> None:
+        self.db_path = db_path
+        self._initialized = False
+        self._lock = threading.Lock()
+
+    def _initialize(self) -> None:
+        with self._lock:
+            if self._initialized:
+                return
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            with sql.db_transaction(self.db_path) as cursor:
+                sql.cursor_execute(
+                    cursor,
+                    "create table if not exists dat_games (id integer primary key, dat text, name text, category text)",
+                )
+                sql.cursor_execute(
+                    cursor, "create table if not exists dat_roms (game_id integer, name text, md5 text, size integer)"
+                )
+                sql.cursor_execute(cursor, "create index if not exists dat_roms_md5 on dat_roms (md5)")
+                sql.cursor_execute(cursor, "create index if not exists dat_roms_game_id on dat_roms (game_id)")
+                sql.cursor_execute(
+                    cursor,
+                    "create table if not exists lookups (md5 text primary key, results text, updated integer)",
+                )
+            self._initialized = True
+
+    def load_dat(self, dat_path: str) -> int:
+        """Index the games of a TOSEC or No-Intro DAT file (Logiqx XML), replacing
+        those of any previous version of it. Returns the number of games loaded.
+
+        The file is parsed outside of any transaction, and its games written in
+        batches, each in a short transaction; they are loaded under a temporary name
+        that only replaces the previous version once the whole file has been read."""
+        self._initialize()
+        dat_name = os.path.basename(dat_path)
+        loading_name = dat_name + ".loading"
+        self._delete_dat_games(loading_name)
+        game_count = 0
+        batch = []
+        try:
+            for game in _iter_dat_games(dat_path):
+                batch.append(game)
+                if len(batch) == DAT_BATCH_SIZE:
+                    self._insert_dat_games(loading_name, batch)
+                    game_count += len(batch)
+                    batch = []
+            self._insert_dat_games(loading_name, batch)
+            game_count += len(batch)
+        except BaseException:
+            # Don't leave part of the games behind
+            self._delete_dat_games(loading_name)
+            raise
+        with sql.db_transaction(self.db_path) as cursor:
+            self._delete_dat_games(dat_name)
+            sql.cursor_execute(cursor, "update dat_games set dat=? where dat=?", (dat_name, loading_name))
+        logger.info("Loaded %d games from %s", game_count, dat_path)
+        return game_count
+
+    def _insert_dat_games(self, dat_name: str, games: List[tuple]) -> None:
+        with sql.db_transaction(self.db_path) as cursor:
+            for name, category, roms in games:
+                game_id = sql.cursor_execute(
+                    cursor, "insert into dat_games (dat, name, category) values (?, ?, ?)", (dat_name, name, category)
+                ).lastrowid
+                cursor.executemany("insert into dat_roms values (?, ?, ?, ?)", [(game_id, *rom) for rom in roms])
+
+    def _delete_dat_games(self, dat_name: str) -> None:
+        with sql.db_transaction(self.db_path) as cursor:
+            sql.cursor_execute(
+                cursor, "delete from dat_roms where game_id in (select id from dat_games where dat=?)", (dat_name,)
+            )
+            sql.cursor_execute(cursor, "delete from dat_games where dat=?", (dat_name,))
+
+    def search_dats(self, md5sums: Iterable[str]) -> Dict[str, List[dict]]:
+        """Return the games of the DAT files that contain ROMs matching the checksums,
+        by checksum; checksums without a match are left out."""
+        self._initialize()
+        matches: Dict[str, List[dict]] = {}
+        md5sums = list(md5sums)
+        with sql.db_cursor(self.db_path) as cursor:
+            for chunk_start in range(0, len(md5sums), sql.MAX_VARIABLES):
+                chunk = md5sums[chunk_start : chunk_start + sql.MAX_VARIABLES]
+                rows = sql.cursor_execute(
+                    cursor,
+                    "select dat_roms.md5, dat_games.id, dat_games.name, dat_games.category "
+                    "from dat_roms join dat_games on dat_games.id = dat_roms.game_id "
+                    "where dat_roms.md5 in (%s)" % ", ".join("?" * len(chunk)),
+                    chunk,
+                ).fetchall()
+                for md5sum, game_id, name, category in rows:
+                    roms = sql.cursor_execute(
+                        cursor, "select name, md5, size from dat_roms where game_id=?", (game_id,)
+                    ).fetchall()
+                    matches.setdefault(md5sum, []).append(
+                        {
+                            "name": name,
+                            "category": {"name": category},
+                            "roms": [
+                                {"name": rom_name, "md5": rom_md5, "size": size} for rom_name, rom_md5, size in roms
+                            ],
+                        }
+                    )
+        return matches
+
+    def get_lookups(self, md5sums: Iterable[str]) -> Dict[str, List[dict]]:
+        """Return the cached results of the API by checksum; those not cached, or
+        whose lack of results is too old to be trusted, are left out."""
+        self._initialize()
+        lookups = {}
+        md5sums = list(md5sums)
+        expired = time.time() - NO_RESULTS_LIFETIME
+        with sql.db_cursor(self.db_path) as cursor:
+            for chunk_start in range(0, len(md5sums), sql.MAX_VARIABLES):
+                chunk = md5sums[chunk_start : chunk_start + sql.MAX_VARIABLES]
+                rows = sql.cursor_execute(
+                    cursor,
+                    "select md5, results, updated from lookups where md5 in (%s)" % ", ".join("?" * len(chunk)),
+                    chunk,
+                ).fetchall()
+                for md5sum, results, updated in rows:
+                    results = json.loads(results)
+                    if results or updated > expired:
+                        lookups[md5sum] = results
+        return lookups
+
+    def set_lookups(self, lookups: Dict[str, List[dict]]) -> None:
+        """Cache the results of the API, by checksum."""
+        self._initialize()
+        now = int(time.time())
+        with sql.db_transaction(self.db_path) as cursor:
+            for md5sum, results in lookups.items():
+                sql.cursor_execute(
+                    cursor, "insert or replace into lookups values (?, ?, ?)", (md5sum, json.dumps(results), now)
+                )
+
+
+TOSEC_DATABASE = TosecDatabase()
+
+
+def _iter_dat_games(dat_path: str) -> Iterator[tuple]:
+    """Parse the games of a DAT file one at a time; yields their name, their category
+    and the name, checksum and size of their ROMs."""
+    category = os.path.splitext(os.path.basename(dat_path))[0]
+    for _event, element in ElementTree.iterparse(dat_path):
+        if element.tag == "header":
+            category = element.findtext("name") or category
+            element.clear()
+        elif element.tag in ("game", "machine"):
+            roms = [
+                (rom.get("name"), rom.get("md5").lower(), rom.get("size"))
+                for rom in element.iter("rom")
+                if rom.get("md5")
+            ]
+            yield element.get("name"), category, roms
+            element.clear()
+
+
+def load_dat(dat_path: str) -> int:
+    """Index a TOSEC or No-Intro DAT file, so its ROMs can be identified offline."""
+    return TOSEC_DATABASE.load_dat(dat_path)
+
+
+def _query_tosec_api(md5sum: str) -> Optional[List[dict]]:
+    """Look up a checksum with the API; returns the games found, or None if the API
+    could not be reached."""
     url = settings.SITE_URL + "/api/tosec/games?md5=" + md5sum
     response = http.Request(url, headers={"Content-Type": "application/json"})
     try:
@@ -76,16 +259,84 @@ def search_tosec_by_md5(md5sum):
     except http.HTTPError as ex:
         logger.error("Unable to get bundle from API: %s", ex)
         return None
-    response_data = response.json
-    return response_data["results"]
+    return response.json["results"]
+
+
+def search_tosec_by_md5s(md5sums: Iterable[str], offline: bool = False) -> Dict[str, Optional[List[dict]]]:
+    """Identify ROMs by checksum, in the loaded DAT files first, then in the cache of
+    previous lookups, and finally with the Lutris API. Returns the games found for each
+    checksum; checksums that could not be looked up have None as result."""
+    md5sums = list(dict.fromkeys(md5sum.lower() for md5sum in md5sums if md5sum))
+    results: Dict[str, Optional[List[dict]]] = {}
+    try:
+        results.update(TOSEC_DATABASE.search_dats(md5sums))
+        results.update(TOSEC_DATABASE.get_lookups(md5sum for md5sum in md5sums if md5sum not in results))
+    except sqlite3.Error as ex:
+        logger.warning("Unable to read the TOSEC database: %s", ex)
+
+    missing = [md5sum for md5sum in md5sums if md5sum not in results]
+    if offline or not missing:
+        results.update((md5sum, None) for md5sum in missing)
+        return results
+    with ThreadPoolExecutor(max_workers=TOSEC_API_WORKERS) as executor:
+        lookups = dict(zip(missing, executor.map(_query_tosec_api, missing)))
+    results.update(lookups)
+    try:
+        TOSEC_DATABASE.set_lookups({md5sum: games for md5sum, games in lookups.items() if games is not None})
+    except sqlite3.Error as ex:
+        logger.warning("Unable to cache TOSEC results: %s", ex)
+    return results
 
 
-def scan_folder(folder, extract_archives=False):
-    roms = {}
+def search_tosec_by_md5(md5sum):
+    """Retrieve a lutris bundle from the API"""
+    if not md5sum:
+        return []
+    return search_tosec_by_md5s([md5sum])[md5sum.lower()]
+
+
+def _rename_rom_set(folder, game, checksums, saves):
+    """Rename the files of a ROM set, and their saves, after the ROMs of 'game';
+    does nothing unless every ROM of the game is present. 'checksums' is updated
+    with the new filenames."""
+    renames = {}
+    for game_rom in game["roms"]:
+        source_file = checksums.get(game_rom["md5"].lower())
+        if not source_file:
+            return
+        renames[source_file] = game_rom["name"]
+    for source, dest in renames.items():
+        base_name, _ext = os.path.splitext(source)
+        dest_base_name, _ext = os.path.splitext(dest)
+        if base_name in saves:
+            save_file = saves[base_name]
+            _base_name, ext = os.path.splitext(save_file)
+            os.rename(os.path.join(folder, save_file), os.path.join(folder, dest_base_name + ext))
+        try:
+            os.rename(os.path.join(folder, source), os.path.join(folder, dest))
+        except FileNotFoundError:
+            logger.error("Failed to rename %s to %s", source, dest)
+    for game_rom in game["roms"]:
+        checksums[game_rom["md5"].lower()] = game_rom["name"]
+
+
+def scan_folder(folder, extract_archives=False, dat_paths=None, offline=False):
+    """Identify the ROMs of a folder, and rename those that match a single game after
+    its TOSEC name. ROMs are hashed on a pool of threads, then looked up in batches.
+
+    This is a generator; it yields the filename of each ROM and the games found for
+    it (None if it could not be looked up) as soon as they are known.
+
+    Args:
+        dat_paths: DAT files to load before the scan, to identify ROMs offline
+        offline: Whether to only use the DAT files and previous lookups
+    """
     archives = []
     saves = {}
     checksums = {}
     archive_contents = []
+    for dat_path in dat_paths or []:
+        load_dat(dat_path)
     if extract_archives:
         for filename in os.listdir(folder):
             basename, ext = os.path.splitext(filename)
@@ -95,6 +346,7 @@ def scan_folder(folder, extract_archives=False):
             for archive_file in os.listdir(os.path.join(folder, basename)):
                 archive_contents.append("%s/%s" % (basename, archive_file))
 
+    rom_filenames = []
     for filename in os.listdir(folder) + archive_contents:
         basename, ext = os.path.splitext(filename)
         if ext in archive_formats:
@@ -105,38 +357,28 @@ def scan_folder(folder, extract_archives=False):
             continue
         if os.path.isdir(os.path.join(folder, filename)):
             continue
+        rom_filenames.append(filename)
 
-        md5sum = get_md5_hash(os.path.join(folder, filename))
-        roms[filename] = search_tosec_by_md5(md5sum)
-        checksums[md5sum] = filename
+    digests = hash_files(os.path.join(folder, filename) for filename in rom_filenames)
+    for filename in rom_filenames:
+        md5sum = (digests[os.path.join(folder, filename)] or {}).get("md5")
+        if md5sum:
+            checksums[md5sum] = filename
 
-    for rom, result in roms.items():
-        if not result:
-            print("no result for %s" % rom)
-            continue
-        if len(result) > 1:
-            print("More than 1 match for %s", rom)
-            continue
-        print("Found: %s" % result[0]["name"])
-        roms_matched = 0
-        renames = {}
-        for game_rom in result[0]["roms"]:
-            source_file = checksums[game_rom["md5"]]
-            dest_file = game_rom["name"]
-            renames[source_file] = dest_file
-            roms_matched += 1
-        if roms_matched == len(result[0]["roms"]):
-            for source, dest in renames.items():
-                base_name, _ext = os.path.splitext(source)
-                dest_base_name, _ext = os.path.splitext(dest)
-                if base_name in saves:
-                    save_file = saves[base_name]
-                    _base_name, ext = os.path.splitext(save_file)
-                    os.rename(os.path.join(folder, save_file), os.path.join(folder, dest_base_name + ext))
-                try:
-                    os.rename(os.path.join(folder, source), os.path.join(folder, dest))
-                except FileNotFoundError:
-                    logger.error("Failed to rename %s to %s", source, dest)
+    md5sums = list(checksums)
+    original_filenames = dict(checksums)
+    for chunk_start in range(0, len(md5sums), TOSEC_BATCH_SIZE):
+        results = search_tosec_by_md5s(md5sums[chunk_start : chunk_start + TOSEC_BATCH_SIZE], offline=offline)
+        for md5sum, result in results.items():
+            rom = original_filenames[md5sum]
+            if not result:
+                logger.info("No result for %s", rom)
+            elif len(result) > 1:
+                logger.info("More than 1 match for %s", rom)
+            else:
+                logger.info("Found: %s", result[0]["name"])
+                _rename_rom_set(folder, result[0], checksums, saves)
+            yield rom, result
 
 
 def guess_platform(game):
@@ -1,13 +1,9 @@
 import copy
 import time
-from typing import Any, Callable, Optional, Set
+from typing import Any, Callable, Iterable, List, Optional, Set
 
 from lutris.database import games
-from lutris.database.categories import (
-    get_game_ids_for_categories,
-    get_uncategorized_game_ids,
-    normalized_category_names,
-)
+from lutris.database.catalog import GAME_CATALOG
 from lutris.exceptions import InvalidSearchTermError
 from lutris.runners import get_runner_human_name
 from lutris.search_predicate import (
@@ -355,7 +351,7 @@ class GameSearch(BaseSearch):
         return FlagPredicate(installed, lambda db_game: bool(db_game["installed"]), tag="installed")
 
     def get_categorized_predicate(self, categorized: Optional[bool]) -> SearchPredicate:
-        uncategorized_ids = get_uncategorized_game_ids()
+        uncategorized_ids = GAME_CATALOG.get_uncategorized_game_ids()
 
         def is_categorized(db_game):
             return db_game["id"] not in uncategorized_ids
@@ -363,8 +359,8 @@ class GameSearch(BaseSearch):
         return FlagPredicate(categorized, is_categorized, tag="categorized")
 
     def get_category_predicate(self, category: str) -> SearchPredicate:
-        names = normalized_category_names(category, subname_allowed=True)
-        category_game_ids = set(get_game_ids_for_categories(names))
+        names = GAME_CATALOG.normalized_category_names(category, subname_allowed=True)
+        category_game_ids = set(GAME_CATALOG.get_game_ids_for_categories(names))
 
         def match_category(db_game):
             game_id = db_game["id"]
@@ -374,8 +370,8 @@ class GameSearch(BaseSearch):
         return MatchPredicate(match_category, text=text, tag="category", value=category)
 
     def get_category_flag_predicate(self, category: str, tag: str, in_category: Optional[bool] = True) -> FlagPredicate:
-        names = normalized_category_names(category, subname_allowed=True)
-        category_game_ids = set(get_game_ids_for_categories(names))
+        names = GAME_CATALOG.normalized_category_names(category, subname_allowed=True)
+        category_game_ids = set(GAME_CATALOG.get_game_ids_for_categories(names))
 
         def is_in_category(db_game):
             game_id = db_game["id"]
@@ -456,6 +452,19 @@ class GameSearch(BaseSearch):
         return MatchPredicate(match_platform, text=text, tag="platform", value=platform)
 
 
+def filter_db_games(db_games: List[games.DbGameDict], searches: Iterable[GameSearch]) -> List[games.DbGameDict]:
+    """Returns the games, as database rows, that match all the searches given.
+
+    The games are tested in memory; they come from the catalog, which has already loaded
+    them, and querying the database again on each keystroke would cost more than that."""
+    searches = [search for search in searches if not search.is_empty]
+    if not searches:
+        return db_games
+
+    predicate = AndPredicate([search.get_predicate() for search in searches]).simplify()
+    return [game for game in db_games if predicate.accept(game)]
+
+
 class RunnerSearch(BaseSearch):
     """A search for runners, which applies to the runner objects."""
 
@@ -1,7 +1,7 @@
 from abc import ABC, abstractmethod
 from typing import Any, Callable, Dict, List, Optional
 
-from lutris.util.strings import strip_accents
+from lutris.util.strings import fold_search_text
 
 FLAG_TEXTS: Dict[str, Optional[bool]] = {"true": True, "yes": True, "false": False, "no": False}
 
@@ -128,15 +128,11 @@ class TextPredicate(SearchPredicate):
     def __init__(self, match_text: str, text_function: Callable[[Any], Optional[str]], tag: str):
         self.tag = tag
         self.match_text = match_text
-        self.stripped_text = strip_accents(match_text).casefold()
+        self.stripped_text = fold_search_text(match_text)
         self.text_function = text_function
 
     def accept(self, candidate: Any) -> bool:
-        candidate_text = self.text_function(candidate)
-        if not candidate_text:
-            return False
-
-        candidate_text = strip_accents(candidate_text).casefold()
+        candidate_text = fold_search_text(self.text_function(candidate))
         return bool(candidate_text and self.stripped_text in candidate_text)
 
     def __str__(self):
@@ -162,8 +162,7 @@ class AmazonService(OnlineService):
             logger.error("User not connected to Amazon")
             return
         games = [AmazonGame.new_from_amazon_game(game) for game in self.get_library()]
-        for game in games:
-            game.save()
+        AmazonGame.save_many(games)
         return games
 
     def save_user_data(self, user_data):
@@ -12,8 +12,14 @@ from lutris import api, settings
 from lutris.api import get_game_installers
 from lutris.config import write_game_config
 from lutris.database import sql
-from lutris.database.games import add_game, get_game_by_field, get_game_for_service, get_games
-from lutris.database.services import ServiceGameCollection
+from lutris.database.games import (
+    add_game,
+    get_all_installed_game_for_service,
+    get_game_by_field,
+    get_game_for_service,
+    get_games,
+)
+from lutris.database.services import ServiceGameCollection, ServiceGameSync
 from lutris.game import GAME_UPDATED, Game
 from lutris.gui.dialogs import NoticeDialog
 from lutris.gui.dialogs.webconnect_dialog import WebConnectDialog
@@ -78,6 +84,8 @@ class LutrisCoverartMedium(LutrisCoverart):
 
 SERVICE_GAMES_LOADING = NotificationSource()
 SERVICE_GAMES_LOADED = NotificationSource()
+# Fired with the service and the appids of the changed games, or None if the whole library may have changed
+SERVICE_GAMES_UPDATED = NotificationSource()
 SERVICE_LOGIN = NotificationSource()
 SERVICE_LOGOUT = NotificationSource()
 
@@ -140,22 +148,27 @@ class BaseService:
         def do_reload():
             if self.is_loading:
                 logger.warning("'%s' games are already loading", self.name)
-                return
+                return None
 
             try:
                 self.is_loading = True
 
-                self.wipe_game_cache()
-                self.load()
-                self.load_icons()
+                installed_games = set(get_all_installed_game_for_service(self.id))
+                sync = self.sync_games()
+                self.load_icons(sync.added + sync.changed)
                 self.add_installed_games()
                 logger.debug("'%s' games reloaded", self.name)
+                if sync.added or sync.removed or installed_games != set(get_all_installed_game_for_service(self.id)):
+                    return None
+                return sync.changed
             finally:
                 self.is_loading = False
 
-        def reload_cb(_result, error):
+        def reload_cb(changed_appids, error):
             logger.debug("Reload callback")
             SERVICE_GAMES_LOADED.fire(self)
+            if changed_appids is None or changed_appids:
+                SERVICE_GAMES_UPDATED.fire(self, changed_appids)
             reloaded_callback(error)
 
         SERVICE_GAMES_LOADING.fire(self)
@@ -164,8 +177,23 @@ class BaseService:
     def load(self):
         logger.warning("Load method not implemented")
 
-    def load_icons(self):
-        """Download all game media from the service"""
+    def sync_games(self) -> ServiceGameSync:
+        """Reload the games from the service, only writing to the database the
+        games that were added, changed or removed since the last load."""
+        self.wipe_library_cache()
+        with ServiceGameSync(self.id) as sync:
+            self.load()
+        logger.info(
+            "%s library synced: %s added, %s changed, %s removed",
+            self.name,
+            len(sync.added),
+            len(sync.changed),
+            len(sync.removed),
+        )
+        return sync
+
+    def load_icons(self, appids=None):
+        """Download game media from the service, for all games or only those in `appids`"""
         logger.debug("Loading icons...")
         all_medias = self.medias.copy()
         all_medias.update(self.extra_medias)
@@ -174,14 +202,19 @@ class BaseService:
 
         # Download icons
         for service_media in service_medias:
-            media_urls = service_media.get_media_urls()
+            media_urls = service_media.get_media_urls(appids)
             download_media(media_urls, service_media)
 
         # Process icons
         for service_media in service_medias:
             service_media.render()
 
+    def wipe_library_cache(self):
+        """Delete any copy of the library downloaded from the service, so that the
+        next load gets fresh data."""
+
     def wipe_game_cache(self):
+        self.wipe_library_cache()
         logger.debug("Deleting games from service-games for %s", self.id)
         sql.db_delete(settings.DB_PATH, "service_games", "service", self.id)
 
@@ -505,15 +538,14 @@ class OnlineService(BaseService):
             return False
         return all(system.path_exists(path) for path in self.credential_files)
 
-    def wipe_game_cache(self):
-        """Wipe the game cache, allowing it to be reloaded"""
+    def wipe_library_cache(self):
+        """Delete the library cache, allowing it to be reloaded"""
         if self.cache_path:
             logger.debug("Deleting %s cache %s", self.id, self.cache_path)
             if os.path.isdir(self.cache_path):
                 shutil.rmtree(self.cache_path)
             elif system.path_exists(self.cache_path):
                 os.remove(self.cache_path)
-        super().wipe_game_cache()
 
     def logout(self):
         """Disconnect from the service by removing all credentials"""
@@ -122,8 +122,7 @@ class BattleNetService(BaseService):
 
     def load(self):
         games = [BattleNetGame.create(game) for game in GAME_IDS.values()]
-        for game in games:
-            game.save()
+        BattleNetGame.save_many(games)
         return games
 
     def _mark_games_uninstalled(self):
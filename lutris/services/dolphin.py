@@ -36,8 +36,7 @@ class DolphinService(BaseService):
             return
         cache_reader = DolphinCacheReader()
         dolphin_games = [DolphinGame.new_from_cache(game) for game in cache_reader.get_games()]
-        for game in dolphin_games:
-            game.save()
+        DolphinGame.save_many(dolphin_games)
         return dolphin_games
 
     def generate_installer(self, db_game):
@@ -352,9 +352,8 @@ class EAAppService(OnlineService):
         logger.info("Retrieved %s games from EA library", len(games))
         ea_games = []
         for game in games:
-            ea_game = EAAppGame.new_from_api(game)
-            ea_game.save()
-            ea_games.append(ea_game)
+            ea_games.append(EAAppGame.new_from_api(game))
+        EAAppGame.save_many(ea_games)
         return ea_games
 
     def get_library(self, user_id):
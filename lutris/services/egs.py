@@ -311,8 +311,8 @@ class EpicGamesStoreService(OnlineService):
                 logger.exception("Unable to interpret EGS game: %s", ex)
                 logger.info("EGS game skipped: %s", game)
                 continue
-            egs_game.save()
             egs_games.append(egs_game)
+        EGSGame.save_many(egs_games)
         return egs_games
 
     def install_from_egs(self, egs_game, manifest):
@@ -67,12 +67,11 @@ class FlathubService(BaseService):
     runner = "flatpak"
     game_class = FlathubGame
 
-    def wipe_game_cache(self):
-        """Wipe the game cache, allowing it to be reloaded"""
+    def wipe_library_cache(self):
+        """Delete the library cache, allowing it to be reloaded"""
         if system.path_exists(self.cache_path):
             logger.debug("Deleting %s cache %s", self.id, self.cache_path)
             os.remove(self.cache_path)
-        super().wipe_game_cache()
 
     def get_flatpak_cmd(self):
         flatpak_abspath = shutil.which("flatpak")
@@ -92,8 +91,7 @@ class FlathubService(BaseService):
         flathub_games = []
         for game in entries:
             flathub_games.append(FlathubGame.new_from_flathub_game(game))
-        for game in flathub_games:
-            game.save()
+        FlathubGame.save_many(flathub_games)
         return flathub_games
 
     def install(self, db_game):
@@ -151,9 +151,8 @@ class GameJoltService(OnlineService):
             if not self._has_downloadable_builds(game_data):
                 continue
 
-            game = GameJoltGame.new(game_data)
-            game.save()
-            result.append(game)
+            result.append(GameJoltGame.new(game_data))
+        GameJoltGame.save_many(result)
         logger.debug("GameJolt: loaded %d games with downloadable builds", len(result))
         return result
 
@@ -152,8 +152,7 @@ class GOGService(OnlineService):
         except AuthenticationError as ex:
             logger.warning("GOG session expired during library load")
             raise AuthTokenExpiredError("GOG token expired, please log in again") from ex
-        for game in games:
-            game.save()
+        GOGGame.save_many(games)
         self.match_games()
         return games
 
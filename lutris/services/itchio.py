@@ -197,10 +197,9 @@ class ItchIoService(OnlineService):
         for game in library:
             if game["title"] in seen:
                 continue
-            _game = ItchIoGame.new(game)
-            games.append(_game)
-            _game.save()
+            games.append(ItchIoGame.new(game))
             seen.add(game["title"])
+        ItchIoGame.save_many(games)
         return games
 
     def make_api_request(self, path, query=None):
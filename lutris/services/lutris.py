@@ -103,16 +103,14 @@ class LutrisService(OnlineService):
     def load(self):
         lutris_games = self.get_library()
         logger.debug("Loaded %s games from Lutris library", len(lutris_games))
-        for game in lutris_games:
-            lutris_game = LutrisGame.new_from_api(game)
-            lutris_game.save()
+        LutrisGame.save_many([LutrisGame.new_from_api(game) for game in lutris_games])
         logger.debug("Matching with already installed games")
         self.match_games()
         logger.debug("Lutris games loaded")
         return lutris_games
 
-    def load_icons(self):
-        super().load_icons()
+    def load_icons(self, appids=None):
+        super().load_icons(appids)
         # Also load any media for games that use Lutris media,
         # but are not in the Lutris library.
         sync_media()
@@ -38,6 +38,7 @@ class ScummvmService(BaseService):
         config.read(SCUMMVM_CONFIG_FILE)
         config_sections = config.sections()
 
+        scummvm_games = []
         for section in config_sections:
             if section == "scummvm":
                 continue
@@ -48,7 +49,8 @@ class ScummvmService(BaseService):
             game.runner = "scummvm"
             game.lutris_slug = game.slug
             game.details = json.dumps({"path": config[section]["path"]})
-            game.save()
+            scummvm_games.append(game)
+        ScummvmGame.save_many(scummvm_games)
 
     def generate_installer(self, db_game):
         details = json.loads(db_game["details"])
@@ -1,7 +1,5 @@
 """Service game module"""
 
-from lutris import settings
-from lutris.database import sql
 from lutris.database.services import ServiceGameCollection
 from lutris.services.service_media import ServiceMedia
 
@@ -24,9 +22,9 @@ class ServiceGame:
         self.icon = None  # Game icon
         self.details = None  # Additional details for the game
 
-    def save(self):
-        """Save this game to database"""
-        game_data = {
+    def get_db_data(self):
+        """Return the fields of this game as stored in the database"""
+        return {
             "service": self.service,
             "appid": self.appid,
             "name": self.name,
@@ -36,8 +34,12 @@ class ServiceGame:
             "logo": self.logo,
             "details": str(self.details),
         }
-        existing_game = ServiceGameCollection.get_game(self.service, self.appid)
-        if existing_game:
-            sql.db_update(settings.DB_PATH, "service_games", game_data, {"id": existing_game["id"]})
-        else:
-            sql.db_insert(settings.DB_PATH, "service_games", game_data)
+
+    def save(self):
+        """Save this game to database"""
+        self.save_many([self])
+
+    @staticmethod
+    def save_many(service_games):
+        """Save several games to the database in a single transaction"""
+        ServiceGameCollection.save_games([game.get_db_data() for game in service_games])
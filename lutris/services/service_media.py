@@ -2,7 +2,7 @@ import json
 import os
 import random
 import time
-from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Tuple, cast
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, cast
 
 from lutris.database.services import ServiceGameCollection
 from lutris.util import system
@@ -138,11 +138,20 @@ class ServiceMedia:
             return None
         return self.url_pattern % details[self.api_field]
 
-    def get_media_urls(self) -> Dict[str, str]:
-        """Return URLs for icons and logos from a service"""
+    def get_media_urls(self, appids: Optional[Sequence[str]] = None) -> Dict[str, str]:
+        """Return URLs for icons and logos from a service. If `appids` is given, only the games
+        it contains and those whose media is missing are included."""
         if self.source == "local":
             return {}
         service_games = ServiceGameCollection.get_for_service(self.service)
+        if appids is not None:
+            appids = set(appids)
+            service_games = [
+                game
+                for game in service_games
+                if str(game["appid"]) in appids
+                or not system.path_exists(os.path.join(self.dest_path, self.get_filename(cast(str, game["slug"]))))
+            ]
         medias: Dict[str, str] = {}
         for game in service_games:
             if not game["details"]:
@@ -17,8 +17,8 @@ from lutris.services.lutris import sync_media
 from lutris.services.service_game import ServiceGame
 from lutris.services.service_media import ServiceMedia
 from lutris.util.log import logger
-from lutris.util.steam.appmanifest import AppManifest, get_appmanifests
 from lutris.util.steam.config import get_active_steamid64, get_steam_library, get_steamapps_dirs
+from lutris.util.steam.watcher import MANIFEST_INDEX
 from lutris.util.strings import slugify
 
 
@@ -96,11 +96,13 @@ class SteamService(BaseService):
         steam_games = get_steam_library(steamid)
         if not steam_games:
             raise RuntimeError(_("Failed to load games. Check that your profile is set to public during the sync."))
-        for steam_game in steam_games:
-            if steam_game["appid"] in self.excluded_appids:
-                continue
-            game = self.game_class.new_from_steam_game(steam_game)
-            game.save()
+        self.game_class.save_many(
+            [
+                self.game_class.new_from_steam_game(steam_game)
+                for steam_game in steam_games
+                if steam_game["appid"] not in self.excluded_appids
+            ]
+        )
         self.match_games()
         return steam_games
 
@@ -165,74 +167,100 @@ class SteamService(BaseService):
     def steamapps_paths(self):
         return get_steamapps_dirs()
 
-    def add_installed_games(self):
-        """Syncs installed Steam games with Lutris"""
-        stats = {"installed": 0, "removed": 0, "deduped": 0, "paths": []}
-        installed_slugs = []
-        installed_appids = []
-
-        for steamapps_path in self.steamapps_paths:
-            for appmanifest_file in get_appmanifests(steamapps_path):
-                if steamapps_path not in stats["paths"]:
-                    stats["paths"].append(steamapps_path)
-                app_manifest_path = os.path.join(steamapps_path, appmanifest_file)
+    def _get_installed_game_appids(self):
+        """Return the AppIDs of the installed games this service removes when they
+        leave the Steam library, by game id. AppIDs are kept in the service_id column;
+        those missing are read from the game configs once and stored there."""
+        if self.runner == "steam":
+            query = "select id, service_id from games where installed = 1 and runner = ?"
+            params = (self.runner,)
+        else:
+            query = "select id, service_id from games where installed = 1 and service = ?"
+            params = (self.id,)
+        appids = {}
+        for db_game in sql.db_query(settings.DB_PATH, query, params):
+            game_id = str(db_game["id"])
+            appid = db_game["service_id"]
+            if not appid:
+                steam_game = Game(game_id)
+                if steam_game.config is None:
+                    logger.warning("Steam game %s has no config", game_id)
+                    continue
                 try:
-                    app_manifest = AppManifest(app_manifest_path)
-                    installed_appids.append(app_manifest.steamid)
-                    slug = self.install_from_steam(app_manifest)
-                    if slug:
-                        installed_slugs.append(slug)
-                    stats["installed"] += 1
-                except Exception as ex:
-                    logger.error("Failed to process app manifest %s: %s", app_manifest_path, ex)
+                    appid = str(steam_game.config.game_level["game"]["appid"])
+                except KeyError:
+                    logger.warning("Steam game %s has no AppID", game_id)
+                    continue
+                sql.db_update(settings.DB_PATH, "games", {"service_id": appid}, conditions={"id": game_id})
+            appids[game_id] = appid
+        return appids
 
-        if stats["paths"]:
-            logger.debug("%s Steam games detected and installed", stats["installed"])
-            logger.debug("Games found in: %s", ", ".join(stats["paths"]))
+    def add_installed_games(self):
+        """Syncs installed Steam games with Lutris
+
+        App manifests are only parsed again when they change (see ManifestIndex),
+        and the AppIDs of the games come from the database, so that removals and
+        deduplication are set operations."""
+        stats = {"installed": 0, "removed": 0, "deduped": 0}
+        steamapps_paths = self.steamapps_paths
+        changed_paths = MANIFEST_INDEX.update(steamapps_paths)
+        manifests = MANIFEST_INDEX.get_manifests(steamapps_paths)
+        if manifests:
+            logger.debug("%s Steam games detected, %s app manifests changed", len(manifests), len(changed_paths))
         else:
             logger.debug("No Steam folder found with games")
 
-        db_games = get_games(filters={"runner": "steam"})
-        for db_game in db_games:
-            steam_game = Game(db_game["id"])
-            if steam_game.config is None:
-                logger.warning("Steam game %s has no config", db_game["id"])
-                continue
-            try:
-                appid = steam_game.config.game_level["game"]["appid"]
-            except KeyError:
-                logger.warning("Steam game %s has no AppID", db_game["id"])
+        installed_appids = {manifest.steamid for manifest in manifests}
+        installer_slugs = {
+            db_game["installer_slug"]
+            for db_game in sql.db_query(
+                settings.DB_PATH, "select installer_slug from games where installer_slug like ?", ("%s-%%" % self.id,)
+            )
+        }
+        installed_slugs = []
+        for manifest in manifests:
+            if "%s-%s" % (self.id, manifest.steamid) in installer_slugs:
                 continue
+            slug = self.install_from_steam(manifest)
+            if slug:
+                installed_slugs.append(slug)
+                stats["installed"] += 1
+        logger.debug("%s Steam games added", stats["installed"])
+
+        for game_id, appid in self._get_installed_game_appids().items():
             if appid not in installed_appids:
                 try:
-                    steam_game.uninstall()
+                    Game(game_id).uninstall()
                     stats["removed"] += 1
                 except Exception as ex:
                     logger.error("Failed to uninstall game %s: %s", appid, ex)
-
         logger.debug("%s Steam games removed", stats["removed"])
 
         db_appids = defaultdict(list)
-        db_games = get_games(filters={"service": "steam"})
-        for db_game in db_games:
-            db_appids[db_game["service_id"]].append(db_game["id"])
+        for db_game in sql.db_query(
+            settings.DB_PATH, "select id, service_id, playtime from games where service = ?", (self.id,)
+        ):
+            db_appids[db_game["service_id"]].append(db_game)
 
-        for _appid, game_ids in db_appids.items():
-            if len(game_ids) == 1:
+        for _appid, db_games in db_appids.items():
+            if len(db_games) == 1:
                 continue
-            for game_id in game_ids:
-                steam_game = Game(game_id)
+            # Keep the game played the most, remove the unplayed duplicates
+            db_games.sort(key=lambda db_game: (-(db_game["playtime"] or 0), db_game["id"]))
+            for db_game in db_games[1:]:
+                if db_game["playtime"]:
+                    continue
+                steam_game = Game(str(db_game["id"]))
                 if steam_game.config is None:
-                    logger.warning("Steam game %s has no config for deduplication", game_id)
+                    logger.warning("Steam game %s has no config for deduplication", db_game["id"])
                     continue
-                if not steam_game.playtime:
-                    try:
-                        # Unsafe to emit a signal from a worker thread!
-                        steam_game.uninstall()
-                        steam_game.delete()
-                        stats["deduped"] += 1
-                    except Exception as ex:
-                        logger.error("Failed to deduplicate game %s: %s", game_id, ex)
+                try:
+                    # Unsafe to emit a signal from a worker thread!
+                    steam_game.uninstall()
+                    steam_game.delete()
+                    stats["deduped"] += 1
+                except Exception as ex:
+                    logger.error("Failed to deduplicate game %s: %s", db_game["id"], ex)
 
         sync_media(installed_slugs)
         logger.debug("%s Steam games deduplicated", stats["deduped"])
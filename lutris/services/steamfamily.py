@@ -145,10 +145,12 @@ class SteamFamilyService(SteamService, OnlineService):
             except:
                 logger.warning("Failed to get a new access token")
                 raise AuthTokenExpiredError("Access Token expired") from ex
-        for steam_game in library:
-            if steam_game["appid"] in self.excluded_appids:
-                continue
-            game = self.game_class.new_from_steamfamily_game(steam_game)
-            game.save()
+        self.game_class.save_many(
+            [
+                self.game_class.new_from_steamfamily_game(steam_game)
+                for steam_game in library
+                if steam_game["appid"] not in self.excluded_appids
+            ]
+        )
         self.match_games()
         return library
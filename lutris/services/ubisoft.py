@@ -196,15 +196,12 @@ class UbisoftConnectService(OnlineService):
                             is_pc = True
                 if not is_pc:
                     continue
-            ubi_game = UbisoftGame.new_from_api(game)
-            ubi_game.save()
-            ubi_games.append(ubi_game)
+            ubi_games.append(UbisoftGame.new_from_api(game))
         configuration_data = self.get_configurations()
         config_parser = UbisoftParser()
         for game in config_parser.parse_games(configuration_data):
-            ubi_game = UbisoftGame.new_from_api(game)
-            ubi_game.save()
-            ubi_games.append(ubi_game)
+            ubi_games.append(UbisoftGame.new_from_api(game))
+        UbisoftGame.save_many(ubi_games)
         return ubi_games
 
     @property
@@ -100,8 +100,7 @@ class XDGService(BaseService):
     def load(self):
         """Return the list of games stored in the XDG menu."""
         xdg_games = [XDGGame.new_from_xdg_app(app) for app in self.iter_xdg_games()]
-        for game in xdg_games:
-            game.save()
+        XDGGame.save_many(xdg_games)
         return xdg_games
 
     def generate_installer(self, db_game):
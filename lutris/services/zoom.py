@@ -109,8 +109,7 @@ class ZoomService(OnlineService):
             logger.error("User not connected to Zoom")
             return []
         games = [ZoomGame.new_from_zoom_game(game) for game in self.get_library()]
-        for game in games:
-            game.save()
+        ZoomGame.save_many(games)
         self.match_games()
         return games
 
@@ -37,6 +37,7 @@ WINE_DIR: str = os.path.join(RUNNER_DIR, "wine")
 
 SHADER_CACHE_DIR = os.path.join(CACHE_DIR, "shaders")
 INSTALLER_CACHE_DIR = os.path.join(CACHE_DIR, "installer")
+THUMBNAIL_CACHE_DIR = os.path.join(CACHE_DIR, "thumbnails")
 BANNER_PATH = os.path.join(DATA_DIR, "banners")
 COVERART_PATH = os.path.join(DATA_DIR, "coverart")
 
@@ -44,12 +45,18 @@ RUNTIME_VERSIONS_PATH = os.path.join(CACHE_DIR, "versions.json")
 ICON_PATH = os.path.join(GLib.get_user_data_dir(), "icons", "hicolor", "128x128", "apps")
 
 DB_PATH = sio.read_setting("pga_path") or os.path.join(DATA_DIR, "pga.db")
+HASH_CACHE_PATH = os.path.join(CACHE_DIR, "hashes.db")
+TOSEC_DB_PATH = os.path.join(CACHE_DIR, "tosec.db")
+API_CACHE_DIR = os.path.join(CACHE_DIR, "api")
 
 TEST_TEMP_DIR = TemporaryDirectory()
 test_modules = ["unittest", "nosetests", "nose2", "nose", "pytest"]
 for test_module in test_modules:
     if test_module in sys.modules.keys():
         DB_PATH = os.path.join(TEST_TEMP_DIR.name, "pga.db")
+        HASH_CACHE_PATH = os.path.join(TEST_TEMP_DIR.name, "hashes.db")
+        TOSEC_DB_PATH = os.path.join(TEST_TEMP_DIR.name, "tosec.db")
+        API_CACHE_DIR = os.path.join(TEST_TEMP_DIR.name, "api")
         break
 
 
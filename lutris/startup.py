@@ -44,6 +44,7 @@ def init_dirs():
         settings.CACHE_DIR,
         settings.SHADER_CACHE_DIR,
         settings.INSTALLER_CACHE_DIR,
+        settings.THUMBNAIL_CACHE_DIR,
         settings.TMP_DIR,
     ]
     for directory in directories:
@@ -0,0 +1,259 @@
+"""Download of whole sets of files, such as the files of an InstallerFileCollection.
+
+A :class:`DownloadManager` runs the downloads of a file set on a bounded
+pool of worker threads, smallest files first, so games made of thousands
+of small files don't wait on the set-up of each download in turn. The
+downloads share one ``requests.Session`` per host, which keeps their
+connections alive, and a :class:`RateLimiter` when the total bandwidth is
+capped by the ``download_bandwidth_limit`` setting (in KiB/s).
+"""
+
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from lutris import __version__, settings
+from lutris.util.download_cache import CacheState, create_cache_lock, update_cache_lock
+from lutris.util.downloader import Downloader
+from lutris.util.log import logger
+
+
+def get_bandwidth_limit() -> int:
+    """Return the cap on the total download bandwidth in bytes/second, or 0 if there's none."""
+    try:
+        return max(0, int(settings.read_setting("download_bandwidth_limit") or 0)) * 1024
+    except ValueError:
+        logger.warning("Invalid download_bandwidth_limit setting, downloads are not capped")
+        return 0
+
+
+class RateLimiter:
+    """A token bucket that caps the total throughput of the downloads sharing it.
+
+    Downloaders call :meth:`consume` for each chunk they receive; it sleeps as
+    long as needed to keep the average rate at ``rate`` bytes/second, allowing
+    bursts of up to one second's worth.
+    """
+
+    def __init__(self, rate: int) -> None:
+        self.rate = rate
+        self._lock = threading.Lock()
+        self._tokens = float(rate)
+        self._last_time = time.monotonic()
+
+    def consume(self, size: int) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.rate, self._tokens + (now - self._last_time) * self.rate) - size
+            self._last_time = now
+            delay = -self._tokens / self.rate if self._tokens < 0 else 0
+        if delay:
+            time.sleep(delay)
+
+
+class DownloadManager:
+    """Downloads a set of installer files, and reports their aggregate progress.
+
+    Each file is downloaded to ``<dest_file>.tmp`` by its own downloader (its
+    ``downloader_class``, or Downloader), and renamed once complete. Files
+    already at their destination are skipped. A failed file is retried up to
+    ``max_retries`` times before the whole set fails.
+
+    Like Downloader, this is polled from the main thread: start() it, then
+    read ``state``, ``downloaded_size`` and ``active_files`` regularly.
+    """
+
+    (INIT, DOWNLOADING, CANCELLED, ERROR, COMPLETED) = list(range(5))
+
+    DEFAULT_WORKERS = 8
+    # Files at least this large, or with a downloader class of their own, which
+    # may open many connections, are only downloaded MAX_LARGE_FILES at a time.
+    LARGE_FILE_SIZE = 256 * 1024 * 1024
+    MAX_LARGE_FILES = 2
+
+    def __init__(
+        self,
+        files: List[Any],
+        max_workers: int = DEFAULT_WORKERS,
+        bandwidth_limit: Optional[int] = None,
+        max_retries: int = 3,
+    ) -> None:
+        self.files = sorted(files, key=self._get_file_order)
+        self.max_workers = max(1, max_workers)
+        if bandwidth_limit is None:
+            bandwidth_limit = get_bandwidth_limit()
+        self.rate_limiter = RateLimiter(bandwidth_limit) if bandwidth_limit else None
+        self.max_retries = max_retries
+
+        self.state = self.INIT
+        self.error: Optional[Exception] = None
+        self.num_files_downloaded = 0
+        self._completed_size = 0
+        self._lock = threading.Lock()
+        self._stop_request = threading.Event()
+        self._next_index = 0
+        self._running_workers = 0
+        self._active: Dict[Any, Downloader] = {}
+        self._sessions: Dict[str, requests.Session] = {}
+        self._large_file_slots = threading.Semaphore(self.MAX_LARGE_FILES)
+
+    def __repr__(self):
+        return "download manager for %d files" % len(self.files)
+
+    @staticmethod
+    def _get_file_order(file) -> float:
+        """Files of unknown size go last, after the largest ones."""
+        return file.size if file.size is not None else float("inf")
+
+    def _is_large_file(self, file) -> bool:
+        return bool(getattr(file, "downloader_class", None)) or (file.size or 0) >= self.LARGE_FILE_SIZE
+
+    @property
+    def downloaded_size(self) -> int:
+        """Bytes downloaded so far, across completed and active downloads."""
+        with self._lock:
+            return self._completed_size + sum(downloader.downloaded_size for downloader in self._active.values())
+
+    @property
+    def active_files(self) -> List[Any]:
+        """The files being downloaded right now."""
+        with self._lock:
+            return list(self._active)
+
+    def get_session(self, url: str) -> requests.Session:
+        """Return the session shared by the downloads from the host of 'url'."""
+        host = urlparse(url).netloc
+        with self._lock:
+            session = self._sessions.get(host)
+            if not session:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.headers["User-Agent"] = "Lutris/%s" % __version__
+                self._sessions[host] = session
+            return session
+
+    def start(self) -> None:
+        """Start downloading the files in the background."""
+        logger.debug("⬇ %d files, %d at a time", len(self.files), self.max_workers)
+        self.state = self.DOWNLOADING
+        with self._lock:
+            self._running_workers = min(self.max_workers, len(self.files)) or 1
+        for index in range(self._running_workers):
+            thread = threading.Thread(target=self._worker_loop, name="DownloadManager-%d" % index, daemon=True)
+            thread.start()
+
+    def cancel(self) -> None:
+        """Stop all downloads; the partial files are removed."""
+        logger.debug("❌ %s", self)
+        self.state = self.CANCELLED
+        self._stop_request.set()
+        self._cancel_active()
+
+    def _cancel_active(self) -> None:
+        with self._lock:
+            downloaders = list(self._active.values())
+        for downloader in downloaders:
+            downloader.cancel()
+
+    def _next_file(self) -> Optional[Any]:
+        """Return the next file to download, skipping those already there."""
+        while not self._stop_request.is_set():
+            with self._lock:
+                if self._next_index >= len(self.files):
+                    return None
+                file = self.files[self._next_index]
+                self._next_index += 1
+            if os.path.exists(file.dest_file):
+                logger.info("File exists, skipping download: '%s'", file.dest_file)
+                size = os.path.getsize(file.dest_file)
+                with self._lock:
+                    self._completed_size += size
+                    self.num_files_downloaded += 1
+                continue
+            return file
+        return None
+
+    def _worker_loop(self) -> None:
+        try:
+            while True:
+                file = self._next_file()
+                if file is None:
+                    break
+                if self._is_large_file(file):
+                    with self._large_file_slots:
+                        self._download_file(file)
+                else:
+                    self._download_file(file)
+        except Exception as ex:
+            self._on_failed(ex)
+        finally:
+            with self._lock:
+                self._running_workers -= 1
+                is_last = self._running_workers == 0
+            if is_last and self.state == self.DOWNLOADING:
+                logger.debug("✅ %s", self)
+                self.state = self.COMPLETED
+
+    def _create_downloader(self, file) -> Downloader:
+        downloader_class = getattr(file, "downloader_class", None) or Downloader
+        downloader = downloader_class(
+            file.url,
+            file.tmp_file,
+            referer=file.referer,
+            overwrite=True,
+            session=self.get_session(file.url),
+            hash_type=file.hash_type,
+        )
+        downloader.rate_limiter = self.rate_limiter
+        return downloader
+
+    def _download_file(self, file) -> None:
+        """Download one file, retrying it as needed; raises the last error if
+        it can't be downloaded."""
+        file.tmp_file = file.dest_file + ".tmp"
+        if os.path.exists(file.tmp_file):
+            os.remove(file.tmp_file)
+        create_cache_lock(file.dest_file, CacheState.DOWNLOADING)
+
+        for attempt in range(self.max_retries + 1):
+            if self._stop_request.is_set():
+                return
+            downloader = self._create_downloader(file)
+            with self._lock:
+                self._active[file] = downloader
+            try:
+                downloader.start()
+                if not downloader.join():
+                    return  # Cancelled
+                break
+            except Exception as ex:
+                if attempt >= self.max_retries or self._stop_request.is_set():
+                    raise
+                logger.warning(
+                    "Download of %s failed (attempt %d/%d): %s", file.url, attempt + 1, self.max_retries + 1, ex
+                )
+            finally:
+                with self._lock:
+                    del self._active[file]
+
+        os.rename(file.tmp_file, file.dest_file)
+        update_cache_lock(file.dest_file, CacheState.DOWNLOADED)
+        with self._lock:
+            self._completed_size += downloader.downloaded_size
+            self.num_files_downloaded += 1
+
+    def _on_failed(self, error: Exception) -> None:
+        if self.state != self.DOWNLOADING:
+            return
+        logger.error("Download of %s failed: %s", self, error)
+        self.error = error
+        self.state = self.ERROR
+        self._stop_request.set()
+        self._cancel_active()
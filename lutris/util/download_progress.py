@@ -16,6 +16,7 @@ a progress update never corrupts the file.
 import json
 import os
 import tempfile
+import threading
 import time
 from typing import Any, Dict, List, Tuple
 
@@ -31,10 +32,10 @@ class DownloadProgress:
     after each range finishes; the orchestrator calls :meth:`cleanup`
     once the full file is verified.
 
-    Thread-safety: :meth:`mark_range_complete` uses a file-level
-    atomic-replace strategy. Multiple threads may call it concurrently
-    as long as they pass non-overlapping (start, end) pairs, which is
-    guaranteed by the range-splitting logic in GOGDownloader.
+    Thread-safety: :meth:`mark_range_complete` and :meth:`split_range`
+    hold a lock while they update the data and save it, and saving uses
+    a file-level atomic-replace strategy; the writer thread and the
+    download workers of GOGDownloader call them concurrently.
     """
 
     PROGRESS_SUFFIX = ".progress"
@@ -43,6 +44,7 @@ class DownloadProgress:
         self.dest_path: str = dest_path
         self.progress_path: str = dest_path + self.PROGRESS_SUFFIX
         self._data: Dict[str, Any] = {}
+        self._lock = threading.Lock()
 
     # ------------------------------------------------------------------
     # Factory / lifecycle
@@ -120,11 +122,34 @@ class DownloadProgress:
             start: Inclusive start byte offset.
             end: Inclusive end byte offset.
         """
-        completed = self._data.get("completed_ranges", [])
-        pair = [start, end]
-        if pair not in completed:
-            completed.append(pair)
-            self._data["completed_ranges"] = completed
+        with self._lock:
+            completed = self._data.get("completed_ranges", [])
+            pair = [start, end]
+            if pair not in completed:
+                completed.append(pair)
+                self._data["completed_ranges"] = completed
+                self._data["updated_at"] = time.time()
+                self._save()
+
+    def split_range(self, start: int, end: int, split_at: int) -> None:
+        """Record that a planned range is now downloaded as two ranges.
+
+        This is called when an idle worker takes over the end of a range
+        another worker is still downloading.
+
+        Args:
+            start: Inclusive start byte offset of the range.
+            end: Inclusive end byte offset of the range.
+            split_at: Start byte offset of the second range.
+        """
+        with self._lock:
+            total = self._data.get("total_ranges", [])
+            try:
+                index = total.index([start, end])
+            except ValueError:
+                logger.warning("Range %d-%d to split is not in %s", start, end, self.progress_path)
+                return
+            total[index : index + 1] = [[start, split_at - 1], [split_at, end]]
             self._data["updated_at"] = time.time()
             self._save()
 
@@ -0,0 +1,196 @@
+"""Work-stealing scheduling of byte-range segments for parallel downloads.
+
+A file is split into small fixed-size segments, kept in a shared queue
+that the connections take their next segment from. Once the queue is
+empty, an idle connection takes over the back half of the largest
+segment still being downloaded, so one slow connection can't hold up
+the end of the download.
+
+The number of connections is adjusted as the download goes by a
+:class:`ConnectionController`, from the throughput they achieve.
+"""
+
+import threading
+from collections import deque
+from typing import Callable, Iterable, List, Optional, Set, Tuple
+
+
+class Segment:
+    """A byte range downloaded by one connection.
+
+    ``offset`` is the next byte to claim; ``end`` is inclusive, and moves
+    back when an idle connection takes over the rest of the segment.
+    """
+
+    def __init__(self, start: int, end: int) -> None:
+        self.start = start
+        self.end = end
+        self.offset = start
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return "Segment(%d-%d, at %d)" % (self.start, self.end, self.offset)
+
+    @property
+    def remaining(self) -> int:
+        """Number of bytes not yet claimed."""
+        return self.end + 1 - self.offset
+
+    def claim(self, size: int) -> Tuple[int, int, bool]:
+        """Claim up to ``size`` bytes at the offset, for data just received.
+
+        Returns:
+            Tuple of (offset, claimed size, whether the segment is now complete).
+            The claimed size is 0 once the segment is complete.
+        """
+        with self._lock:
+            offset = self.offset
+            claimed = max(0, min(size, self.end + 1 - offset))
+            self.offset += claimed
+            return offset, claimed, self.offset > self.end
+
+    def split(self, min_size: int) -> Optional["Segment"]:
+        """Split off the back half of the unclaimed bytes as a new segment,
+        if both halves are at least ``min_size`` bytes."""
+        with self._lock:
+            remaining = self.end + 1 - self.offset
+            if remaining < 2 * min_size:
+                return None
+            split_at = self.offset + remaining // 2
+            segment = Segment(split_at, self.end)
+            self.end = split_at - 1
+            return segment
+
+
+class SegmentScheduler:
+    """Hands out segments to the connections of a download.
+
+    Segments are given out front to back, so the file is written roughly
+    in order. When none are left, the largest segment in progress is split
+    and its back half given out instead.
+
+    Args:
+        ranges: ``(start, end)`` inclusive byte ranges to download.
+        min_split_size: Smallest segment that splitting may produce.
+        on_split: Called with ``(start, end, split_at)`` after the segment
+            that spanned ``start``-``end`` has been split at ``split_at``.
+    """
+
+    def __init__(
+        self,
+        ranges: Iterable[Tuple[int, int]],
+        min_split_size: int,
+        on_split: Optional[Callable[[int, int, int], None]] = None,
+    ) -> None:
+        self.min_split_size = min_split_size
+        self.on_split = on_split
+        self._lock = threading.Lock()
+        self._pending = deque(Segment(start, end) for start, end in ranges)
+        self._active: Set[Segment] = set()
+
+    def next_segment(self) -> Optional[Segment]:
+        """Return the segment a connection should download next, or None if
+        there's nothing left worth downloading on another connection."""
+        with self._lock:
+            if self._pending:
+                segment = self._pending.popleft()
+                self._active.add(segment)
+                return segment
+
+            if not self._active:
+                return None
+            largest = max(self._active, key=lambda s: s.remaining)
+            old_end = largest.end
+            segment = largest.split(self.min_split_size)
+            if segment:
+                if self.on_split:
+                    self.on_split(largest.start, old_end, segment.start)
+                self._active.add(segment)
+            return segment
+
+    def finish(self, segment: Segment) -> None:
+        """Called by a connection once it stops working on a segment."""
+        with self._lock:
+            self._active.discard(segment)
+
+    def has_work(self) -> bool:
+        """True if another connection would find something to download."""
+        with self._lock:
+            if self._pending:
+                return True
+            return any(segment.remaining >= 2 * self.min_split_size for segment in self._active)
+
+    @property
+    def active_segments(self) -> List[Segment]:
+        with self._lock:
+            return list(self._active)
+
+
+class ConnectionController:
+    """Picks the number of connections to use, by hill climbing on throughput.
+
+    After each measurement period it tries one connection more; the step is
+    kept if throughput rose by at least ``GAIN_THRESHOLD`` and taken back
+    otherwise. Once settled, it probes again every ``PROBE_PERIODS`` periods
+    or when throughput changes markedly, since the link may have changed.
+    At the maximum, it probes with one connection less instead, which is
+    kept if throughput holds up.
+    """
+
+    GAIN_THRESHOLD = 0.1
+    PROBE_PERIODS = 5
+
+    def __init__(self, initial: int, maximum: int, minimum: int = 1) -> None:
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.target = min(max(initial, self.minimum), self.maximum)
+        self._baseline: Optional[float] = None  # Throughput before the probe, or while settled
+        self._step = 0  # Change made by the probe in progress
+        self._settled_periods = 0
+        self._measured = False
+
+    def update(self, throughput: float) -> int:
+        """Take the throughput of the last period into account, and return
+        the number of connections to use from now on."""
+        if self._step:
+            if self._step > 0:
+                kept = throughput >= self._baseline * (1 + self.GAIN_THRESHOLD)
+            else:
+                kept = throughput >= self._baseline
+            if kept and self._step > 0 and self._probe(1):
+                self._baseline = throughput
+                return self.target
+            if not kept:
+                self.target -= self._step
+            self._step = 0
+            self._baseline = None  # Measure again with the connections kept
+            self._settled_periods = 0
+            return self.target
+
+        if self._baseline is None:
+            self._baseline = throughput
+            if not self._measured:
+                self._measured = True
+                self._probe_either_way()
+            return self.target
+
+        self._settled_periods += 1
+        changed = abs(throughput - self._baseline) > self._baseline * self.GAIN_THRESHOLD
+        if changed or self._settled_periods >= self.PROBE_PERIODS:
+            self._baseline = throughput
+            self._settled_periods = 0
+            self._probe_either_way()
+        return self.target
+
+    def _probe_either_way(self) -> None:
+        if not self._probe(1):
+            self._probe(-1)
+
+    def _probe(self, step: int) -> bool:
+        """Change the connection count by 'step', if within bounds."""
+        target = self.target + step
+        if target < self.minimum or target > self.maximum:
+            return False
+        self.target = target
+        self._step = step
+        return True
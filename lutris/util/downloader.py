@@ -1,4 +1,5 @@
 import bisect
+import hashlib
 import os
 import threading
 import time
@@ -7,7 +8,7 @@ from typing import Any, Dict, Optional
 import requests
 
 from lutris import __version__
-from lutris.util import jobs
+from lutris.util import hashing, jobs
 from lutris.util.log import logger
 
 # `time.time` can skip ahead or even go backwards if the current
@@ -62,6 +63,7 @@ class Downloader:
         headers: Dict[str, str] = None,
         session: Optional[requests.Session] = None,
         chunk_size: int = DEFAULT_CHUNK_SIZE,
+        hash_type: Optional[str] = None,
     ) -> None:
         self.url: str = url
         self.dest: str = dest
@@ -71,6 +73,8 @@ class Downloader:
         self.referer = referer
         self.session = session
         self.chunk_size = chunk_size
+        # The checksum of this type is computed as the file is written, see get_file_checksum()
+        self.hash_type = hash_type
         self.stop_request = None
         self.thread = None
 
@@ -90,6 +94,10 @@ class Downloader:
         self.time_left_check_time = 0
         self.file_pointer = None
         self.progress_event = threading.Event()
+        self.checksum: Optional[str] = None  # Set on completion, if there's a hash_type
+        self._hasher = None
+        # Shared by the downloads whose total bandwidth is capped, see DownloadManager
+        self.rate_limiter = None
 
         # Stall detection state
         self._stall_start: Optional[float] = None  # monotonic time when speed first dropped
@@ -148,6 +156,7 @@ class Downloader:
         if self.overwrite and os.path.isfile(self.dest):
             os.remove(self.dest)
         self.file_pointer = open(self.dest, "wb")  # pylint: disable=consider-using-with
+        self._hasher = self._create_hasher()
         self.thread = jobs.AsyncCall(self.async_download, None)
         self.stop_request = self.thread.stop_request
 
@@ -167,6 +176,19 @@ class Downloader:
         self.speed_check_time = 0
         self.time_left_check_time = 0
         self.file_pointer = None
+        self.checksum = None
+        self._hasher = None
+
+    def _create_hasher(self):
+        """Return a new hasher for the hash_type, or None if there's none."""
+        return hashlib.new(self.hash_type) if self.hash_type else None
+
+    def _store_checksum(self, hasher) -> None:
+        """Records the checksum of the completed file, so that verifying it
+        needn't read it all again."""
+        if hasher:
+            self.checksum = hasher.hexdigest()
+            hashing.set_file_hash(self.dest, self.hash_type, self.checksum)
 
     def check_progress(self, blocking=False):
         """Append last downloaded chunk to dest file and store stats.
@@ -208,6 +230,7 @@ class Downloader:
             self.file_pointer = None
         if os.path.isfile(self.dest):
             os.remove(self.dest)
+        self.progress_event.set()  # Wake up join()
 
     def async_download(self):
         """Execute download with stall detection and retry logic.
@@ -308,6 +331,10 @@ class Downloader:
                 stream_bytes += len(chunk)
                 self.downloaded_size += len(chunk)
                 self.file_pointer.write(chunk)
+                if self._hasher:
+                    self._hasher.update(chunk)
+                if self.rate_limiter:
+                    self.rate_limiter.consume(len(chunk))
                 self._check_stall(stream_bytes)
             self.progress_event.set()
 
@@ -321,6 +348,7 @@ class Downloader:
         if self.file_pointer:
             self.file_pointer.close()
         self.file_pointer = open(self.dest, "wb")  # pylint: disable=consider-using-with
+        self._hasher = self._create_hasher()
 
     @staticmethod
     def _is_retryable_http_error(error: requests.HTTPError) -> bool:
@@ -343,6 +371,7 @@ class Downloader:
         if self.file_pointer:
             self.file_pointer.close()
             self.file_pointer = None
+        self.progress_event.set()
 
     def on_download_completed(self):
         if self.state == self.CANCELLED:
@@ -358,6 +387,8 @@ class Downloader:
         self.state = self.COMPLETED
         self.file_pointer.close()
         self.file_pointer = None
+        self._store_checksum(self._hasher)
+        self.progress_event.set()
 
     def get_stats(self):
         """Calculate and store download stats."""
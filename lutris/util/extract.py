@@ -1,24 +1,100 @@
 import gzip
+import hashlib
+import json
 import os
+import re
 import shutil
+import stat
 import subprocess
 import tarfile
+import threading
 import uuid
 import zipfile
 import zlib
-from typing import List, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator, List, Optional, Tuple
 
 from lutris import settings
 from lutris.exceptions import MissingExecutableError
 from lutris.util import system
 from lutris.util.log import logger
 
+# Called with the number of bytes of the archive processed so far, and its total size
+ProgressCallback = Callable[[int, int], None]
+
+# Most zip members extracted at the same time
+MAX_ZIP_WORKERS = 8
+
+# Compression methods the zipfile module can extract; for others, we use 7-zip
+ZIP_COMPRESSION_METHODS = (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED, zipfile.ZIP_BZIP2, zipfile.ZIP_LZMA)
+
 
 class ExtractError(Exception):
     """Exception raised when and archive fails to extract"""
 
 
-def extract_archive(path: str, to_directory: str = ".", merge_single: bool = True, extractor=None) -> Tuple[str, str]:
+class ExtractionIndex:
+    """The entries of an archive that have been extracted completely, kept in a
+    file next to the extraction folder so an interrupted extraction can resume."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.completed = set()
+        self._lock = threading.Lock()
+        self._file = None
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as index_file:
+                for line in index_file:
+                    try:
+                        self.completed.add(json.loads(line))
+                    except ValueError:
+                        break  # Cut short by the interruption
+            logger.info("Resuming extraction, %d entries already extracted", len(self.completed))
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.completed
+
+    def add(self, name: str) -> None:
+        with self._lock:
+            if not self._file:
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write(json.dumps(name) + "\n")
+            self._file.flush()
+            self.completed.add(name)
+
+    def remove(self) -> None:
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+
+# Set in the processes the installer extracts archives in, see init_shared_progress()
+_shared_progress = None
+
+
+def init_shared_progress(progress) -> None:
+    """Initializer for a process pool, which makes report_shared_progress() store the progress
+    in 'progress', a multiprocessing.Value("d"), for the parent process to read."""
+    global _shared_progress
+    _shared_progress = progress
+
+
+def report_shared_progress(processed: int, total: int) -> None:
+    """A ProgressCallback for extractions run in another process; see init_shared_progress()."""
+    if _shared_progress is not None and total:
+        _shared_progress.value = min(processed / total, 1.0)
+
+
+def extract_archive(
+    path: str,
+    to_directory: str = ".",
+    merge_single: bool = True,
+    extractor=None,
+    progress_callback: Optional[ProgressCallback] = None,
+) -> Tuple[str, str]:
     """Extract an archive to a destination directory.
 
     Args:
@@ -32,6 +108,12 @@ def extract_archive(path: str, to_directory: str = ".", merge_single: bool = Tru
             to extract the archive structure as-is.
         extractor: Force a specific extractor (e.g. "tgz", "7zip", "gog"). When None,
             the extractor is guessed from the file extension.
+        progress_callback: Called as the archive is extracted, with the number of
+            bytes of it processed so far and its size. Not all extractors report progress.
+
+    The archive is extracted in a folder inside to_directory, and its content then
+    moved into place, which only takes a rename. If the extraction of a tar or zip
+    archive is interrupted, extracting it again to the same place resumes it.
 
     Returns:
         A tuple of (archive_path, to_directory).
@@ -44,12 +126,16 @@ def extract_archive(path: str, to_directory: str = ".", merge_single: bool = Tru
 
     opener, mode = _get_archive_opener(extractor)
 
-    temp_path = temp_dir = os.path.join(to_directory, ".extract-%s" % _random_id())
+    temp_path = temp_dir = os.path.join(to_directory, ".extract-%s" % _get_extraction_id(path))
+    index = ExtractionIndex(temp_dir + ".index")
+    if not index.completed and os.path.isdir(temp_dir):
+        system.delete_folder(temp_dir)  # Left over, but we can't tell what is complete
     try:
-        _do_extract(path, temp_path, opener, mode, extractor)
-    except (OSError, zlib.error, tarfile.ReadError, EOFError) as ex:
+        _do_extract(path, temp_path, opener, mode, extractor, index=index, progress_callback=progress_callback)
+    except (OSError, zlib.error, tarfile.ReadError, zipfile.BadZipFile, EOFError) as ex:
         logger.error("Extraction failed: %s", ex)
         raise ExtractError(str(ex)) from ex
+    index.remove()
     if merge_single:
         extracted = os.listdir(temp_path)
         if len(extracted) == 1:
@@ -71,7 +157,7 @@ def extract_archive(path: str, to_directory: str = ".", merge_single: bool = Tru
         if inner_extractor:
             logger.debug("Nested archive detected (%s), extracting inner layer", inner_extractor)
             try:
-                return extract_archive(temp_path, to_directory, merge_single, inner_extractor)
+                return extract_archive(temp_path, to_directory, merge_single, inner_extractor, progress_callback)
             finally:
                 system.delete_folder(temp_dir)
 
@@ -97,7 +183,7 @@ def extract_archive(path: str, to_directory: str = ".", merge_single: bool = Tru
                     shutil.move(source_path, destination_path)
                 elif os.path.isdir(destination_path):
                     try:
-                        system.merge_folders(source_path, destination_path)
+                        system.merge_folders(source_path, destination_path, consume=True)
                     except OSError as ex:
                         logger.error(
                             "Failed to merge to destination %s: %s",
@@ -126,6 +212,8 @@ def _guess_extractor(path):
         extractor = "tzst"
     elif path.endswith(".gz"):
         extractor = "gzip"
+    elif path.casefold().endswith(".zip"):
+        extractor = "zip"
     elif path.endswith(".exe"):
         extractor = "exe"
     elif path.endswith(".deb"):
@@ -152,6 +240,8 @@ def _get_archive_opener(extractor):
         opener, mode = tarfile.open, "r:zst"  # Note: not supported by tarfile yet
     elif extractor == "gzip":
         opener = "gz"
+    elif extractor == "zip":
+        opener = "zip"
     elif extractor == "gog":
         opener = "innoextract"
     elif extractor == "exe":
@@ -170,11 +260,29 @@ def _random_id():
     return str(uuid.uuid4())[:8]
 
 
-def _do_extract(archive: str, dest: str, opener, mode: str = None, extractor=None) -> None:
+def _get_extraction_id(path: str) -> str:
+    """Return an ID for the extraction of an archive, which stays the same
+    as long as the archive does, so an interrupted extraction can be resumed."""
+    file_stat = os.stat(path)
+    key = "%s:%s:%s" % (path, file_stat.st_size, file_stat.st_mtime_ns)
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:8]
+
+
+def _do_extract(
+    archive: str,
+    dest: str,
+    opener,
+    mode: str = None,
+    extractor=None,
+    index: Optional[ExtractionIndex] = None,
+    progress_callback: Optional[ProgressCallback] = None,
+) -> None:
     if opener == "gz":
         _decompress_gz(archive, dest)
+    elif opener == "zip":
+        _extract_zip(archive, dest, index=index, progress_callback=progress_callback)
     elif opener == "7zip":
-        _extract_7zip(archive, dest, archive_type=extractor)
+        _extract_7zip(archive, dest, archive_type=extractor, progress_callback=progress_callback)
     elif opener == "exe":
         _extract_exe(archive, dest)
     elif opener == "innoextract":
@@ -184,9 +292,106 @@ def _do_extract(archive: str, dest: str, opener, mode: str = None, extractor=Non
     elif opener == "AppImage":
         _extract_AppImage(archive, dest)
     else:
-        handler = opener(archive, mode)
-        handler.extractall(dest)
-        handler.close()
+        _extract_tar(archive, dest, opener, mode, index=index, progress_callback=progress_callback)
+
+
+def _extract_tar(
+    archive: str,
+    dest: str,
+    opener,
+    mode: str,
+    index: Optional[ExtractionIndex] = None,
+    progress_callback: Optional[ProgressCallback] = None,
+) -> None:
+    """Extract a tar archive in a single pass, recording each member in the index
+    once it's extracted; members already in it are skipped."""
+    total_size = os.path.getsize(archive)
+    with open(archive, "rb") as archive_file:
+        with opener(fileobj=archive_file, mode=mode) as handler:
+
+            def iter_members() -> Iterator[tarfile.TarInfo]:
+                for member in handler:
+                    if index and member.name in index and not member.isdir():
+                        continue
+                    yield member
+                    # extractall() asks for the next member once this one is extracted
+                    if index:
+                        index.add(member.name)
+                    if progress_callback:
+                        progress_callback(archive_file.tell(), total_size)
+
+            handler.extractall(dest, members=iter_members())
+
+
+def _can_extract_zip(zip_file: zipfile.ZipFile) -> bool:
+    return all(
+        info.compress_type in ZIP_COMPRESSION_METHODS and not info.flag_bits & 0x1  # Encrypted
+        for info in zip_file.infolist()
+    )
+
+
+def _extract_zip(
+    archive: str,
+    dest: str,
+    index: Optional[ExtractionIndex] = None,
+    progress_callback: Optional[ProgressCallback] = None,
+) -> None:
+    """Extract a zip archive, several members at a time; like 7-zip, this restores
+    the Unix permissions and symlinks stored in the archive. Members in the index
+    are skipped, and others added to it as they are extracted."""
+    if not zipfile.is_zipfile(archive):
+        _extract_7zip(archive, dest, progress_callback=progress_callback)
+        return
+    with zipfile.ZipFile(archive) as zip_file:
+        if not _can_extract_zip(zip_file):
+            logger.debug("%s uses features zipfile does not support, using 7-zip", archive)
+            _extract_7zip(archive, dest, archive_type="zip", progress_callback=progress_callback)
+            return
+
+        members = []
+        for info in zip_file.infolist():
+            if info.is_dir():
+                zip_file.extract(info, dest)
+            elif not index or info.filename not in index:
+                members.append(info)
+        # Extracting members creates their folders; do that first, as threads would race to
+        for folder in {os.path.dirname(info.filename) for info in members}:
+            if folder:
+                zip_file.extract(zipfile.ZipInfo(folder + "/"), dest)
+
+        total_size = sum(info.compress_size for info in zip_file.infolist()) or 1
+        processed = total_size - sum(info.compress_size for info in members)
+        lock = threading.Lock()
+        local = threading.local()
+
+        def extract_member(info: zipfile.ZipInfo) -> None:
+            nonlocal processed
+            if not hasattr(local, "zip_file"):
+                local.zip_file = zipfile.ZipFile(archive)
+            mode = info.external_attr >> 16
+            if info.create_system == 3 and stat.S_ISLNK(mode):
+                target_path = os.path.join(dest, info.filename)
+                if not system.path_contains(dest, target_path):
+                    logger.warning("Skipping symlink %s, outside of the archive's folder", info.filename)
+                    return
+                if os.path.lexists(target_path):
+                    os.remove(target_path)
+                os.symlink(local.zip_file.read(info).decode("utf-8"), target_path)
+            else:
+                target_path = local.zip_file.extract(info, dest)
+                if info.create_system == 3 and stat.S_IMODE(mode):
+                    os.chmod(target_path, stat.S_IMODE(mode))
+            if index:
+                index.add(info.filename)
+            if progress_callback:
+                with lock:
+                    processed += info.compress_size
+                    progress_callback(processed, total_size)
+
+        workers = min(MAX_ZIP_WORKERS, os.cpu_count() or 1)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="unzip") as executor:
+            # list() re-raises the first error
+            list(executor.map(extract_member, members))
 
 
 def _decompress_gz(file_path: str, dest_path: str):
@@ -203,12 +408,25 @@ def _decompress_gz(file_path: str, dest_path: str):
         gzipped_file.close()
 
 
-def _extract_7zip(path: str, dest: str, archive_type: str = None) -> None:
+def _extract_7zip(
+    path: str, dest: str, archive_type: str = None, progress_callback: Optional[ProgressCallback] = None
+) -> None:
     _7zip_path = _get_7zip_path()
-    command = [_7zip_path, "x", path, "-o{}".format(dest), "-aoa"]
+    # -mmt: use as many threads as the format allows; -bsp1: progress to stdout
+    command = [_7zip_path, "x", path, "-o{}".format(dest), "-aoa", "-mmt=on", "-bsp1"]
     if archive_type and archive_type != "auto":
         command.append("-t{}".format(archive_type))
-    subprocess.call(command)
+    if not progress_callback:
+        subprocess.call(command)
+        return
+
+    # 7-zip rewrites its progress line with backspaces, like " 42% 13 - file"
+    total_size = os.path.getsize(path)
+    with subprocess.Popen(command, stdout=subprocess.PIPE) as process:
+        for chunk in iter(lambda: process.stdout.read1(4096), b""):
+            percentages = re.findall(rb"(\d+)%", chunk)
+            if percentages:
+                progress_callback(int(percentages[-1]) * total_size // 100, total_size)
 
 
 def _get_7zip_path() -> str:
@@ -0,0 +1,209 @@
+"""Placement of files into game folders, by the cheapest means the file system allows.
+
+Installers move and copy a lot of data from the download cache and from
+extracted archives into the game folder. A :class:`FilePlacer` does this on
+a pool of threads, and for each file tries, in order:
+
+- renaming it, if the source may be consumed and is on the same file system;
+- cloning it with a reflink (``FICLONE``), which shares the data on file
+  systems that support it, such as btrfs and xfs;
+- ``copy_file_range()``, which copies within the kernel;
+- a plain copy.
+
+Hard links may be used instead of copies where the caller allows it; the
+files then share their content, and changing one changes the other.
+"""
+
+import errno
+import fcntl
+import os
+import shutil
+import threading
+from concurrent.futures import FIRST_EXCEPTION, Future, ThreadPoolExecutor, wait
+from typing import Iterable, List, Sequence, Tuple
+
+from lutris.util.log import logger
+from lutris.util.strings import human_size
+
+# ioctl request to clone a whole file, from linux/fs.h
+FICLONE = 0x40049409
+
+# How the content of a file got to its destination
+RENAME = "rename"
+REFLINK = "reflink"
+HARDLINK = "hardlink"
+COPY_RANGE = "copy_file_range"
+COPY = "copy"
+SYMLINK = "symlink"
+
+# Methods by which no data was written
+SHARED_METHODS = (RENAME, REFLINK, HARDLINK)
+
+# Errors of copy_file_range() that mean it can't be used for these files
+_COPY_RANGE_UNSUPPORTED = (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.EPERM)
+_COPY_RANGE_COUNT = 1024 * 1024 * 1024
+_COPY_BUFFER_SIZE = 1024 * 1024
+
+
+def _copy_contents(src_fd: int, dst_fd: int) -> str:
+    """Copy the content of an open file to another, which must be empty."""
+    try:
+        fcntl.ioctl(dst_fd, FICLONE, src_fd)
+        return REFLINK
+    except OSError:
+        pass  # Not supported by the file system, or across file systems
+
+    if hasattr(os, "copy_file_range"):
+        copied = 0
+        try:
+            while True:
+                size = os.copy_file_range(src_fd, dst_fd, _COPY_RANGE_COUNT)
+                if not size:
+                    # Some file systems, like procfs or FUSE ones, report an end of
+                    # file on the first call instead of an error; the data must be read.
+                    if copied or not os.fstat(src_fd).st_size:
+                        return COPY_RANGE
+                    break
+                copied += size
+        except OSError as ex:
+            if copied or ex.errno not in _COPY_RANGE_UNSUPPORTED:
+                raise
+
+    while True:
+        data = os.read(src_fd, _COPY_BUFFER_SIZE)
+        if not data:
+            return COPY
+        view = memoryview(data)
+        while view:
+            view = view[os.write(dst_fd, view) :]
+
+
+def clone_file(src: str, dst: str) -> str:
+    """Copy a file like shutil.copy(src, dst, follow_symlinks=False) does, but
+    sharing the data with a reflink when possible. Returns the method used."""
+    if os.path.islink(src):
+        os.symlink(os.readlink(src), dst)
+        return SYMLINK
+    if os.path.exists(dst) and os.path.samefile(src, dst):
+        raise shutil.SameFileError("{!r} and {!r} are the same file".format(src, dst))
+    with open(src, "rb") as src_file, open(dst, "wb") as dst_file:
+        method = _copy_contents(src_file.fileno(), dst_file.fileno())
+        os.fchmod(dst_file.fileno(), os.fstat(src_file.fileno()).st_mode & 0o7777)
+    return method
+
+
+def link_file(src: str, dst: str) -> str:
+    """Hard link 'src' as 'dst', replacing any file there; copies it instead if
+    they are on different file systems. Returns the method used."""
+    if os.path.islink(src):
+        return clone_file(src, dst)
+    temp_path = "%s.%s.link" % (dst, threading.get_ident())
+    try:
+        os.link(src, temp_path)
+    except OSError as ex:
+        if ex.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK, errno.EOPNOTSUPP):
+            raise
+        return clone_file(src, dst)
+    os.replace(temp_path, dst)
+    return HARDLINK
+
+
+def move_file(src: str, dst: str) -> str:
+    """Move 'src' to 'dst', replacing any file there. Returns the method used."""
+    try:
+        os.rename(src, dst)
+        return RENAME
+    except OSError as ex:
+        if ex.errno != errno.EXDEV:
+            raise
+    method = clone_file(src, dst)
+    os.remove(src)
+    return method
+
+
+class FilePlacer:
+    """Places files at their destinations on a pool of threads, and keeps count of
+    the bytes that were written and of those that were not, thanks to renames,
+    reflinks or hard links.
+
+    Use it as a context manager; leaving the context waits for the files to be placed,
+    and raises the first error if any failed.
+
+    Args:
+        max_workers: Number of files placed at the same time.
+        allow_hardlinks: Whether copies may be hard links to their source.
+    """
+
+    DEFAULT_WORKERS = 8
+
+    def __init__(self, max_workers: int = DEFAULT_WORKERS, allow_hardlinks: bool = False) -> None:
+        self.allow_hardlinks = allow_hardlinks
+        self.bytes_copied = 0
+        self.bytes_saved = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="file-placer")
+        self._futures: List[Future] = []
+
+    def __enter__(self) -> "FilePlacer":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        try:
+            if exc_type is None:
+                self.wait()
+        finally:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def place(self, src: str, destinations: Sequence[str], consume: bool = False) -> None:
+        """Place the file 'src' at each path in 'destinations', replacing any file
+        there. If 'consume' is set, the source is moved to the first destination,
+        and the other destinations are copied from it."""
+        self._futures.append(self._executor.submit(self._place, src, destinations, consume))
+
+    def wait(self) -> None:
+        """Wait for the files submitted so far to be placed; raises the first error."""
+        futures, self._futures = self._futures, []
+        done, not_done = wait(futures, return_when=FIRST_EXCEPTION)
+        for future in not_done:
+            future.cancel()
+        for future in done:
+            if future.exception():
+                raise future.exception()
+
+    def _copy(self, src: str, dst: str) -> str:
+        if self.allow_hardlinks:
+            return link_file(src, dst)
+        return clone_file(src, dst)
+
+    def _place(self, src: str, destinations: Sequence[str], consume: bool) -> None:
+        if not destinations:
+            return
+        size = os.path.getsize(src) if not os.path.islink(src) else 0
+        first = destinations[0]
+        methods = [move_file(src, first) if consume else self._copy(src, first)]
+        for dst in destinations[1:]:
+            methods.append(self._copy(first, dst))
+        saved = sum(size for method in methods if method in SHARED_METHODS)
+        with self._lock:
+            self.bytes_saved += saved
+            self.bytes_copied += size * len(methods) - saved
+
+    def log_summary(self, description: str) -> None:
+        logger.info(
+            "%s: %s written, %s shared or moved",
+            description,
+            human_size(self.bytes_copied),
+            human_size(self.bytes_saved),
+        )
+
+
+def place_files(
+    placements: Iterable[Tuple[str, Sequence[str]]], consume: bool = False, allow_hardlinks: bool = False
+) -> int:
+    """Place each source file at its destinations, as FilePlacer.place() does,
+    and return the number of bytes that did not have to be written."""
+    with FilePlacer(allow_hardlinks=allow_hardlinks) as placer:
+        for src, destinations in placements:
+            placer.place(src, destinations, consume=consume)
+    placer.log_summary("Placed files")
+    return placer.bytes_saved
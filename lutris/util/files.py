@@ -1,11 +1,12 @@
 import os
 
-from lutris.util.system import get_md5_hash
+from lutris.util.hashing import hash_files
 
 
 def get_folder_contents(target_directory: str, with_hash: bool = True) -> list:
     """Recursively iterate over a folder content and return its details"""
     folder_content = []
+    file_descs = []
     for path, dir_names, file_names in os.walk(target_directory):
         for dir_name in dir_names:
             dir_path = os.path.join(path, dir_name)
@@ -29,7 +30,11 @@ def get_folder_contents(target_directory: str, with_hash: bool = True) -> list:
                 "date_accessed": int(file_stats.st_atime),
                 "type": "file",
             }
-            if with_hash:
-                file_desc["md5_hash"] = get_md5_hash(file_path)
+            file_descs.append(file_desc)
             folder_content.append(file_desc)
+    if with_hash:
+        digests = hash_files(file_desc["name"] for file_desc in file_descs)
+        for file_desc in file_descs:
+            file_digests = digests[file_desc["name"]]
+            file_desc["md5_hash"] = file_digests["md5"] if file_digests else False
     return folder_content
@@ -1,10 +1,171 @@
-"""Automatically detects game executables in a folder"""
+"""Automatically detects game executables in a folder
+
+Files are identified by their header: ELF, PE and shortcut headers are
+parsed here, and only scripts go through libmagic. The directories of a
+game are scanned on a pool of threads, in the order os.walk() would visit
+them; the executable is picked from the first directory that has any.
+"""
 
 import os
+import struct
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 from lutris.util import magic, system
 from lutris.util.log import logger
 
+# Directories scanned at the same time
+MAX_FINDER_WORKERS = 8
+
+# Bytes read from the start of each file to identify it
+HEADER_SIZE = 64
+
+ELF_MAGIC = b"\x7fELF"
+ELF_CLASSES = {1: "32bit", 2: "64bit"}
+ELF_LSB = 1
+ELF_EXECUTABLE_TYPES = (2, 3)  # ET_EXEC and ET_DYN
+
+# Header and CLSID of Windows shortcuts (.lnk)
+LNK_MAGIC = b"L\x00\x00\x00\x01\x14\x02\x00\x00\x00\x00\x00\xc0\x00\x00\x00\x00\x00\x00F"
+
+PE_MACHINE_I386 = 0x14C
+PE_MACHINE_AMD64 = 0x8664
+PE_OPTIONAL_MAGIC_PE32 = 0x10B
+PE_OPTIONAL_MAGIC_PE32_PLUS = 0x20B
+PE_SUBSYSTEM_GUI = 2
+PE_CHARACTERISTIC_DLL = 0x2000
+# COFF header (after the signature), then the start of the optional header up to the subsystem
+PE_HEADER = struct.Struct("<4sHHIIIHHH66xH")
+
+LINUX_CANDIDATE_RANKS = ("shell", "bash", "posix", "64bit", "32bit")
+WINDOWS_CANDIDATE_RANKS = ("link", "64bit", "32bit")
+
+
+def read_header(path, size=HEADER_SIZE):
+    try:
+        with open(path, "rb") as binary_file:
+            return binary_file.read(size)
+    except OSError:
+        return b""
+
+
+def get_elf_type(header):
+    """Return '64bit' or '32bit' for a little-endian ELF executable or shared object,
+    None for anything else."""
+    if len(header) < 18 or not header.startswith(ELF_MAGIC) or header[5] != ELF_LSB:
+        return None
+    (elf_type,) = struct.unpack_from("<H", header, 16)
+    if elf_type not in ELF_EXECUTABLE_TYPES:
+        return None
+    return ELF_CLASSES.get(header[4])
+
+
+def get_pe_type(path, header):
+    """Return '64bit' for an x86-64 GUI program, '32bit' for an i386 GUI program
+    and None for anything else, DLLs included."""
+    if len(header) < 0x40 or not header.startswith(b"MZ"):
+        return None
+    (pe_offset,) = struct.unpack_from("<I", header, 0x3C)
+    try:
+        with open(path, "rb") as binary_file:
+            binary_file.seek(pe_offset)
+            pe_header = binary_file.read(PE_HEADER.size)
+    except (OSError, OverflowError):
+        return None
+    if len(pe_header) < PE_HEADER.size:
+        return None
+    signature, machine, _sections, _time, _symbols, _count, _size, characteristics, optional_magic, subsystem = (
+        PE_HEADER.unpack(pe_header)
+    )
+    if signature != b"PE\x00\x00" or subsystem != PE_SUBSYSTEM_GUI or characteristics & PE_CHARACTERISTIC_DLL:
+        return None
+    if machine == PE_MACHINE_AMD64 and optional_magic == PE_OPTIONAL_MAGIC_PE32_PLUS:
+        return "64bit"
+    if machine == PE_MACHINE_I386 and optional_magic == PE_OPTIONAL_MAGIC_PE32:
+        return "32bit"
+    return None
+
+
+def get_script_types(path):
+    """Return the kinds of script libmagic recognizes the file as."""
+    try:
+        file_type = magic.from_file(path)
+    except (OSError, magic.MagicException) as ex:
+        logger.warning("Unable to identify %s: %s", path, ex)
+        return []
+    script_types = []
+    if "ASCII text executable" in file_type:
+        script_types.append("shell")
+    if "Bourne-Again shell script" in file_type:
+        script_types.append("bash")
+    if "POSIX shell script executable" in file_type:
+        script_types.append("posix")
+    return script_types
+
+
+def get_linux_candidate_types(path):
+    header = read_header(path)
+    if header.startswith(b"#!"):
+        return get_script_types(path)
+    elf_type = get_elf_type(header)
+    return [elf_type] if elf_type else []
+
+
+def get_windows_candidate_types(path):
+    header = read_header(path)
+    if header.startswith(LNK_MAGIC):
+        return ["link"]
+    pe_type = get_pe_type(path, header)
+    return [pe_type] if pe_type else []
+
+
+def _scan_directory(path, get_candidate_types, is_excluded_file):
+    """Return the candidates of a directory, by type, and its subdirectories.
+    Symbolic links are neither candidates nor followed."""
+    candidates = {}
+    subdirs = []
+    try:
+        with os.scandir(path) as entries:
+            entries = list(entries)
+    except OSError as ex:
+        logger.warning("Unable to list %s: %s", path, ex)
+        return candidates, subdirs
+    for entry in entries:
+        if entry.is_symlink():
+            continue
+        if entry.is_dir():
+            subdirs.append(entry.path)
+        elif not is_excluded_file(entry.name):
+            for candidate_type in get_candidate_types(entry.path):
+                candidates[candidate_type] = entry.path
+    return candidates, subdirs
+
+
+def find_candidates(path, get_candidate_types, is_excluded_file, is_excluded_directory=None):
+    """Return the candidates of the first directory that has any, by type, in
+    the order os.walk() visits them. Directories are scanned ahead on a pool
+    of threads, and the scan stops as soon as that directory is known."""
+    if is_excluded_directory and is_excluded_directory(path):
+        return {}
+    with ThreadPoolExecutor(max_workers=MAX_FINDER_WORKERS, thread_name_prefix="game-finder") as executor:
+
+        def submit(dir_path):
+            return executor.submit(_scan_directory, dir_path, get_candidate_types, is_excluded_file)
+
+        pending = deque([submit(path)])
+        try:
+            while pending:
+                candidates, subdirs = pending.popleft().result()
+                if candidates:
+                    return candidates
+                subdirs = [
+                    subdir for subdir in subdirs if not (is_excluded_directory and is_excluded_directory(subdir))
+                ]
+                pending.extendleft(reversed([submit(subdir) for subdir in subdirs]))
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+    return {}
+
 
 def is_excluded_elf(filename):
     excluded = ("xdg-open", "uninstall")
@@ -14,35 +175,12 @@ def is_excluded_elf(filename):
 
 def find_linux_game_executable(path, make_executable=False):
     """Looks for a binary or shell script that launches the game in a directory"""
-
-    for base, _dirs, files in os.walk(path):
-        candidates = {}
-        for _file in files:
-            if is_excluded_elf(_file):
-                continue
-            abspath = os.path.join(base, _file)
-            file_type = magic.from_file(abspath)
-            if "ASCII text executable" in file_type:
-                candidates["shell"] = abspath
-            if "Bourne-Again shell script" in file_type:
-                candidates["bash"] = abspath
-            if "POSIX shell script executable" in file_type:
-                candidates["posix"] = abspath
-            if "64-bit LSB executable" in file_type or "64-bit LSB shared object" in file_type:
-                candidates["64bit"] = abspath
-            if "32-bit LSB executable" in file_type or "32-bit LSB shared object" in file_type:
-                candidates["32bit"] = abspath
-        if candidates:
-            if make_executable:
-                for candidate in candidates.values():
-                    system.make_executable(candidate)
-            return (
-                candidates.get("shell")
-                or candidates.get("bash")
-                or candidates.get("posix")
-                or candidates.get("64bit")
-                or candidates.get("32bit")
-            )
+    candidates = find_candidates(path, get_linux_candidate_types, is_excluded_elf)
+    if candidates:
+        if make_executable:
+            for candidate in candidates.values():
+                system.make_executable(candidate)
+        return next(candidates[rank] for rank in LINUX_CANDIDATE_RANKS if rank in candidates)
     logger.error("Couldn't find a Linux executable in %s", path)
     return ""
 
@@ -76,26 +214,8 @@ def is_excluded_exe(filename):
 
 
 def find_windows_game_executable(path):
-    for base, _dirs, files in os.walk(path):
-        candidates = {}
-        if is_excluded_dir(base):
-            continue
-        for _file in files:
-            if is_excluded_exe(_file):
-                continue
-            abspath = os.path.join(base, _file)
-            if os.path.islink(abspath):
-                continue
-            file_type = magic.from_file(abspath)
-            if "MS Windows shortcut" in file_type:
-                candidates["link"] = abspath
-            elif all([_ in file_type for _ in ("PE32+ executable", "(GUI)", "x86-64")]):
-                candidates["64bit"] = abspath
-            elif all([_ in file_type for _ in ("PE32 executable", "(GUI)")]) and any(
-                [_ in file_type for _ in ("Intel i386", "Intel 80386")]
-            ):
-                candidates["32bit"] = abspath
-        if candidates:
-            return candidates.get("link") or candidates.get("64bit") or candidates.get("32bit")
+    candidates = find_candidates(path, get_windows_candidate_types, is_excluded_exe, is_excluded_dir)
+    if candidates:
+        return next(candidates[rank] for rank in WINDOWS_CANDIDATE_RANKS if rank in candidates)
     logger.error("Couldn't find a Windows executable in %s", path)
     return ""
@@ -9,12 +9,13 @@ maintaining API compatibility with DownloadProgressBox and
 DownloadCollectionProgressBox.
 """
 
+import hashlib
 import os
 import queue
 import threading
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Any, Dict, List, Optional, Tuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import IO, Any, Dict, List, Optional, Tuple
 
 import requests
 from requests.adapters import HTTPAdapter
@@ -22,15 +23,77 @@ from requests.adapters import HTTPAdapter
 from lutris import __version__
 from lutris.util import jobs
 from lutris.util.download_progress import DownloadProgress
+from lutris.util.download_segments import ConnectionController, Segment, SegmentScheduler
 from lutris.util.downloader import DEFAULT_CHUNK_SIZE, Downloader, get_time
 from lutris.util.log import logger
 
 
+class RangeHasher:
+    """Computes the checksum of a file whose byte ranges are written out of order.
+
+    Data written at the hashing offset is hashed as it is written; data written
+    beyond it is recorded as pending, and read back from the file once the offset
+    reaches it. Ranges completed by an earlier session are pending from the start,
+    since hasher states can't be saved with the download progress.
+    """
+
+    READ_SIZE = 1024 * 1024
+
+    def __init__(self, hash_type: str) -> None:
+        self.hasher = hashlib.new(hash_type)
+        self.offset = 0  # Everything before this is hashed
+        self._pending: Dict[int, int] = {}  # Start to end (exclusive) of the spans written but not hashed
+
+    def hexdigest(self) -> str:
+        return self.hasher.hexdigest()
+
+    def add_written(self, start: int, end: int) -> None:
+        """Record that the bytes from 'start' to 'end' (exclusive) are in the file."""
+        for pending_start, pending_end in list(self._pending.items()):
+            if pending_start <= end and start <= pending_end:
+                del self._pending[pending_start]
+                start = min(start, pending_start)
+                end = max(end, pending_end)
+        self._pending[start] = end
+
+    def update(self, file: IO[bytes], offset: int, data: bytes) -> None:
+        """Account for 'data', just written at 'offset' in 'file'."""
+        end = offset + len(data)
+        if end <= self.offset:
+            return  # A retried range writing again what is hashed already
+        if offset > self.offset:
+            self.add_written(offset, end)
+            return
+        self.hasher.update(memoryview(data)[self.offset - offset :])
+        self.offset = end
+        self.catch_up(file)
+
+    def catch_up(self, file: IO[bytes]) -> None:
+        """Hash the pending spans the hashing offset has reached, reading them from 'file'."""
+        while self._pending:
+            start = min(self._pending)
+            if start > self.offset:
+                return
+            end = self._pending.pop(start)
+            if end > self.offset:
+                file.flush()
+                while self.offset < end:
+                    data = os.pread(file.fileno(), min(self.READ_SIZE, end - self.offset), self.offset)
+                    if not data:
+                        raise OSError("Unexpected end of file at %d while hashing" % self.offset)
+                    self.hasher.update(data)
+                    self.offset += len(data)
+
+
 class GOGDownloader(Downloader):
     """Multi-connection parallel downloader optimized for GOG CDN downloads.
 
     Downloads large files using multiple simultaneous HTTP Range requests,
-    each writing to a different region of the output file. Falls back to
+    each writing to a different region of the output file. The file is cut
+    into segments that the connections take in turn, and idle connections
+    split the largest segment left; the number of connections starts at
+    ``num_workers`` and is adjusted to the throughput, up to ``max_workers``.
+    Falls back to
     single-stream download if the server doesn't support Range requests
     or the file is too small to benefit from parallelism.
 
@@ -39,7 +102,11 @@ class GOGDownloader(Downloader):
     """
 
     DEFAULT_WORKERS = 4
+    MAX_WORKERS = 16
     MIN_CHUNK_SIZE = 5 * 1024 * 1024  # 5MB minimum per worker
+    SEGMENT_SIZE = 32 * 1024 * 1024  # Largest segment planned up front
+    MIN_SPLIT_SIZE = 2 * 1024 * 1024  # Smallest segment made by splitting
+    CONTROL_INTERVAL = 2.0  # seconds between connection count adjustments
     RETRY_ATTEMPTS = 3
     RETRY_DELAY = 2  # seconds between retries
 
@@ -54,6 +121,8 @@ class GOGDownloader(Downloader):
         session: Optional[requests.Session] = None,
         chunk_size: int = DEFAULT_CHUNK_SIZE,
         num_workers: int = DEFAULT_WORKERS,
+        hash_type: Optional[str] = None,
+        max_workers: Optional[int] = None,
     ) -> None:
         super().__init__(
             url=url,
@@ -64,9 +133,14 @@ class GOGDownloader(Downloader):
             headers=headers,
             session=session,
             chunk_size=chunk_size,
+            hash_type=hash_type,
         )
         self.num_workers = max(1, num_workers)
+        self.max_workers = max(self.num_workers, max_workers or self.MAX_WORKERS)
         self._download_lock = threading.Lock()
+        # Connections running, and how many there should be
+        self._connection_count = 0
+        self._target_connections = self.num_workers
         self._progress: Optional[DownloadProgress] = None
         # Pipelining: bounded queue decouples download I/O from disk writes
         self._write_queue: queue.Queue = queue.Queue(maxsize=64)
@@ -74,7 +148,7 @@ class GOGDownloader(Downloader):
         self._writer_error_event = threading.Event()
         # Create a dedicated session with connection pooling sized for our workers
         self._parallel_session = requests.Session()
-        adapter = HTTPAdapter(pool_maxsize=self.num_workers + 2)
+        adapter = HTTPAdapter(pool_maxsize=self.max_workers + 2)
         self._parallel_session.mount("https://", adapter)
         self._parallel_session.mount("http://", adapter)
         self._parallel_session.headers["User-Agent"] = "Lutris/%s" % __version__
@@ -118,6 +192,7 @@ class GOGDownloader(Downloader):
 
         # Workers manage their own file I/O - no shared file_pointer needed
         self.file_pointer = None
+        self._hasher = None
         self.thread = jobs.AsyncCall(self.async_download, None)
         self.stop_request = self.thread.stop_request
 
@@ -138,6 +213,7 @@ class GOGDownloader(Downloader):
         if self._progress:
             self._progress.cleanup()
             self._progress = None
+        self.progress_event.set()  # Wake up join()
 
     def on_download_completed(self):
         """Mark download as complete and clean up progress file."""
@@ -151,10 +227,13 @@ class GOGDownloader(Downloader):
             self.progress_percentage = 100
         self.state = self.COMPLETED
         # No shared file_pointer to close
+        if self._hasher and self._hasher.offset == (self.full_size or self.downloaded_size):
+            self._store_checksum(self._hasher)
         # Remove progress file — download is complete
         if self._progress:
             self._progress.cleanup()
             self._progress = None
+        self.progress_event.set()
 
     def _build_request_headers(self) -> Dict[str, str]:
         """Build HTTP headers for download requests."""
@@ -169,13 +248,17 @@ class GOGDownloader(Downloader):
     def _calculate_ranges(self, file_size: int) -> List[Tuple[int, int]]:
         """Split file into byte ranges for parallel download.
 
+        There is at least one range per worker, and none larger than
+        SEGMENT_SIZE, except for the remainder that goes to the last one.
+
         Returns a list of (start, end) tuples representing inclusive byte ranges.
         """
-        chunk_size = file_size // self.num_workers
+        range_count = max(self.num_workers, -(-file_size // self.SEGMENT_SIZE))
+        chunk_size = file_size // range_count
         ranges = []
-        for i in range(self.num_workers):
+        for i in range(range_count):
             start = i * chunk_size
-            end = file_size - 1 if i == self.num_workers - 1 else (i + 1) * chunk_size - 1
+            end = file_size - 1 if i == range_count - 1 else (i + 1) * chunk_size - 1
             ranges.append((start, end))
         return ranges
 
@@ -186,10 +269,13 @@ class GOGDownloader(Downloader):
         write queue. A None sentinel signals the writer to exit.
 
         All disk I/O and progress tracking happens here, keeping download
-        workers free from disk latency.
+        workers free from disk latency. The checksum is computed here too,
+        as the data is written.
         """
         try:
             with open(self.dest, "r+b") as f:
+                if self._hasher:
+                    self._hasher.catch_up(f)
                 while True:
                     if self.stop_request and self.stop_request.is_set():
                         # Drain remaining items on cancel
@@ -206,6 +292,8 @@ class GOGDownloader(Downloader):
                     offset, data, range_start, range_end = item
                     f.seek(offset)
                     f.write(data)
+                    if self._hasher:
+                        self._hasher.update(f, offset, data)
                     with self._download_lock:
                         self.downloaded_size += len(data)
                     self.progress_event.set()
@@ -303,6 +391,7 @@ class GOGDownloader(Downloader):
                     with self._download_lock:
                         self.downloaded_size = 0
 
+            self._hasher = self._create_range_hasher(self._progress.completed_ranges)
             total_remaining = sum(e - s + 1 for s, e in ranges_to_download)
             logger.info(
                 "GOG parallel download: %d workers, %d ranges to download, %d MB remaining of %d MB total",
@@ -317,28 +406,14 @@ class GOGDownloader(Downloader):
             self._writer_error = None
             self._writer_error_event.clear()
 
+            scheduler = SegmentScheduler(ranges_to_download, self.MIN_SPLIT_SIZE, on_split=self._progress.split_range)
+
             # Start dedicated writer thread
             writer_thread = threading.Thread(target=self._writer_loop, name="GOGDownloader-writer", daemon=True)
             writer_thread.start()
 
-            errors = []
             try:
-                with ThreadPoolExecutor(max_workers=self.num_workers) as executor:
-                    future_to_range = {}
-                    for start, end in ranges_to_download:
-                        future = executor.submit(self._download_range, final_url, headers, start, end)
-                        future_to_range[future] = (start, end)
-
-                    for future in as_completed(future_to_range):
-                        try:
-                            future.result()
-                        except Exception as ex:
-                            rng = future_to_range[future]
-                            logger.error("Worker failed for range %d-%d: %s", rng[0], rng[1], ex)
-                            errors.append(ex)
-                            # Signal other workers to stop
-                            if self.stop_request:
-                                self.stop_request.set()
+                errors = self._run_connections(final_url, headers, scheduler)
             finally:
                 # Signal writer thread to exit and wait for it
                 self._write_queue.put(None)
@@ -356,6 +431,92 @@ class GOGDownloader(Downloader):
             logger.exception("GOG parallel download failed: %s", ex)
             self.on_download_failed(ex)
 
+    def _run_connections(self, url: str, headers: dict, scheduler: SegmentScheduler) -> List[Exception]:
+        """Run connections until the scheduler has no segment left, adjusting
+        their number every CONTROL_INTERVAL. Returns the errors of the
+        connections that failed; the others are stopped after a failure."""
+        controller = ConnectionController(self.num_workers, self.max_workers)
+        self._target_connections = controller.target
+        self._connection_count = 0
+        errors: List[Exception] = []
+        futures = set()
+        last_check_time = get_time()
+        last_size = self.downloaded_size
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="GOGDownloader") as executor:
+            while not errors and not (self.stop_request and self.stop_request.is_set()):
+                with self._download_lock:
+                    starting = min(self._target_connections - self._connection_count, self.max_workers - len(futures))
+                    if starting > 0 and scheduler.has_work():
+                        self._connection_count += starting
+                    else:
+                        starting = 0
+                for _i in range(starting):
+                    futures.add(executor.submit(self._connection_loop, url, headers, scheduler))
+                if not futures:
+                    break
+
+                done, futures = wait(futures, timeout=self.CONTROL_INTERVAL, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        future.result()
+                    except Exception as ex:
+                        logger.error("GOG download connection failed: %s", ex)
+                        errors.append(ex)
+
+                now = get_time()
+                if now - last_check_time >= self.CONTROL_INTERVAL:
+                    throughput = (self.downloaded_size - last_size) / (now - last_check_time)
+                    target = controller.update(throughput)
+                    if target != self._target_connections:
+                        logger.debug(
+                            "GOG download: %d connections at %.1f MB/s, now using %d",
+                            self._target_connections,
+                            throughput / (1024 * 1024),
+                            target,
+                        )
+                        with self._download_lock:
+                            self._target_connections = target
+                    last_check_time = now
+                    last_size = self.downloaded_size
+
+            if errors and self.stop_request:
+                # Signal other workers to stop
+                self.stop_request.set()
+        return errors
+
+    def _connection_loop(self, url: str, headers: dict, scheduler: SegmentScheduler) -> None:
+        """Download segments on one connection until there are none left, or
+        there are more connections than wanted."""
+        counted = True
+        try:
+            while not (self.stop_request and self.stop_request.is_set()):
+                with self._download_lock:
+                    if self._connection_count > self._target_connections:
+                        self._connection_count -= 1
+                        counted = False
+                        return
+                segment = scheduler.next_segment()
+                if not segment:
+                    return
+                try:
+                    self._download_segment(url, headers, segment)
+                finally:
+                    scheduler.finish(segment)
+        finally:
+            if counted:
+                with self._download_lock:
+                    self._connection_count -= 1
+
+    def _create_range_hasher(self, completed_ranges: List[Tuple[int, int]]) -> Optional[RangeHasher]:
+        """Return a RangeHasher for the hash_type, aware of the ranges already downloaded."""
+        if not self.hash_type:
+            return None
+        range_hasher = RangeHasher(self.hash_type)
+        for start, end in completed_ranges:
+            range_hasher.add_written(start, end + 1)
+        return range_hasher
+
     def _probe_server(self, headers: dict) -> Tuple[str, int, bool]:
         """Probe the server to determine final URL, file size, and Range support.
 
@@ -400,18 +561,24 @@ class GOGDownloader(Downloader):
             return False
 
     def _download_range(self, url: str, headers: dict, start: int, end: int) -> None:
-        """Download a specific byte range and enqueue data for the writer thread.
+        """Download a specific byte range and enqueue data for the writer thread."""
+        self._download_segment(url, headers, Segment(start, end))
 
-        Each worker downloads its assigned byte range and puts chunks into
-        the write queue for the dedicated writer thread. Workers never
-        perform file I/O directly, keeping them free from disk latency.
+    def _download_segment(self, url: str, headers: dict, segment: Segment) -> None:
+        """Download a segment and enqueue data for the writer thread.
 
-        Retries up to RETRY_ATTEMPTS times with exponential backoff.
+        Each worker downloads its segment and puts chunks into the write
+        queue for the dedicated writer thread. Workers never perform file
+        I/O directly, keeping them free from disk latency. The download
+        stops early if an idle worker takes over the end of the segment.
+
+        Retries up to RETRY_ATTEMPTS times with exponential backoff,
+        resuming after the bytes already received.
         """
         for attempt in range(self.RETRY_ATTEMPTS):
             try:
                 range_headers = dict(headers)
-                range_headers["Range"] = "bytes=%d-%d" % (start, end)
+                range_headers["Range"] = "bytes=%d-%d" % (segment.offset, segment.end)
 
                 response = self._parallel_session.get(
                     url,
@@ -423,7 +590,7 @@ class GOGDownloader(Downloader):
 
                 if response.status_code not in (200, 206):
                     raise requests.HTTPError(
-                        "HTTP %d for range %d-%d" % (response.status_code, start, end),
+                        "HTTP %d for range %d-%d" % (response.status_code, segment.offset, segment.end),
                         response=response,
                     )
 
@@ -431,63 +598,75 @@ class GOGDownloader(Downloader):
                 if response.status_code == 200:
                     logger.warning(
                         "Server ignored Range header, reading full response for range %d-%d",
-                        start,
-                        end,
+                        segment.offset,
+                        segment.end,
                     )
-                    self._write_from_full_response(response, start, end)
+                    self._write_from_full_response(response, segment)
                     return
 
                 # Normal 206 Partial Content response — enqueue for writer
                 self._reset_stall_state()
                 stream_bytes = 0
-                current_offset = start
-                range_size = end - start + 1
-
-                for chunk in response.iter_content(chunk_size=self.chunk_size):
-                    if self.stop_request and self.stop_request.is_set():
-                        return
-                    if self._writer_error_event.is_set():
-                        return  # Writer failed, stop downloading
-                    if chunk:
-                        stream_bytes += len(chunk)
-                        # Mark the last chunk of this range so writer knows when to
-                        # record the range as complete
-                        is_last_chunk = stream_bytes >= range_size
-                        range_end_marker = end if is_last_chunk else None
-                        self._write_queue.put((current_offset, chunk, start, range_end_marker))
-                        current_offset += len(chunk)
-                        self._check_stall(stream_bytes)
 
+                try:
+                    for chunk in response.iter_content(chunk_size=self.chunk_size):
+                        if self.stop_request and self.stop_request.is_set():
+                            return
+                        if self._writer_error_event.is_set():
+                            return  # Writer failed, stop downloading
+                        if chunk:
+                            stream_bytes += len(chunk)
+                            if self._enqueue_chunk(segment, chunk):
+                                return  # Success
+                            self._check_stall(stream_bytes)
+                finally:
+                    response.close()
+                if segment.remaining > 0:
+                    raise requests.ConnectionError(
+                        "Connection closed at %d, before the end of range %d-%d"
+                        % (segment.offset, segment.start, segment.end)
+                    )
                 return  # Success
 
             except Exception as ex:
                 if self.stop_request and self.stop_request.is_set():
                     return  # Cancelled, don't retry
                 if attempt < self.RETRY_ATTEMPTS - 1:
-                    wait = self.RETRY_DELAY * (attempt + 1)
+                    wait_time = self.RETRY_DELAY * (attempt + 1)
                     logger.warning(
                         "GOG range %d-%d attempt %d/%d failed: %s, retrying in %ds...",
-                        start,
-                        end,
+                        segment.start,
+                        segment.end,
                         attempt + 1,
                         self.RETRY_ATTEMPTS,
                         ex,
-                        wait,
+                        wait_time,
                     )
-                    time.sleep(wait)
+                    time.sleep(wait_time)
                 else:
                     raise
 
-    def _write_from_full_response(self, response: requests.Response, start: int, end: int) -> None:
+    def _enqueue_chunk(self, segment: Segment, data: bytes) -> bool:
+        """Claim the part of 'data' that is still within the segment and queue it
+        for the writer. Returns True once the segment is complete."""
+        offset, size, is_complete = segment.claim(len(data))
+        if size:
+            if size < len(data):
+                data = data[:size]
+            # Mark the last chunk of this segment so writer knows when to
+            # record the range as complete
+            self._write_queue.put((offset, data, segment.start, segment.end if is_complete else None))
+            if self.rate_limiter:
+                self.rate_limiter.consume(size)
+        return is_complete
+
+    def _write_from_full_response(self, response: requests.Response, segment: Segment) -> None:
         """Handle the case where server returns 200 instead of 206.
 
         Read the full response but only enqueue our byte range portion.
         This is a fallback for non-compliant servers.
         """
         bytes_read = 0
-        current_offset = start
-        range_size = end - start + 1
-        enqueued_bytes = 0
 
         for chunk in response.iter_content(chunk_size=self.chunk_size):
             if self.stop_request and self.stop_request.is_set():
@@ -499,27 +678,11 @@ class GOGDownloader(Downloader):
 
             # Only write the portion that falls within our range
             chunk_start = bytes_read
-            chunk_end = bytes_read + len(chunk)
-
-            if chunk_end <= start:
+            bytes_read += len(chunk)
+            if bytes_read <= segment.offset:
                 # Before our range, skip
-                bytes_read += len(chunk)
                 continue
-            elif chunk_start >= end + 1:
-                # Past our range, done
-                break
-            else:
-                # Calculate the slice of this chunk we need
-                slice_start = max(0, start - chunk_start)
-                slice_end = min(len(chunk), end + 1 - chunk_start)
-                data = chunk[slice_start:slice_end]
-                enqueued_bytes += len(data)
-                is_last = enqueued_bytes >= range_size
-                self._write_queue.put((current_offset, data, start, end if is_last else None))
-                current_offset += len(data)
-
-            bytes_read += len(chunk)
-            if bytes_read >= end + 1:
+            if self._enqueue_chunk(segment, chunk[segment.offset - chunk_start :]):
                 break
 
     def _single_stream_download(self, url: str, headers: dict) -> None:
@@ -532,13 +695,18 @@ class GOGDownloader(Downloader):
         self.full_size = int(response.headers.get("Content-Length", "").strip() or 0)
         self.progress_event.set()
 
+        self._hasher = self._create_range_hasher([])
         with open(self.dest, "wb") as f:
             for chunk in response.iter_content(chunk_size=self.chunk_size):
                 if self.stop_request and self.stop_request.is_set():
                     break
                 if chunk:
+                    if self._hasher:
+                        self._hasher.update(f, self.downloaded_size, chunk)
                     self.downloaded_size += len(chunk)
                     f.write(chunk)
+                    if self.rate_limiter:
+                        self.rate_limiter.consume(len(chunk))
                 self.progress_event.set()
 
         self.on_download_completed()
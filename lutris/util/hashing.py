@@ -0,0 +1,206 @@
+"""Hashing of files, with a persistent cache of the digests.
+
+Digests are cached in an SQLite database by file identity: device, inode,
+size and modification time. A file that has not changed since it was last
+hashed is not read again, even after a rename. Digests that have not been
+looked up for a long time are deleted when the cache is opened. Several algorithms can be
+computed in a single read of a file, and many files hashed on a pool of
+threads; hashlib and zlib release the GIL while they work.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+from lutris import settings
+from lutris.database import sql
+from lutris.util.log import logger
+
+# Size of the reads used to hash files
+HASH_BUFFER_SIZE = 1024 * 1024
+
+# Files hashed at the same time by hash_files()
+MAX_HASH_WORKERS = 4
+
+# Digests not looked up for this long, in seconds, are deleted
+HASH_CACHE_MAX_AGE = 180 * 24 * 60 * 60
+
+# How old the time a digest was last looked up must be for it to be updated
+HASH_CACHE_SEEN_RESOLUTION = 24 * 60 * 60
+
+# What identifies a file's content, short of reading it
+FileIdentity = Tuple[int, int, int, int]
+
+
+class Crc32Hash:
+    """zlib.crc32 with the interface of hashlib's hash objects; its digest is the
+    CRC as 8 hexadecimal digits, as found in DAT files."""
+
+    name = "crc32"
+
+    def __init__(self) -> None:
+        self._crc = 0
+
+    def update(self, data) -> None:
+        self._crc = zlib.crc32(data, self._crc)
+
+    def hexdigest(self) -> str:
+        return "%08x" % self._crc
+
+
+def new_hash(algorithm: str):
+    """Return a hash object for 'algorithm', which may be 'crc32' or any algorithm of hashlib."""
+    if algorithm == "crc32":
+        return Crc32Hash()
+    return hashlib.new(algorithm)
+
+
+def get_file_identity(path: str) -> FileIdentity:
+    file_stat = os.stat(path)
+    return file_stat.st_dev, file_stat.st_ino, file_stat.st_size, file_stat.st_mtime_ns
+
+
+class HashCache:
+    """The digests of files, by file identity and algorithm, kept in an SQLite database.
+
+    A file changed in place within the resolution of its modification time, and
+    without changing size, would go unnoticed; this is not meant for security."""
+
+    def __init__(self, db_path: str = settings.HASH_CACHE_PATH) -> None:
+        self.db_path = db_path
+        self._initialized = False
+        self._lock = threading.Lock()
+
+    def _initialize(self) -> None:
+        with self._lock:
+            if self._initialized:
+                return
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            now = int(time.time())
+            with sql.db_transaction(self.db_path) as cursor:
+                sql.cursor_execute(
+                    cursor,
+                    "create table if not exists hashes ("
+                    "device integer, inode integer, size integer, mtime_ns integer, "
+                    "algorithm text, digest text, seen_at integer not null default 0, "
+                    "primary key (device, inode, size, mtime_ns, algorithm)) without rowid",
+                )
+                columns = [row[1] for row in sql.cursor_execute(cursor, "pragma table_info(hashes)")]
+                if "seen_at" not in columns:
+                    # Caches from before seen_at was added start their count now
+                    sql.cursor_execute(cursor, "alter table hashes add column seen_at integer not null default 0")
+                    sql.cursor_execute(cursor, "update hashes set seen_at=?", (now,))
+                deleted = sql.cursor_execute(
+                    cursor, "delete from hashes where seen_at<?", (now - HASH_CACHE_MAX_AGE,)
+                ).rowcount
+            if deleted:
+                logger.debug("Deleted %d old digests from the hash cache", deleted)
+            self._initialized = True
+
+    def get(self, identity: FileIdentity, algorithms: Iterable[str]) -> Dict[str, str]:
+        """Return the digests known for a file, by algorithm; those not known are left out."""
+        algorithms = list(algorithms)
+        placeholders = ", ".join("?" * len(algorithms))
+        now = int(time.time())
+        try:
+            self._initialize()
+            with sql.db_cursor(self.db_path) as cursor:
+                rows = sql.cursor_execute(
+                    cursor,
+                    "select algorithm, digest, seen_at from hashes "
+                    "where device=? and inode=? and size=? and mtime_ns=? and algorithm in (%s)" % placeholders,
+                    (*identity, *algorithms),
+                ).fetchall()
+            if any(seen_at < now - HASH_CACHE_SEEN_RESOLUTION for _algorithm, _digest, seen_at in rows):
+                with sql.db_transaction(self.db_path) as cursor:
+                    sql.cursor_execute(
+                        cursor,
+                        "update hashes set seen_at=? "
+                        "where device=? and inode=? and size=? and mtime_ns=? and algorithm in (%s)" % placeholders,
+                        (now, *identity, *algorithms),
+                    )
+        except sqlite3.Error as ex:
+            logger.warning("Unable to read the hash cache: %s", ex)
+            return {}
+        return {algorithm: digest for algorithm, digest, _seen_at in rows}
+
+    def set(self, identity: FileIdentity, digests: Dict[str, str]) -> None:
+        """Record the digests of a file, by algorithm."""
+        try:
+            self._initialize()
+            with sql.db_transaction(self.db_path) as cursor:
+                for algorithm, digest in digests.items():
+                    sql.cursor_execute(
+                        cursor,
+                        "insert or replace into hashes values (?, ?, ?, ?, ?, ?, ?)",
+                        (*identity, algorithm, digest, int(time.time())),
+                    )
+        except sqlite3.Error as ex:
+            logger.warning("Unable to write to the hash cache: %s", ex)
+
+
+HASH_CACHE = HashCache()
+
+
+def set_file_hash(path: str, algorithm: str, digest: str) -> None:
+    """Record the digest of a file that was just written, computed as it was written."""
+    try:
+        identity = get_file_identity(path)
+    except OSError as ex:
+        logger.warning("Unable to store the checksum of %s: %s", path, ex)
+        return
+    HASH_CACHE.set(identity, {algorithm: digest})
+
+
+def get_file_hashes(path: str, algorithms: Sequence[str] = ("md5",)) -> Dict[str, str]:
+    """Return the digests of a file for each algorithm, reading it at most once.
+    Raises OSError if it can't be read."""
+    identity = get_file_identity(path)
+    digests = HASH_CACHE.get(identity, algorithms)
+    missing = [algorithm for algorithm in algorithms if algorithm not in digests]
+    if not missing:
+        return digests
+
+    hashers = [new_hash(algorithm) for algorithm in missing]
+    buffer = bytearray(HASH_BUFFER_SIZE)
+    view = memoryview(buffer)
+    with open(path, "rb", buffering=0) as input_file:
+        for length in iter(lambda: input_file.readinto(buffer), 0):
+            for hasher in hashers:
+                hasher.update(view[:length])
+    computed = {algorithm: hasher.hexdigest() for algorithm, hasher in zip(missing, hashers)}
+    # The file may have been modified while we read it
+    if get_file_identity(path) == identity:
+        HASH_CACHE.set(identity, computed)
+    digests.update(computed)
+    return digests
+
+
+def get_file_hash(path: str, algorithm: str = "md5") -> str:
+    """Return the digest of a file; raises OSError if it can't be read."""
+    return get_file_hashes(path, (algorithm,))[algorithm]
+
+
+def hash_files(
+    paths: Iterable[str], algorithms: Sequence[str] = ("md5",), max_workers: int = MAX_HASH_WORKERS
+) -> Dict[str, Optional[Dict[str, str]]]:
+    """Return the digests of many files, by path, hashing several files at a time.
+    Files that can't be read have None as digests."""
+
+    def hash_file(path: str) -> Optional[Dict[str, str]]:
+        try:
+            return get_file_hashes(path, algorithms)
+        except OSError as ex:
+            logger.warning("Unable to hash %s: %s", path, ex)
+            return None
+
+    path_list = list(paths)
+    if len(path_list) < 2:
+        return {path: hash_file(path) for path in path_list}
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hashing") as executor:
+        return dict(zip(path_list, executor.map(hash_file, path_list)))
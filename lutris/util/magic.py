@@ -163,13 +163,18 @@ class Magic:
             self.cookie = None
 
 
-_instances = {}
+# Each thread has its own libmagic cookies, so that threads identifying
+# files don't wait on each other's lock.
+_thread_instances = threading.local()
 
 
 def _get_magic_type(mime):
-    i = _instances.get(mime)
+    instances = getattr(_thread_instances, "instances", None)
+    if instances is None:
+        instances = _thread_instances.instances = {}
+    i = instances.get(mime)
     if i is None:
-        i = _instances[mime] = Magic(mime=mime)
+        i = instances[mime] = Magic(mime=mime)
     return i
 
 
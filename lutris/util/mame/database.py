@@ -3,13 +3,16 @@
 # Standard Library
 import json
 import os
+import sqlite3
 from xml.etree import ElementTree
 
 # Lutris Modules
 from lutris import settings
+from lutris.database import sql
 from lutris.util.log import logger
 
 CACHE_DIR = os.path.join(settings.CACHE_DIR, "mame")
+MACHINE_DB_PATH = os.path.join(CACHE_DIR, "machines.db")
 
 
 def simplify_manufacturer(manufacturer):
@@ -27,9 +30,9 @@ def is_game(machine):
     Clones return False
     """
     return (
-        machine.attrib["isbios"] == "no"
-        and machine.attrib["isdevice"] == "no"
-        and machine.attrib["runnable"] == "yes"
+        machine.attrib.get("isbios", "no") == "no"
+        and machine.attrib.get("isdevice", "no") == "no"
+        and machine.attrib.get("runnable", "yes") == "yes"
         and "romof" not in machine.attrib
         # FIXME: Filter by the machines that accept coins, but not like that
         # and "coin" in machine.find("input").attrib
@@ -58,17 +61,25 @@ def is_system(machine):
     return has_software_list(machine)
 
 
+def _iter_machine_elements(xml_path):
+    context = ElementTree.iterparse(xml_path, events=("start", "end"))
+    _event, root = next(context)
+    for event, element in context:
+        if event == "end" and element.tag == "machine":
+            yield element
+            root.clear()
+
+
 def iter_machines(xml_path, filter_func=None):
-    """Iterate through machine nodes in the MAME XML"""
+    """Iterate through machine nodes in the MAME XML. The XML is parsed as it is
+    read, and each machine is cleared once the next one is requested, so it must
+    not be kept around."""
     try:
-        root = ElementTree.parse(xml_path).getroot()
-    except Exception as ex:  # pylint: disable=broad-except
+        for machine in _iter_machine_elements(xml_path):
+            if not filter_func or filter_func(machine):
+                yield machine
+    except (OSError, ElementTree.ParseError) as ex:
         logger.error("Failed to read MAME XML: %s", ex)
-        return []
-    for machine in root:
-        if filter_func and not filter_func(machine):
-            continue
-        yield machine
 
 
 def get_machine_info(machine):
@@ -93,31 +104,205 @@ def get_machine_info(machine):
     }
 
 
-def get_supported_systems(xml_path, force=False):
+def _get_text(machine, tag):
+    child = machine.find(tag)
+    return child.text if child is not None else None
+
+
+def _get_attributes(machine, tag):
+    child = machine.find(tag)
+    return json.dumps(dict(child.attrib)) if child is not None else None
+
+
+def _get_machine_rows(machine):
+    """Return the rows of each table of the machine database for a machine node"""
+    name = machine.attrib["name"]
+    rows = {
+        "machines": [
+            (
+                name,
+                _get_text(machine, "description"),
+                simplify_manufacturer(_get_text(machine, "manufacturer")),
+                _get_text(machine, "year"),
+                machine.attrib.get("cloneof"),
+                machine.attrib.get("romof"),
+                is_system(machine),
+                is_game(machine),
+                _get_attributes(machine, "input"),
+                _get_attributes(machine, "driver"),
+            )
+        ],
+        "roms": [],
+        "ports": [],
+        "devices": [],
+        "software_lists": [],
+    }
+    for child in machine:
+        if child.tag == "rom":
+            attrib = child.attrib
+            rows["roms"].append((name, attrib.get("name"), attrib.get("size"), attrib.get("crc"), json.dumps(attrib)))
+        elif child.tag == "port":
+            rows["ports"].append((name, json.dumps(child.attrib)))
+        elif child.tag == "device":
+            rows["devices"].append(
+                (
+                    name,
+                    json.dumps(child.attrib),
+                    "".join(instance.attrib["name"] for instance in child.findall("instance")),
+                    "".join(instance.attrib["briefname"] for instance in child.findall("instance")),
+                    json.dumps([extension.attrib["name"] for extension in child.findall("extension")]),
+                )
+            )
+        elif child.tag == "softwarelist":
+            rows["software_lists"].append((name, child.attrib.get("name"), child.attrib.get("status")))
+    return rows
+
+
+MACHINE_DB_SCHEMA = (
+    "create table machines (name text primary key, description text, manufacturer text, year text, "
+    "cloneof text, romof text, is_system integer, is_game integer, input text, driver text)",
+    "create table roms (machine text, name text, size integer, crc text, attributes text)",
+    "create table ports (machine text, attributes text)",
+    "create table devices (machine text, attributes text, name text, briefname text, extensions text)",
+    "create table software_lists (machine text, name text, status text)",
+    "create index machines_system on machines (is_system, manufacturer, description)",
+    "create index machines_game on machines (is_game)",
+    "create index roms_machine on roms (machine)",
+    "create index roms_crc on roms (crc)",
+    "create index ports_machine on ports (machine)",
+    "create index devices_machine on devices (machine)",
+    "create index software_lists_machine on software_lists (machine)",
+)
+
+# Machines parsed before their rows are written to the database
+MACHINE_BATCH_SIZE = 500
+
+
+def build_machine_database(xml_path, db_path=MACHINE_DB_PATH):
+    """Index the machines of the MAME XML in an SQLite database, replacing the
+    previous one once complete. Returns the number of machines indexed."""
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    temp_path = db_path + ".tmp"
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+    connection = sqlite3.connect(temp_path)
+    machine_count = 0
+    try:
+        connection.execute("PRAGMA journal_mode=OFF")
+        connection.execute("PRAGMA synchronous=OFF")
+        for statement in MACHINE_DB_SCHEMA:
+            connection.execute(statement)
+        batch = {}
+        for machine in _iter_machine_elements(xml_path):
+            for table, rows in _get_machine_rows(machine).items():
+                batch.setdefault(table, []).extend(rows)
+            machine_count += 1
+            if machine_count % MACHINE_BATCH_SIZE == 0:
+                _insert_machine_rows(connection, batch)
+                batch = {}
+        _insert_machine_rows(connection, batch)
+        connection.commit()
+    except (OSError, ElementTree.ParseError) as ex:
+        # Don't replace the database with part of the machines
+        logger.error("Failed to read MAME XML: %s", ex)
+        machine_count = 0
+    finally:
+        connection.close()
+    if not machine_count:
+        os.remove(temp_path)
+        return 0
+    os.replace(temp_path, db_path)
+    logger.info("Indexed %d MAME machines in %s", machine_count, db_path)
+    return machine_count
+
+
+def _insert_machine_rows(connection, batch):
+    for table, rows in batch.items():
+        if rows:
+            connection.executemany("insert into %s values (%s)" % (table, ", ".join("?" * len(rows[0]))), rows)
+
+
+def is_machine_database_ready(xml_path, db_path=MACHINE_DB_PATH):
+    """Return True if the machine database exists and is not older than the MAME XML"""
+    try:
+        db_mtime = os.path.getmtime(db_path)
+    except OSError:
+        return False
+    try:
+        return db_mtime >= os.path.getmtime(xml_path)
+    except OSError:
+        return True
+
+
+def _query_machines(db_path, condition):
+    with sql.db_cursor(db_path) as cursor:
+        rows = sql.cursor_execute(
+            cursor,
+            "select name, description, manufacturer, year from machines where %s "
+            "order by manufacturer, description" % condition,
+        ).fetchall()
+    return {
+        name: {"description": description, "manufacturer": manufacturer, "year": year}
+        for name, description, manufacturer, year in rows
+    }
+
+
+def get_machine(name, db_path=MACHINE_DB_PATH):
+    """Return the information of a single machine from the machine database, in
+    the format of get_machine_info(), or None if it is not known."""
+    with sql.db_cursor(db_path) as cursor:
+        row = sql.cursor_execute(
+            cursor, "select description, manufacturer, year, input, driver from machines where name=?", (name,)
+        ).fetchone()
+        if not row:
+            return None
+        description, manufacturer, year, machine_input, driver = row
+        roms = sql.cursor_execute(cursor, "select attributes from roms where machine=?", (name,)).fetchall()
+        ports = sql.cursor_execute(cursor, "select attributes from ports where machine=?", (name,)).fetchall()
+        devices = sql.cursor_execute(
+            cursor, "select attributes, name, briefname, extensions from devices where machine=?", (name,)
+        ).fetchall()
+    return {
+        "description": description,
+        "manufacturer": manufacturer,
+        "year": year,
+        "roms": [json.loads(attributes) for (attributes,) in roms],
+        "ports": [json.loads(attributes) for (attributes,) in ports],
+        "devices": [
+            {
+                "info": json.loads(attributes),
+                "name": device_name,
+                "briefname": briefname,
+                "extensions": json.loads(extensions),
+            }
+            for attributes, device_name, briefname, extensions in devices
+        ],
+        "input": json.loads(machine_input) if machine_input else {},
+        "driver": json.loads(driver) if driver else {},
+    }
+
+
+def get_supported_systems(xml_path, force=False, db_path=MACHINE_DB_PATH):
     """Return supported systems (computers and consoles) supported.
     From the full XML list extracted from MAME, filter the systems that are
     runnable, not clones and have the ability to run software.
+
+    The systems come from the machine database, which is built from the XML
+    if needed; use get_machine() for the details of a system.
     """
-    systems_cache_path = os.path.join(CACHE_DIR, "systems.json")
-    if os.path.exists(systems_cache_path) and not force:
-        with open(systems_cache_path, "r", encoding="utf-8") as systems_cache_file:
-            try:
-                systems = json.load(systems_cache_file)
-            except json.JSONDecodeError:
-                logger.error("Failed to read systems cache %s", systems_cache_path)
-                systems = None
-        if systems:
-            return systems
-    logger.info("Parsing MAME XML to build systems list")
-    systems = {machine.attrib["name"]: get_machine_info(machine) for machine in iter_machines(xml_path, is_system)}
-    if not systems:
+    if force or not is_machine_database_ready(xml_path, db_path):
+        logger.info("Parsing MAME XML to build the machine database")
+        if not build_machine_database(xml_path, db_path):
+            return {}
+    try:
+        return _query_machines(db_path, "is_system")
+    except sqlite3.Error as ex:
+        logger.error("Failed to read the MAME machine database %s: %s", db_path, ex)
         return {}
-    logger.info("Writing %d systems to %s", len(systems), systems_cache_path)
-    with open(systems_cache_path, "w", encoding="utf-8") as systems_cache_file:
-        json.dump(systems, systems_cache_file, indent=2)
-    return systems
 
 
-def get_games(xml_path):
+def get_games(xml_path, db_path=MACHINE_DB_PATH):
     """Return a list of all games"""
-    return {machine.attrib["name"]: get_machine_info(machine) for machine in iter_machines(xml_path, is_game)}
+    if not is_machine_database_ready(xml_path, db_path) and not build_machine_database(xml_path, db_path):
+        return {}
+    return _query_machines(db_path, "is_game")
@@ -1,42 +1,66 @@
 """Keep track of game executables' presence"""
 
-import json
 import os
+import re
+import threading
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from gi.repository import Gio, GLib
 
 from lutris import settings
-from lutris.database.games import get_games
-from lutris.game import Game
+from lutris.database import sql
+from lutris.game import get_path_from_game_config
 from lutris.gui.widgets import NotificationSource
 from lutris.util import cache_single
 from lutris.util.jobs import AsyncCall
 from lutris.util.log import logger
+from lutris.util.yaml import read_yaml_from_file
+
+LEGACY_GAME_PATH_CACHE_PATH = os.path.join(settings.CACHE_DIR, "game-paths.json")
+MAX_CONFIG_READERS = 8
+PATH_PROBE_TIMEOUT = 3  # Seconds a single path has to answer before it is given up on
+MAX_PROBE_WORKERS = 8
+MOUNTS_PATH = "/proc/self/mounts"
+
 
-GAME_PATH_CACHE_PATH = os.path.join(settings.CACHE_DIR, "game-paths.json")
+def _get_game_path(db_game):
+    """Return the path of a game from its row in the database. This reads the game's
+    own config file only, which is all Game.get_path_from_config() needs, without
+    loading the runner and system configs."""
+    config_path = os.path.join(settings.CONFIG_DIR, "games/%s.yml" % db_game["configpath"])
+    game_config = read_yaml_from_file(config_path).get("game") or {}
+    return get_path_from_game_config(game_config, db_game["runner"], db_game["directory"])
 
 
 def get_game_paths():
-    game_paths = {}
-    all_games = get_games(filters={"installed": 1})
-    for db_game in all_games:
-        if db_game.get("runner") in ("steam", "web"):
-            continue
-        game = Game(db_game["id"])
-        path = game.get_path_from_config()
-        if not path:
-            continue
-        game_paths[db_game["id"]] = path
-    return game_paths
+    query = "SELECT id, runner, directory, configpath FROM games WHERE installed = 1"
+    db_games = [
+        db_game
+        for db_game in sql.db_query(settings.DB_PATH, query)
+        if db_game["configpath"] and db_game["runner"] not in ("steam", "web")
+    ]
+    with ThreadPoolExecutor(max_workers=MAX_CONFIG_READERS) as executor:
+        paths = executor.map(_get_game_path, db_games)
+    return {str(db_game["id"]): path for db_game, path in zip(db_games, paths) if path}
 
 
 def build_path_cache(recreate=False):
     """Generate a new cache path"""
-    if os.path.exists(GAME_PATH_CACHE_PATH) and not recreate:
+    if not recreate and sql.db_query(settings.DB_PATH, "SELECT 1 FROM game_paths LIMIT 1"):
         return
     start_time = time.time()
-    with open(GAME_PATH_CACHE_PATH, "w", encoding="utf-8") as cache_file:
-        game_paths = get_game_paths()
-        json.dump(game_paths, cache_file, indent=2)
+    game_paths = get_game_paths()
+    with sql.db_transaction(settings.DB_PATH) as cursor:
+        sql.cursor_execute(cursor, "DELETE FROM game_paths")
+        sql.db_insert_many(
+            settings.DB_PATH,
+            "game_paths",
+            [{"game_id": game_id, "path": path} for game_id, path in game_paths.items()],
+        )
+    if os.path.exists(LEGACY_GAME_PATH_CACHE_PATH):
+        os.remove(LEGACY_GAME_PATH_CACHE_PATH)
     end_time = time.time()
     get_path_cache.cache_clear()
     logger.debug("Game path cache built in %0.2f seconds", end_time - start_time)
@@ -49,50 +73,124 @@ def add_to_path_cache(game):
     if not path:
         logger.warning("No path for %s", game)
         return
-    current_cache = read_path_cache()
-    current_cache[game.id] = path
-    with open(GAME_PATH_CACHE_PATH, "w", encoding="utf-8") as cache_file:
-        json.dump(current_cache, cache_file, indent=2)
+    sql.db_upsert_many(settings.DB_PATH, "game_paths", [{"game_id": game.id, "path": path}], ["game_id"])
     get_path_cache.cache_clear()
 
 
 @cache_single
 def get_path_cache():
-    """Return the contents of the path cache file; this
+    """Return the contents of the path cache; this
     dict is cached, so do not modify it."""
     return read_path_cache()
 
 
 def read_path_cache():
-    """Read the contents of the path cache file, and does not cache it."""
-    with open(GAME_PATH_CACHE_PATH, encoding="utf-8") as cache_file:
-        try:
-            return json.load(cache_file)
-        except json.JSONDecodeError:
-            return {}
+    """Read the contents of the path cache, and does not cache it."""
+    return {
+        str(row["game_id"]): row["path"]
+        for row in sql.db_query(settings.DB_PATH, "SELECT game_id, path FROM game_paths")
+    }
 
 
 def remove_from_path_cache(game):
     logger.debug("Removing %s from path cache", game)
-    current_cache = read_path_cache()
-    if game.id not in current_cache:
+    if not sql.db_query(settings.DB_PATH, "SELECT 1 FROM game_paths WHERE game_id = ?", (game.id,)):
         logger.warning("Game %s (id=%s) not in cache path", game, game.id)
         return
-    del current_cache[game.id]
-    with open(GAME_PATH_CACHE_PATH, "w", encoding="utf-8") as cache_file:
-        json.dump(current_cache, cache_file, indent=2)
+    sql.db_delete(settings.DB_PATH, "game_paths", "game_id", game.id)
     get_path_cache.cache_clear()
 
 
+def get_mount_points():
+    """Return the mount points of the system, longest first. They are read from the kernel's
+    mount table, so that no mounted file system, which might not answer, is touched."""
+    try:
+        with open(MOUNTS_PATH, encoding="utf-8") as mounts_file:
+            lines = mounts_file.readlines()
+    except OSError as ex:
+        logger.warning("Unable to read the mount points: %s", ex)
+        return ["/"]
+    mount_points = {"/"}
+    for line in lines:
+        fields = line.split()
+        if len(fields) > 1:
+            # Spaces and other special characters are escaped as octal sequences, like '\040'
+            mount_points.add(re.sub(r"\\([0-7]{3})", lambda match: chr(int(match.group(1), 8)), fields[1]))
+    return sorted(mount_points, key=len, reverse=True)
+
+
+def get_mount_point(path, mount_points):
+    """Return the mount point 'path' is on, from the mount points given longest first"""
+    for mount_point in mount_points:
+        if path == mount_point or path.startswith(mount_point.rstrip("/") + "/"):
+            return mount_point
+    return "/"
+
+
+def probe_paths(probe, paths, timeout=None, max_workers=MAX_PROBE_WORKERS):
+    """Call probe(path) for each path on worker threads, and return a dict of the results.
+
+    A path whose probe takes longer than 'timeout' seconds, or raises, is left out of the
+    results. The thread stuck on it is abandoned and another takes its place; the workers
+    are daemon threads so a dead network mount can't hold up the exit of Lutris either."""
+    timeout = timeout or PATH_PROBE_TIMEOUT
+    pending = deque(paths)
+    results = {}
+    started = {}  # path: start time, for the probes in progress
+    condition = threading.Condition()
+
+    def work():
+        while True:
+            with condition:
+                if not pending:
+                    return
+                path = pending.popleft()
+                started[path] = time.monotonic()
+            try:
+                result = probe(path)
+            except Exception as ex:  # pylint: disable=broad-except
+                logger.warning("Unable to check %s: %s", path, ex)
+                result = None
+            with condition:
+                if started.pop(path, None) is not None and result is not None:
+                    results[path] = result
+                condition.notify()
+
+    def start_worker():
+        threading.Thread(target=work, daemon=True).start()
+
+    for _i in range(min(max_workers, len(pending))):
+        start_worker()
+    with condition:
+        while pending or started:
+            now = time.monotonic()
+            for path, start_time in list(started.items()):
+                if now - start_time >= timeout:
+                    logger.warning("No answer checking %s after %s seconds", path, timeout)
+                    del started[path]
+                    if pending:
+                        start_worker()
+            wait_time = min(started.values()) + timeout - now if started else timeout
+            condition.wait(max(wait_time, 0.01))
+    return results
+
+
 class MissingGames:
     """This class is a singleton that holds a set of game-ids for games whose directories
     are missing. It is updated on a background thread, but there's a NotificationSource ('updated')
-    that fires when that thread has made changes and exited, so that the UI cab update then."""
+    that fires when that thread has made changes and exited, so that the UI cab update then.
+
+    Once all paths have been checked, they are watched with file monitors and later changes
+    are applied as they are reported; a full check is only done again when the path cache
+    changes or a volume is mounted or unmounted."""
 
     def __init__(self):
         self.updated = NotificationSource()
         self.missing_game_ids = set()
         self._update_running = None
+        self._watched_path_cache = None  # The path cache the monitors are up to date with
+        self._monitors = {}  # path: Gio.FileMonitor
+        self._volume_monitor = None
 
     @property
     def is_initialized(self):
@@ -103,37 +201,84 @@ class MissingGames:
         """This starts the check for all games; the actual list of game-ids will be obtained
         on the worker thread, and this method will start it."""
 
-        if not self._update_running:
-            self._update_running = True
-            AsyncCall(self._update_missing_games, self._update_missing_games_cb)
+        if self._update_running:
+            return
+        if self._watched_path_cache is not None and self._watched_path_cache is get_path_cache():
+            return  # The monitors keep missing_game_ids up to date
+        self._update_running = True
+        AsyncCall(self._update_missing_games, self._update_missing_games_cb)
 
     def _update_missing_games(self):
-        """This is the method that runs on the worker thread; it checks each game given
-        and returns True if any changes to missing_game_ids was made."""
+        """This is the method that runs on the worker thread; it checks the paths of every game
+        and returns the path cache, the ids of the missing games and the paths that could be
+        checked. Paths are grouped by mount point; when a mount point does not answer, all
+        of its games are missing without checking each of them."""
 
         logger.debug("Checking for missing games")
 
-        changed = False
-
-        for game_id, path in get_path_cache().items():
-            if path:
-                old_status = game_id in self.missing_game_ids
-                new_status = not os.path.exists(path)
-                if old_status != new_status:
-                    if new_status:
-                        self.missing_game_ids.add(game_id)
-                    else:
-                        self.missing_game_ids.discard(game_id)
-                    changed = True
-        return changed
-
-    def _update_missing_games_cb(self, changed, error):
+        path_cache = get_path_cache()
+        paths = {path for path in path_cache.values() if path}
+        known_mount_points = get_mount_points()
+        mount_points = {path: get_mount_point(os.path.abspath(path), known_mount_points) for path in paths}
+        mounted = probe_paths(os.path.isdir, set(mount_points.values()))
+        for mount_point in set(mount_points.values()) - set(mounted):
+            logger.warning("%s is not reachable, its games are missing", mount_point)
+        reachable_paths = [path for path, mount_point in mount_points.items() if mounted.get(mount_point)]
+        present = probe_paths(os.path.exists, reachable_paths)
+        missing_game_ids = {game_id for game_id, path in path_cache.items() if path and not present.get(path)}
+        return path_cache, missing_game_ids, set(present)
+
+    def _update_missing_games_cb(self, result, error):
         self._update_running = False
 
         if error:
             logger.exception("Unable to detect missing games: %s", error)
-        elif changed:
+            return
+        path_cache, missing_game_ids, checked_paths = result
+        self._watch_paths(checked_paths)
+        all_checked = len(checked_paths) == len({path for path in path_cache.values() if path})
+        self._watched_path_cache = path_cache if all_checked else None
+        if missing_game_ids != self.missing_game_ids:
+            self.missing_game_ids = missing_game_ids
             self.updated.fire()
 
+    def _watch_paths(self, paths):
+        """Monitor the paths given, and stop monitoring any others; this must run on the main thread."""
+        for path in set(self._monitors) - paths:
+            self._monitors.pop(path).cancel()
+        for path in paths - set(self._monitors):
+            try:
+                monitor = Gio.File.new_for_path(path).monitor_file(Gio.FileMonitorFlags.NONE)
+            except GLib.Error as ex:
+                logger.warning("Unable to monitor %s: %s", path, ex)
+                continue
+            monitor.connect("changed", self._on_path_changed)
+            self._monitors[path] = monitor
+        if not self._volume_monitor:
+            self._volume_monitor = Gio.VolumeMonitor.get()
+            self._volume_monitor.connect("mount-added", self._on_mounts_changed)
+            self._volume_monitor.connect("mount-removed", self._on_mounts_changed)
+
+    def _on_path_changed(self, _monitor, _file, _other_file, event_type):
+        if event_type not in (Gio.FileMonitorEvent.CREATED, Gio.FileMonitorEvent.DELETED):
+            return
+        path = _file.get_path()
+        if self._watched_path_cache is None or path is None:
+            return
+        is_missing = not os.path.exists(path)
+        game_ids = {game_id for game_id, game_path in self._watched_path_cache.items() if game_path == path}
+        if is_missing:
+            missing_game_ids = self.missing_game_ids | game_ids
+        else:
+            missing_game_ids = self.missing_game_ids - game_ids
+        if missing_game_ids != self.missing_game_ids:
+            self.missing_game_ids = missing_game_ids
+            self.updated.fire()
+
+    def _on_mounts_changed(self, _volume_monitor, _mount):
+        self._watched_path_cache = None
+        if self.is_initialized:
+            self.update_all_missing()
+
 
 MISSING_GAMES = MissingGames()
@@ -0,0 +1,167 @@
+"""Tracking of the processes that belong to a running game"""
+
+import os
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from lutris.util import system
+from lutris.util.log import logger
+from lutris.util.process import Process
+
+CGROUP_ROOT = "/sys/fs/cgroup"
+
+# Processes with these names are reported even without the game's UUID, so the runners can decide
+PROCESS_NAME_PREFIXES = ("gamescope",)
+
+
+def get_scope_unit_name(game_uuid: str) -> str:
+    """Return the name of the systemd scope a game is launched in."""
+    return "lutris-game-%s.scope" % game_uuid
+
+
+def get_cgroup_path(pid: int) -> Optional[str]:
+    """Return the path, relative to the cgroup v2 hierarchy, of the cgroup a process is in."""
+    try:
+        with open("/proc/%d/cgroup" % pid, encoding="utf-8") as cgroup_file:
+            for line in cgroup_file:
+                if line.startswith("0::"):
+                    return line[3:].strip()
+    except OSError:
+        pass
+    return None
+
+
+@lru_cache(maxsize=None)
+def is_scope_supported() -> bool:
+    """True if games can be launched in a systemd scope of their own, so their processes can be
+    listed from their cgroup; this needs the unified cgroup hierarchy and a systemd user manager,
+    which is not available inside a Flatpak sandbox."""
+    if not os.path.exists(os.path.join(CGROUP_ROOT, "cgroup.controllers")):
+        return False
+    if not system.can_find_executable("systemd-run"):
+        return False
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if not os.environ.get("DBUS_SESSION_BUS_ADDRESS") and not (runtime_dir and os.path.exists(runtime_dir + "/bus")):
+        return False  # systemd-run --user needs the session bus
+    cgroup_path = get_cgroup_path(os.getpid())
+    return bool(cgroup_path and "/user@" in cgroup_path)
+
+
+def get_scope_command(game_uuid: str) -> List[str]:
+    """Return the command prefix that runs a command in the game's scope; systemd-run
+    executes the command itself, so it keeps its PID and output."""
+    return [
+        system.find_required_executable("systemd-run"),
+        "--user",
+        "--scope",
+        "--quiet",
+        "--collect",
+        "--unit=%s" % get_scope_unit_name(game_uuid),
+    ]
+
+
+def _get_process_identity(pid: int) -> Optional[str]:
+    """Return the executable of a process, which changes when it execs; it is None for
+    processes we can't inspect."""
+    try:
+        return os.readlink("/proc/%d/exe" % pid)
+    except OSError:
+        return None
+
+
+class GameProcessTracker:
+    """Finds the processes that can belong to a running game, for the runner to filter.
+
+    If the game was launched in a scope of its own, these are the processes in its cgroup,
+    which the kernel keeps up to date; no scanning is needed. Otherwise, this falls back on
+    the processes started since the launch, and only inspects the environment of those it
+    has not seen before, or that have executed something else since. The runner's verdict
+    on each process is kept the same way, so it only inspects the processes it hasn't seen."""
+
+    def __init__(self, game_uuid: str, prelaunch_pids: Optional[Iterable[int]], main_pid: Optional[int] = None):
+        self.game_uuid = game_uuid
+        self.prelaunch_pids = set(prelaunch_pids) if prelaunch_pids else None
+        self.main_pid = main_pid
+        self.scope_path: Optional[str] = None
+        self._scope_unit_name = get_scope_unit_name(game_uuid)
+        self._scope_lookup_done = main_pid is None
+        # Whether each process, by PID and executable, is a candidate
+        self._candidates: Dict[Tuple[int, Optional[str]], bool] = {}
+        # Whether each candidate, by PID and executable, belongs to the game according to the runner
+        self._game_processes: Dict[Tuple[int, Optional[str]], bool] = {}
+
+    def _find_scope(self) -> None:
+        """Locates the game's cgroup from its main process. This is retried until the
+        process has moved into its scope, which systemd-run does just after starting."""
+        if self._scope_lookup_done:
+            return
+        cgroup_path = get_cgroup_path(self.main_pid)
+        if cgroup_path is None:
+            self._scope_lookup_done = True  # the process is gone, the scope with it
+        elif os.path.basename(cgroup_path) == self._scope_unit_name:
+            self.scope_path = os.path.join(CGROUP_ROOT, cgroup_path.lstrip("/"))
+            self._scope_lookup_done = True
+            logger.debug("Tracking the processes of the game in %s", self.scope_path)
+
+    def get_scope_pids(self) -> Optional[Set[int]]:
+        """Return the PIDs of the processes in the game's cgroup, or None if there's none."""
+        self._find_scope()
+        if not self.scope_path:
+            return None
+        try:
+            with open(os.path.join(self.scope_path, "cgroup.procs"), encoding="utf-8") as procs_file:
+                return {int(pid) for pid in procs_file.read().split()}
+        except FileNotFoundError:
+            return set()  # systemd removes the scope once it is empty
+        except OSError as ex:
+            logger.warning("Unable to read the processes of %s: %s", self.scope_path, ex)
+            self.scope_path = None
+            return None
+
+    def _is_candidate(self, key: Tuple[int, Optional[str]]) -> bool:
+        is_candidate = self._candidates.get(key)
+        if is_candidate is None:
+            process = Process(key[0])
+            is_candidate = process.environ.get("LUTRIS_GAME_UUID") == self.game_uuid or (process.name or "").startswith(
+                PROCESS_NAME_PREFIXES
+            )
+            self._candidates[key] = is_candidate
+        return is_candidate
+
+    def _get_candidate_keys(self) -> Set[Tuple[int, Optional[str]]]:
+        """Return the PIDs and executables of the processes that may belong to the game."""
+        scope_pids = self.get_scope_pids()
+        if scope_pids is not None:
+            return {(pid, _get_process_identity(pid)) for pid in scope_pids}
+
+        if self.prelaunch_pids is None:
+            logger.error("No prelaunch PIDs recorded. The game's PIDs cannot be computed.")
+            return set()
+
+        new_pids = set(system.get_running_pid_list()) - self.prelaunch_pids
+        self._candidates = _prune(self._candidates, new_pids)
+        keys = {(pid, _get_process_identity(pid)) for pid in new_pids}
+        return {key for key in keys if self._is_candidate(key)}
+
+    def get_candidate_pids(self) -> Set[int]:
+        """Return the PIDs of the processes that may belong to the game."""
+        return {pid for pid, _identity in self._get_candidate_keys()}
+
+    def get_game_pids(self, filter_pids: Callable[[Set[int]], Set[int]]) -> Set[int]:
+        """Return the PIDs of the processes of the game; filter_pids is given the candidates
+        it has not been given before, and returns those that belong to the game."""
+        keys = self._get_candidate_keys()
+        self._game_processes = _prune(self._game_processes, {pid for pid, _identity in keys})
+        new_keys = {key for key in keys if key not in self._game_processes}
+        if new_keys:
+            game_pids = filter_pids({pid for pid, _identity in new_keys})
+            for key in new_keys:
+                self._game_processes[key] = key[0] in game_pids
+        return {key[0] for key in keys if self._game_processes[key]}
+
+
+def _prune(processes: Dict[Tuple[int, Optional[str]], bool], pids: Set[int]) -> Dict[Tuple[int, Optional[str]], bool]:
+    """Forget the processes that are gone, once there are enough of them to be worth it."""
+    if len(processes) > 4 * len(pids) + 1024:
+        return {key: value for key, value in processes.items() if key[0] in pids}
+    return processes
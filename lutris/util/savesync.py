@@ -12,6 +12,7 @@ except ImportError:
 
 from lutris import settings
 from lutris.game import Game
+from lutris.util.hashing import hash_files
 from lutris.util.log import logger
 from lutris.util.strings import human_size
 from lutris.util.wine.prefix import find_prefix
@@ -80,14 +81,19 @@ class SaveInfo:
 
     def format_dir_info(self, path: str) -> list:
         path_files = self.get_dir_info(path)
+        path = path.rstrip("/")
+        root = path if not os.path.isfile(path) else os.path.dirname(path)
+        digests = hash_files(os.path.join(root, path_file) for path_file in path_files)
         output = []
         for path_file in sorted(path_files, key=lambda k: path_files[k].st_mtime, reverse=True):
             fstats = path_files[path_file]
+            file_digests = digests[os.path.join(root, path_file)]
             output.append(
                 {
                     "file": path_file,
                     "size": fstats.st_size,
                     "modified": fstats.st_mtime,
+                    "md5": file_digests["md5"] if file_digests else None,
                 }
             )
         return output
@@ -284,6 +290,8 @@ def save_check(game):
                 if not remote_file:
                     unsynced[section]["unsynced"].append(filename)
                 files[filename]["seen"] = True
+                if file_info.get("md5") and file_info["md5"] == files[filename].get("md5"):
+                    continue  # Same content, whatever the modification times
                 if file_info["modified"] > files[filename]["modified"]:
                     print("Local file %s is newer" % filename)
                     unsynced[section]["newer"].append(filename)
@@ -137,6 +137,11 @@ def get_path_from_appmanifest(steamapps_path, appid):
     return appmanifest.get_install_path()
 
 
+def is_appmanifest(filename):
+    """Return True if the file name is the one of an appmanifest file"""
+    return bool(re.match(r"^appmanifest_\d+.acf$", filename))
+
+
 def get_appmanifests(steamapps_path):
     """Return the list for all appmanifest files in a Steam library folder"""
-    return [f for f in os.listdir(steamapps_path) if re.match(r"^appmanifest_\d+.acf$", f)]
+    return [f for f in os.listdir(steamapps_path) if is_appmanifest(f)]
@@ -1,11 +1,16 @@
 """Steam game library watcher"""
 
+# Standard Library
+import os
+import threading
+
 # Third Party Libraries
 # pylint: disable=too-few-public-methods
 from gi.repository import Gio, GLib
 
 # Lutris Modules
 from lutris.util.log import logger
+from lutris.util.steam.appmanifest import AppManifest, get_appmanifests, is_appmanifest
 
 
 class SteamWatcher:
@@ -30,3 +35,91 @@ class SteamWatcher:
             return
         if self.callback:
             self.callback(event_type, path)
+
+
+class ManifestIndex:
+    """The app manifests of Steam library folders, parsed once and kept until their
+    file changes. Manifests are told apart by modification time and size; folders
+    that can be watched are not listed again, only the manifests a SteamWatcher
+    reported as changed are looked at."""
+
+    def __init__(self):
+        self.manifests = {}  # path: (mtime_ns, size, AppManifest)
+        self._scanned_paths = set()
+        self._watchers = {}
+        self._changed_paths = set()
+        self._lock = threading.Lock()  # Guards the reported changes
+        self._update_lock = threading.Lock()
+
+    def _on_manifest_changed(self, _event_type, path):
+        with self._lock:
+            self._changed_paths.add(path)
+
+    def _watch(self, steamapps_path):
+        """Start watching a folder; returns True if changes to it will be reported."""
+        if steamapps_path not in self._watchers:
+            self._watchers[steamapps_path] = SteamWatcher([steamapps_path], self._on_manifest_changed)
+        return bool(self._watchers[steamapps_path].monitors)
+
+    def _update_manifest(self, path):
+        """Parse the manifest at 'path' if it changed; returns True if it did."""
+        try:
+            file_stat = os.stat(path)
+        except OSError:
+            return self.manifests.pop(path, None) is not None
+        file_key = (file_stat.st_mtime_ns, file_stat.st_size)
+        known = self.manifests.get(path)
+        if known and known[:2] == file_key:
+            return False
+        try:
+            self.manifests[path] = file_key + (AppManifest(path),)
+        except Exception as ex:  # pylint: disable=broad-except
+            logger.error("Failed to process app manifest %s: %s", path, ex)
+            self.manifests.pop(path, None)
+        return True
+
+    def update(self, steamapps_paths):
+        """Bring the manifests of the given library folders up to date. Returns
+        the paths of the manifests that were added, changed or removed."""
+        steamapps_paths = set(steamapps_paths)
+        with self._update_lock:
+            changed = set()
+            with self._lock:
+                reported_paths = self._changed_paths
+                self._changed_paths = set()
+            for steamapps_path in steamapps_paths:
+                if steamapps_path in self._scanned_paths:
+                    paths = {path for path in reported_paths if os.path.dirname(path) == steamapps_path}
+                else:
+                    # Watch before listing, so that no change goes unnoticed
+                    if self._watch(steamapps_path):
+                        self._scanned_paths.add(steamapps_path)
+                    try:
+                        filenames = get_appmanifests(steamapps_path)
+                    except OSError as ex:
+                        logger.warning("Unable to list %s: %s", steamapps_path, ex)
+                        filenames = []
+                    paths = {os.path.join(steamapps_path, filename) for filename in filenames}
+                    paths.update(path for path in self.manifests if os.path.dirname(path) == steamapps_path)
+                changed.update(
+                    path for path in paths if is_appmanifest(os.path.basename(path)) and self._update_manifest(path)
+                )
+            # Reports for folders that were not updated are kept for later
+            with self._lock:
+                self._changed_paths.update(
+                    path for path in reported_paths if os.path.dirname(path) not in steamapps_paths
+                )
+            return changed
+
+    def get_manifests(self, steamapps_paths):
+        """Return the manifests of the given library folders"""
+        steamapps_paths = set(steamapps_paths)
+        with self._update_lock:
+            return [
+                manifest
+                for path, (_mtime, _size, manifest) in self.manifests.items()
+                if os.path.dirname(path) in steamapps_paths
+            ]
+
+
+MANIFEST_INDEX = ManifestIndex()
@@ -1,5 +1,6 @@
 """String utilities"""
 
+import functools
 import math
 import re
 import shlex
@@ -76,6 +77,16 @@ def strip_accents(value: str) -> str:
     return value
 
 
+@functools.lru_cache(maxsize=65536)
+def fold_search_text(value: Optional[str]) -> str:
+    """Returns 'value' without accents and case-folded, the way text searches compare it.
+
+    This is cached, since the same game names get folded again on each keystroke."""
+    if not value:
+        return ""
+    return strip_accents(value).casefold()
+
+
 def get_natural_sort_key(value: str, number_width: int = 16) -> str:
     """Returns a string with the numerical parts (runs of digits)
     0-padded out to 'number_width' digits."""
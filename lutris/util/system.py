@@ -16,6 +16,8 @@ from gi.repository import Gio, GLib
 
 from lutris import settings
 from lutris.exceptions import MissingExecutableError
+from lutris.util import hashing
+from lutris.util.file_placement import FilePlacer
 from lutris.util.log import logger
 from lutris.util.portals import TrashPortal
 
@@ -208,12 +210,10 @@ def get_md5_in_zip(filename: str) -> str:
 def get_md5_hash(filename: str) -> Union[bool, str]:
     """Return the md5 hash of a file."""
     try:
-        with open(filename, "rb") as _file:
-            _hash = read_file_md5(_file)
+        return hashing.get_file_hash(filename, "md5")
     except IOError:
         logger.warning("Error reading %s", filename)
         return False
-    return _hash
 
 
 def read_file_md5(filedesc: IO[bytes]) -> str:
@@ -225,11 +225,7 @@ def read_file_md5(filedesc: IO[bytes]) -> str:
 
 def get_file_checksum(filename: str, hash_type: str) -> str:
     """Return the checksum of type `hash_type` for a given filename"""
-    hasher = hashlib.new(hash_type)
-    with open(filename, "rb") as input_file:
-        for chunk in iter(lambda: input_file.read(4096), b""):
-            hasher.update(chunk)
-    return hasher.hexdigest()
+    return hashing.get_file_hash(filename, hash_type)
 
 
 def is_executable(exec_path: str) -> bool:
@@ -349,27 +345,29 @@ def substitute(string_template: str, variables: Dict[str, str]) -> str:
     return template.safe_substitute(variables)
 
 
-def merge_folders(source: str, destination: str) -> None:
-    """Merges the content of source to destination"""
+def merge_folders(source: str, destination: str, consume: bool = False) -> None:
+    """Merges the content of source to destination; if 'consume' is set, the files
+    are moved rather than copied, which leaves only folders in source."""
     logger.debug("Merging %s into %s", source, destination)
     # We do not use shutil.copytree() here because that would copy
     # the file permissions, and we do not want them.
     source = os.path.abspath(source)
-    for dirpath, dirnames, filenames in os.walk(source):
-        source_relpath = dirpath[len(source) :].strip("/")
-        dst_abspath = os.path.join(destination, source_relpath)
-        for dirname in dirnames:
-            new_dir = os.path.join(dst_abspath, dirname)
-            logger.debug("creating dir: %s", new_dir)
-            try:
-                os.mkdir(new_dir)
-            except OSError:
-                pass
-        for filename in filenames:
-            # logger.debug("Copying %s", filename)
-            if not os.path.exists(dst_abspath):
+    with FilePlacer() as placer:
+        for dirpath, dirnames, filenames in os.walk(source):
+            source_relpath = dirpath[len(source) :].strip("/")
+            dst_abspath = os.path.join(destination, source_relpath)
+            for dirname in dirnames:
+                new_dir = os.path.join(dst_abspath, dirname)
+                logger.debug("creating dir: %s", new_dir)
+                try:
+                    os.mkdir(new_dir)
+                except OSError:
+                    pass
+            if filenames and not os.path.exists(dst_abspath):
                 os.makedirs(dst_abspath)
-            shutil.copy(os.path.join(dirpath, filename), os.path.join(dst_abspath, filename), follow_symlinks=False)
+            for filename in filenames:
+                placer.place(os.path.join(dirpath, filename), [os.path.join(dst_abspath, filename)], consume=consume)
+    placer.log_summary("Merged %s into %s" % (source, destination))
 
 
 def remove_folder(
@@ -1,6 +1,8 @@
 """Utility functions for YAML handling"""
 
 import os
+import threading
+from collections import OrderedDict
 
 import yaml
 from yaml.parser import ParserError
@@ -9,22 +11,89 @@ from yaml.scanner import ScannerError
 from lutris.util.log import logger
 from lutris.util.system import path_exists
 
+# PyYAML's bindings to libyaml parse and emit many times faster, when it was built with them
+SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+SafeDumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+YAML_FILE_CACHE_SIZE = 4096
+
+
+def copy_tree(value):
+    """Copy the containers of a parsed YAML tree; its scalars are immutable and are shared."""
+    if isinstance(value, dict):
+        return {key: copy_tree(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [copy_tree(item) for item in value]
+    if isinstance(value, set):
+        return set(value)
+    return value
+
+
+def get_file_key(path: str) -> tuple:
+    """Return what tells a version of a file from another: its modification time and size"""
+    file_stat = os.stat(path)
+    return file_stat.st_mtime_ns, file_stat.st_size
+
+
+class YamlFileCache:
+    """The parsed contents of YAML files, kept as long as the modification time and size
+    of the file stay the same. The trees kept here are never handed out; each reader gets
+    its own copy, which it may modify."""
+
+    def __init__(self, max_size: int = YAML_FILE_CACHE_SIZE):
+        self.max_size = max_size
+        self._trees = OrderedDict()  # path: (file key, tree), least recently used first
+        self._lock = threading.Lock()
+
+    def get(self, path: str, file_key: tuple):
+        """Return a copy of the tree parsed from the file, or None if that version of the file is not cached"""
+        with self._lock:
+            entry = self._trees.get(path)
+            if not entry or entry[0] != file_key:
+                return None
+            self._trees.move_to_end(path)
+        return copy_tree(entry[1])
+
+    def set(self, path: str, file_key: tuple, tree) -> None:
+        tree = copy_tree(tree)
+        with self._lock:
+            self._trees[path] = (file_key, tree)
+            self._trees.move_to_end(path)
+            while len(self._trees) > self.max_size:
+                self._trees.popitem(last=False)
+
+    def discard(self, path: str) -> None:
+        with self._lock:
+            self._trees.pop(path, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._trees.clear()
+
+
+YAML_FILE_CACHE = YamlFileCache()
+
 
 def read_yaml_from_file(filename: str) -> dict:
-    """Read filename and return parsed yaml"""
+    """Read filename and return parsed yaml; files that did not change since
+    they were last read are not parsed again."""
     if not path_exists(filename):
         return {}
+    file_key = get_file_key(filename)
+    yaml_content = YAML_FILE_CACHE.get(filename, file_key)
+    if yaml_content is not None:
+        return yaml_content
     with open(filename, "r", encoding="utf-8") as yaml_file:
         try:
-            yaml_content = yaml.safe_load(yaml_file) or {}
+            yaml_content = yaml.load(yaml_file, Loader=SafeLoader) or {}
         except (ScannerError, ParserError):
             logger.error("error parsing file %s", filename)
             yaml_content = {}
+    YAML_FILE_CACHE.set(filename, file_key, yaml_content)
     return yaml_content
 
 
 def write_yaml_to_file(config: dict, filepath: str) -> None:
-    yaml_config = yaml.safe_dump(config, default_flow_style=False)
+    yaml_config = yaml.dump(config, Dumper=SafeDumper, default_flow_style=False)
 
     temp_path = filepath + ".tmp"
     try:
@@ -32,5 +101,6 @@ def write_yaml_to_file(config: dict, filepath: str) -> None:
             filehandler.write(yaml_config)
         os.rename(temp_path, filepath)
     finally:
+        YAML_FILE_CACHE.discard(filepath)
         if os.path.isfile(temp_path):
             os.unlink(temp_path)
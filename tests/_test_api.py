@@ -1,3 +1,4 @@
+import tempfile
 import unittest
 from unittest.mock import patch
 
@@ -68,3 +69,70 @@ class TestApi(unittest.TestCase):
 
         version_info = api.get_default_runner_version_info("wine", "bogus-version")
         self.assertIsNone(version_info)
+
+
+class FakeRequest:
+    """Stands for http.Request, answering with a fixed document and ETag, or
+    with 304 Not Modified when the ETag matches."""
+
+    def __init__(self, responses, url, headers=None):
+        self.responses = responses
+        self.url = url
+        self.headers = headers or {}
+        self.json = None
+        self.info = None
+
+    def get(self):
+        self.responses["requests"] += 1
+        if self.responses.get("error"):
+            raise api.HTTPError("Unable to connect to server")
+        if self.headers.get("If-None-Match") == self.responses["etag"]:
+            raise api.HTTPError("Not Modified", code=304)
+        self.json = self.responses["data"]
+        self.info = {"ETag": self.responses["etag"]}
+        return self
+
+
+class TestApiCache(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        cache_dir_patch = patch("lutris.settings.API_CACHE_DIR", self.temp_dir.name)
+        cache_dir_patch.start()
+        self.addCleanup(cache_dir_patch.stop)
+        self.responses = {"requests": 0, "etag": '"v1"', "data": {"results": [{"slug": "quake"}]}}
+        request_patch = patch(
+            "lutris.util.http.Request", lambda url, headers=None: FakeRequest(self.responses, url, headers)
+        )
+        request_patch.start()
+        self.addCleanup(request_patch.stop)
+
+    def test_fresh_response_is_not_requested_again(self):
+        url = "https://lutris.net/api/installers/quake"
+        self.assertEqual(api.get_cached_json(url, ttl=60), self.responses["data"])
+        self.assertEqual(api.get_cached_json(url, ttl=60), self.responses["data"])
+        self.assertEqual(self.responses["requests"], 1)
+
+    def test_stale_response_is_revalidated(self):
+        url = "https://lutris.net/api/installers/quake"
+        api.get_cached_json(url, ttl=0)
+        self.responses["data"] = {"results": []}  # Not sent with a 304
+        self.assertEqual(api.get_cached_json(url, ttl=0), {"results": [{"slug": "quake"}]})
+        self.assertEqual(self.responses["requests"], 2)
+
+        self.responses["etag"] = '"v2"'
+        self.assertEqual(api.get_cached_json(url, ttl=0), {"results": []})
+
+    def test_stale_response_used_when_offline(self):
+        url = "https://lutris.net/api/installers/quake"
+        api.get_cached_json(url, ttl=0)
+        self.responses["error"] = True
+        self.assertEqual(api.get_cached_json(url, ttl=0), {"results": [{"slug": "quake"}]})
+        with self.assertRaises(api.HTTPError):
+            api.get_cached_json("https://lutris.net/api/installers/doom", ttl=0)
+
+    def test_installers_from_cache(self):
+        with patch("lutris.api.normalize_installer", lambda installer: installer):
+            self.assertEqual(api.get_game_installers("quake", cache_ttl=60), [{"slug": "quake"}])
+            self.assertEqual(api.get_game_installers("quake", cache_ttl=60), [{"slug": "quake"}])
+        self.assertEqual(self.responses["requests"], 1)
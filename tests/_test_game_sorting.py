@@ -0,0 +1,70 @@
+import os
+import unittest
+
+from lutris import settings
+from lutris.database import games as games_db
+from lutris.database import schema, sql
+from lutris.game_sorting import SORT_KEY_CACHE, sort_games
+from lutris.util.test_config import setup_test_environment
+
+setup_test_environment()
+
+
+class FakeService:
+    def __init__(self):
+        self.calls = 0
+
+    def get_game_release_date(self, db_game):
+        self.calls += 1
+        return db_game.get("release_date")
+
+
+class TestSortGames(unittest.TestCase):
+    def setUp(self):
+        sql.close_connections()
+        if os.path.exists(settings.DB_PATH):
+            os.remove(settings.DB_PATH)
+        schema.syncdb()
+        SORT_KEY_CACHE.invalidate()
+
+    def get_names(self, games, *args, **kwargs):
+        return [game["name"] for game in sort_games(games, *args, **kwargs)]
+
+    def test_natural_name_sort(self):
+        games = [
+            {"id": 1, "name": "Slap battler 20", "installed": 1},
+            {"id": 2, "name": "slap battler 3", "installed": 1},
+            {"id": 3, "name": "Alpha", "sortname": "Zulu", "installed": 1},
+            {"id": 4, "name": "Beta", "installed": 0},
+        ]
+        self.assertEqual(self.get_names(games, "name"), ["slap battler 3", "Slap battler 20", "Alpha", "Beta"])
+        self.assertEqual(
+            self.get_names(games, "name", reverse_order=True), ["Alpha", "Slap battler 20", "slap battler 3", "Beta"]
+        )
+        self.assertEqual(
+            self.get_names(games, "name", installed_first=False),
+            ["Beta", "slap battler 3", "Slap battler 20", "Alpha"],
+        )
+
+    def test_year_sort_uses_service_dates(self):
+        service = FakeService()
+        games = [
+            {"service": "fake", "appid": "1", "name": "A", "year": "1999"},
+            {"service": "fake", "appid": "2", "name": "B", "release_date": "2004-05-06"},
+            {"service": "fake", "appid": "3", "name": "C"},
+        ]
+        for _i in range(2):
+            self.assertEqual(self.get_names(games, "year", service=service), ["B", "A", "C"])
+            self.assertEqual(self.get_names(games, "year", reverse_order=True, service=service), ["A", "B", "C"])
+        self.assertEqual(service.calls, 2)
+
+    def test_cached_keys_follow_updates(self):
+        game_id = games_db.add_game(name="Zeta", installed=1)
+        games_db.add_game(name="Mu", installed=1)
+        self.assertEqual(self.get_names(games_db.get_games(), "name"), ["Mu", "Zeta"])
+        games_db.update_existing(id=game_id, name="Alpha", slug="zeta")
+        self.assertEqual(self.get_names(games_db.get_games(), "name"), ["Alpha", "Mu"])
+        self.assertEqual(len(self.get_names(games_db.get_games(), "playtime")), 2)
+        sql.db_update(settings.DB_PATH, "games", {"playtime": 5.0}, {"installed": 1})
+        games_db.update_existing(id=game_id, playtime=2.0)
+        self.assertEqual(self.get_names(games_db.get_games(), "playtime"), ["Mu", "Alpha"])
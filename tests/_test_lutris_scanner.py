@@ -0,0 +1,54 @@
+"""Tests for the import of games installed with Lutris (scanners/lutris.py)."""
+
+import os
+from unittest.mock import patch
+
+from lutris import settings
+from lutris.database import games as games_db
+from lutris.scanners import lutris as scanner
+from lutris.util.test_config import setup_test_environment
+from tests._test_pga import DatabaseTester
+
+setup_test_environment()
+
+
+def _api_game(slug):
+    return {"slug": slug, "name": slug.title(), "aliases": []}
+
+
+def _prepare_game(installer, game_folder):
+    configpath = "%s-1" % installer["game_slug"]
+    os.makedirs(settings.GAME_CONFIG_DIR, exist_ok=True)
+    with open(os.path.join(settings.GAME_CONFIG_DIR, configpath + ".yml"), "w", encoding="utf-8") as config_file:
+        config_file.write("game: {}\n")
+    return {"name": installer["game_slug"], "slug": installer["game_slug"], "runner": "linux", "configpath": configpath}
+
+
+def _find_game(game_folder, api_game, cache_ttl=None):
+    return game_folder, {"game_slug": api_game["slug"]}
+
+
+class TestScanDirectory(DatabaseTester):
+    @patch.object(scanner, "sync_media")
+    @patch.object(scanner, "prepare_game", side_effect=_prepare_game)
+    @patch.object(scanner, "find_game", side_effect=_find_game)
+    def test_failing_game_does_not_roll_back_others(self, _find_game_mock, _prepare_game_mock, sync_media):
+        slugs = ["first", "broken", "last"]
+        add_or_update = games_db.add_or_update
+
+        def add_game(**fields):
+            if fields["slug"] == "broken":
+                raise ValueError("Broken game")
+            return add_or_update(**fields)
+
+        with patch.object(scanner, "get_game_slugs_and_folders", return_value={slug: slug for slug in slugs}):
+            with patch.object(scanner, "get_api_games", return_value=[_api_game(slug) for slug in slugs]):
+                with patch.object(scanner.games_db, "add_or_update", side_effect=add_game):
+                    installed, missing = scanner.scan_directory("/games")
+
+        self.assertEqual(sorted(installed), ["first", "last"])
+        self.assertEqual(list(missing), ["broken"])
+        self.assertEqual(sorted(game["slug"] for game in games_db.get_games()), ["first", "last"])
+        self.assertEqual(sync_media.call_args.args[0], {"first", "last"})
+        self.assertFalse(os.path.exists(os.path.join(settings.GAME_CONFIG_DIR, "broken-1.yml")))
+        self.assertTrue(os.path.exists(os.path.join(settings.GAME_CONFIG_DIR, "first-1.yml")))
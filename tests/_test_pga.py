@@ -1,10 +1,14 @@
 import os
+import threading
 import unittest
 from sqlite3 import OperationalError
 
 from lutris import settings
+from lutris.database import categories as categories_db
 from lutris.database import games as games_db
 from lutris.database import schema, sql
+from lutris.database.catalog import GameCatalog
+from lutris.database.services import ServiceGameCollection, ServiceGameSync
 from lutris.util.test_config import setup_test_environment
 
 setup_test_environment()
@@ -12,6 +16,7 @@ setup_test_environment()
 
 class DatabaseTester(unittest.TestCase):
     def setUp(self):
+        sql.close_connections()
         if os.path.exists(settings.DB_PATH):
             os.remove(settings.DB_PATH)
         schema.syncdb()
@@ -63,6 +68,220 @@ class TestPersonnalGameArchive(DatabaseTester):
         self.assertEqual(game["directory"], "/foo")
 
 
+class TestBulkOperations(DatabaseTester):
+    def test_add_games_bulk(self):
+        game_ids = games_db.add_games_bulk([{"name": "foo", "slug": "foo"}, {"name": "bar", "slug": "bar"}])
+        self.assertEqual(len(game_ids), 2)
+        self.assertEqual(games_db.get_game_by_field(game_ids[1], "id")["name"], "bar")
+
+    def test_insert_many_is_chunked(self):
+        rows = [{"service": "test", "appid": str(i), "name": "game %s" % i} for i in range(1000)]
+        self.assertEqual(sql.db_insert_many(settings.DB_PATH, "service_games", rows), 1000)
+        self.assertEqual(len(sql.db_select(settings.DB_PATH, "service_games")), 1000)
+
+    def test_insert_many_requires_same_fields(self):
+        with self.assertRaises(ValueError):
+            sql.db_insert_many(settings.DB_PATH, "service_games", [{"appid": "1"}, {"name": "foo"}])
+
+    def test_upsert_many(self):
+        sql.db_insert(settings.DB_PATH, "service_games", {"service": "test", "appid": "1", "name": "old"})
+        rows = [
+            {"service": "test", "appid": "1", "name": "new"},
+            {"service": "test", "appid": "2", "name": "other"},
+            {"service": "test", "appid": "2", "name": "duplicate"},
+        ]
+        inserted = sql.db_upsert_many(settings.DB_PATH, "service_games", rows, key_fields=("service", "appid"))
+        self.assertEqual(inserted, 1)
+        results = sql.db_query(settings.DB_PATH, "SELECT appid, name FROM service_games ORDER BY appid")
+        self.assertEqual(results, [{"appid": "1", "name": "new"}, {"appid": "2", "name": "duplicate"}])
+
+
+class TestServiceGameSync(DatabaseTester):
+    @staticmethod
+    def make_game(appid, name, lutris_slug=None):
+        return {"service": "test", "appid": appid, "name": name, "lutris_slug": lutris_slug, "details": "{}"}
+
+    def setUp(self):
+        super().setUp()
+        ServiceGameCollection.save_games(
+            [
+                self.make_game("1", "unchanged", lutris_slug="matched"),
+                self.make_game("2", "old name"),
+                self.make_game("3", "removed"),
+            ]
+        )
+
+    def test_sync_only_writes_changes(self):
+        with ServiceGameSync("test") as sync:
+            ServiceGameCollection.save_games(
+                [self.make_game("1", "unchanged"), self.make_game("2", "new name"), self.make_game(4, "added")]
+            )
+        self.assertEqual(sync.added, ["4"])
+        self.assertEqual(sync.changed, ["2"])
+        self.assertEqual(sync.removed, ["3"])
+        games = {game["appid"]: game for game in ServiceGameCollection.get_for_service("test")}
+        self.assertEqual(sorted(games), ["1", "2", "4"])
+        self.assertEqual(games["1"]["lutris_slug"], "matched")
+        self.assertEqual(games["2"]["name"], "new name")
+
+    def test_sync_without_changes(self):
+        with ServiceGameSync("test") as sync:
+            ServiceGameCollection.save_games(
+                [self.make_game("1", "unchanged"), self.make_game("2", "old name"), self.make_game("3", "removed")]
+            )
+        self.assertFalse(sync.has_changes)
+
+    def test_failed_sync_removes_nothing(self):
+        with self.assertRaises(RuntimeError):
+            with ServiceGameSync("test"):
+                raise RuntimeError("Network is down")
+        self.assertEqual(len(ServiceGameCollection.get_for_service("test")), 3)
+
+
+class TestGameCatalog(DatabaseTester):
+    def setUp(self):
+        super().setUp()
+        self.catalog = GameCatalog()
+        self.game_ids = [
+            games_db.add_game(name="Quake", runner="linux", installed=1, service="gog", service_id="12"),
+            games_db.add_game(name="Doom", runner="dosbox", installed=0, service="steam", service_id="34"),
+            games_db.add_game(name="Ultima", runner="dosbox", installed=1, platform="MS-DOS"),
+        ]
+        self.hidden_id = categories_db.add_category(".hidden", no_signal=True)
+        self.rpg_id = categories_db.add_category("RPG", no_signal=True)
+        categories_db.add_game_to_category(self.game_ids[1], self.hidden_id, no_signal=True)
+        categories_db.add_game_to_category(self.game_ids[2], self.rpg_id, no_signal=True)
+
+    def tearDown(self):
+        sql.remove_write_listener(self.catalog._on_db_write)
+
+    def test_get_games_matches_database(self):
+        queries = [
+            ({}, {}),
+            ({"installed": "1"}, {}),
+            ({"runner": "dosbox", "installed": 1}, {}),
+            ({"platform": None}, {}),
+            ({"runner": ["linux", "dosbox"]}, {"service": {"steam"}}),
+            ({}, {"service": set()}),
+            ({"service_id": 12}, {}),
+        ]
+        for filters, excludes in queries:
+            self.assertEqual(
+                self.catalog.get_games(filters=filters, excludes=excludes),
+                games_db.get_games(filters=filters, excludes=excludes),
+            )
+
+    def test_categories_match_database(self):
+        for included, excluded in ((None, None), (["RPG"], None), (None, [".hidden"]), ([".uncategorized"], [])):
+            self.assertEqual(
+                self.catalog.get_game_ids_for_categories(included, excluded),
+                categories_db.get_game_ids_for_categories(included, excluded),
+            )
+        self.assertEqual(self.catalog.get_uncategorized_game_ids(), categories_db.get_uncategorized_game_ids())
+        for name in ("rpg", "p", "R_G", "unknown"):
+            self.assertEqual(
+                self.catalog.normalized_category_names(name, subname_allowed=True),
+                categories_db.normalized_category_names(name, subname_allowed=True),
+            )
+
+    def test_follows_database_writes(self):
+        self.assertEqual(len(self.catalog.get_games()), 3)
+        sql.db_update(settings.DB_PATH, "games", {"installed": 1}, {"id": self.game_ids[1]})
+        self.assertEqual(len(self.catalog.get_games(filters={"installed": 1})), 3)
+        games_db.delete_game(self.game_ids[0])
+        self.assertIsNone(self.catalog.get_game_by_id(self.game_ids[0]))
+        self.assertIsNone(self.catalog.get_game_for_service("gog", "12"))
+        categories_db.remove_category_from_game(self.game_ids[1], self.hidden_id, no_signal=True)
+        self.assertEqual(self.catalog.get_game_ids_for_categories([".hidden"]), [])
+
+    def test_writes_are_notified_after_commit(self):
+        notified = []
+
+        def on_write(db_path, table, row_ids):
+            notified.append(table)
+
+        sql.add_write_listener(on_write)
+        try:
+            with sql.db_transaction(settings.DB_PATH):
+                games_db.add_game(name="foo", runner="linux")
+                self.assertEqual(notified, [])
+        finally:
+            sql.remove_write_listener(on_write)
+        self.assertEqual(notified, ["games"])
+
+
+class TestConnections(DatabaseTester):
+    def test_uses_wal_journal(self):
+        result = sql.db_query(settings.DB_PATH, "PRAGMA journal_mode")
+        self.assertEqual(result[0]["journal_mode"], "wal")
+
+    def test_connection_is_reused(self):
+        connection = sql.get_connection(settings.DB_PATH)
+        games_db.add_game(name="LutrisTest", runner="Linux")
+        self.assertIs(sql.get_connection(settings.DB_PATH), connection)
+
+    def test_transaction_is_committed(self):
+        with sql.db_transaction(settings.DB_PATH):
+            games_db.add_game(name="foo", runner="Linux")
+            games_db.add_game(name="bar", runner="Linux")
+        self.assertEqual(len(games_db.get_games()), 2)
+
+    def test_transaction_is_rolled_back_on_error(self):
+        with self.assertRaises(ValueError):
+            with sql.db_transaction(settings.DB_PATH):
+                games_db.add_game(name="foo", runner="Linux")
+                with sql.db_transaction(settings.DB_PATH):
+                    games_db.add_game(name="bar", runner="Linux")
+                raise ValueError("Abort")
+        self.assertEqual(games_db.get_games(), [])
+
+    def test_writer_waits_for_transaction_of_other_thread(self):
+        started = threading.Event()
+        errors = []
+
+        def write():
+            started.wait()
+            try:
+                games_db.add_game(name="bar", runner="Linux")
+            except Exception as ex:  # pylint: disable=broad-except
+                errors.append(ex)
+
+        writer = threading.Thread(target=write)
+        writer.start()
+        with sql.db_transaction(settings.DB_PATH):
+            games_db.add_game(name="foo", runner="Linux")
+            started.set()
+            writer.join(0.2)
+            self.assertTrue(writer.is_alive())  # Waiting for the transaction, not failing
+            games_db.add_game(name="baz", runner="Linux")
+        writer.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(sorted(game["name"] for game in games_db.get_games()), ["bar", "baz", "foo"])
+
+    def test_transaction_does_not_hold_up_other_databases(self):
+        other_db_path = os.path.join(os.path.dirname(settings.DB_PATH), "other.db")
+        if os.path.exists(other_db_path):
+            os.remove(other_db_path)
+        with sql.db_cursor(other_db_path) as cursor:
+            sql.cursor_execute(cursor, "CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)")
+        errors = []
+
+        def write():
+            try:
+                sql.db_insert(other_db_path, "items", {"name": "item"})
+            except Exception as ex:  # pylint: disable=broad-except
+                errors.append(ex)
+
+        with sql.db_transaction(settings.DB_PATH):
+            games_db.add_game(name="foo", runner="Linux")
+            writer = threading.Thread(target=write)
+            writer.start()
+            writer.join(2)
+            self.assertFalse(writer.is_alive())  # Not waiting for the transaction
+        self.assertEqual(errors, [])
+        self.assertEqual(sql.db_select(other_db_path, "items", fields=["name"]), [{"name": "item"}])
+
+
 class TestDbCreator(DatabaseTester):
     def test_can_generate_fields(self):
         text_field = schema.field_to_string("name", "TEXT")
@@ -132,3 +351,22 @@ class TestMigration(DatabaseTester):
         _schema = schema.get_schema(self.tablename)
         self.assertEqual(_schema[2]["name"], "new_field")
         self.assertEqual(migrated, ["new_field"])
+
+    def test_syncdb_creates_indexes(self):
+        for table, indexes in schema.INDEXES.items():
+            existing_indexes = schema.get_indexes(table)
+            for index in indexes:
+                self.assertIn(schema.get_index_name(table, index["fields"]), existing_indexes)
+
+    def test_can_generate_index(self):
+        query = schema.index_to_string("games", ["service", "service_id"], unique=True)
+        self.assertEqual(
+            query, "CREATE UNIQUE INDEX IF NOT EXISTS games_service_service_id_idx ON games (service, service_id)"
+        )
+
+    def test_unique_index_falls_back_on_duplicates(self):
+        fields = [{"name": "id", "type": "INTEGER", "indexed": True}, {"name": "name", "type": "TEXT"}]
+        schema.create_table("testing", fields)
+        sql.db_insert_many(settings.DB_PATH, "testing", [{"name": "dup"}, {"name": "dup"}])
+        schema.create_indexes("testing", [{"fields": ["name"], "unique": True}])
+        self.assertIn("testing_name_idx", schema.get_indexes("testing"))
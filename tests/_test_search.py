@@ -0,0 +1,120 @@
+import os
+import sqlite3
+import unittest
+from unittest.mock import patch
+
+from lutris import settings
+from lutris.database import categories as categories_db
+from lutris.database import games as games_db
+from lutris.database import schema, sql
+from lutris.database.catalog import GAME_CATALOG
+from lutris.database.services import ServiceGameCollection
+from lutris.search import GameSearch, filter_db_games
+from lutris.services.gog import GOGService
+from lutris.util.test_config import setup_test_environment
+
+setup_test_environment()
+
+SEARCHES = [
+    "",
+    "quake",
+    "uake",
+    '"uake"',
+    "pokemon",
+    "POKÉMON",
+    "super mar",
+    "mario super",
+    "witcher the",
+    "?",
+    "ultima OR doom",
+    "-doom",
+    "installed:yes",
+    "installed:no dosbox",
+    "hidden:yes",
+    "-hidden:yes",
+    "favorite:no",
+    "categorized:yes",
+    "categorized:no",
+    "category:rpg",
+    "category:.uncategorized",
+    "-category:rp",
+    "source:steam",
+    "source:none",
+    "runner:dosbox",
+    "runner:none",
+    "runner:wine OR runner:linux",
+    "platform:dos",
+    "platform:none",
+    "playtime:>2",
+    "playtime:<2",
+    "playtime:2",
+    "lastplayed:<10",
+    "directory:games",
+    "-(installed:yes OR hidden:yes) source:gog",
+]
+
+
+class TestFilterDbGames(unittest.TestCase):
+    def setUp(self):
+        sql.close_connections()
+        if os.path.exists(settings.DB_PATH):
+            os.remove(settings.DB_PATH)
+        schema.syncdb()
+        game_ids = [
+            games_db.add_game(name="Quake", runner="linux", installed=1, service="gog", playtime=3.5),
+            games_db.add_game(name="Doom", runner="dosbox", installed=0, service="steam", playtime=1.0),
+            games_db.add_game(name="Ultima", runner="dosbox", installed=1, platform="MS-DOS", directory="/games/u"),
+            games_db.add_game(name="Pokémon", runner="wine", installed=1, playtime=2.0),
+            games_db.add_game(name="", runner="", installed=None, platform=""),
+            games_db.add_game(name="Super Mario World", slug="super-mario-world", runner="snes9x"),
+            games_db.add_game(name="The Witcher", sortname="Witcher, The", runner="wine"),
+        ]
+        hidden_id = categories_db.add_category(".hidden", no_signal=True)
+        rpg_id = categories_db.add_category("RPG", no_signal=True)
+        favorite_id = categories_db.add_category("favorite", no_signal=True)
+        categories_db.add_game_to_category(game_ids[1], hidden_id, no_signal=True)
+        categories_db.add_game_to_category(game_ids[2], rpg_id, no_signal=True)
+        categories_db.add_game_to_category(game_ids[3], favorite_id, no_signal=True)
+
+    def test_filtering_does_not_query_the_database(self):
+        db_games = GAME_CATALOG.get_games()  # The catalog loads the games once
+        with patch.object(sql, "cursor_execute", side_effect=AssertionError("database queried")):
+            for text in SEARCHES:
+                search = GameSearch(text)
+                expected = [game for game in db_games if search.matches(game)]
+                self.assertEqual(filter_db_games(db_games, [search]), expected, text)
+
+    def test_text_is_found_inside_names(self):
+        games_db.add_game(name="Minecraft", runner="linux")
+        games_db.add_game(name="Half-Life 2", runner="wine")
+        db_games = GAME_CATALOG.get_games()
+        for text, expected in (("craft", ["Minecraft"]), ("alf", ["Half-Life 2"]), ("f-l", ["Half-Life 2"])):
+            search = GameSearch(text)
+            self.assertEqual([g["name"] for g in filter_db_games(db_games, [search])], expected, text)
+
+    def test_full_text_index_of_earlier_versions_is_dropped(self):
+        with sql.db_transaction(settings.DB_PATH) as cursor:
+            cursor.execute("CREATE VIRTUAL TABLE games_fts USING fts5(name)")
+            cursor.execute(
+                "CREATE TRIGGER games_fts_insert AFTER INSERT ON games BEGIN "
+                "INSERT INTO games_fts(rowid, name) VALUES (NEW.id, fold_search_text(NEW.name)); END"
+            )
+        schema.syncdb()
+        self.assertEqual(
+            sql.db_query(settings.DB_PATH, "SELECT name FROM sqlite_master WHERE name LIKE 'games_fts%'"), []
+        )
+        sql.close_connections()
+        with sqlite3.connect(settings.DB_PATH) as connection:
+            connection.execute("INSERT INTO games (name, slug) VALUES ('Quake', 'quake')")
+        connection.close()
+
+    def test_service_search_matches_names(self):
+        ServiceGameCollection.save_games(
+            [
+                {"service": "gog", "appid": "1", "name": "Quake", "details": "{}"},
+                {"service": "gog", "appid": "2", "name": "Doom", "details": "not json"},
+            ]
+        )
+        service_games = ServiceGameCollection.get_for_service("gog")
+        search = GameSearch("uak", service=GOGService())
+        self.assertEqual([g["name"] for g in filter_db_games(service_games, [search])], ["Quake"])
@@ -0,0 +1,158 @@
+"""Tests for the incremental sync of installed Steam games (steam/watcher.py, services/steam.py)."""
+
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from lutris import settings
+from lutris.database import games as games_db
+from lutris.database import schema, sql
+from lutris.services.steam import SteamService
+from lutris.util.steam import watcher
+from lutris.util.steam.watcher import ManifestIndex
+from lutris.util.test_config import setup_test_environment
+
+setup_test_environment()
+
+APPMANIFEST = """"AppState"
+{
+    "appid"        "%(appid)s"
+    "name"        "%(name)s"
+    "StateFlags"        "4"
+    "installdir"        "%(name)s"
+}
+"""
+
+
+class FakeWatcher:
+    """Stands for SteamWatcher; changes are reported by calling report()"""
+
+    watchers = []
+
+    def __init__(self, steamapps_paths, callback=None, watchable=True):
+        self.steamapps_paths = steamapps_paths
+        self.callback = callback
+        self.monitors = [object()] if watchable else []
+        self.watchers.append(self)
+
+    @classmethod
+    def report(cls, path):
+        for fake_watcher in cls.watchers:
+            if os.path.dirname(path) in fake_watcher.steamapps_paths:
+                fake_watcher.callback(None, path)
+
+
+class FakeGame:
+    """Stands for Game, without reading any config"""
+
+    uninstalled = []
+    configs = {}
+
+    def __init__(self, game_id):
+        self.id = game_id
+        self.config = FakeGame.configs.get(game_id)
+
+    def uninstall(self):
+        FakeGame.uninstalled.append(self.id)
+
+
+class FakeConfig:
+    def __init__(self, appid):
+        self.game_level = {"game": {"appid": appid}}
+
+
+class SteamSyncTester(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.steamapps_path = os.path.join(self.temp_dir.name, "steamapps")
+        os.makedirs(self.steamapps_path)
+        FakeWatcher.watchers = []
+        watcher_patch = patch.object(watcher, "SteamWatcher", FakeWatcher)
+        watcher_patch.start()
+        self.addCleanup(watcher_patch.stop)
+
+    def write_manifest(self, appid, name):
+        path = os.path.join(self.steamapps_path, "appmanifest_%s.acf" % appid)
+        with open(path, "w", encoding="utf-8") as manifest_file:
+            manifest_file.write(APPMANIFEST % {"appid": appid, "name": name})
+        return path
+
+
+class TestManifestIndex(SteamSyncTester):
+    def test_only_reported_manifests_are_parsed_again(self):
+        index = ManifestIndex()
+        first_path = self.write_manifest("10", "Counter-Strike")
+        self.write_manifest("20", "Team Fortress Classic")
+        self.assertEqual(len(index.update([self.steamapps_path])), 2)
+
+        self.write_manifest("30", "Day of Defeat")  # Not reported
+        os.remove(first_path)
+        FakeWatcher.report(first_path)
+        with patch.object(watcher, "get_appmanifests", side_effect=AssertionError("folder listed again")):
+            self.assertEqual(index.update([self.steamapps_path]), {first_path})
+        self.assertEqual([manifest.steamid for manifest in index.get_manifests([self.steamapps_path])], ["20"])
+
+    def test_unwatched_folder_is_checked_by_modification_time(self):
+        index = ManifestIndex()
+        with patch.object(watcher, "SteamWatcher", lambda paths, callback: FakeWatcher(paths, callback, False)):
+            path = self.write_manifest("10", "Counter-Strike")
+            index.update([self.steamapps_path])
+            self.assertEqual(index.update([self.steamapps_path]), set())
+            self.write_manifest("10", "Counter-Strike: Source")
+            os.utime(path, ns=(0, 0))
+            self.assertEqual(index.update([self.steamapps_path]), {path})
+        self.assertEqual(index.get_manifests([self.steamapps_path])[0].name, "Counter-Strike: Source")
+
+
+class TestAddInstalledGames(SteamSyncTester):
+    def setUp(self):
+        super().setUp()
+        sql.close_connections()
+        if os.path.exists(settings.DB_PATH):
+            os.remove(settings.DB_PATH)
+        schema.syncdb()
+        FakeGame.uninstalled = []
+        FakeGame.configs = {}
+        for target, value in (
+            ("lutris.services.steam.MANIFEST_INDEX", ManifestIndex()),
+            ("lutris.services.steam.Game", FakeGame),
+            ("lutris.services.steam.sync_media", lambda slugs: None),
+            ("lutris.services.steam.SteamService.steamapps_paths", [self.steamapps_path]),
+        ):
+            service_patch = patch(target, value)
+            service_patch.start()
+            self.addCleanup(service_patch.stop)
+
+    def add_steam_game(self, name, appid=None, **fields):
+        return games_db.add_game(name=name, runner="steam", installed=1, service_id=appid, **fields)
+
+    def test_removes_games_no_longer_installed(self):
+        self.write_manifest("10", "Counter-Strike")
+        self.add_steam_game("Counter-Strike", "10", service="steam")
+        removed_id = self.add_steam_game("Half-Life", "70", service="steam")
+        SteamService().add_installed_games()
+        self.assertEqual(FakeGame.uninstalled, [str(removed_id)])
+
+    def test_stores_missing_appids(self):
+        self.write_manifest("10", "Counter-Strike")
+        game_id = str(self.add_steam_game("Counter-Strike"))
+        FakeGame.configs[game_id] = FakeConfig("10")
+        SteamService().add_installed_games()
+        self.assertEqual(games_db.get_game_by_field(game_id, "id")["service_id"], "10")
+
+        FakeGame.configs.clear()  # The config is not read again
+        SteamService().add_installed_games()
+        self.assertEqual(FakeGame.uninstalled, [])
+
+    def test_deduplicates_unplayed_games(self):
+        self.write_manifest("10", "Counter-Strike")
+        played_id = self.add_steam_game("Counter-Strike", "10", service="steam", playtime=2.0)
+        duplicate_id = self.add_steam_game("Counter-Strike", "10", service="steam")
+        FakeGame.configs[str(duplicate_id)] = FakeConfig("10")
+        with patch.object(FakeGame, "delete", create=True) as delete:
+            SteamService().add_installed_games()
+        delete.assert_called_once()
+        self.assertEqual(FakeGame.uninstalled, [str(duplicate_id)])
+        self.assertNotEqual(played_id, duplicate_id)
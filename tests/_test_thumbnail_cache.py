@@ -0,0 +1,121 @@
+"""Tests for the disk cache of scaled media (gui/widgets/thumbnail_cache.py)."""
+
+import os
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from lutris.gui.widgets import thumbnail_cache
+from lutris.gui.widgets.thumbnail_cache import get_thumbnail_path, load_thumbnail, prune_thumbnails
+
+DAY = 24 * 60 * 60
+
+
+class FakeSurface:
+    """Stands for a cairo.ImageSurface; its PNG file holds its text"""
+
+    def __init__(self, text):
+        self.text = text
+        self.device_scale = None
+
+    @classmethod
+    def create_from_png(cls, path):
+        return cls(Path(path).read_text())
+
+    def write_to_png(self, path):
+        Path(path).write_text(self.text)
+
+    def set_device_scale(self, x_scale, _y_scale):
+        self.device_scale = x_scale
+
+
+@pytest.fixture(autouse=True)
+def thumbnail_dir(tmp_path):
+    cache_dir = tmp_path / "thumbnails"
+    with patch.object(thumbnail_cache.settings, "THUMBNAIL_CACHE_DIR", str(cache_dir)):
+        with patch.object(thumbnail_cache, "cairo", SimpleNamespace(ImageSurface=FakeSurface, Error=ValueError)):
+            yield cache_dir
+
+
+@pytest.fixture
+def scaler():
+    def scale(path, size, _device_scale, preserve_aspect_ratio=True):
+        return FakeSurface("%s at %dx%d" % (Path(path).read_text(), *size))
+
+    with patch.object(thumbnail_cache, "get_scaled_surface_by_path", side_effect=scale) as scale_mock:
+        yield scale_mock
+
+
+def _write_media(path, content, mtime):
+    path.write_text(content)
+    os.utime(path, (mtime, mtime))
+    return str(path)
+
+
+def _write_thumbnail(cache_dir, name, size, last_used):
+    path = cache_dir / name[:2] / (name + ".png")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"x" * size)
+    os.utime(path, (last_used, 0))
+    return path
+
+
+class TestLoadThumbnail:
+    def test_thumbnail_is_saved_then_used(self, tmp_path, scaler):
+        key = (_write_media(tmp_path / "cover.jpg", "cover", 1000), (64, 64), 2, True)
+        assert load_thumbnail(key).text == "cover at 64x64"
+        assert os.path.exists(get_thumbnail_path(key))
+
+        surface = load_thumbnail(key)
+        assert surface.text == "cover at 64x64"
+        assert surface.device_scale == 2
+        assert scaler.call_count == 1
+
+    def test_missing_media_has_no_thumbnail(self, tmp_path, scaler):
+        assert load_thumbnail((str(tmp_path / "missing.jpg"), (64, 64), 1, True)) is None
+        scaler.assert_not_called()
+
+    def test_changed_media_is_scaled_again(self, tmp_path, scaler):
+        media_path = tmp_path / "cover.jpg"
+        key = (_write_media(media_path, "old cover", 1000), (64, 64), 1, True)
+        load_thumbnail(key)
+        _write_media(media_path, "new cover", 2000)
+        assert load_thumbnail(key).text == "new cover at 64x64"
+        assert load_thumbnail(key).text == "new cover at 64x64"
+        assert scaler.call_count == 2
+
+    def test_use_of_thumbnail_is_recorded(self, tmp_path, scaler):
+        key = (_write_media(tmp_path / "cover.jpg", "cover", 1000), (64, 64), 1, True)
+        load_thumbnail(key)
+        thumbnail_path = get_thumbnail_path(key)
+        os.utime(thumbnail_path, (time.time() - 10 * DAY, 1000))
+        load_thumbnail(key)
+        assert os.stat(thumbnail_path).st_atime > time.time() - DAY
+        assert os.stat(thumbnail_path).st_mtime == 1000
+
+
+class TestPruneThumbnails:
+    def test_unused_thumbnails_are_deleted(self, thumbnail_dir):
+        now = time.time()
+        old = _write_thumbnail(thumbnail_dir, "aa01", 10, now - 100 * DAY)
+        recent = _write_thumbnail(thumbnail_dir, "bb02", 10, now - DAY)
+        prune_thumbnails(max_size=1000, max_age=90 * DAY)
+        assert not old.exists()
+        assert recent.exists()
+
+    def test_least_recently_used_deleted_over_budget(self, thumbnail_dir):
+        now = time.time()
+        oldest = _write_thumbnail(thumbnail_dir, "aa01", 400, now - 3 * DAY)
+        older = _write_thumbnail(thumbnail_dir, "bb02", 400, now - 2 * DAY)
+        newest = _write_thumbnail(thumbnail_dir, "aa03", 400, now - DAY)
+        prune_thumbnails(max_size=800, max_age=90 * DAY)
+        assert not oldest.exists()
+        assert older.exists()
+        assert newest.exists()
+
+    def test_missing_cache_is_ignored(self, thumbnail_dir):
+        prune_thumbnails()
+        assert not thumbnail_dir.exists()
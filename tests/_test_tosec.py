@@ -0,0 +1,146 @@
+"""Tests for the identification of ROMs by checksum (scanners/tosec.py)."""
+
+import hashlib
+import os
+from unittest.mock import patch
+from xml.etree import ElementTree
+
+import pytest
+
+from lutris.scanners import tosec
+from lutris.scanners.tosec import TosecDatabase, scan_folder, search_tosec_by_md5s
+from lutris.util import hashing
+from lutris.util.hashing import HashCache
+
+DAT = """<?xml version="1.0"?>
+<datafile>
+    <header><name>Nintendo Famicom - Games</name></header>
+    <game name="Super Game (1986)(Maker)">
+        <rom name="Super Game (1986)(Maker).nes" size="3" md5="%s"/>
+    </game>
+    <game name="Two Disks (1987)(Maker)">
+        <rom name="Two Disks (1987)(Maker)(Disk 1 of 2).fds" size="6" md5="%s"/>
+        <rom name="Two Disks (1987)(Maker)(Disk 2 of 2).fds" size="6" md5="%s"/>
+    </game>
+</datafile>
+"""
+
+
+def _md5(content):
+    return hashlib.md5(content).hexdigest()
+
+
+@pytest.fixture(autouse=True)
+def databases(tmp_path):
+    database = TosecDatabase(str(tmp_path / "cache" / "tosec.db"))
+    with patch.object(tosec, "TOSEC_DATABASE", database):
+        with patch.object(hashing, "HASH_CACHE", HashCache(str(tmp_path / "cache" / "hashes.db"))):
+            yield database
+
+
+@pytest.fixture
+def dat_path(tmp_path):
+    path = tmp_path / "famicom.dat"
+    path.write_text(DAT % (_md5(b"rom"), _md5(b"disk 1"), _md5(b"disk 2")), encoding="utf-8")
+    return str(path)
+
+
+def _api_game(name, *contents):
+    return {
+        "name": name,
+        "category": {"name": "Sega Genesis"},
+        "roms": [{"name": name, "md5": _md5(c)} for c in contents],
+    }
+
+
+class TestSearchTosec:
+    def test_matches_loaded_dat_offline(self, databases, dat_path):
+        assert databases.load_dat(dat_path) == 2
+        results = search_tosec_by_md5s([_md5(b"disk 2"), _md5(b"unknown")], offline=True)
+        game = results[_md5(b"disk 2")][0]
+        assert game["name"] == "Two Disks (1987)(Maker)"
+        assert tosec.guess_platform(game) == "nes"
+        assert len(game["roms"]) == 2
+        assert results[_md5(b"unknown")] is None
+
+    def test_reloading_dat_replaces_games(self, databases, dat_path):
+        databases.load_dat(dat_path)
+        databases.load_dat(dat_path)
+        assert len(databases.search_dats([_md5(b"rom")])[_md5(b"rom")]) == 1
+
+    def test_dat_is_loaded_in_batches(self, databases, dat_path):
+        with patch.object(tosec, "DAT_BATCH_SIZE", 1):
+            assert databases.load_dat(dat_path) == 2
+        assert len(databases.search_dats([_md5(b"rom"), _md5(b"disk 1")])) == 2
+
+    def test_broken_dat_keeps_previous_version(self, databases, dat_path):
+        databases.load_dat(dat_path)
+        with open(dat_path, encoding="utf-8") as dat_file:
+            content = dat_file.read()
+        with open(dat_path, "w", encoding="utf-8") as dat_file:
+            dat_file.write(content[: content.index("</game>") + 7])
+        with patch.object(tosec, "DAT_BATCH_SIZE", 1):
+            with pytest.raises(ElementTree.ParseError):
+                databases.load_dat(dat_path)
+        assert len(databases.search_dats([_md5(b"rom")])[_md5(b"rom")]) == 1
+        assert len(databases.search_dats([_md5(b"disk 1")])) == 1
+
+    def test_api_requests_are_cached(self):
+        md5sums = [_md5(b"rom %d" % i) for i in range(10)]
+        game = _api_game("Game", b"rom 0")
+        with patch.object(tosec, "_query_tosec_api") as query:
+            query.side_effect = lambda md5sum: [game] if md5sum == md5sums[0] else []
+            results = search_tosec_by_md5s([md5sum.upper() for md5sum in md5sums])
+            assert sorted(call.args[0] for call in query.call_args_list) == sorted(md5sums)
+            assert results[md5sums[0]] == [game]
+            assert results[md5sums[1]] == []
+
+            assert search_tosec_by_md5s(md5sums) == results
+            assert query.call_count == 10
+
+    def test_failed_lookup_is_not_cached(self):
+        with patch.object(tosec, "_query_tosec_api", return_value=None) as query:
+            assert search_tosec_by_md5s([_md5(b"rom")]) == {_md5(b"rom"): None}
+            search_tosec_by_md5s([_md5(b"rom")])
+        assert query.call_count == 2
+
+
+class TestScanFolder:
+    def test_renames_matched_rom_sets(self, tmp_path, databases, dat_path):
+        folder = tmp_path / "roms"
+        folder.mkdir()
+        (folder / "game.nes").write_bytes(b"rom")
+        (folder / "game.srm").write_bytes(b"save")
+        (folder / "d1.fds").write_bytes(b"disk 1")
+        (folder / "d2.fds").write_bytes(b"disk 2")
+        (folder / "junk.bin").write_bytes(b"junk")
+
+        results = dict(scan_folder(str(folder), dat_paths=[dat_path], offline=True))
+
+        assert set(results) == {"game.nes", "d1.fds", "d2.fds", "junk.bin"}
+        assert results["junk.bin"] is None
+        assert sorted(os.listdir(folder)) == [
+            "Super Game (1986)(Maker).nes",
+            "Super Game (1986)(Maker).srm",
+            "Two Disks (1987)(Maker)(Disk 1 of 2).fds",
+            "Two Disks (1987)(Maker)(Disk 2 of 2).fds",
+            "junk.bin",
+        ]
+
+    def test_api_checksums_in_upper_case(self, tmp_path):
+        folder = tmp_path / "roms"
+        folder.mkdir()
+        (folder / "game.md").write_bytes(b"rom")
+        game = _api_game("Sonic (1991)(Sega)", b"rom")
+        game["roms"][0].update(name="Sonic (1991)(Sega).md", md5=_md5(b"rom").upper())
+        with patch.object(tosec, "_query_tosec_api", return_value=[game]):
+            assert list(scan_folder(str(folder))) == [("game.md", [game])]
+        assert os.listdir(folder) == ["Sonic (1991)(Sega).md"]
+
+    def test_incomplete_rom_set_not_renamed(self, tmp_path, dat_path):
+        folder = tmp_path / "roms"
+        folder.mkdir()
+        (folder / "d1.fds").write_bytes(b"disk 1")
+        results = list(scan_folder(str(folder), dat_paths=[dat_path], offline=True))
+        assert results[0][0] == "d1.fds"
+        assert os.listdir(folder) == ["d1.fds"]
@@ -0,0 +1,150 @@
+"""Tests for the parallel download of file sets (download_manager.py)."""
+
+import os
+import threading
+import time
+
+from lutris.util.download_manager import DownloadManager, RateLimiter
+
+
+class FakeDownloader:
+    """Writes the file's content instead of downloading it; fails the first
+    ``failures`` attempts for a URL."""
+
+    failures = {}
+    started = []
+    lock = threading.Lock()
+
+    def __init__(self, url, dest, referer=None, overwrite=False, session=None, hash_type=None):
+        self.url = url
+        self.dest = dest
+        self.session = session
+        self.downloaded_size = 0
+        self.rate_limiter = None
+
+    def start(self):
+        with self.lock:
+            self.started.append(self.url)
+
+    def join(self):
+        with self.lock:
+            failures = self.failures.get(self.url, 0)
+            if failures:
+                self.failures[self.url] = failures - 1
+                raise RuntimeError("Connection reset")
+        with open(self.dest, "wb") as dest_file:
+            dest_file.write(b"x" * 10)
+        self.downloaded_size = 10
+        return True
+
+    def cancel(self):
+        pass
+
+
+class FakeFile:
+    """The attributes of an InstallerFile that DownloadManager uses."""
+
+    referer = None
+    hash_type = None
+    tmp_file = None
+    downloader_class = FakeDownloader
+
+    def __init__(self, filename, url, dest_file, size):
+        self.filename = filename
+        self.url = url
+        self.dest_file = dest_file
+        self.size = size
+
+
+def _make_file(tmp_path, name, size):
+    return FakeFile(name, "https://cdn.example.com/%s" % name, str(tmp_path / name), size)
+
+
+def _run(manager, timeout=10):
+    manager.start()
+    deadline = time.monotonic() + timeout
+    while manager.state == manager.DOWNLOADING and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return manager.state
+
+
+class TestDownloadManager:
+    def setup_method(self):
+        FakeDownloader.failures = {}
+        FakeDownloader.started = []
+
+    def test_smallest_files_first(self, tmp_path):
+        files = [
+            _make_file(tmp_path, "big", 300),
+            _make_file(tmp_path, "unknown", None),
+            _make_file(tmp_path, "small", 1),
+        ]
+        manager = DownloadManager(files, max_workers=1, bandwidth_limit=0)
+        assert [file.filename for file in manager.files] == ["small", "big", "unknown"]
+
+    def test_downloads_all_files(self, tmp_path):
+        files = [_make_file(tmp_path, "file%d" % i, i) for i in range(20)]
+        manager = DownloadManager(files, max_workers=4, bandwidth_limit=0)
+        assert _run(manager) == manager.COMPLETED
+        assert manager.num_files_downloaded == 20
+        assert manager.downloaded_size == 200
+        for file in files:
+            assert os.path.exists(file.dest_file)
+            assert not os.path.exists(file.tmp_file)
+
+    def test_skips_existing_files(self, tmp_path):
+        files = [_make_file(tmp_path, "done", 4), _make_file(tmp_path, "todo", 10)]
+        with open(files[0].dest_file, "wb") as dest_file:
+            dest_file.write(b"data")
+        manager = DownloadManager(files, max_workers=2, bandwidth_limit=0)
+        assert _run(manager) == manager.COMPLETED
+        assert FakeDownloader.started == [files[1].url]
+        assert manager.num_files_downloaded == 2
+        assert manager.downloaded_size == 14
+
+    def test_retries_failed_file(self, tmp_path):
+        file = _make_file(tmp_path, "flaky", 10)
+        FakeDownloader.failures = {file.url: 2}
+        manager = DownloadManager([file], bandwidth_limit=0, max_retries=2)
+        assert _run(manager) == manager.COMPLETED
+        assert FakeDownloader.started == [file.url] * 3
+
+    def test_fails_after_max_retries(self, tmp_path):
+        file = _make_file(tmp_path, "broken", 10)
+        FakeDownloader.failures = {file.url: 5}
+        manager = DownloadManager([file], bandwidth_limit=0, max_retries=1)
+        assert _run(manager) == manager.ERROR
+        assert str(manager.error) == "Connection reset"
+        assert not os.path.exists(file.dest_file)
+
+    def test_empty_file_set_completes(self):
+        manager = DownloadManager([], bandwidth_limit=0)
+        assert _run(manager) == manager.COMPLETED
+
+    def test_session_shared_per_host(self):
+        manager = DownloadManager([], bandwidth_limit=0)
+        session = manager.get_session("https://cdn.example.com/a.bin")
+        assert manager.get_session("https://cdn.example.com/b.bin") is session
+        assert manager.get_session("https://other.example.com/a.bin") is not session
+
+    def test_rate_limiter_given_to_downloaders(self, tmp_path):
+        file = _make_file(tmp_path, "file", 10)
+        manager = DownloadManager([file], bandwidth_limit=1024)
+        file.tmp_file = file.dest_file + ".tmp"
+        assert manager._create_downloader(file).rate_limiter is manager.rate_limiter
+        assert manager.rate_limiter.rate == 1024
+
+
+class TestRateLimiter:
+    def test_burst_within_rate_does_not_wait(self):
+        limiter = RateLimiter(1000)
+        start = time.monotonic()
+        limiter.consume(500)
+        assert time.monotonic() - start < 0.1
+
+    def test_waits_once_over_rate(self):
+        limiter = RateLimiter(1000)
+        start = time.monotonic()
+        limiter.consume(1000)
+        limiter.consume(200)
+        assert time.monotonic() - start >= 0.15
@@ -148,6 +148,33 @@ class TestMarkRangeComplete:
         assert (0, 99) in fresh.completed_ranges
 
 
+# ------------------------------------------------------------------
+# split_range
+# ------------------------------------------------------------------
+
+
+class TestSplitRange:
+    def test_split_replaces_range(self, progress):
+        progress.create("https://example.com", 300, [(0, 99), (100, 199), (200, 299)])
+        progress.split_range(100, 199, 150)
+        assert progress.total_ranges == [(0, 99), (100, 149), (150, 199), (200, 299)]
+
+    def test_split_ranges_resume(self, progress):
+        progress.create("https://example.com", 200, [(0, 99), (100, 199)])
+        progress.split_range(0, 99, 50)
+        progress.mark_range_complete(50, 99)
+
+        fresh = DownloadProgress(progress.dest_path)
+        fresh.load()
+        assert fresh.get_remaining_ranges() == [(0, 49), (100, 199)]
+        assert fresh.get_completed_size() == 50
+
+    def test_split_of_unknown_range_is_ignored(self, progress):
+        progress.create("https://example.com", 100, [(0, 99)])
+        progress.split_range(0, 49, 25)
+        assert progress.total_ranges == [(0, 99)]
+
+
 # ------------------------------------------------------------------
 # get_remaining_ranges
 # ------------------------------------------------------------------
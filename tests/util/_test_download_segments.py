@@ -0,0 +1,89 @@
+"""Tests for the segment scheduling of parallel downloads (download_segments.py)."""
+
+from lutris.util.download_segments import ConnectionController, Segment, SegmentScheduler
+
+
+class TestSegment:
+    def test_claim_advances_offset(self):
+        segment = Segment(100, 199)
+        assert segment.claim(60) == (100, 60, False)
+        assert segment.claim(60) == (160, 40, True)
+        assert segment.claim(10) == (200, 0, True)
+
+    def test_split_takes_back_half(self):
+        segment = Segment(0, 99)
+        segment.claim(20)
+        other = segment.split(10)
+        assert (segment.start, segment.end) == (0, 59)
+        assert (other.start, other.end) == (60, 99)
+
+    def test_no_split_below_min_size(self):
+        segment = Segment(0, 99)
+        segment.claim(90)
+        assert segment.split(10) is None
+        assert segment.end == 99
+
+
+class TestSegmentScheduler:
+    def test_segments_given_out_in_order(self):
+        scheduler = SegmentScheduler([(0, 99), (100, 199)], 10)
+        assert scheduler.next_segment().start == 0
+        assert scheduler.next_segment().start == 100
+
+    def test_idle_connection_splits_largest_segment(self):
+        splits = []
+        scheduler = SegmentScheduler([(0, 99), (100, 399)], 10, on_split=lambda *args: splits.append(args))
+        first = scheduler.next_segment()
+        second = scheduler.next_segment()
+        second.claim(100)
+
+        stolen = scheduler.next_segment()
+        assert (stolen.start, stolen.end) == (300, 399)
+        assert second.end == 299
+        assert splits == [(100, 399, 300)]
+
+        first.claim(100)
+        scheduler.finish(first)
+        assert scheduler.has_work()
+
+    def test_nothing_left_to_split(self):
+        scheduler = SegmentScheduler([(0, 99)], 10)
+        segment = scheduler.next_segment()
+        segment.claim(90)
+        assert not scheduler.has_work()
+        assert scheduler.next_segment() is None
+
+
+class TestConnectionController:
+    def test_adds_connections_while_throughput_rises(self):
+        controller = ConnectionController(4, 8)
+        assert controller.update(40) == 5
+        assert controller.update(50) == 6
+        assert controller.update(60) == 7
+
+    def test_takes_back_connection_that_does_not_help(self):
+        controller = ConnectionController(4, 8)
+        assert controller.update(40) == 5
+        assert controller.update(41) == 4
+        # Settled: no probing while throughput holds
+        for _i in range(ConnectionController.PROBE_PERIODS - 1):
+            assert controller.update(40) == 4
+        assert controller.update(40) == 4
+        assert controller.update(40) == 5
+
+    def test_drops_connection_at_maximum_if_throughput_holds(self):
+        controller = ConnectionController(4, 4)
+        assert controller.update(40) == 3
+        assert controller.update(40) == 3
+
+    def test_keeps_connection_at_maximum_if_throughput_falls(self):
+        controller = ConnectionController(4, 4)
+        assert controller.update(40) == 3
+        assert controller.update(30) == 4
+
+    def test_probes_again_when_throughput_changes(self):
+        controller = ConnectionController(4, 8)
+        controller.update(40)
+        controller.update(41)
+        controller.update(40)
+        assert controller.update(20) == 5
@@ -0,0 +1,114 @@
+"""Tests for the extraction of archives (extract.py)."""
+
+import io
+import json
+import os
+import tarfile
+import zipfile
+from unittest.mock import patch
+
+from lutris.util import extract
+from lutris.util.extract import ExtractionIndex, extract_archive
+
+
+def _make_zip(path, files, unix_modes=None):
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zip_file:
+        for name, content in files.items():
+            info = zipfile.ZipInfo(name)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            if unix_modes and name in unix_modes:
+                info.create_system = 3
+                info.external_attr = unix_modes[name] << 16
+            zip_file.writestr(info, content)
+    return str(path)
+
+
+def _make_tar(path, files):
+    with tarfile.open(path, "w:gz") as tar_file:
+        for name, content in files.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            tar_file.addfile(info, io.BytesIO(content))
+    return str(path)
+
+
+class TestExtractZip:
+    def test_extracts_single_folder_content(self, tmp_path):
+        files = {"game/data/level%d.pak" % i: b"level %d" % i for i in range(50)}
+        files["game/start.sh"] = b"#!/bin/sh"
+        archive = _make_zip(tmp_path / "game.zip", files, unix_modes={"game/start.sh": 0o100755})
+        dest = tmp_path / "dest"
+        dest.mkdir()
+
+        extract_archive(archive, str(dest))
+
+        assert (dest / "data" / "level7.pak").read_bytes() == b"level 7"
+        assert os.stat(dest / "start.sh").st_mode & 0o777 == 0o755
+        assert sorted(os.listdir(dest)) == ["data", "start.sh"]
+
+    def test_reports_progress(self, tmp_path):
+        archive = _make_zip(tmp_path / "game.zip", {"a.bin": b"a" * 1000, "b.bin": b"b" * 1000})
+        progress = []
+        extract_archive(archive, str(tmp_path / "dest"), progress_callback=lambda done, total: progress.append(done))
+        assert len(progress) == 2
+        assert progress[-1] == sum(info.compress_size for info in zipfile.ZipFile(archive).infolist())
+
+    def test_unsupported_zip_uses_7zip(self, tmp_path):
+        archive = _make_zip(tmp_path / "game.zip", {"a.bin": b"a"})
+        with patch("lutris.util.extract._can_extract_zip", return_value=False):
+            with patch("lutris.util.extract._extract_7zip") as extract_7zip:
+                extract._extract_zip(archive, str(tmp_path / "dest"))
+        extract_7zip.assert_called_once()
+
+
+class TestExtractTar:
+    def test_resumes_from_index(self, tmp_path):
+        archive = _make_tar(tmp_path / "game.tar.gz", {"a.bin": b"a", "b.bin": b"b"})
+        dest = tmp_path / "dest"
+        dest.mkdir()
+        # An interrupted extraction left a.bin done
+        temp_dir = dest / (".extract-%s" % extract._get_extraction_id(archive))
+        temp_dir.mkdir()
+        (temp_dir / "a.bin").write_bytes(b"already there")
+        with open(str(temp_dir) + ".index", "w", encoding="utf-8") as index_file:
+            index_file.write(json.dumps("a.bin") + "\n")
+
+        extract_archive(archive, str(dest), merge_single=False)
+
+        assert (dest / "a.bin").read_bytes() == b"already there"
+        assert (dest / "b.bin").read_bytes() == b"b"
+        assert sorted(os.listdir(dest)) == ["a.bin", "b.bin"]
+
+    def test_stale_folder_without_index_is_discarded(self, tmp_path):
+        archive = _make_tar(tmp_path / "game.tar.gz", {"a.bin": b"a"})
+        dest = tmp_path / "dest"
+        temp_dir = dest / (".extract-%s" % extract._get_extraction_id(archive))
+        temp_dir.mkdir(parents=True)
+        (temp_dir / "partial.bin").write_bytes(b"?")
+
+        extract_archive(archive, str(dest), merge_single=False)
+
+        assert sorted(os.listdir(dest)) == ["a.bin"]
+
+    def test_merges_into_existing_folder(self, tmp_path):
+        archive = _make_tar(tmp_path / "game.tar.gz", {"data/new.pak": b"new", "data/old.pak": b"updated"})
+        dest = tmp_path / "dest"
+        (dest / "data").mkdir(parents=True)
+        (dest / "data" / "old.pak").write_bytes(b"old")
+        (dest / "data" / "save.dat").write_bytes(b"save")
+
+        extract_archive(archive, str(dest), merge_single=False)
+
+        assert (dest / "data" / "new.pak").read_bytes() == b"new"
+        assert (dest / "data" / "old.pak").read_bytes() == b"updated"
+        assert (dest / "data" / "save.dat").read_bytes() == b"save"
+        assert sorted(os.listdir(dest)) == ["data"]
+
+
+class TestExtractionIndex:
+    def test_ignores_truncated_entry(self, tmp_path):
+        path = tmp_path / "index"
+        path.write_text(json.dumps("a.bin") + '\n"b.b', encoding="utf-8")
+        index = ExtractionIndex(str(path))
+        assert "a.bin" in index
+        assert "b.b" not in index
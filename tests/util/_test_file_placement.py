@@ -0,0 +1,119 @@
+"""Tests for the placement of files by reflink, rename, hard link or copy (file_placement.py)."""
+
+import errno
+import os
+import shutil
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from lutris.util import file_placement, system
+from lutris.util.file_placement import FilePlacer, clone_file, move_file, place_files
+
+
+def _write(path, content=b"game data"):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+    return str(path)
+
+
+class TestCloneFile:
+    def test_copies_content_and_mode(self, tmp_path):
+        src = _write(tmp_path / "src.exe")
+        os.chmod(src, 0o755)
+        dst = str(tmp_path / "dst.exe")
+        assert clone_file(src, dst) in (file_placement.REFLINK, file_placement.COPY_RANGE, file_placement.COPY)
+        assert (tmp_path / "dst.exe").read_bytes() == b"game data"
+        assert os.stat(dst).st_mode & 0o777 == 0o755
+
+    def test_falls_back_to_plain_copy(self, tmp_path):
+        src = _write(tmp_path / "src.bin", b"x" * 3_000_000)
+        dst = str(tmp_path / "dst.bin")
+        with patch("lutris.util.file_placement.fcntl.ioctl", side_effect=OSError(errno.EOPNOTSUPP, "")):
+            with patch("lutris.util.file_placement.os.copy_file_range", side_effect=OSError(errno.EXDEV, "")):
+                assert clone_file(src, dst) == file_placement.COPY
+        assert (tmp_path / "dst.bin").read_bytes() == b"x" * 3_000_000
+
+    def test_copies_when_copy_file_range_copies_nothing(self, tmp_path):
+        src = _write(tmp_path / "src.bin", b"x" * 3_000_000)
+        dst = str(tmp_path / "dst.bin")
+        with patch("lutris.util.file_placement.fcntl.ioctl", side_effect=OSError(errno.EOPNOTSUPP, "")):
+            with patch("lutris.util.file_placement.os.copy_file_range", return_value=0):
+                assert clone_file(src, dst) == file_placement.COPY
+        assert (tmp_path / "dst.bin").read_bytes() == b"x" * 3_000_000
+
+    def test_replaces_existing_file(self, tmp_path):
+        src = _write(tmp_path / "src.bin", b"new")
+        dst = _write(tmp_path / "dst.bin", b"old content")
+        clone_file(src, dst)
+        assert (tmp_path / "dst.bin").read_bytes() == b"new"
+
+    def test_copies_symlink_as_symlink(self, tmp_path):
+        os.symlink("target.bin", tmp_path / "link.bin")
+        dst = str(tmp_path / "copy.bin")
+        assert clone_file(str(tmp_path / "link.bin"), dst) == file_placement.SYMLINK
+        assert os.readlink(dst) == "target.bin"
+
+    def test_refuses_same_file(self, tmp_path):
+        src = _write(tmp_path / "src.bin")
+        os.link(src, tmp_path / "linked.bin")
+        with pytest.raises(shutil.SameFileError):
+            clone_file(src, str(tmp_path / "linked.bin"))
+        assert (tmp_path / "src.bin").read_bytes() == b"game data"
+
+
+class TestMoveFile:
+    def test_renames_on_same_file_system(self, tmp_path):
+        src = _write(tmp_path / "src.bin")
+        dst = str(tmp_path / "dst.bin")
+        assert move_file(src, dst) == file_placement.RENAME
+        assert not os.path.exists(src)
+
+    def test_copies_across_file_systems(self, tmp_path):
+        src = _write(tmp_path / "src.bin")
+        dst = str(tmp_path / "dst.bin")
+        with patch("lutris.util.file_placement.os.rename", side_effect=OSError(errno.EXDEV, "")):
+            assert move_file(src, dst) != file_placement.RENAME
+        assert not os.path.exists(src)
+        assert (tmp_path / "dst.bin").read_bytes() == b"game data"
+
+
+class TestFilePlacer:
+    def test_consumed_source_placed_at_all_destinations(self, tmp_path):
+        src = _write(tmp_path / "cache" / "abc123", b"x" * 100)
+        destinations = [str(tmp_path / "game" / name) for name in ("a.dll", "b.dll", "c.dll")]
+        os.makedirs(tmp_path / "game")
+        saved = place_files([(src, destinations)], consume=True)
+        assert not os.path.exists(src)
+        for dst in destinations:
+            assert Path(dst).read_bytes() == b"x" * 100
+        assert saved >= 100  # The rename at least
+
+    def test_hardlinks_when_allowed(self, tmp_path):
+        src = _write(tmp_path / "src.bin")
+        destinations = [str(tmp_path / "a.bin"), str(tmp_path / "b.bin")]
+        with FilePlacer(allow_hardlinks=True) as placer:
+            placer.place(src, destinations)
+        assert os.path.samefile(src, destinations[0])
+        assert os.path.samefile(src, destinations[1])
+        assert placer.bytes_saved == 2 * len(b"game data")
+        assert placer.bytes_copied == 0
+
+    def test_raises_first_error(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            with FilePlacer() as placer:
+                placer.place(str(tmp_path / "missing.bin"), [str(tmp_path / "dst.bin")])
+
+
+class TestMergeFolders:
+    def test_merges_tree(self, tmp_path):
+        _write(tmp_path / "src" / "data" / "level1.pak", b"level")
+        _write(tmp_path / "src" / "game.exe", b"exe")
+        _write(tmp_path / "dst" / "game.exe", b"old")
+        _write(tmp_path / "dst" / "saves" / "save1", b"save")
+        system.merge_folders(str(tmp_path / "src"), str(tmp_path / "dst"))
+        assert (tmp_path / "dst" / "data" / "level1.pak").read_bytes() == b"level"
+        assert (tmp_path / "dst" / "game.exe").read_bytes() == b"exe"
+        assert (tmp_path / "dst" / "saves" / "save1").read_bytes() == b"save"
+        assert (tmp_path / "src" / "game.exe").exists()
@@ -0,0 +1,84 @@
+"""Tests for the detection of game executables (game_finder.py)."""
+
+import os
+import struct
+
+from lutris.util import game_finder
+from lutris.util.game_finder import find_linux_game_executable, find_windows_game_executable
+
+
+def _elf(elf_class=2, elf_type=2):
+    return b"\x7fELF" + bytes([elf_class, 1, 1]) + b"\x00" * 9 + struct.pack("<H", elf_type) + b"\x00" * 46
+
+
+def _pe(machine=0x8664, optional_magic=0x20B, subsystem=2, characteristics=0x22):
+    dos_header = b"MZ" + b"\x00" * 0x3A + struct.pack("<I", 0x40)
+    return dos_header + game_finder.PE_HEADER.pack(
+        b"PE\x00\x00", machine, 1, 0, 0, 0, 240, characteristics, optional_magic, subsystem
+    )
+
+
+def _write(path, content, mode=0o644):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+    os.chmod(path, mode)
+    return str(path)
+
+
+class TestHeaders:
+    def test_elf_types(self):
+        assert game_finder.get_elf_type(_elf()) == "64bit"
+        assert game_finder.get_elf_type(_elf(elf_class=1, elf_type=3)) == "32bit"
+        assert game_finder.get_elf_type(_elf(elf_type=1)) is None  # Relocatable object
+        assert game_finder.get_elf_type(b"\x7fELF") is None
+
+    def test_pe_types(self, tmp_path):
+        def pe_type(content):
+            path = _write(tmp_path / "game.exe", content)
+            return game_finder.get_pe_type(path, game_finder.read_header(path))
+
+        assert pe_type(_pe()) == "64bit"
+        assert pe_type(_pe(machine=0x14C, optional_magic=0x10B)) == "32bit"
+        assert pe_type(_pe(subsystem=3)) is None  # Console
+        assert pe_type(_pe(characteristics=0x2022)) is None  # DLL
+        assert pe_type(b"MZ" + b"\x00" * 0x3A + struct.pack("<I", 0xFFFFFF)) is None  # Truncated
+
+
+class TestFindLinuxGameExecutable:
+    def test_prefers_script_to_binary(self, tmp_path):
+        _write(tmp_path / "game.x86_64", _elf())
+        script = _write(tmp_path / "start.sh", b"#!/bin/bash\necho start\n")
+        assert find_linux_game_executable(str(tmp_path)) == script
+
+    def test_picks_first_directory_with_candidates(self, tmp_path):
+        binary = _write(tmp_path / "game.x86", _elf(elf_class=1))
+        _write(tmp_path / "bin" / "start.sh", b"#!/bin/sh\n")
+        _write(tmp_path / "README", b"Read me")
+        assert find_linux_game_executable(str(tmp_path)) == binary
+
+    def test_searches_subdirectories(self, tmp_path):
+        _write(tmp_path / "data" / "level.pak", b"PAK")
+        binary = _write(tmp_path / "game" / "bin" / "game.bin", _elf())
+        _write(tmp_path / "game" / "bin" / "uninstall.bin", _elf())
+        assert find_linux_game_executable(str(tmp_path), make_executable=True) == binary
+        assert os.access(binary, os.X_OK)
+
+    def test_nothing_found(self, tmp_path):
+        _write(tmp_path / "data.bin", b"\x00" * 100)
+        os.symlink("/bin/sh", tmp_path / "sh")
+        assert find_linux_game_executable(str(tmp_path)) == ""
+
+
+class TestFindWindowsGameExecutable:
+    def test_prefers_shortcut_then_64bit(self, tmp_path):
+        _write(tmp_path / "game32.exe", _pe(machine=0x14C, optional_magic=0x10B))
+        game64 = _write(tmp_path / "game64.exe", _pe())
+        assert find_windows_game_executable(str(tmp_path)) == game64
+        link = _write(tmp_path / "Game.lnk", game_finder.LNK_MAGIC + b"\x00" * 56)
+        assert find_windows_game_executable(str(tmp_path)) == link
+
+    def test_skips_excluded_files_and_directories(self, tmp_path):
+        _write(tmp_path / "setup.exe", _pe())
+        _write(tmp_path / "Common Files" / "helper.exe", _pe())
+        game = _write(tmp_path / "Game" / "game.exe", _pe())
+        assert find_windows_game_executable(str(tmp_path)) == game
@@ -1,5 +1,6 @@
 """Tests for the GOG multi-connection parallel downloader."""
 
+import hashlib
 import os
 import threading
 import time
@@ -7,9 +8,10 @@ from unittest.mock import MagicMock, patch
 
 import pytest
 
+from lutris.util import system
 from lutris.util.download_progress import DownloadProgress
 from lutris.util.downloader import DEFAULT_CHUNK_SIZE, Downloader
-from lutris.util.gog_downloader import GOGDownloader
+from lutris.util.gog_downloader import GOGDownloader, RangeHasher
 
 
 class TestGOGDownloaderInit:
@@ -125,6 +127,15 @@ class TestCalculateRanges:
         total = sum(end - start + 1 for start, end in ranges)
         assert total == file_size
 
+    def test_large_file_split_into_segments(self):
+        """Large files get more ranges than workers, none larger than a segment."""
+        dl = GOGDownloader("https://example.com/file.bin", "/tmp/test.bin", num_workers=4)
+        file_size = 10 * dl.SEGMENT_SIZE + 5
+        ranges = dl._calculate_ranges(file_size)
+        assert len(ranges) == 11
+        assert ranges[-1][1] == file_size - 1
+        assert all(end - start + 1 <= dl.SEGMENT_SIZE for start, end in ranges)
+
     def test_no_gaps_or_overlaps(self):
         """Byte ranges must be contiguous with no gaps or overlaps."""
         dl = GOGDownloader("https://example.com/file.bin", "/tmp/test.bin", num_workers=5)
@@ -1006,3 +1017,74 @@ class TestCompletionCleansProgress:
         assert dl.state == dl.COMPLETED
         assert not os.path.exists(dest + ".progress")
         assert dl._progress is None
+
+
+class TestRangeHasher:
+    """Test the checksum computed while ranges are written out of order."""
+
+    def _write(self, f, hasher, offset, data):
+        f.seek(offset)
+        f.write(data)
+        hasher.update(f, offset, data)
+
+    def test_out_of_order_writes(self, tmp_path):
+        data = os.urandom(5000)
+        hasher = RangeHasher("md5")
+        with open(tmp_path / "file.bin", "w+b") as f:
+            f.truncate(len(data))
+            self._write(f, hasher, 3000, data[3000:4000])
+            self._write(f, hasher, 1000, data[1000:3000])
+            self._write(f, hasher, 4000, data[4000:])
+            assert hasher.offset == 0
+            self._write(f, hasher, 0, data[:1000])
+        assert hasher.offset == len(data)
+        assert hasher.hexdigest() == hashlib.md5(data).hexdigest()
+
+    def test_retried_range_is_hashed_once(self, tmp_path):
+        data = os.urandom(3000)
+        hasher = RangeHasher("sha256")
+        with open(tmp_path / "file.bin", "w+b") as f:
+            f.truncate(len(data))
+            self._write(f, hasher, 0, data[:500])
+            self._write(f, hasher, 2000, data[2000:2500])
+            self._write(f, hasher, 2000, data[2000:])
+            self._write(f, hasher, 0, data[:1000])
+            self._write(f, hasher, 1000, data[1000:2000])
+        assert hasher.hexdigest() == hashlib.sha256(data).hexdigest()
+
+    def test_resumed_download_stores_checksum(self, tmp_path):
+        dest = str(tmp_path / "resume.bin")
+        data = os.urandom(4000)
+        with open(dest, "wb") as f:
+            f.truncate(len(data))
+            f.write(data[:1000])
+            f.seek(2000)
+            f.write(data[2000:3000])
+        progress = DownloadProgress(dest)
+        progress.create("https://cdn.gog.com/file.bin", len(data), [(0, 999), (1000, 1999), (2000, 2999), (3000, 3999)])
+        progress.mark_range_complete(0, 999)
+        progress.mark_range_complete(2000, 2999)
+
+        dl = GOGDownloader("https://cdn.gog.com/file.bin", dest, num_workers=4, hash_type="md5")
+        dl.MIN_CHUNK_SIZE = 100
+        dl.stop_request = threading.Event()
+
+        def mock_get(url, headers=None, stream=None, timeout=None, cookies=None):
+            start, end = (int(part) for part in headers["Range"].replace("bytes=", "").split("-"))
+            resp = MagicMock()
+            resp.status_code = 206
+            resp.iter_content = MagicMock(return_value=[data[start : end + 1]])
+            return resp
+
+        head_resp = MagicMock()
+        head_resp.url = "https://cdn.gog.com/file.bin"
+        head_resp.headers = {"Content-Length": str(len(data)), "Accept-Ranges": "bytes"}
+        with patch.object(dl._parallel_session, "head", return_value=head_resp):
+            with patch.object(dl._parallel_session, "get", side_effect=mock_get):
+                dl.async_download()
+
+        assert dl.state == dl.COMPLETED
+        assert dl.checksum == hashlib.md5(data).hexdigest()
+        with patch.object(system.hashlib, "new") as new_hasher:
+            assert system.get_file_checksum(dest, "md5") == dl.checksum
+        new_hasher.assert_not_called()
@@ -0,0 +1,117 @@
+"""Tests for the hashing of files and the persistent hash cache (hashing.py)."""
+
+import hashlib
+import os
+import sqlite3
+import time
+import zlib
+from unittest.mock import patch
+
+import pytest
+
+from lutris.util import hashing
+from lutris.util.hashing import (
+    HashCache,
+    get_file_hash,
+    get_file_hashes,
+    get_file_identity,
+    hash_files,
+    set_file_hash,
+)
+
+
+@pytest.fixture(autouse=True)
+def hash_cache(tmp_path):
+    cache = HashCache(str(tmp_path / "cache" / "hashes.db"))
+    with patch.object(hashing, "HASH_CACHE", cache):
+        yield cache
+
+
+def _write(path, content):
+    path.write_bytes(content)
+    return str(path)
+
+
+class TestGetFileHashes:
+    def test_several_algorithms_in_one_pass(self, tmp_path):
+        content = os.urandom(3 * hashing.HASH_BUFFER_SIZE + 17)
+        path = _write(tmp_path / "rom.bin", content)
+        digests = get_file_hashes(path, ("md5", "sha1", "sha256", "crc32"))
+        assert digests == {
+            "md5": hashlib.md5(content).hexdigest(),
+            "sha1": hashlib.sha1(content).hexdigest(),
+            "sha256": hashlib.sha256(content).hexdigest(),
+            "crc32": "%08x" % zlib.crc32(content),
+        }
+
+    def test_cached_digest_not_read_again(self, tmp_path):
+        path = _write(tmp_path / "rom.bin", b"rom")
+        expected = get_file_hash(path, "sha1")
+        with patch("builtins.open", side_effect=AssertionError("file read again")):
+            assert get_file_hash(path, "sha1") == expected
+
+    def test_cache_survives_rename(self, tmp_path):
+        path = _write(tmp_path / "rom.bin", b"rom")
+        expected = get_file_hash(path)
+        os.rename(path, tmp_path / "renamed.bin")
+        with patch("builtins.open", side_effect=AssertionError("file read again")):
+            assert get_file_hash(str(tmp_path / "renamed.bin")) == expected
+
+    def test_modified_file_hashed_again(self, tmp_path):
+        path = _write(tmp_path / "rom.bin", b"rom")
+        get_file_hash(path)
+        _write(tmp_path / "rom.bin", b"patched rom")
+        assert get_file_hash(path) == hashlib.md5(b"patched rom").hexdigest()
+
+    def test_stored_digest_is_used(self, tmp_path):
+        path = _write(tmp_path / "setup.exe", b"setup")
+        set_file_hash(path, "sha256", "digest computed while downloading")
+        assert get_file_hash(path, "sha256") == "digest computed while downloading"
+
+    def test_missing_file_raises(self, tmp_path):
+        with pytest.raises(OSError):
+            get_file_hash(str(tmp_path / "missing.bin"))
+
+
+class TestHashFiles:
+    def test_hashes_all_files(self, tmp_path):
+        paths = [_write(tmp_path / ("rom%d.bin" % i), b"rom %d" % i) for i in range(10)]
+        paths.append(str(tmp_path / "missing.bin"))
+        digests = hash_files(paths)
+        for i in range(10):
+            assert digests[paths[i]] == {"md5": hashlib.md5(b"rom %d" % i).hexdigest()}
+        assert digests[paths[-1]] is None
+
+
+class TestHashCache:
+    def test_old_digests_deleted_when_opened(self, tmp_path, hash_cache):
+        old_path = _write(tmp_path / "old.bin", b"old")
+        seen_path = _write(tmp_path / "seen.bin", b"seen")
+        recent_path = _write(tmp_path / "recent.bin", b"recent")
+        start = time.time()
+        with patch.object(hashing.time, "time", return_value=start):
+            get_file_hash(old_path)
+            get_file_hash(seen_path)
+        with patch.object(hashing.time, "time", return_value=start + hashing.HASH_CACHE_MAX_AGE / 2):
+            get_file_hash(seen_path)  # Looked up again, so kept longer
+            get_file_hash(recent_path)
+
+        reopened = HashCache(hash_cache.db_path)
+        with patch.object(hashing.time, "time", return_value=start + hashing.HASH_CACHE_MAX_AGE + 1):
+            assert reopened.get(get_file_identity(old_path), ["md5"]) == {}
+            assert reopened.get(get_file_identity(seen_path), ["md5"]) == {"md5": hashlib.md5(b"seen").hexdigest()}
+            assert reopened.get(get_file_identity(recent_path), ["md5"]) == {"md5": hashlib.md5(b"recent").hexdigest()}
+
+    def test_cache_without_seen_time_is_upgraded(self, tmp_path, hash_cache):
+        path = _write(tmp_path / "rom.bin", b"rom")
+        os.makedirs(os.path.dirname(hash_cache.db_path))
+        with sqlite3.connect(hash_cache.db_path) as connection:
+            connection.execute(
+                "create table hashes (device integer, inode integer, size integer, mtime_ns integer, "
+                "algorithm text, digest text, primary key (device, inode, size, mtime_ns, algorithm)) without rowid"
+            )
+            connection.execute("insert into hashes values (?, ?, ?, ?, 'md5', 'stored')", get_file_identity(path))
+        connection.close()
+        assert get_file_hash(path) == "stored"
+        set_file_hash(path, "sha1", "also stored")
+        assert get_file_hashes(path, ("md5", "sha1")) == {"md5": "stored", "sha1": "also stored"}
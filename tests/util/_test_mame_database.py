@@ -0,0 +1,126 @@
+"""Tests for the MAME machine database (mame/database.py)."""
+
+import os
+
+import pytest
+
+from lutris.util.mame import database
+from lutris.util.mame.database import build_machine_database, get_games, get_machine, get_supported_systems
+
+LISTXML = """<?xml version="1.0"?>
+<mame build="0.261">
+    <machine name="pacman" sourcefile="pacman.cpp">
+        <description>Pac-Man (Midway)</description>
+        <year>1980</year>
+        <manufacturer>Namco (Midway license)</manufacturer>
+        <rom name="pacman.6e" size="4096" crc="c1e6ab10"/>
+        <rom name="pacman.6f" size="4096" crc="1a6fb2d4"/>
+        <input players="2" coins="2"/>
+        <driver status="good"/>
+    </machine>
+    <machine name="puckman" sourcefile="pacman.cpp" cloneof="pacman" romof="pacman">
+        <description>PuckMan (Japan set 1)</description>
+        <year>1980</year>
+        <manufacturer>Namco</manufacturer>
+        <input players="2"/>
+        <driver status="good"/>
+    </machine>
+    <machine name="neogeo" sourcefile="neogeo.cpp" isbios="yes">
+        <description>Neo-Geo MV-6F</description>
+        <year>1990</year>
+        <manufacturer>SNK</manufacturer>
+        <device_ref name="software_list"/>
+    </machine>
+    <machine name="genesis" sourcefile="megadriv.cpp">
+        <description>Genesis (USA, NTSC)</description>
+        <year>1989</year>
+        <manufacturer>Sega</manufacturer>
+        <device_ref name="software_list"/>
+        <port tag=":ctrl1"/>
+        <device type="cartridge" tag="mdslot">
+            <instance name="cartridge" briefname="cart"/>
+            <extension name="md"/>
+            <extension name="bin"/>
+        </device>
+        <softwarelist tag="cart_list" name="megadriv" status="original"/>
+        <input players="2"/>
+        <driver status="good"/>
+    </machine>
+    <machine name="apple2" sourcefile="apple2.cpp">
+        <description>Apple ][</description>
+        <year>1977</year>
+        <manufacturer>Apple Computer</manufacturer>
+        <device_ref name="software_list"/>
+        <input players="1"/>
+        <driver status="good"/>
+    </machine>
+</mame>
+"""
+
+
+@pytest.fixture
+def xml_path(tmp_path):
+    path = tmp_path / "mame.xml"
+    path.write_text(LISTXML, encoding="utf-8")
+    return str(path)
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "cache" / "machines.db")
+
+
+class TestMachineDatabase:
+    def test_systems_sorted_by_manufacturer(self, xml_path, db_path):
+        systems = get_supported_systems(xml_path, db_path=db_path)
+        assert list(systems) == ["apple2", "genesis"]
+        assert systems["apple2"] == {"description": "Apple ][", "manufacturer": "Apple", "year": "1977"}
+
+    def test_games_exclude_clones_and_bios(self, xml_path, db_path):
+        games = get_games(xml_path, db_path=db_path)
+        assert "pacman" in games
+        assert "puckman" not in games
+        assert "neogeo" not in games
+
+    def test_machine_details(self, xml_path, db_path):
+        build_machine_database(xml_path, db_path)
+        genesis = get_machine("genesis", db_path)
+        assert genesis["ports"] == [{"tag": ":ctrl1"}]
+        assert genesis["devices"] == [
+            {
+                "info": {"type": "cartridge", "tag": "mdslot"},
+                "name": "cartridge",
+                "briefname": "cart",
+                "extensions": ["md", "bin"],
+            }
+        ]
+        assert genesis["input"] == {"players": "2"}
+        assert [rom["name"] for rom in get_machine("pacman", db_path)["roms"]] == ["pacman.6e", "pacman.6f"]
+        assert get_machine("missing", db_path) is None
+
+    def test_rebuilt_when_xml_changes(self, xml_path, db_path):
+        get_supported_systems(xml_path, db_path=db_path)
+        with open(xml_path, "w", encoding="utf-8") as xml_file:
+            xml_file.write(LISTXML.replace("Genesis (USA, NTSC)", "Mega Drive"))
+        db_mtime = os.path.getmtime(db_path)
+        os.utime(xml_path, (db_mtime + 10, db_mtime + 10))
+        assert get_supported_systems(xml_path, db_path=db_path)["genesis"]["description"] == "Mega Drive"
+
+    def test_invalid_xml_keeps_previous_database(self, xml_path, db_path, tmp_path):
+        build_machine_database(xml_path, db_path)
+        broken_path = tmp_path / "broken.xml"
+        broken_path.write_text("<mame><machine", encoding="utf-8")
+        assert build_machine_database(str(broken_path), db_path) == 0
+        assert database.is_machine_database_ready(xml_path, db_path)
+        assert get_machine("pacman", db_path)["description"] == "Pac-Man (Midway)"
+
+    def test_truncated_xml_not_indexed(self, xml_path, db_path, tmp_path):
+        truncated_path = tmp_path / "truncated.xml"
+        truncated_path.write_text(LISTXML[: LISTXML.index('<machine name="genesis"')], encoding="utf-8")
+        assert build_machine_database(str(truncated_path), db_path) == 0
+        assert not os.path.exists(db_path)
+        assert [machine.attrib["name"] for machine in database.iter_machines(str(truncated_path))] == [
+            "pacman",
+            "puckman",
+            "neogeo",
+        ]
@@ -0,0 +1,168 @@
+"""Tests for the detection of missing games (path_cache.py)."""
+
+import os
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from lutris import settings
+from lutris.database import games as games_db
+from lutris.database import schema, sql
+from lutris.game import Game
+from lutris.util import path_cache
+from lutris.util.path_cache import (
+    MissingGames,
+    add_to_path_cache,
+    build_path_cache,
+    get_path_cache,
+    probe_paths,
+    remove_from_path_cache,
+)
+from lutris.util.test_config import setup_test_environment
+from lutris.util.yaml import write_yaml_to_file
+
+setup_test_environment()
+
+
+def _write(path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"game")
+    return str(path)
+
+
+@pytest.fixture
+def config_dir(tmp_path):
+    sql.close_connections()
+    if os.path.exists(settings.DB_PATH):
+        os.remove(settings.DB_PATH)
+    schema.syncdb()
+    (tmp_path / "config" / "games").mkdir(parents=True)
+    with patch.object(settings, "CONFIG_DIR", str(tmp_path / "config")):
+        yield tmp_path / "config"
+    get_path_cache.cache_clear()
+
+
+def _add_game(config_dir, name, runner, game_config, directory="/games/%s"):
+    write_yaml_to_file({"game": game_config}, str(config_dir / "games" / ("%s.yml" % name)))
+    return str(games_db.add_game(name=name, runner=runner, installed=1, configpath=name, directory=directory % name))
+
+
+class TestPathCache:
+    def test_built_from_game_configs(self, config_dir):
+        linux_id = _add_game(config_dir, "quake", "linux", {"exe": "quake.sh"})
+        dosbox_id = _add_game(config_dir, "doom", "dosbox", {"main_file": "~/doom/doom.conf"})
+        _add_game(config_dir, "portal", "steam", {"appid": "400"})
+        _add_game(config_dir, "pacman", "mame", {"main_file": "pacman"})
+        _add_game(config_dir, "empty", "linux", {})
+
+        with patch("lutris.game.LutrisConfig", side_effect=AssertionError("full config loaded")):
+            build_path_cache()
+        assert get_path_cache() == {
+            linux_id: "/games/quake/quake.sh",
+            dosbox_id: os.path.expanduser("~/doom/doom.conf"),
+        }
+
+    def test_updated_per_game(self, config_dir):
+        game_id = _add_game(config_dir, "quake", "linux", {"exe": "quake.sh"})
+        build_path_cache()
+        other_id = _add_game(config_dir, "doom", "linux", {"exe": "/opt/doom/doom"})
+        build_path_cache()  # Already built, the new game is not added
+        assert list(get_path_cache()) == [game_id]
+
+        add_to_path_cache(Game(other_id))
+        assert get_path_cache()[other_id] == "/opt/doom/doom"
+        remove_from_path_cache(Game(game_id))
+        assert get_path_cache() == {other_id: "/opt/doom/doom"}
+
+
+class TestProbePaths:
+    def test_returns_results(self):
+        assert probe_paths(len, ["a", "bb", "ccc"]) == {"a": 1, "bb": 2, "ccc": 3}
+
+    def test_stuck_probe_left_out(self):
+        release = threading.Event()
+
+        def probe(path):
+            if path == "dead":
+                release.wait()
+            return True
+
+        try:
+            results = probe_paths(probe, ["dead"] + ["live%d" % i for i in range(5)], timeout=0.2, max_workers=1)
+        finally:
+            release.set()
+        assert "dead" not in results
+        assert len(results) == 5
+
+    def test_failed_probe_left_out(self):
+        assert probe_paths(lambda path: 1 / len(path), ["", "a"]) == {"a": 1.0}
+
+
+class TestMountPoints:
+    def test_read_from_mount_table(self, tmp_path):
+        mounts_path = tmp_path / "mounts"
+        mounts_path.write_text(
+            "/dev/sda2 / ext4 rw 0 0\n"
+            "/dev/sdb1 /media/user/My\\040Games vfat rw 0 0\n"
+            "server:/games /mnt/nas nfs rw 0 0\n",
+            encoding="utf-8",
+        )
+        with patch.object(path_cache, "MOUNTS_PATH", str(mounts_path)):
+            mount_points = path_cache.get_mount_points()
+        assert mount_points == ["/media/user/My Games", "/mnt/nas", "/"]
+        assert path_cache.get_mount_point("/media/user/My Games/game.exe", mount_points) == "/media/user/My Games"
+        assert path_cache.get_mount_point("/mnt/nasty/game.exe", mount_points) == "/"
+        assert path_cache.get_mount_point("/mnt/nas", mount_points) == "/mnt/nas"
+
+
+class TestMissingGames:
+    def test_games_on_absent_mount_are_missing(self, tmp_path):
+        present = _write(tmp_path / "disk" / "game" / "game.sh")
+        path_by_id = {
+            "1": present,
+            "2": str(tmp_path / "disk" / "deleted" / "game.sh"),
+            "3": str(tmp_path / "usb" / "game" / "game.sh"),
+            "4": "",
+        }
+        checked = []
+
+        def exists(path):
+            checked.append(path)
+            return os.path.isfile(path)
+
+        mount_points = [str(tmp_path / "disk"), str(tmp_path / "usb"), "/"]
+        with patch.object(path_cache, "get_path_cache", return_value=path_by_id):
+            with patch.object(path_cache, "get_mount_points", return_value=mount_points):
+                with patch("os.path.exists", exists):
+                    cache, missing_game_ids, checked_paths = MissingGames()._update_missing_games()
+        assert cache is path_by_id
+        assert missing_game_ids == {"2", "3"}
+        assert checked_paths == {path_by_id["1"], path_by_id["2"]}
+        assert path_by_id["3"] not in checked  # Not checked on its own, the mount is absent
+
+    def test_dead_mount_checked_once(self, tmp_path):
+        nas_path = str(tmp_path / "nas")
+        path_by_id = {str(index): os.path.join(nas_path, "game%d" % index, "game.sh") for index in range(40)}
+        release = threading.Event()
+        probed = []
+        isdir = os.path.isdir
+
+        def hanging_isdir(path):
+            probed.append(path)
+            if path == nas_path:
+                release.wait()
+            return isdir(path)
+
+        try:
+            with patch.object(path_cache, "get_path_cache", return_value=path_by_id):
+                with patch.object(path_cache, "get_mount_points", return_value=[nas_path, "/"]):
+                    with patch.object(path_cache, "PATH_PROBE_TIMEOUT", 0.2):
+                        with patch("os.path.isdir", hanging_isdir):
+                            with patch("os.path.exists", side_effect=AssertionError("path on a dead mount checked")):
+                                _cache, missing_game_ids, checked_paths = MissingGames()._update_missing_games()
+        finally:
+            release.set()
+        assert probed == [nas_path]
+        assert missing_game_ids == set(path_by_id)
+        assert checked_paths == set()
@@ -0,0 +1,93 @@
+"""Tests for the tracking of game processes."""
+
+import os
+import subprocess
+import sys
+from unittest.mock import patch
+
+from lutris.util import process_tracker
+from lutris.util.process_tracker import GameProcessTracker, get_scope_unit_name
+from lutris.util.system import get_running_pid_list
+
+
+def start_process(game_uuid):
+    env = dict(os.environ, LUTRIS_GAME_UUID=game_uuid)
+    return subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"], env=env)
+
+
+class TestGameProcessTracker:
+    def test_scanner_reports_processes_of_the_game(self):
+        tracker = GameProcessTracker("game-uuid", get_running_pid_list())
+        game_process = start_process("game-uuid")
+        other_process = start_process("other-uuid")
+        try:
+            candidates = tracker.get_candidate_pids()
+            assert game_process.pid in candidates
+            assert other_process.pid not in candidates
+            assert os.getpid() not in candidates
+        finally:
+            game_process.kill()
+            other_process.kill()
+            game_process.wait()
+            other_process.wait()
+        assert game_process.pid not in tracker.get_candidate_pids()
+
+    def test_scanner_inspects_new_processes_once(self):
+        tracker = GameProcessTracker("game-uuid", get_running_pid_list())
+        game_process = start_process("game-uuid")
+        try:
+            tracker.get_candidate_pids()
+            with patch.object(process_tracker, "Process") as process_mock:
+                assert game_process.pid in tracker.get_candidate_pids()
+            process_mock.assert_not_called()
+        finally:
+            game_process.kill()
+            game_process.wait()
+
+    def test_runner_filters_new_processes_once(self):
+        tracker = GameProcessTracker("game-uuid", get_running_pid_list())
+        game_process = start_process("game-uuid")
+        filtered = []
+
+        def filter_pids(pids):
+            filtered.append(pids)
+            return pids
+
+        try:
+            assert game_process.pid in tracker.get_game_pids(filter_pids)
+            assert game_process.pid in tracker.get_game_pids(filter_pids)
+            assert filtered == [{game_process.pid}]
+            assert tracker.get_game_pids(lambda pids: set()) == {game_process.pid}
+        finally:
+            game_process.kill()
+            game_process.wait()
+        assert game_process.pid not in tracker.get_game_pids(filter_pids)
+
+    def test_rejected_processes_stay_rejected(self):
+        tracker = GameProcessTracker("game-uuid", get_running_pid_list())
+        game_process = start_process("game-uuid")
+        try:
+            assert tracker.get_game_pids(lambda pids: set()) == set()
+            assert tracker.get_game_pids(lambda pids: pids) == set()
+        finally:
+            game_process.kill()
+            game_process.wait()
+
+    def test_scope_processes_come_from_the_cgroup(self, tmp_path):
+        scope_name = get_scope_unit_name("game-uuid")
+        scope_dir = tmp_path / "app.slice" / scope_name
+        scope_dir.mkdir(parents=True)
+        (scope_dir / "cgroup.procs").write_text("12\n34\n")
+        tracker = GameProcessTracker("game-uuid", None, main_pid=12)
+        with patch.object(process_tracker, "CGROUP_ROOT", str(tmp_path)):
+            with patch.object(process_tracker, "get_cgroup_path", return_value="/app.slice/" + scope_name):
+                assert tracker.get_candidate_pids() == {12, 34}
+                (scope_dir / "cgroup.procs").unlink()
+                scope_dir.rmdir()
+                assert tracker.get_candidate_pids() == set()
+
+    def test_falls_back_until_the_process_is_in_its_scope(self):
+        tracker = GameProcessTracker("game-uuid", [1], main_pid=12)
+        with patch.object(process_tracker, "get_cgroup_path", return_value="/app.slice/terminal.scope"):
+            assert tracker.get_scope_pids() is None
+        assert tracker.scope_path is None
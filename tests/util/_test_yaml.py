@@ -0,0 +1,63 @@
+"""Tests for the reading and writing of YAML files (yaml.py)."""
+
+import os
+from unittest.mock import patch
+
+import pytest
+
+from lutris.util import yaml as lutris_yaml
+from lutris.util.yaml import YamlFileCache, read_yaml_from_file, write_yaml_to_file
+
+
+@pytest.fixture(autouse=True)
+def yaml_file_cache():
+    cache = YamlFileCache(max_size=2)
+    with patch.object(lutris_yaml, "YAML_FILE_CACHE", cache):
+        yield cache
+
+
+@pytest.fixture
+def config_path(tmp_path):
+    path = str(tmp_path / "system.yml")
+    write_yaml_to_file({"system": {"env": {"DXVK_HUD": "1"}, "disable_screen_saver": True}}, path)
+    return path
+
+
+class TestReadYamlFromFile:
+    def test_unchanged_file_not_parsed_again(self, config_path):
+        expected = read_yaml_from_file(config_path)
+        with patch.object(lutris_yaml.yaml, "load", side_effect=AssertionError("file parsed again")):
+            assert read_yaml_from_file(config_path) == expected
+
+    def test_readers_get_their_own_copy(self, config_path):
+        config = read_yaml_from_file(config_path)
+        config["system"]["env"]["DXVK_HUD"] = "0"
+        config["game"] = {}
+        assert read_yaml_from_file(config_path) == {"system": {"env": {"DXVK_HUD": "1"}, "disable_screen_saver": True}}
+
+    def test_written_file_read_again(self, config_path):
+        read_yaml_from_file(config_path)
+        stat = os.stat(config_path)
+        write_yaml_to_file({"system": {"env": {"DXVK_HUD": "0"}, "disable_screen_saver": True}}, config_path)
+        os.utime(config_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))  # Same time and size as before
+        assert read_yaml_from_file(config_path)["system"]["env"] == {"DXVK_HUD": "0"}
+
+    def test_file_changed_by_others_read_again(self, config_path):
+        read_yaml_from_file(config_path)
+        with open(config_path, "w", encoding="utf-8") as config_file:
+            config_file.write("system:\n  disable_screen_saver: false\n")
+        assert read_yaml_from_file(config_path) == {"system": {"disable_screen_saver": False}}
+
+    def test_least_recently_used_files_dropped(self, tmp_path, yaml_file_cache):
+        paths = [str(tmp_path / ("game%d.yml" % index)) for index in range(3)]
+        for path in paths:
+            write_yaml_to_file({"game": {"exe": path}}, path)
+            read_yaml_from_file(path)
+        assert yaml_file_cache.get(paths[0], lutris_yaml.get_file_key(paths[0])) is None
+        assert yaml_file_cache.get(paths[2], lutris_yaml.get_file_key(paths[2])) == {"game": {"exe": paths[2]}}
+
+    def test_missing_and_invalid_files(self, tmp_path):
+        assert read_yaml_from_file(str(tmp_path / "missing.yml")) == {}
+        path = tmp_path / "invalid.yml"
+        path.write_text("game: [exe\n", encoding="utf-8")
+        assert read_yaml_from_file(str(path)) == {}
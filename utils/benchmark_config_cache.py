@@ -0,0 +1,82 @@
+"""Time the creation of LutrisConfig objects for a synthetic library, with the pure-Python
+and the libyaml YAML loaders, with and without the cache of parsed config files.
+
+Usage: python3 utils/benchmark_config_cache.py [config count]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import yaml
+
+from lutris import settings
+from lutris.config import LutrisConfig
+from lutris.util import yaml as lutris_yaml
+from lutris.util.yaml import write_yaml_to_file
+
+RUNNER = "linux"
+
+
+def populate(config_dir, config_count):
+    os.makedirs(os.path.join(config_dir, "games"))
+    os.makedirs(os.path.join(config_dir, "runners"))
+    write_yaml_to_file(
+        {
+            "system": {
+                "env": {"DXVK_HUD": "fps", "MANGOHUD": "1", "WINEDEBUG": "-all"},
+                "disable_screen_saver": True,
+                "game_path": "/home/user/Games",
+                "prefix_command": "gamemoderun",
+            }
+        },
+        os.path.join(config_dir, "system.yml"),
+    )
+    write_yaml_to_file(
+        {RUNNER: {"ld_preload": ""}, "system": {"pulse_latency": True}},
+        os.path.join(config_dir, "runners", "%s.yml" % RUNNER),
+    )
+    for index in range(config_count):
+        write_yaml_to_file(
+            {
+                "game": {"exe": "/home/user/Games/game-%s/start.sh" % index, "args": "--fullscreen", "working_dir": ""},
+                RUNNER: {},
+                "system": {"env": {"GAME_INDEX": str(index)}},
+            },
+            os.path.join(config_dir, "games", "game-%s.yml" % index),
+        )
+
+
+def create_configs(config_count):
+    start = time.perf_counter()
+    for index in range(config_count):
+        LutrisConfig(runner_slug=RUNNER, game_config_id="game-%s" % index)
+    return time.perf_counter() - start
+
+
+def run(title, config_count, loader, cache_size):
+    lutris_yaml.SafeLoader = loader
+    lutris_yaml.YAML_FILE_CACHE.clear()
+    lutris_yaml.YAML_FILE_CACHE.max_size = cache_size
+    cold = create_configs(config_count)
+    warm = create_configs(config_count)
+    print("%-32s first pass %7.2f s   second pass %7.2f s" % (title, cold, warm))
+
+
+def main():
+    config_count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    with tempfile.TemporaryDirectory() as temp_dir:
+        settings.CONFIG_DIR = os.path.join(temp_dir, "lutris")
+        settings.RUNNERS_CONFIG_DIR = os.path.join(settings.CONFIG_DIR, "runners")
+        print("Writing %s game configs..." % config_count)
+        populate(settings.CONFIG_DIR, config_count)
+        print("Creating %s LutrisConfig objects, twice:" % config_count)
+        run("Python loader, no cache", config_count, yaml.SafeLoader, 0)
+        if hasattr(yaml, "CSafeLoader"):
+            run("libyaml loader, no cache", config_count, yaml.CSafeLoader, 0)
+        run("Default loader, cache", config_count, lutris_yaml.SafeLoader, config_count + 2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Show the query plans and timings of the hot database lookups on a synthetic library,
+with and without the secondary indexes declared in lutris.database.schema.
+
+Usage: python3 utils/benchmark_db_indexes.py [game count]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+from lutris import settings
+from lutris.database import categories as categories_db
+from lutris.database import games as games_db
+from lutris.database import schema, sql
+from lutris.database.services import ServiceGameCollection
+
+SERVICES = ("steam", "gog", "egs", "humblebundle", "itchio")
+RUNNERS = ("linux", "wine", "steam", "dosbox", "mame", "libretro")
+REPEAT = 200
+
+
+def populate(game_count):
+    games = []
+    service_games = []
+    for index in range(game_count):
+        service = SERVICES[index % len(SERVICES)]
+        slug = "game-%s" % index
+        games.append(
+            {
+                "name": "Game %s" % index,
+                "slug": slug,
+                "installer_slug": "%s-%s" % (slug, service),
+                "runner": RUNNERS[index % len(RUNNERS)],
+                "installed": int(index % 3 == 0),
+                "configpath": "%s-%s" % (slug, index),
+                "service": service,
+                "service_id": str(index),
+            }
+        )
+        service_games.append({"service": service, "appid": str(index), "name": "Game %s" % index, "slug": slug})
+    sql.db_insert_many(settings.DB_PATH, "games", games)
+    sql.db_insert_many(settings.DB_PATH, "service_games", service_games)
+    category_ids = [categories_db.add_category("category %s" % index, no_signal=True) for index in range(20)]
+    sql.db_insert_many(
+        settings.DB_PATH,
+        "games_categories",
+        [{"game_id": game_id, "category_id": random.choice(category_ids)} for game_id in range(1, game_count, 4)],
+    )
+
+
+def get_lookups(game_count):
+    def get_by_slug():
+        return games_db.get_games_by_slug("game-%s" % random.randrange(game_count))
+
+    def get_for_service():
+        index = random.randrange(game_count)
+        return games_db.get_game_for_service(SERVICES[index % len(SERVICES)], str(index))
+
+    def get_service_game():
+        index = random.randrange(game_count)
+        return ServiceGameCollection.get_game(SERVICES[index % len(SERVICES)], str(index))
+
+    def get_installed():
+        return games_db.get_games(filters={"installed": 1})
+
+    def get_in_category():
+        return categories_db.get_game_ids_for_categories(["category %s" % random.randrange(20)])
+
+    return [
+        ("games by slug", "SELECT * FROM games WHERE slug=?", get_by_slug),
+        ("game for service", "SELECT * FROM games WHERE service=? AND service_id=?", get_for_service),
+        ("service game", "SELECT * FROM service_games WHERE service=? AND appid=?", get_service_game),
+        ("installed games", "SELECT * FROM games WHERE installed=?", get_installed),
+        (
+            "games in category",
+            "SELECT games.id FROM games INNER JOIN games_categories ON games.id = games_categories.game_id "
+            "INNER JOIN categories ON categories.id = games_categories.category_id WHERE categories.name IN (?)",
+            get_in_category,
+        ),
+    ]
+
+
+def explain(query):
+    rows = sql.db_query(settings.DB_PATH, "EXPLAIN QUERY PLAN " + query, ("x",) * query.count("?"))
+    return "; ".join(row["detail"] for row in rows)
+
+
+def run_lookups(lookups, title):
+    print("\n== %s" % title)
+    for name, query, lookup in lookups:
+        repeat = REPEAT if "installed" not in name else REPEAT // 20
+        start = time.perf_counter()
+        for _i in range(repeat):
+            lookup()
+        elapsed = (time.perf_counter() - start) / repeat
+        print("%-18s %9.3f ms  %s" % (name, elapsed * 1000, explain(query)))
+
+
+def drop_indexes():
+    for table, indexes in schema.INDEXES.items():
+        for index in indexes:
+            with sql.db_cursor(settings.DB_PATH) as cursor:
+                cursor.execute("DROP INDEX IF EXISTS %s" % schema.get_index_name(table, index["fields"]))
+
+
+def main():
+    game_count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    with tempfile.TemporaryDirectory() as temp_dir:
+        settings.DB_PATH = os.path.join(temp_dir, "pga.db")
+        schema.syncdb()
+        print("Populating a database with %s games..." % game_count)
+        populate(game_count)
+        lookups = get_lookups(game_count)
+        drop_indexes()
+        run_lookups(lookups, "Without secondary indexes")
+        schema.syncdb()
+        run_lookups(lookups, "With secondary indexes")
+        sql.close_connections()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Compare how long GOGDownloader takes to download a file from a local
+HTTP server where one connection in four is much slower than the others,
+with a fixed split into one range per worker, and with segments that
+idle connections split and a connection count adjusted to the throughput.
+
+Usage: python3 utils/benchmark_gog_download.py [size in MB]
+"""
+
+import itertools
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from lutris.util.gog_downloader import GOGDownloader
+
+RATE = 8 * 1024 * 1024  # bytes per second for each connection
+SLOW_RATE = RATE // 8
+SLOW_EVERY = 4  # one request in this many is served at SLOW_RATE
+BLOCK_SIZE = 64 * 1024
+WORKERS = 4
+
+
+class ThrottledHandler(BaseHTTPRequestHandler):
+    data = b""
+    request_counter = itertools.count()
+
+    def log_message(self, *args):
+        pass
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(self.data)))
+        self.send_header("Accept-Ranges", "bytes")
+        self.end_headers()
+
+    def do_GET(self):
+        start, end = 0, len(self.data) - 1
+        match = re.match(r"bytes=(\d+)-(\d+)", self.headers.get("Range", ""))
+        if match:
+            start, end = int(match.group(1)), min(int(match.group(2)), end)
+            self.send_response(206)
+            self.send_header("Content-Range", "bytes %d-%d/%d" % (start, end, len(self.data)))
+        else:
+            self.send_response(200)
+        self.send_header("Content-Length", str(end - start + 1))
+        self.end_headers()
+
+        rate = SLOW_RATE if next(self.request_counter) % SLOW_EVERY == 1 else RATE
+        began = time.monotonic()
+        sent = 0
+        try:
+            for offset in range(start, end + 1, BLOCK_SIZE):
+                block = self.data[offset : min(offset + BLOCK_SIZE, end + 1)]
+                self.wfile.write(block)
+                sent += len(block)
+                delay = sent / rate - (time.monotonic() - began)
+                if delay > 0:
+                    time.sleep(delay)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the downloader closed a segment that was taken over
+
+
+def time_download(url, dest, size, adaptive):
+    dl = GOGDownloader(url, dest, num_workers=WORKERS, max_workers=None if adaptive else WORKERS)
+    if adaptive:
+        dl.SEGMENT_SIZE = 4 * 1024 * 1024
+        dl.MIN_SPLIT_SIZE = 1024 * 1024
+        dl.CONTROL_INTERVAL = 0.5
+    else:
+        dl.SEGMENT_SIZE = size
+        dl.MIN_SPLIT_SIZE = size
+        dl.CONTROL_INTERVAL = 3600
+    dl.stop_request = threading.Event()
+    ThrottledHandler.request_counter = itertools.count()
+    start = time.perf_counter()
+    dl.async_download()
+    elapsed = time.perf_counter() - start
+    if dl.state != dl.COMPLETED:
+        raise RuntimeError("Download failed: %s" % dl.error)
+    with open(dest, "rb") as dest_file:
+        if dest_file.read() != ThrottledHandler.data:
+            raise RuntimeError("Downloaded file is corrupt")
+    os.remove(dest)
+    return elapsed
+
+
+def main():
+    size = int(sys.argv[1]) * 1024 * 1024 if len(sys.argv) > 1 else 64 * 1024 * 1024
+    ThrottledHandler.data = os.urandom(size)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ThrottledHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = "http://127.0.0.1:%d/file.bin" % server.server_port
+
+    print(
+        "%d MB at %d MB/s per connection, one request in %d at %.1f MB/s"
+        % (size // (1024 * 1024), RATE // (1024 * 1024), SLOW_EVERY, SLOW_RATE / (1024 * 1024))
+    )
+    with tempfile.TemporaryDirectory() as temp_dir:
+        dest = os.path.join(temp_dir, "file.bin")
+        for label, adaptive in (("static ranges", False), ("work stealing", True)):
+            print("%-14s %8.2f s" % (label, time_download(url, dest, size, adaptive)))
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Show how long sorting the games for the views takes on a synthetic library,
+for each sort mode, on the first sort and once the sort keys are cached.
+
+Usage: python3 utils/benchmark_view_sort.py [game count...]
+"""
+
+import random
+import sys
+import time
+
+from lutris.game_sorting import SORT_DEFAULTS, SORT_KEY_CACHE, sort_games
+
+REPEAT = 5
+WORDS = ("super", "mega", "quest", "battle", "the", "legend", "of", "space", "racer", "dungeon")
+
+
+def make_games(game_count):
+    games = []
+    for index in range(game_count):
+        year = random.randrange(1980, 2025)
+        name = " ".join(random.choice(WORDS).title() for _i in range(3)) + " %s" % random.randrange(100)
+        games.append(
+            {
+                "id": index + 1,
+                "name": name,
+                "sortname": name[4:] if index % 10 == 0 else "",
+                "installed": index % 3 == 0,
+                "year": random.choice((None, str(year), "%s-06-01" % year)),
+                "lastplayed": random.choice((None, random.randrange(1500000000, 1700000000))),
+                "installed_at": random.choice((None, random.randrange(1500000000, 1700000000))),
+                "playtime": random.choice((None, random.random() * 100)),
+            }
+        )
+    return games
+
+
+def time_sort(games, view_sorting):
+    start = time.perf_counter()
+    for _i in range(REPEAT):
+        sort_games(games, view_sorting, reverse_order=bool(_i % 2))
+    return (time.perf_counter() - start) / REPEAT
+
+
+def main():
+    game_counts = [int(arg) for arg in sys.argv[1:]] or [10000, 50000]
+    for game_count in game_counts:
+        games = make_games(game_count)
+        print("\n== %s games" % game_count)
+        print("%-14s %12s %12s" % ("sort", "first", "cached"))
+        for view_sorting in SORT_DEFAULTS:
+            SORT_KEY_CACHE.invalidate()
+            start = time.perf_counter()
+            sort_games(games, view_sorting)
+            first = time.perf_counter() - start
+            cached = time_sort(games, view_sorting)
+            print("%-14s %9.1f ms %9.1f ms" % (view_sorting, first * 1000, cached * 1000))
+
+
+if __name__ == "__main__":
+    main()